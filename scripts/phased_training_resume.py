@@ -17,7 +17,9 @@ import instructlab.model.accelerated_train
 
 # This test is designed to be single threaded
 ORIG_RUN_TRAINING = instructlab.training.run_training
-ORIG_EVAL_CHECKPOINTS = instructlab.model.accelerated_train._evaluate_dir_of_checkpoints
+# patched rather than _evaluate_dir_of_checkpoints, as it also evaluates the checkpoints
+# while training with --phased-pipelined-eval
+ORIG_MT_BENCH = instructlab.model.accelerated_train._mtbench
 
 INTENTIONAL_TRAINING_FAILURE_MESSAGE = "INTENTIONAL TRAINING FAILURE"
 INTENTIONAL_MT_BENCH_FAILURE_MESSAGE = "INTENTIONAL MT_BENCH FAILURE"
@@ -49,21 +51,21 @@ def run_training_phase(
     fail_on_phase1=False,
     fail_on_phase2=False,
     fail_on_mt_bench=False,
+    pipelined_eval=False,
 ):
     instructlab.training.run_training = ORIG_RUN_TRAINING
-    instructlab.model.accelerated_train._evaluate_dir_of_checkpoints = (
-        ORIG_EVAL_CHECKPOINTS
-    )
+    instructlab.model.accelerated_train._mtbench = ORIG_MT_BENCH
 
     if fail_on_phase1:
         instructlab.training.run_training = fail_before_first_run_training
     elif fail_on_phase2:
         instructlab.training.run_training = fail_before_second_run_training
     elif fail_on_mt_bench:
-        instructlab.model.accelerated_train._evaluate_dir_of_checkpoints = fail_mt_bench
+        instructlab.model.accelerated_train._mtbench = fail_mt_bench
 
     os.makedirs(phased_base_dir, exist_ok=True)
 
+    extra_args = ["--phased-pipelined-eval"] if pipelined_eval else []
     cli_runner = CliRunner()
     with cli_runner.isolated_filesystem():
         result = cli_runner.invoke(
@@ -88,6 +90,7 @@ def run_training_phase(
                 "--phased-base-dir",
                 phased_base_dir,
                 "--skip-user-confirm",
+                *extra_args,
             ],
         )
 
@@ -104,8 +107,12 @@ def run_training_phase(
     elif fail_on_mt_bench:
         assert INTENTIONAL_MT_BENCH_FAILURE_MESSAGE in result.output
         assert_phase2_resumed_and_eval_started(result)
+        if pipelined_eval:
+            assert_pipelined_eval_interrupted_and_recovered(result)
     else:
         assert_completion_resumed(result)
+        # the evaluation failed on purpose is left in flight in the journal
+        assert_interrupted_eval_recovered(result)
     if fail_on_phase1 or fail_on_phase2 or fail_on_mt_bench:
         assert result.exception is not None
     assert result.exit_code == expected_exit_code
@@ -138,6 +145,19 @@ def assert_phase2_resumed_and_eval_started(result):
     assert_phase1_in_journal(result)
 
 
+def assert_interrupted_eval_recovered(result):
+    assert "whose evaluation was interrupted" in result.output
+
+
+def assert_pipelined_eval_interrupted_and_recovered(result):
+    if "No GPUs are left over by training" in result.output:
+        print("No spare GPUs, checkpoints were not evaluated while training")
+        return
+    assert "Evaluating checkpoints while training on gpus" in result.output
+    # the evaluation that failed while training is evaluated again after training
+    assert_interrupted_eval_recovered(result)
+
+
 def assert_completion_resumed(result):
     assert_phase2_eval_started(result)
     assert_phase1_in_journal(result)
@@ -150,7 +170,7 @@ def assert_completion_resumed(result):
 
 
 def test_phased_training_resume(
-    knowledge_data_path, skills_data_path, data_home_path, config
+    knowledge_data_path, skills_data_path, data_home_path, config, pipelined_eval
 ):
     phased_base_dir = os.path.join(data_home_path, "instructlab", "phased-resume")
 
@@ -162,6 +182,7 @@ def test_phased_training_resume(
         config,
         expected_exit_code=1,
         fail_on_phase1=True,
+        pipelined_eval=pipelined_eval,
     )
     print("Running training to fail on phase 2")
     run_training_phase(
@@ -171,6 +192,7 @@ def test_phased_training_resume(
         config,
         expected_exit_code=1,
         fail_on_phase2=True,
+        pipelined_eval=pipelined_eval,
     )
     print("Running training to fail on mt_bench")
     run_training_phase(
@@ -180,9 +202,16 @@ def test_phased_training_resume(
         config,
         expected_exit_code=1,
         fail_on_mt_bench=True,
+        pipelined_eval=pipelined_eval,
     )
     print("Running training to completion")
-    run_training_phase(knowledge_data_path, skills_data_path, phased_base_dir, config)
+    run_training_phase(
+        knowledge_data_path,
+        skills_data_path,
+        phased_base_dir,
+        config,
+        pipelined_eval=pipelined_eval,
+    )
 
     shutil.rmtree(phased_base_dir)
 
@@ -195,12 +224,18 @@ if __name__ == "__main__":
     parser.add_argument("--skills-data-path", help="Path to skills data path")
     parser.add_argument("--data-home-path", help="Data home path")
     parser.add_argument("--config", help="Path to instructlab config")
+    parser.add_argument(
+        "--pipelined-eval",
+        action="store_true",
+        help="Evaluate checkpoints while training, on the GPUs left over by training",
+    )
     args = parser.parse_args()
     knowledge_data_path = args.knowledge_data_path
     skills_data_path = args.skills_data_path
     data_home_path = args.data_home_path
     config = args.config
+    pipelined_eval = args.pipelined_eval
 
     test_phased_training_resume(
-        knowledge_data_path, skills_data_path, data_home_path, config
+        knowledge_data_path, skills_data_path, data_home_path, config, pipelined_eval
     )
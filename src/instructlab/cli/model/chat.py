@@ -142,6 +142,46 @@ logger = logging.getLogger(__name__)
     config_class="rag",
     config_sections="retriever",
 )
+@click.option(
+    "--retriever-index-type",
+    "index_type",
+    type=click.Choice(["flat", "ivf"]),
+    cls=clickext.ConfigOption,
+    config_class="rag",
+    config_sections="retriever",
+)
+@click.option(
+    "--retriever-nprobe",
+    "nprobe",
+    type=click.IntRange(min=1),
+    cls=clickext.ConfigOption,
+    config_class="rag",
+    config_sections="retriever",
+)
+@click.option(
+    "--retriever-strategy",
+    "strategy",
+    type=click.Choice(["dense", "hybrid"]),
+    cls=clickext.ConfigOption,
+    config_class="rag",
+    config_sections="retriever",
+)
+@click.option(
+    "--retriever-rrf-k",
+    "rrf_k",
+    type=click.IntRange(min=1),
+    cls=clickext.ConfigOption,
+    config_class="rag",
+    config_sections="retriever",
+)
+@click.option(
+    "--retriever-context-token-budget",
+    "context_token_budget",
+    type=click.IntRange(min=0),
+    cls=clickext.ConfigOption,
+    config_class="rag",
+    config_sections="retriever",
+)
 @click.option(
     "-nd",
     "--no-decoration",
@@ -172,6 +212,11 @@ def chat(
     collection_name,
     embedding_model_path,
     top_k,
+    index_type,
+    nprobe,
+    strategy,
+    rrf_k,
+    context_token_budget,
     no_decoration,
 ):
     """Runs a chat using the modified model"""
@@ -213,4 +258,13 @@ def chat(
         logs_dir=ctx.obj.config.chat.logs_dir,
         vi_mode=ctx.obj.config.chat.vi_mode,
         visible_overflow=ctx.obj.config.chat.visible_overflow,
+        embedding_cache_dir=ctx.obj.config.rag.embedding_model.cache_dir,
+        embedding_cache_max_entries=ctx.obj.config.rag.embedding_model.cache_max_entries,
+        index_type=index_type,
+        nprobe=nprobe,
+        retrieval_strategy=strategy,
+        rrf_k=rrf_k,
+        rag_context_token_budget=context_token_budget,
+        retriever_socket_path=ctx.obj.config.rag.retriever.socket_path,
+        server_pool_socket_path=ctx.obj.config.serve.pool.socket_path,
     )
@@ -64,9 +64,18 @@ from instructlab.model.download import download_models
     envvar="HF_TOKEN",
     help="User access token for connecting to the Hugging Face Hub.",
 )
+@click.option(
+    "--oci-max-concurrency",
+    type=click.IntRange(min=1),
+    default=DEFAULTS.OCI_DOWNLOAD_MAX_CONCURRENCY,
+    show_default=True,
+    help="Maximum number of layers of an OCI model image downloaded at the same time.",
+)
 @click.pass_context
 @clickext.display_params
-def download(ctx, repositories, releases, filenames, model_dir, hf_token):
+def download(
+    ctx, repositories, releases, filenames, model_dir, hf_token, oci_max_concurrency
+):
     """Download models"""
     try:
         model = Path(model_dir)
@@ -77,6 +86,7 @@ def download(ctx, repositories, releases, filenames, model_dir, hf_token):
             filenames=filenames,
             model_dir=model,
             hf_token=hf_token,
+            oci_max_concurrency=oci_max_concurrency,
         )
     except Exception as e:
         click.secho(f"Downloading failed with the following exception: {e}", fg="red")
@@ -0,0 +1,24 @@
+# SPDX-License-Identifier: Apache-2.0
+
+# Third Party
+import click
+
+# First Party
+from instructlab import clickext
+from instructlab.model.blob_store import BlobStore
+
+
+@click.command(name="gc")
+@clickext.display_params
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    help="Only report the stored model files which would be removed.",
+)
+def gc(dry_run: bool):
+    """Remove the stored model files no model uses anymore"""
+    count, freed_bytes = BlobStore().collect_garbage(dry_run=dry_run)
+    action = "Would free" if dry_run else "Freed"
+    click.echo(
+        f"{action} {freed_bytes / 1024**2:.1f} MiB of {count} unused model files."
+    )
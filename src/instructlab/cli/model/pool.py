@@ -0,0 +1,83 @@
+# SPDX-License-Identifier: Apache-2.0
+
+# Standard
+import logging
+import os
+
+# Third Party
+import click
+
+# First Party
+from instructlab import clickext, log
+from instructlab.defaults import DEFAULTS
+
+logger = logging.getLogger(__name__)
+
+
+@click.command()
+@click.option(
+    "--socket-path",
+    "socket_path",
+    type=click.Path(dir_okay=False),
+    cls=clickext.ConfigOption,
+    config_class="serve",
+    config_sections="pool",
+)
+@click.option(
+    "--max-servers",
+    "max_servers",
+    type=click.IntRange(min=1),
+    cls=clickext.ConfigOption,
+    config_class="serve",
+    config_sections="pool",
+)
+@click.option(
+    "--idle-timeout",
+    "idle_timeout",
+    type=click.IntRange(min=1),
+    cls=clickext.ConfigOption,
+    config_class="serve",
+    config_sections="pool",
+)
+@click.option(
+    "--min-available-memory",
+    "min_available_memory",
+    type=click.FloatRange(min=0, max=1),
+    cls=clickext.ConfigOption,
+    config_class="serve",
+    config_sections="pool",
+)
+@click.pass_context
+@clickext.display_params
+def pool(
+    ctx,  # pylint: disable=unused-argument
+    socket_path,
+    max_servers,
+    idle_timeout,
+    min_available_memory,
+):
+    """Keeps recently used model servers warm for evaluate, generate and chat"""
+    # First Party
+    from instructlab.model.backends.server_pool import ServerPoolDaemon
+
+    try:
+        daemon = ServerPoolDaemon(
+            socket_path=socket_path,
+            max_servers=max_servers,
+            idle_timeout=idle_timeout,
+            min_available_memory=min_available_memory,
+            process_registry_file=DEFAULTS.PROCESS_REGISTRY_FILE,
+        )
+    except RuntimeError as exc:
+        click.secho(f"Failed to start the server pool: {exc}", fg="red")
+        raise click.exceptions.Exit(1)
+
+    os.makedirs(daemon.log_file.parent, exist_ok=True)
+    log.add_file_handler_to_logger(logging.getLogger(), daemon.log_file)
+    logger.info(f"Serving the model server pool on {socket_path}")
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Server pool stopped")
+    finally:
+        daemon.server_close()
@@ -22,7 +22,13 @@ signal.signal(signal.SIGTERM, signal_handler)
 
 
 def warn_for_unsupported_backend_param(ctx):
-    for param in ["gpu_layers", "num_threads", "max_ctx_size"]:
+    for param in [
+        "gpu_layers",
+        "num_threads",
+        "max_ctx_size",
+        "parallel_slots",
+        "prompt_batch_size",
+    ]:
         if ctx.get_parameter_source(param) == click.core.ParameterSource.COMMANDLINE:
             logger.warning(
                 f"Option '--{param.replace('_','-')}' not supported by the backend."
@@ -57,6 +63,18 @@ def warn_for_unsupported_backend_param(ctx):
     cls=clickext.ConfigOption,
     config_sections="llama_cpp",
 )
+@click.option(
+    "--parallel-slots",
+    type=click.IntRange(min=1),
+    cls=clickext.ConfigOption,
+    config_sections="llama_cpp",
+)
+@click.option(
+    "--prompt-batch-size",
+    type=click.IntRange(min=1),
+    cls=clickext.ConfigOption,
+    config_sections="llama_cpp",
+)
 @click.option(
     "--model-family",
     type=str,
@@ -107,6 +125,8 @@ def serve(
     gpu_layers: int,
     num_threads: int | None,
     max_ctx_size: int,
+    parallel_slots: int,
+    prompt_batch_size: int,
     model_family,
     log_file: pathlib.Path | None,
     backend: str | None,
@@ -140,6 +160,8 @@ def serve(
         gpus,
         host,
         port,
+        parallel_slots=parallel_slots,
+        prompt_batch_size=prompt_batch_size,
     )
 
 
@@ -349,6 +349,7 @@ def clickpath_setup(is_dir: bool) -> click.Path:
     type=click.Path(dir_okay=True, file_okay=False, path_type=pathlib.Path),
     cls=clickext.ConfigOption,
 )
+@click.option("--phased-pipelined-eval", is_flag=True, cls=clickext.ConfigOption)
 @click.option(
     "--skip-user-confirm",
     "-y",
@@ -418,6 +419,7 @@ def train(
     phased_phase2_learning_rate: float | None,
     phased_phase2_effective_batch_size: int | None,
     phased_mt_bench_judge: pathlib.Path | None,
+    phased_pipelined_eval: bool,
     skip_user_confirm: bool,
     enable_serving_output: bool,
     pipeline: str,
@@ -484,6 +486,7 @@ def train(
                 phased_phase2_effective_batch_size=phased_phase2_effective_batch_size,
                 enable_serving_output=enable_serving_output,
                 phased_mt_bench_judge=phased_mt_bench_judge,
+                phased_pipelined_eval=phased_pipelined_eval,
                 skip_user_confirm=skip_user_confirm,
                 force_clear_phased_cache=force_clear_phased_cache,
                 eval_serve=ctx.obj.config.serve,
@@ -8,7 +8,7 @@ import click
 
 # First Party
 from instructlab import clickext
-from instructlab.defaults import UPLOAD_DESTINATIONS
+from instructlab.defaults import DEFAULTS, UPLOAD_DESTINATIONS
 from instructlab.model.upload import HFModelUploader, OCIModelUploader, S3ModelUploader
 
 logger = logging.getLogger(__name__)
@@ -47,8 +47,38 @@ logger = logging.getLogger(__name__)
     envvar="HF_TOKEN",
     help="User access token for connecting to the Hugging Face Hub.",
 )
+@click.option(
+    "--s3-max-files",
+    type=click.IntRange(min=1),
+    default=DEFAULTS.S3_UPLOAD_MAX_FILES,
+    show_default=True,
+    help="Number of files uploaded to S3 at the same time.",
+)
+@click.option(
+    "--s3-max-concurrency",
+    type=click.IntRange(min=1),
+    default=DEFAULTS.S3_UPLOAD_MAX_CONCURRENCY,
+    show_default=True,
+    help="Number of parts of a file uploaded to S3 at the same time.",
+)
+@click.option(
+    "--s3-chunk-size",
+    type=click.IntRange(min=5),
+    default=DEFAULTS.S3_UPLOAD_CHUNK_SIZE_MB,
+    show_default=True,
+    help="Size in MiB of the parts of the files uploaded to S3, which requires at least 5 MiB.",
+)
 @clickext.display_params
-def upload(model, dest_type, destination, release, hf_token):
+def upload(
+    model,
+    dest_type,
+    destination,
+    release,
+    hf_token,
+    s3_max_files,
+    s3_max_concurrency,
+    s3_chunk_size,
+):
     """Uploads model to a specified location - currently supports Hugging Face and OCI artifact registries such as Quay.io"""
     uploader = None
 
@@ -69,6 +99,9 @@ def upload(model, dest_type, destination, release, hf_token):
         uploader = S3ModelUploader(
             model=model,
             destination=destination,
+            max_files=s3_max_files,
+            max_concurrency=s3_max_concurrency,
+            chunk_size_mb=s3_chunk_size,
         )
     else:
         click.secho(
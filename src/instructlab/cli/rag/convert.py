@@ -47,6 +47,20 @@ logger = logging.getLogger(__name__)
     config_sections="convert",
     cls=clickext.ConfigOption,
 )
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False),
+    config_class="rag",
+    config_sections="convert",
+    cls=clickext.ConfigOption,
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    config_class="rag",
+    config_sections="convert",
+    cls=clickext.ConfigOption,
+)
 @click.pass_context
 @clickext.display_params
 def convert(
@@ -55,6 +69,8 @@ def convert(
     taxonomy_base,
     input_dir,
     output_dir,
+    cache_dir,
+    workers,
 ):
     """Pipeline to convert documents from their original format (e.g., PDF) into Docling JSON format for use by ilab rag ingest"""
 
@@ -82,10 +98,14 @@ def convert(
             taxonomy_path=taxonomy_path,
             taxonomy_base=taxonomy_base,
             output_dir=output_dir,
+            cache_dir=cache_dir,
+            workers=workers,
         )
     else:
         logger.info(f"Pre-processing documents from {input_dir} to {output_dir}")
         convert_documents_from_folder(
             input_dir=input_dir,
             output_dir=output_dir,
+            cache_dir=cache_dir,
+            workers=workers,
         )
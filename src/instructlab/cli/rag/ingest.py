@@ -29,6 +29,22 @@ logger = logging.getLogger(__name__)
     config_class="rag",
     config_sections="document_store",
 )
+@click.option(
+    "--document-store-embedding-dtype",
+    "embedding_dtype",
+    type=click.Choice(["float32", "float16"]),
+    cls=clickext.ConfigOption,
+    config_class="rag",
+    config_sections="document_store",
+)
+@click.option(
+    "--document-store-embedding-quantization",
+    "embedding_quantization",
+    type=click.Choice(["none", "int8", "binary"]),
+    cls=clickext.ConfigOption,
+    config_class="rag",
+    config_sections="document_store",
+)
 @click.option(
     "--embedding-model-path",
     "embedding_model_path",
@@ -37,6 +53,70 @@ logger = logging.getLogger(__name__)
     config_class="rag",
     config_sections="embedding_model",
 )
+@click.option(
+    "--embedding-cache-dir",
+    "cache_dir",
+    type=click.Path(file_okay=False),
+    cls=clickext.ConfigOption,
+    config_class="rag",
+    config_sections="embedding_model",
+)
+@click.option(
+    "--embedding-cache-max-entries",
+    "cache_max_entries",
+    type=click.IntRange(min=0),
+    cls=clickext.ConfigOption,
+    config_class="rag",
+    config_sections="embedding_model",
+)
+@click.option(
+    "--embedding-batch-size",
+    "batch_size",
+    type=click.IntRange(min=1),
+    cls=clickext.ConfigOption,
+    config_class="rag",
+    config_sections="embedding_model",
+)
+@click.option(
+    "--embedding-model-dtype",
+    "dtype",
+    type=click.Choice(["float32", "float16", "bfloat16", "int8"]),
+    cls=clickext.ConfigOption,
+    config_class="rag",
+    config_sections="embedding_model",
+)
+@click.option(
+    "--embedding-device",
+    "device",
+    type=click.STRING,
+    cls=clickext.ConfigOption,
+    config_class="rag",
+    config_sections="embedding_model",
+)
+@click.option(
+    "--embedding-processes",
+    "encode_processes",
+    type=click.IntRange(min=0),
+    cls=clickext.ConfigOption,
+    config_class="rag",
+    config_sections="embedding_model",
+)
+@click.option(
+    "--chunking-workers",
+    "chunking_workers",
+    type=click.IntRange(min=1),
+    cls=clickext.ConfigOption,
+    config_class="rag",
+    config_sections="ingest",
+)
+@click.option(
+    "--stream-batch-size",
+    "stream_batch_size",
+    type=click.IntRange(min=0),
+    cls=clickext.ConfigOption,
+    config_class="rag",
+    config_sections="ingest",
+)
 @click.option(
     "--input-dir",
     required=False,
@@ -47,14 +127,31 @@ logger = logging.getLogger(__name__)
     ),
     help="Directory where pre-processed documents are located.",
 )
+@click.option(
+    "--incremental",
+    is_flag=True,
+    default=False,
+    help="Update the existing document store, embedding only new or changed documents and removing the deleted ones.",
+)
 @click.pass_context
 @clickext.display_params
 def ingest(
     ctx,
     uri,
     collection_name,
+    embedding_dtype,
+    embedding_quantization,
     embedding_model_path,
+    cache_dir,
+    cache_max_entries,
+    batch_size,
+    dtype,
+    device,
+    encode_processes,
+    chunking_workers,
+    stream_batch_size,
     input_dir,
+    incremental,
 ):
     """The embedding ingestion pipeline"""
 
@@ -65,8 +162,16 @@ def ingest(
         )
         return
 
-    logger.debug(f"Document Store: {collection_name} @ {uri}")
+    logger.debug(
+        f"Document Store: {collection_name} @ {uri} ({embedding_dtype}, {embedding_quantization} quantization)"
+    )
     logger.debug(f"Embedding model: {embedding_model_path}")
+    logger.debug(f"Embedding cache: {cache_dir} ({cache_max_entries} entries)")
+    logger.debug(
+        f"Embedding settings: batch size {batch_size}, dtype {dtype}, device {device}, {encode_processes} processes"
+    )
+    logger.debug(f"Chunking workers: {chunking_workers}")
+    logger.debug(f"Stream batch size: {stream_batch_size}")
 
     if input_dir is None:
         # Local
@@ -99,5 +204,16 @@ def ingest(
         document_store_uri=uri,
         document_store_collection_name=collection_name,
         embedding_model_path=embedding_model_path,
+        incremental=incremental,
+        embedding_dtype=embedding_dtype,
+        embedding_quantization=embedding_quantization,
+        embedding_cache_dir=cache_dir,
+        embedding_cache_max_entries=cache_max_entries,
+        embedding_batch_size=batch_size,
+        embedding_model_dtype=dtype,
+        embedding_device=device,
+        embedding_processes=encode_processes,
+        chunking_workers=chunking_workers,
+        stream_batch_size=stream_batch_size,
     )
     ingestor.ingest_documents(input_dir=input_dir)
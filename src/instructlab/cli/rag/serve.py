@@ -0,0 +1,155 @@
+# SPDX-License-Identifier: Apache-2.0
+
+# Standard
+import logging
+
+# Third Party
+import click
+
+# First Party
+from instructlab import clickext
+from instructlab.feature_gates import FeatureGating, FeatureScopes, GatedFeatures
+
+logger = logging.getLogger(__name__)
+
+
+@click.command()
+@click.option(
+    "--document-store-uri",
+    "uri",
+    type=click.STRING,
+    cls=clickext.ConfigOption,
+    config_class="rag",
+    config_sections="document_store",
+)
+@click.option(
+    "--document-store-collection-name",
+    "collection_name",
+    type=click.STRING,
+    cls=clickext.ConfigOption,
+    config_class="rag",
+    config_sections="document_store",
+)
+@click.option(
+    "--embedding-model-path",
+    "embedding_model_path",
+    type=click.STRING,
+    cls=clickext.ConfigOption,
+    config_class="rag",
+    config_sections="embedding_model",
+)
+@click.option(
+    "--retriever-top-k",
+    "top_k",
+    type=click.INT,
+    cls=clickext.ConfigOption,
+    config_class="rag",
+    config_sections="retriever",
+)
+@click.option(
+    "--retriever-index-type",
+    "index_type",
+    type=click.Choice(["flat", "ivf"]),
+    cls=clickext.ConfigOption,
+    config_class="rag",
+    config_sections="retriever",
+)
+@click.option(
+    "--retriever-nprobe",
+    "nprobe",
+    type=click.IntRange(min=1),
+    cls=clickext.ConfigOption,
+    config_class="rag",
+    config_sections="retriever",
+)
+@click.option(
+    "--retriever-strategy",
+    "strategy",
+    type=click.Choice(["dense", "hybrid"]),
+    cls=clickext.ConfigOption,
+    config_class="rag",
+    config_sections="retriever",
+)
+@click.option(
+    "--retriever-rrf-k",
+    "rrf_k",
+    type=click.IntRange(min=1),
+    cls=clickext.ConfigOption,
+    config_class="rag",
+    config_sections="retriever",
+)
+@click.option(
+    "--socket-path",
+    "socket_path",
+    type=click.Path(dir_okay=False),
+    cls=clickext.ConfigOption,
+    config_class="rag",
+    config_sections="retriever",
+)
+@click.pass_context
+@clickext.display_params
+def serve(
+    ctx,
+    uri,
+    collection_name,
+    embedding_model_path,
+    top_k,
+    index_type,
+    nprobe,
+    strategy,
+    rrf_k,
+    socket_path,
+):
+    """Serves a warmed-up retriever to the RAG chat sessions over a Unix socket"""
+
+    if not FeatureGating.feature_available(GatedFeatures.RAG):
+        click.echo(
+            f"This functionality is experimental; set {FeatureGating.env_var_name}"
+            f' to "{FeatureScopes.DevPreviewNoUpgrade.value}" to enable.'
+        )
+        return
+
+    # First Party
+    from instructlab.rag.document_store_factory import create_document_retriever
+    from instructlab.rag.retriever_daemon import RetrieverDaemon, retriever_settings
+
+    retriever = create_document_retriever(
+        document_store_uri=uri,
+        document_store_collection_name=collection_name,
+        top_k=top_k,
+        embedding_model_path=embedding_model_path,
+        embedding_cache_dir=ctx.obj.config.rag.embedding_model.cache_dir,
+        embedding_cache_max_entries=ctx.obj.config.rag.embedding_model.cache_max_entries,
+        index_type=index_type,
+        nprobe=nprobe,
+        strategy=strategy,
+        rrf_k=rrf_k,
+    )
+    retriever.warm_up()
+
+    try:
+        daemon = RetrieverDaemon(
+            retriever,
+            socket_path,
+            settings=retriever_settings(
+                document_store_uri=uri,
+                document_store_collection_name=collection_name,
+                top_k=top_k,
+                embedding_model_path=embedding_model_path,
+                index_type=index_type,
+                nprobe=nprobe,
+                strategy=strategy,
+                rrf_k=rrf_k,
+            ),
+        )
+    except RuntimeError as exc:
+        click.secho(f"Failed to start the retriever daemon: {exc}", fg="red")
+        raise click.exceptions.Exit(1)
+
+    logger.info(f"Serving the retriever of {uri} on {socket_path}")
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Retriever daemon stopped")
+    finally:
+        daemon.server_close()
@@ -3,13 +3,19 @@
 
 # Standard
 from typing import TypedDict
+import importlib.util
+import logging
+import threading
+import weakref
 
 # Third Party
 from openai import OpenAI, OpenAIError
 import httpx
 
 # Local
-from .configuration import DEFAULTS
+from .defaults import DEFAULTS
+
+logger = logging.getLogger(__name__)
 
 
 class ClientException(Exception):
@@ -59,12 +65,130 @@ def get_ssl_cert_config(tls_client_cert, tls_client_key, tls_client_passwd):
         return tls_client_cert, tls_client_key, tls_client_passwd
 
 
-def http_client(params: HttpClientParams):
-    return httpx.Client(
-        cert=get_ssl_cert_config(
-            params.get("tls_client_cert", None),
-            params.get("tls_client_key", None),
-            params.get("tls_client_passwd", None),
-        ),
-        verify=not params.get("tls_insecure", True),
+class HttpPoolParams(TypedDict):
+    """
+    Types the settings of the connection pool shared by the HTTP clients.
+    """
+
+    max_connections: int
+    max_keepalive_connections: int
+    keepalive_expiry: float
+    http2: bool
+
+
+_pool_params = HttpPoolParams(
+    max_connections=DEFAULTS.HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=DEFAULTS.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry=DEFAULTS.HTTP_KEEPALIVE_EXPIRY,
+    http2=False,
+)
+# shared clients, by TLS settings and pool settings
+_clients: dict[tuple, httpx.Client] = {}
+_clients_lock = threading.Lock()
+
+
+def configure_http_pool(
+    max_connections: int,
+    max_keepalive_connections: int,
+    keepalive_expiry: float,
+    http2: bool,
+) -> None:
+    """
+    Sets the connection pool settings of the HTTP clients returned by `http_client` from now on.
+    """
+    _pool_params.update(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry,
+        http2=http2,
+    )
+
+
+def http_client(params: HttpClientParams) -> httpx.Client:
+    """
+    Returns the HTTP client shared by all the callers using the same TLS `params`: its connections to the
+    model servers are kept alive and reused across requests, instead of opening a new connection (and TLS
+    session) for each client. When enabled with `configure_http_pool`, HTTP/2 is negotiated with the
+    servers supporting it if the optional `h2` package is installed.
+    """
+    cert = get_ssl_cert_config(
+        params.get("tls_client_cert", None),
+        params.get("tls_client_key", None),
+        params.get("tls_client_passwd", None),
     )
+    verify = not params.get("tls_insecure", True)
+    key = (cert, verify, tuple(_pool_params.values()))
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.Client(
+                cert=cert,
+                verify=verify,
+                limits=httpx.Limits(
+                    max_connections=_pool_params["max_connections"],
+                    max_keepalive_connections=_pool_params["max_keepalive_connections"],
+                    keepalive_expiry=_pool_params["keepalive_expiry"],
+                ),
+                http2=_pool_params["http2"]
+                and importlib.util.find_spec("h2") is not None,
+            )
+            stats = _PoolStats()
+            _pool_stats[client] = stats
+            client.event_hooks = {"response": [stats.record]}
+            _clients[key] = client
+    return client
+
+
+class _PoolStats:
+    """
+    Counts the requests of a client, and the connections they were sent on, from the `network_stream`
+    extension of the responses: the connection pool of httpx is not part of its public API.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # the streams of the connections still open, i.e. referenced by the pool
+        self._streams: weakref.WeakSet = weakref.WeakSet()
+        self._requests = 0
+        self._reused = 0
+
+    def record(self, response: httpx.Response) -> None:
+        stream = response.extensions.get("network_stream")
+        with self._lock:
+            self._requests += 1
+            if stream is not None:
+                if stream in self._streams:
+                    self._reused += 1
+                else:
+                    self._streams.add(stream)
+        if logger.isEnabledFor(logging.DEBUG):
+            stats = self.as_dict()
+            logger.debug(
+                f"{response.request.method} {response.request.url} {response.http_version}: "
+                f"{stats['connections']} pooled connections, "
+                f"{stats['reused']}/{stats['requests']} requests on reused connections"
+            )
+
+    def as_dict(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "connections": len(self._streams),
+                "requests": self._requests,
+                "reused": self._reused,
+            }
+
+
+_pool_stats: "weakref.WeakKeyDictionary[httpx.Client, _PoolStats]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def pool_stats(client: httpx.Client) -> dict[str, int]:
+    """
+    Returns the number of connections of the `client` still open, the number of requests it sent, and
+    how many of them reused an open connection. Only the clients returned by `http_client` are counted.
+    """
+    stats = _pool_stats.get(client)
+    if stats is None:
+        return {"connections": 0, "requests": 0, "reused": 0}
+    return stats.as_dict()
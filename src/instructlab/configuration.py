@@ -42,7 +42,7 @@ import click
 from instructlab.utils import get_model_arch, use_legacy_pretraining_format
 
 # Local
-from . import log
+from . import client_utils, log
 from .defaults import (
     CONFIG_VERSION,
     DEFAULTS,
@@ -85,6 +85,24 @@ class _general(BaseModel):
         default=False,
         description="Use legacy IBM Granite chat template (default uses 3.0 Instruct template)",
     )
+    http_max_connections: PositiveInt = Field(
+        default=DEFAULTS.HTTP_MAX_CONNECTIONS,
+        description="Maximum number of connections opened by the HTTP clients to the model servers.",
+    )
+    http_max_keepalive_connections: int = Field(
+        default=DEFAULTS.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        ge=0,
+        description="Maximum number of idle connections kept alive by the HTTP clients, to be reused by the next requests.",
+    )
+    http_keepalive_expiry: float = Field(
+        default=DEFAULTS.HTTP_KEEPALIVE_EXPIRY,
+        ge=0,
+        description="Number of seconds an idle connection is kept alive by the HTTP clients.",
+    )
+    http2: bool = Field(
+        default=False,
+        description="Negotiate HTTP/2 with the model servers supporting it over TLS. Requires the optional 'h2' package, e.g. 'pip install httpx[http2]'.",
+    )
 
     @field_validator("log_level")
     def validate_log_level(cls, v):
@@ -138,6 +156,18 @@ class _document_store(BaseModel):
         default=DEFAULTS.DOCUMENT_STORE_COLLECTION_NAME,
         description="Document store collection name.",
     )
+    embedding_dtype: str = Field(
+        default=DEFAULTS.DOCUMENT_STORE_EMBEDDING_DTYPE,
+        description="Data type of the embeddings saved in the memory-mapped embeddings file of the document store. 'float16' halves the size of the file at the cost of a small loss of precision.",
+        examples=["float32", "float16"],
+        pattern="float32|float16",
+    )
+    embedding_quantization: str = Field(
+        default=DEFAULTS.DOCUMENT_STORE_EMBEDDING_QUANTIZATION,
+        description="Quantized copy of the embeddings kept in memory to speed up retrieval: 'int8' is 4 times smaller than float32 embeddings, 'binary' 32 times smaller. The best candidates found with the quantized embeddings are rescored with the full embeddings. 'none' disables the quantization.",
+        examples=["none", "int8", "binary"],
+        pattern="none|int8|binary",
+    )
 
 
 class _embedding_model(BaseModel):
@@ -147,6 +177,34 @@ class _embedding_model(BaseModel):
         default_factory=lambda: DEFAULTS.DEFAULT_EMBEDDING_MODEL,
         description="Embedding model to use for RAG.",
     )
+    cache_dir: StrictStr = Field(
+        default_factory=lambda: DEFAULTS.EMBEDDINGS_CACHE_DIR,
+        description="Directory where the computed embeddings are cached, shared by the ingestion and retrieval pipelines.",
+    )
+    cache_max_entries: int = Field(
+        default=DEFAULTS.EMBEDDINGS_CACHE_MAX_ENTRIES,
+        ge=0,
+        description="Maximum number of embeddings kept in the cache, the least recently used are evicted first. 0 disables the cache.",
+    )
+    batch_size: PositiveInt = Field(
+        default=DEFAULTS.EMBEDDING_BATCH_SIZE,
+        description="Number of chunks embedded at once during ingestion.",
+    )
+    dtype: str = Field(
+        default=DEFAULTS.EMBEDDING_DTYPE,
+        description="Precision of the embedding model during ingestion: 'float16' and 'bfloat16' load the model weights in half precision, 'int8' quantizes the model for CPU inference.",
+        examples=["float32", "float16", "bfloat16", "int8"],
+        pattern="float32|float16|bfloat16|int8",
+    )
+    device: Optional[str] = Field(
+        default=None,
+        description="Device running the embedding model during ingestion, e.g. 'cpu', 'cuda:0' or 'mps'. Detected automatically when not set.",
+    )
+    encode_processes: int = Field(
+        default=0,
+        ge=0,
+        description="Number of CPU processes encoding the chunks in parallel during ingestion. 0 or 1 encodes in the current process.",
+    )
 
 
 class _chat(BaseModel):
@@ -226,6 +284,18 @@ class _serve_llama_cpp(BaseModel):
         description="Large Language Model Family",
         examples=["granite", "mixtral"],
     )
+    parallel_slots: PositiveInt = Field(
+        default=DEFAULTS.LLAMA_CPP_PARALLEL_SLOTS,
+        description="Number of copies of the model served behind the same port, each one in its own process and answering one request at a time. Requests wait in a first-in first-out queue for a free slot. Each slot loads the model in memory.",
+    )
+    prompt_batch_size: PositiveInt = Field(
+        default=DEFAULTS.LLAMA_CPP_PROMPT_BATCH_SIZE,
+        description="Maximum number of prompt tokens evaluated at once by llama.cpp.",
+    )
+    max_connections: PositiveInt = Field(
+        default=DEFAULTS.LLAMA_CPP_MAX_CONNECTIONS,
+        description="Maximum number of connections to the server, including the idle keep-alive connections. Requests above the limit are rejected.",
+    )
 
 
 class _serve_server(BaseModel):
@@ -244,6 +314,29 @@ class _serve_server(BaseModel):
     )
 
 
+class _serve_pool(BaseModel):
+    """Class describing configuration of the pool of warm model servers."""
+
+    socket_path: StrictStr = Field(
+        default_factory=lambda: DEFAULTS.SERVER_POOL_SOCKET_PATH,
+        description="Unix socket of the server pool started by 'ilab model pool'. While the pool is running, evaluate, generate and chat get their model server from it instead of starting their own.",
+    )
+    max_servers: PositiveInt = Field(
+        default=DEFAULTS.SERVER_POOL_MAX_SERVERS,
+        description="Maximum number of model servers kept warm by the pool. The least recently used idle server is stopped to start a new one.",
+    )
+    idle_timeout: PositiveInt = Field(
+        default=DEFAULTS.SERVER_POOL_IDLE_TIMEOUT,
+        description="Number of seconds after which an unused model server of the pool is stopped.",
+    )
+    min_available_memory: float = Field(
+        default=DEFAULTS.SERVER_POOL_MIN_AVAILABLE_MEMORY,
+        ge=0,
+        le=1,
+        description="Fraction of the system memory that must remain available when the pool starts a model server. Idle servers are stopped, least recently used first, to make room.",
+    )
+
+
 class _serve(BaseModel):
     """Class describing configuration of the 'serve' sub-command."""
 
@@ -259,6 +352,11 @@ class _serve(BaseModel):
         default_factory=_serve_llama_cpp,
         description="llama-cpp serving settings.",
     )
+    # warm server pool configuration
+    pool: _serve_pool = Field(
+        default_factory=_serve_pool,
+        description="Pool of warm model servers reused across evaluate, generate and chat.",
+    )
     model_path: StrictStr = Field(
         default_factory=lambda: DEFAULTS.DEFAULT_CHAT_MODEL,
         description="Directory where model to be served is stored.",
@@ -305,6 +403,14 @@ class _convert(BaseModel):
         default=DEFAULTS.TAXONOMY_BASE,
         description="Branch of taxonomy used to calculate diff against.",
     )
+    cache_dir: StrictStr = Field(
+        default_factory=lambda: DEFAULTS.CONVERSION_CACHE_DIR,
+        description="Directory where converted documents are cached, keyed on the content of the source document, the Docling version and the conversion options. An empty value disables the cache.",
+    )
+    workers: PositiveInt = Field(
+        default=DEFAULTS.CONVERSION_WORKERS,
+        description="Number of worker processes converting documents in parallel, each one loading its own Docling models.",
+    )
 
 
 class _retriever(BaseModel):
@@ -314,6 +420,49 @@ class _retriever(BaseModel):
         default=DEFAULTS.RETRIEVER_TOP_K,
         description="The maximum number of documents to retrieve.",
     )
+    index_type: str = Field(
+        default=DEFAULTS.RETRIEVER_INDEX_TYPE,
+        description="Type of embedding index used for retrieval: 'flat' scores every stored embedding, 'ivf' uses the approximate nearest-neighbour index built at ingestion time.",
+        examples=["flat", "ivf"],
+        pattern="flat|ivf",
+    )
+    nprobe: PositiveInt = Field(
+        default=DEFAULTS.RETRIEVER_NPROBE,
+        description="Number of clusters of the 'ivf' index scanned for each query. Higher values improve recall at the cost of latency.",
+    )
+    strategy: str = Field(
+        default=DEFAULTS.RETRIEVER_STRATEGY,
+        description="Retrieval strategy: 'dense' ranks the documents by embedding similarity, 'hybrid' fuses that ranking with the ranking of the BM25 index built at ingestion time, improving the recall of queries with exact terms like product codes.",
+        examples=["dense", "hybrid"],
+        pattern="dense|hybrid",
+    )
+    rrf_k: PositiveInt = Field(
+        default=DEFAULTS.RETRIEVER_RRF_K,
+        description="Constant of the reciprocal rank fusion used by the 'hybrid' strategy. Lower values favour the documents ranked first by either retriever.",
+    )
+    context_token_budget: int = Field(
+        default=DEFAULTS.RETRIEVER_CONTEXT_TOKEN_BUDGET,
+        ge=0,
+        description="Maximum number of tokens of the retrieved context added to a chat turn. The best scoring chunks are packed within the budget, after removing the overlapping ones. 0 adds every retrieved chunk.",
+    )
+    socket_path: StrictStr = Field(
+        default_factory=lambda: DEFAULTS.RETRIEVER_SOCKET_PATH,
+        description="Unix socket of the retriever daemon started by 'ilab rag serve'. While the daemon is running, chat sessions query it instead of loading their own document store and embedding model.",
+    )
+
+
+class _ingest(BaseModel):
+    """Class describing configuration of the 'ilab rag ingest' sub-command."""
+
+    chunking_workers: PositiveInt = Field(
+        default=DEFAULTS.CHUNKING_WORKERS,
+        description="Number of worker processes splitting the documents into chunks.",
+    )
+    stream_batch_size: int = Field(
+        default=0,
+        ge=0,
+        description="Number of documents processed at once. Progress is checkpointed after each batch, so that an interrupted ingestion can resume. 0 processes all the documents in a single batch.",
+    )
 
 
 class _rag(BaseModel):
@@ -337,6 +486,9 @@ class _rag(BaseModel):
     convert: _convert = Field(
         default_factory=_convert, description="RAG convert configuration section."
     )
+    ingest: _ingest = Field(
+        default_factory=_ingest, description="RAG ingest configuration section."
+    )
 
 
 class _generate(BaseModel):
@@ -671,6 +823,10 @@ class _train(BaseModel):
         default_factory=lambda: DEFAULTS.DEFAULT_JUDGE_MODEL,
         description="Judge model path for phased MT-Bench evaluation.",
     )
+    phased_pipelined_eval: bool = Field(
+        default=False,
+        description="Evaluate the phase2 checkpoints on the GPUs left over by training as soon as they are saved, while phase2 is still training.",
+    )
     phased_base_dir: str | None = Field(
         default_factory=lambda: DEFAULTS.PHASED_DIR,
         description="Base directory for organization of end-to-end intermediate outputs.",
@@ -1311,6 +1467,7 @@ def ensure_storage_directories_exist() -> bool:
         DEFAULTS.CHATLOGS_DIR,
         DEFAULTS.CHECKPOINTS_DIR,
         DEFAULTS.OCI_DIR,
+        DEFAULTS.BLOBS_DIR,
         DEFAULTS.DATASETS_DIR,
         DEFAULTS.EVAL_DATA_DIR,
         DEFAULTS.MT_BENCH_DATA_DIR,
@@ -1500,6 +1657,12 @@ def init(
             debug_level=config_obj.general.debug_level,
             fmt=config_obj.general.log_format,
         )
+        client_utils.configure_http_pool(
+            max_connections=config_obj.general.http_max_connections,
+            max_keepalive_connections=config_obj.general.http_max_keepalive_connections,
+            keepalive_expiry=config_obj.general.http_keepalive_expiry,
+            http2=config_obj.general.http2,
+        )
 
         # subtly get the additional args per cfg section
         # if any are missing, add in sane defaults
@@ -50,6 +50,7 @@ def gen_data(
                 "_serve",
                 "_serve_vllm",
                 "_serve_llama_cpp",
+                "_serve_pool",
                 "_serve_server",
             )
         ],
@@ -160,7 +161,6 @@ def create_server_and_generate(
     else:
         # First Party
         from instructlab.model.backends import backends
-        from instructlab.model.backends.llama_cpp import Server as llama_cpp_server
 
         backend_instance = backends.select_backend(cfg=serve_cfg, model_path=model_name)
         if (
@@ -183,7 +183,7 @@ def create_server_and_generate(
             raise ValueError(f"Failed to start server: {exc}") from exc
 
         # disable batching when running with the local llama.cpp server
-        if isinstance(backend_instance, llama_cpp_server):
+        if backend_instance.get_backend_type() == backends.LLAMA_CPP:
             if batch_size is not None:
                 logger.warning(
                     "Disabling SDG batching - unsupported with llama.cpp serving"
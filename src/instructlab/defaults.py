@@ -48,6 +48,7 @@ class ILAB_PROCESS_MODES:
 class ILAB_PROCESS_TYPES:
     DATA_GENERATION: str = "Generation"
     TRAINING: str = "Training"
+    SERVER_POOL: str = "Server Pool"
 
 
 # TODO: make it an enum
@@ -63,8 +64,11 @@ class STORAGE_DIR_NAMES:
         "internal"  # for storing all ilab-internal files the user doesn't need to see
     )
     CHATLOGS = "chatlogs"
+    EMBEDDINGS_CACHE = "embeddings_cache"
+    CONVERSION_CACHE = "conversion_cache"
     PHASED = "phased"
     LOGS = "logs"
+    BLOBS = "blobs"
 
 
 class _InstructlabDefaults:
@@ -93,7 +97,19 @@ class _InstructlabDefaults:
     GRANITE_EMBEDDING_MODEL_NAME = GRANITE_EMBEDDING_REPO
     DOCUMENT_STORE_NAME = "embeddings.db"
     DOCUMENT_STORE_COLLECTION_NAME = "ilab"
+    DOCUMENT_STORE_EMBEDDING_DTYPE = "float32"
+    DOCUMENT_STORE_EMBEDDING_QUANTIZATION = "none"
+    CHUNKING_WORKERS = 1
+    CONVERSION_WORKERS = 1
     RETRIEVER_TOP_K = 3
+    RETRIEVER_INDEX_TYPE = "flat"
+    RETRIEVER_NPROBE = 16
+    RETRIEVER_STRATEGY = "dense"
+    RETRIEVER_RRF_K = 60
+    RETRIEVER_CONTEXT_TOKEN_BUDGET = 1024
+    EMBEDDINGS_CACHE_MAX_ENTRIES = 100_000
+    EMBEDDING_BATCH_SIZE = 32
+    EMBEDDING_DTYPE = "float32"
     MERLINITE_GGUF_MODEL_NAME = "merlinite-7b-lab-Q4_K_M.gguf"
     MISTRAL_GGUF_MODEL_NAME = "mistral-7b-instruct-v0.2.Q4_K_M.gguf"
     MODEL_REPO = "instructlab/granite-7b-lab"
@@ -107,9 +123,25 @@ class _InstructlabDefaults:
     NUM_CPUS = 10
     CHUNK_WORD_COUNT = 1000
     CONNECTION_TIMEOUT = httpx.Timeout(timeout=30.0)
+    HTTP_MAX_CONNECTIONS = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+    # shorter than the keep-alive timeout of the llama.cpp server, so that clients do not reuse
+    # a connection the server is closing
+    HTTP_KEEPALIVE_EXPIRY = 4.0
+    LLAMA_CPP_KEEP_ALIVE_TIMEOUT = 5
+    LLAMA_CPP_MAX_CONNECTIONS = 64
+    LLAMA_CPP_PARALLEL_SLOTS = 1
+    LLAMA_CPP_PROMPT_BATCH_SIZE = 512
     # use spawn start method, fork is not thread-safe
     MULTIPROCESSING_START_METHOD = "spawn"
     SDG_PIPELINE = "full"
+    SERVER_POOL_MAX_SERVERS = 2
+    SERVER_POOL_IDLE_TIMEOUT = 1800
+    SERVER_POOL_MIN_AVAILABLE_MEMORY = 0.1
+    S3_UPLOAD_MAX_FILES = 4
+    S3_UPLOAD_MAX_CONCURRENCY = 4
+    S3_UPLOAD_CHUNK_SIZE_MB = 16
+    OCI_DOWNLOAD_MAX_CONCURRENCY = 4
     SDG_SCALE_FACTOR = 30
     SDG_MAX_NUM_TOKENS = 4096
 
@@ -156,6 +188,10 @@ class _InstructlabDefaults:
     def OCI_DIR(self) -> str:
         return path.join(self._cache_home, STORAGE_DIR_NAMES.OCI)
 
+    @property
+    def BLOBS_DIR(self) -> str:
+        return path.join(self._data_dir, STORAGE_DIR_NAMES.BLOBS)
+
     @property
     def DATASETS_DIR(self) -> str:
         return path.join(self._data_dir, STORAGE_DIR_NAMES.DATASETS)
@@ -188,6 +224,14 @@ class _InstructlabDefaults:
     def DEFAULT_DOCUMENT_STORE_PATH(self) -> str:
         return path.join(self._data_dir, self.DOCUMENT_STORE_NAME)
 
+    @property
+    def EMBEDDINGS_CACHE_DIR(self) -> str:
+        return path.join(self._cache_home, STORAGE_DIR_NAMES.EMBEDDINGS_CACHE)
+
+    @property
+    def CONVERSION_CACHE_DIR(self) -> str:
+        return path.join(self._cache_home, STORAGE_DIR_NAMES.CONVERSION_CACHE)
+
     @property
     def DEFAULT_TEACHER_MODEL(self) -> str:
         return path.join(self.MODELS_DIR, self.MISTRAL_GGUF_MODEL_NAME)
@@ -292,5 +336,21 @@ class _InstructlabDefaults:
     def PROCESS_REGISTRY_FILE(self) -> pathlib.Path:
         return pathlib.Path(self.INTERNAL_DIR) / "process_registry.json"
 
+    @property
+    def RETRIEVER_SOCKET_PATH(self) -> str:
+        return path.join(self.INTERNAL_DIR, "retriever.sock")
+
+    @property
+    def SERVER_POOL_SOCKET_PATH(self) -> str:
+        return path.join(self.INTERNAL_DIR, "server_pool.sock")
+
+    @property
+    def S3_UPLOADS_DIR(self) -> str:
+        return path.join(self.INTERNAL_DIR, "s3_uploads")
+
+    @property
+    def MODEL_CATALOG_FILE(self) -> str:
+        return path.join(self.INTERNAL_DIR, "model_catalog.db")
+
 
 DEFAULTS = _InstructlabDefaults()
@@ -1,10 +1,14 @@
 # Standard
+from concurrent.futures import Future, ThreadPoolExecutor
 import enum
 import functools
 import logging
 import os
 import pathlib
 import pprint
+import queue
+import shutil
+import threading
 import typing
 
 # Third Party
@@ -16,6 +20,7 @@ import click
 from instructlab import utils
 from instructlab.configuration import _serve
 from instructlab.model.backends import backends
+from instructlab.model.blob_store import BlobStore
 
 # Local
 from .phased_training import (
@@ -28,6 +33,9 @@ from .phased_training import (
 
 logger = logging.getLogger(__name__)
 
+# Seconds between the scans of the directory of the checkpoints evaluated while training
+CHECKPOINT_POLL_INTERVAL = 30.0
+
 
 class SupportedTrainingStrategies(enum.Enum):
     """Available advanced training strategies"""
@@ -58,6 +66,7 @@ def accelerated_train(
     phased_phase2_effective_batch_size: int | None,
     enable_serving_output: bool,
     phased_mt_bench_judge: pathlib.Path | None,
+    phased_pipelined_eval: bool,
     skip_user_confirm: bool,
     force_clear_phased_cache: bool,
     eval_serve: _serve,
@@ -222,6 +231,7 @@ def accelerated_train(
             eval_serve=eval_serve,
             eval_gpus=eval_gpus,
             strategy=strategy,
+            pipelined_eval=phased_pipelined_eval,
         )
     else:
         # Third Party
@@ -229,12 +239,15 @@ def accelerated_train(
             run_training,  # pylint: disable=no-name-in-module
         )
 
+        checkpoints_dir = pathlib.Path(train_args.ckpt_output_dir) / "hf_format"
         try:
+            BlobStore().detach_tree(checkpoints_dir)
             run_training(train_args=train_args, torch_args=torch_args)
         except (RuntimeError, KeyboardInterrupt, Exception) as e:
             if not isinstance(e, KeyboardInterrupt):
                 logger.error("Failed during training loop: %s", e, exc_info=True)
             raise click.exceptions.Exit(1) from e
+        _store_checkpoints(checkpoints_dir)
 
 
 def _run_phase(
@@ -250,9 +263,12 @@ def _run_phase(
     phase_model: TrainPhaseModel | EvalPhaseModel,
     next_phase: TrainingPhases,
     model_override: pathlib.Path | None = None,
+    watcher: "_CheckpointWatcher | None" = None,
 ):
     """Runs a single phase of the multi-phase training pipeline and capture any errors.
 
+    The watcher evaluating the checkpoints of the phase, if any, is stopped before the phase is committed.
+
     Raises:
         click.exceptions.Exit: Raises a click exception in lieu of a system exit.
     """
@@ -276,9 +292,12 @@ def _run_phase(
             logger.error("Failed during training loop: %s", e, exc_info=True)
         exception = e
     else:
+        _store_checkpoints(checkpoint_dir / "hf_format")
         # progress onto the next phase on success
         journal.current_phase = next_phase
     finally:
+        if watcher is not None:
+            watcher.stop()
         phase_model.ended_at_utc = TrainingJournal.now_utc()
         journal.commit()
 
@@ -286,6 +305,12 @@ def _run_phase(
         raise click.exceptions.Exit(1) from exception
 
 
+def _store_checkpoints(checkpoints_dir: pathlib.Path) -> None:
+    """Moves the checkpoints to the blob store, sharing the files equal to those of other models."""
+    if checkpoints_dir.is_dir():
+        BlobStore().adopt_tree(checkpoints_dir)
+
+
 def _get_checkpoints(phase_checkpoints_dir):
     return list(phase_checkpoints_dir.iterdir())
 
@@ -313,6 +338,7 @@ def _run_phased_training(
     journal: TrainingJournal,
     eval_serve: _serve,
     eval_gpus: int,
+    pipelined_eval: bool,
 ) -> None:
     if journal.current_phase == TrainingPhases.DONE:
         click.secho(
@@ -324,6 +350,15 @@ def _run_phased_training(
     # make mypy happy
     phase_model: TrainPhaseModel | EvalPhaseModel | None = None
 
+    mtbench_eval_func = functools.partial(
+        _mtbench,
+        eval_serve=eval_serve,
+        eval_gpus=eval_gpus,
+        eval_cache=phase2_eval_cache,
+        mtbench_judge=mtbench_judge,
+        enable_serving_output=enable_serving_output,
+    )
+
     if journal.current_phase == TrainingPhases.TRAIN1:
         click.secho("Training Phase 1/2...", fg="cyan")
 
@@ -394,6 +429,13 @@ def _run_phased_training(
         if phase_model is None:
             phase_model = TrainPhaseModel(checkpoints=phase2_checkpoints_dir)
             journal.journal.train_2 = phase_model
+        if journal.journal.eval_2 is not None:
+            # evaluated while the interrupted training ran, which starts over
+            click.secho(
+                "Discarding the checkpoint evaluations of the interrupted Training Phase 2/2",
+                fg="yellow",
+            )
+            journal.journal.eval_2 = None
         journal.commit()
 
         # if journal.journal.eval_1 is None:
@@ -429,6 +471,19 @@ def _run_phased_training(
                 )
 
             next_checkpoint = phase1_checkpoints[0]
+
+        watcher = None
+        if pipelined_eval:
+            watcher = _start_pipelined_eval(
+                journal=journal,
+                checkpoints_dir=phase2_checkpoints_dir / "hf_format",
+                eval_func=mtbench_eval_func,
+                gpu_groups=_spare_gpu_groups(
+                    eval_serve=eval_serve,
+                    eval_gpus=eval_gpus,
+                    training_gpus=torch_args.nproc_per_node,
+                ),
+            )
         _run_phase(
             train_args=train_args,
             torch_args=torch_args,
@@ -442,6 +497,7 @@ def _run_phased_training(
             phase_model=phase_model,
             next_phase=TrainingPhases.EVAL2,
             model_override=next_checkpoint,
+            watcher=watcher,
         )
         logger.debug("Finished training #2\n%s", journal.print_model_rich())
     else:
@@ -451,27 +507,27 @@ def _run_phased_training(
         click.secho("MT-Bench evaluation for Phase 2...", fg="cyan")
 
         phase2_checkpoints_dir = phase2_checkpoints_dir / "hf_format"
-        phase2_eval_cache = base_dir / "phase2" / "eval_cache"
+        checkpoints = _get_checkpoints(phase2_checkpoints_dir)
         phase_model = journal.journal.eval_2
         if phase_model is None:
             # if it's not None, it already exists and may have 'results', so we shouldn't overwrite it.
-            phase_model = EvalPhaseModel(
-                checkpoints=_get_checkpoints(phase2_checkpoints_dir)
-            )
+            phase_model = EvalPhaseModel(checkpoints=checkpoints)
             journal.journal.eval_2 = phase_model
+        else:
+            # checkpoints saved after the evaluation while training stopped
+            phase_model.checkpoints.extend(
+                checkpoint
+                for checkpoint in checkpoints
+                if checkpoint not in phase_model.checkpoints
+            )
+            _recover_in_flight_evaluations(phase_model)
         journal.commit()
 
         best_checkpoint = _evaluate_dir_of_checkpoints(
             phase_model=phase_model,
             journal=journal,
-            eval_func=functools.partial(
-                _mtbench,
-                eval_serve=eval_serve,
-                eval_gpus=eval_gpus,
-                eval_cache=phase2_eval_cache,
-                mtbench_judge=mtbench_judge,
-                enable_serving_output=enable_serving_output,
-            ),
+            eval_func=mtbench_eval_func,
+            gpu_groups=_eval_gpu_groups(eval_serve=eval_serve, eval_gpus=eval_gpus),
         )
 
         phase_model.best_checkpoint = best_checkpoint
@@ -560,6 +616,8 @@ def _training_phase(
         f"TrainingArgs for current phase: {pprint.pformat(train_args)}", fg="cyan"
     )
 
+    # checkpoints of a previous run may be overwritten, the blobs they link to are read-only
+    BlobStore().detach_tree(pathlib.Path(train_args.ckpt_output_dir) / "hf_format")
     run_training(train_args=train_args, torch_args=torch_args)
 
 
@@ -621,6 +679,20 @@ def _mmlu(model: pathlib.Path) -> float:
     return ckpt_score
 
 
+def _checkpoint_eval_cache(
+    eval_cache: pathlib.Path, checkpoint: pathlib.Path
+) -> pathlib.Path:
+    """
+    Returns the directory of eval_cache the evaluation of checkpoint writes its answers and judgments to.
+    Evaluations running at the same time on other GPU groups each have their own, and any output left by an
+    interrupted evaluation of the checkpoint is removed, so that evaluating it again starts afresh.
+    """
+    output_dir = eval_cache / checkpoint.name
+    shutil.rmtree(output_dir, ignore_errors=True)
+    output_dir.mkdir(parents=True)
+    return output_dir
+
+
 def _mtbench(
     model: pathlib.Path,
     eval_serve: _serve,
@@ -628,6 +700,7 @@ def _mtbench(
     eval_cache: pathlib.Path,
     mtbench_judge: pathlib.Path,
     enable_serving_output: bool,
+    gpu_ids: list[str] | None = None,
 ) -> float:
     # TODO: optimization: run all generations in serial and then do all judgments at once to save time loading/unloading prometheus.
     # Third Party
@@ -639,7 +712,11 @@ def _mtbench(
 
     explicit_gpus = None
     gpus, effective_gpus = get_gpus(eval_serve, eval_gpus)
-    if gpus and gpus > 0:
+    if gpu_ids:
+        # the servers are restricted to a group of GPUs shared by no other checkpoint
+        logger.debug(f"Using gpus {','.join(gpu_ids)} of the evaluation group")
+        explicit_gpus = len(gpu_ids)
+    elif gpus and gpus > 0:
         # gpus are specified in config for evaluate
         logger.debug("Using gpus from config")
         explicit_gpus = gpus
@@ -657,16 +734,17 @@ def _mtbench(
     evaluator = MTBenchEvaluator(
         model_name=model_name,
         judge_model_name=judge_model_name,
-        output_dir=str(eval_cache),
+        output_dir=str(_checkpoint_eval_cache(eval_cache, model)),
         merge_system_user_message=True,  # TODO: expose this to the user
     )
 
     server = None
     model_serve_url = None
+    # launch_server changes the serving config, which the servers of other groups share
     try:
         logger.debug("Starting model server for mt-bench answer generation")
         server, model_serve_url, effective_gpus = launch_server(
-            eval_serve=eval_serve,
+            eval_serve=eval_serve.model_copy(deep=True),
             tls_client_cert=None,
             tls_client_key=None,
             tls_client_passwd=None,
@@ -677,6 +755,7 @@ def _mtbench(
             max_workers="auto",
             enable_serving_output=enable_serving_output,
             backend=backends.VLLM,
+            cuda_visible_devices=gpu_ids,
         )
         logger.debug("Generating mt-bench answers")
         evaluator.gen_answers(
@@ -689,7 +768,7 @@ def _mtbench(
     try:
         logger.debug("Starting model server for mt-bench answer judgment")
         server, model_serve_url, effective_gpus = launch_server(
-            eval_serve=eval_serve,
+            eval_serve=eval_serve.model_copy(deep=True),
             tls_client_cert=None,
             tls_client_key=None,
             tls_client_passwd=None,
@@ -700,6 +779,7 @@ def _mtbench(
             max_workers="auto",
             backend=backends.VLLM,
             enable_serving_output=enable_serving_output,
+            cuda_visible_devices=gpu_ids,
         )
         logger.debug("Judging mt-bench answers")
         mt_bench_results: tuple = evaluator.judge_answers(
@@ -713,43 +793,332 @@ def _mtbench(
     return ckpt_score
 
 
+def _visible_gpus() -> list[str]:
+    """Returns the ids of the GPUs visible to this process, as child processes must be given them."""
+    visible_devices = os.environ.get("CUDA_VISIBLE_DEVICES")
+    if visible_devices:
+        return [device.strip() for device in visible_devices.split(",")]
+    # Third Party
+    import torch
+
+    return [str(device) for device in range(torch.cuda.device_count())]
+
+
+def _split_gpus(devices: list[str], group_size: int) -> list[list[str]]:
+    if group_size < 1:
+        return []
+    return [
+        devices[start : start + group_size]
+        for start in range(0, len(devices) - group_size + 1, group_size)
+    ]
+
+
+def _eval_gpu_groups(eval_serve: _serve, eval_gpus: int | None) -> list[list[str]]:
+    """
+    Splits the GPUs of the machine into groups of as many GPUs as the evaluation is configured to serve a
+    model with, so that a checkpoint can be evaluated on each group at the same time.
+    """
+    # First Party
+    from instructlab.model.evaluate import get_gpus
+
+    _, group_size = get_gpus(eval_serve, eval_gpus)
+    groups = _split_gpus(_visible_gpus(), group_size)
+    if len(groups) < 2:
+        # a single evaluation uses all the GPUs
+        return []
+    return groups
+
+
+def _spare_gpu_groups(
+    eval_serve: _serve, eval_gpus: int | None, training_gpus: int
+) -> list[list[str]]:
+    """
+    Splits the GPUs left over by training, which runs on the first ones, into groups to evaluate checkpoints
+    on while training. Without a configured evaluation GPU count, all of them make a single group.
+    """
+    # First Party
+    from instructlab.model.evaluate import get_gpus
+
+    spare_gpus = _visible_gpus()[training_gpus:]
+    _, group_size = get_gpus(eval_serve, eval_gpus)
+    return _split_gpus(spare_gpus, group_size or len(spare_gpus))
+
+
+def _recover_in_flight_evaluations(phase_model: EvalPhaseModel) -> None:
+    if phase_model.in_flight_checkpoints:
+        click.secho(
+            f"Evaluating again {len(phase_model.in_flight_checkpoints)} checkpoint(s) whose evaluation was interrupted",
+            fg="cyan",
+        )
+        phase_model.in_flight_checkpoints = []
+
+
+class _CheckpointEvaluator:
+    """
+    Evaluates the checkpoints put in its queue with eval_func, a checkpoint at a time on each of the
+    gpu_groups, which eval_func receives as gpu_ids, or on all the GPUs without groups. The checkpoints being
+    evaluated are tracked in the journal, and each score is committed as soon as its checkpoint is finished,
+    so an interrupted run evaluates again only the checkpoints that were left. As evaluations run at the same
+    time, eval_func must keep the output of each checkpoint apart, as _mtbench does in _checkpoint_eval_cache.
+    """
+
+    def __init__(
+        self,
+        eval_func: typing.Callable[..., float],
+        phase_model: EvalPhaseModel,
+        journal: TrainingJournal,
+        gpu_groups: list[list[str]] | None = None,
+    ):
+        self.eval_func = eval_func
+        self.phase_model = phase_model
+        self.journal = journal
+        self.gpu_groups: list[list[str] | None] = (
+            list(gpu_groups) if gpu_groups else [None]
+        )
+        self._journal_lock = threading.Lock()
+        self._todo: queue.Queue[pathlib.Path | None] = queue.Queue()
+        # stops the other groups from starting new checkpoints once an evaluation failed
+        self._failed = threading.Event()
+        self._executor: ThreadPoolExecutor | None = None
+        self._futures: list[Future] = []
+
+    def put(self, checkpoint: pathlib.Path) -> None:
+        self._todo.put(checkpoint)
+
+    def add(self, checkpoint: pathlib.Path) -> None:
+        """Adds a newly saved checkpoint to the evaluation phase, and queues it."""
+        with self._journal_lock:
+            if checkpoint not in self.phase_model.checkpoints:
+                self.phase_model.checkpoints.append(checkpoint)
+                self.journal.commit()
+        self.put(checkpoint)
+
+    def start(self) -> None:
+        """Evaluates the queued checkpoints in the background, with a thread per group of GPUs."""
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(self.gpu_groups), thread_name_prefix="checkpoint-eval"
+        )
+        self._futures = [
+            self._executor.submit(self._evaluate, gpu_ids)
+            for gpu_ids in self.gpu_groups
+        ]
+
+    def join(self, cancel: bool = False) -> None:
+        """
+        Waits until all the queued checkpoints are evaluated, or only those in flight if cancel, and raises
+        the first evaluation error. Without start, evaluates them in the calling thread.
+        """
+        if cancel:
+            self._failed.set()
+        for _ in self.gpu_groups:
+            self._todo.put(None)
+        if self._executor is None:
+            self._evaluate(self.gpu_groups[0])
+            return
+        try:
+            for future in self._futures:
+                future.result()
+        except BaseException:
+            # the evaluations in progress finish and are committed to the journal
+            self._failed.set()
+            raise
+        finally:
+            self._executor.shutdown()
+
+    def _evaluate(self, gpu_ids: list[str] | None) -> None:
+        while not self._failed.is_set():
+            checkpoint = self._todo.get()
+            if checkpoint is None:
+                return
+            with self._journal_lock:
+                self.phase_model.in_flight_checkpoints.append(checkpoint)
+                self.journal.commit()
+
+            logger.debug(f"Evaluating {checkpoint} on gpus {gpu_ids or 'all'}")
+            try:
+                if gpu_ids is None:
+                    checkpoint_score = self.eval_func(model=checkpoint)
+                else:
+                    checkpoint_score = self.eval_func(model=checkpoint, gpu_ids=gpu_ids)
+            except BaseException:
+                self._failed.set()
+                raise
+
+            with self._journal_lock:
+                self.phase_model.results.append(
+                    EvalResult(
+                        score=checkpoint_score,
+                        checkpoint=checkpoint,
+                        ended_at_utc=TrainingJournal.now_utc(),
+                    )
+                )
+                self.phase_model.finished_checkpoints.append(checkpoint)
+                self.phase_model.in_flight_checkpoints.remove(checkpoint)
+                self.journal.commit()
+
+                click.secho(
+                    f"CHECKPOINT EVALUATION: {str(checkpoint)} SCORED {checkpoint_score}",
+                    fg="red",
+                    bg="cyan",
+                )
+
+
+def _checkpoint_signature(checkpoint: pathlib.Path) -> tuple | None:
+    """Returns the names, sizes and modification times of the files of a checkpoint with saved weights."""
+    files = [path for path in checkpoint.iterdir() if path.is_file()]
+    names = {path.name for path in files}
+    if "config.json" not in names or not any(
+        name.endswith((".safetensors", ".bin")) for name in names
+    ):
+        return None
+    return tuple(
+        sorted(
+            (path.name, path.stat().st_size, path.stat().st_mtime_ns) for path in files
+        )
+    )
+
+
+class _CheckpointWatcher(threading.Thread):
+    """
+    Adds the checkpoints saved in checkpoints_dir to the evaluator, once their files have not changed for a
+    poll interval, so that they are evaluated while training goes on. The checkpoints left by an interrupted
+    training are skipped until they are saved again.
+    """
+
+    def __init__(
+        self,
+        checkpoints_dir: pathlib.Path,
+        evaluator: _CheckpointEvaluator,
+        poll_interval: float = CHECKPOINT_POLL_INTERVAL,
+    ):
+        super().__init__(name="checkpoint-watcher", daemon=True)
+        self.checkpoints_dir = checkpoints_dir
+        self.evaluator = evaluator
+        self.poll_interval = poll_interval
+        self._stopped = threading.Event()
+        self._signatures: dict[pathlib.Path, tuple | None] = {}
+        self._queued: set[pathlib.Path] = set()
+        self._leftovers: dict[pathlib.Path, tuple | None] = {}
+        if checkpoints_dir.is_dir():
+            self._leftovers = {
+                checkpoint: _checkpoint_signature(checkpoint)
+                for checkpoint in checkpoints_dir.iterdir()
+                if checkpoint.is_dir()
+            }
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.poll_interval):
+            self.poll()
+
+    def poll(self) -> None:
+        if not self.checkpoints_dir.is_dir():
+            return
+        for checkpoint in sorted(self.checkpoints_dir.iterdir()):
+            if checkpoint in self._queued or not checkpoint.is_dir():
+                continue
+            signature = _checkpoint_signature(checkpoint)
+            if checkpoint in self._leftovers:
+                if self._leftovers[checkpoint] == signature:
+                    continue
+                del self._leftovers[checkpoint]
+            if signature is None or self._signatures.get(checkpoint) != signature:
+                # still being saved
+                self._signatures[checkpoint] = signature
+                continue
+            logger.debug(f"Checkpoint {checkpoint} saved, queueing its evaluation")
+            self._queued.add(checkpoint)
+            self.evaluator.add(checkpoint)
+
+    def stop(self) -> None:
+        """
+        Stops watching, and waits for the evaluations in flight. The checkpoints that were not evaluated
+        are left to the evaluation phase.
+        """
+        self._stopped.set()
+        self.join()
+        try:
+            self.evaluator.join(cancel=True)
+        # pylint: disable=broad-except
+        except Exception as e:
+            logger.error(
+                f"Checkpoint evaluation during training failed, the remaining checkpoints are evaluated after training: {e}",
+                exc_info=True,
+            )
+
+
+def _start_pipelined_eval(
+    journal: TrainingJournal,
+    checkpoints_dir: pathlib.Path,
+    eval_func: typing.Callable[..., float],
+    gpu_groups: list[list[str]],
+) -> _CheckpointWatcher | None:
+    """
+    Starts evaluating the phase 2 checkpoints on the gpu_groups as soon as they are saved in checkpoints_dir.
+    Returns the watcher to stop once training is finished, or None without spare GPUs.
+    """
+    if not gpu_groups:
+        click.secho(
+            "No GPUs are left over by training, checkpoints are evaluated after training",
+            fg="yellow",
+        )
+        return None
+
+    phase_model = EvalPhaseModel(checkpoints=[])
+    journal.journal.eval_2 = phase_model
+    journal.commit()
+
+    click.secho(
+        f"Evaluating checkpoints while training on gpus {' '.join(','.join(group) for group in gpu_groups)}",
+        fg="cyan",
+    )
+    evaluator = _CheckpointEvaluator(
+        eval_func=eval_func,
+        phase_model=phase_model,
+        journal=journal,
+        gpu_groups=gpu_groups,
+    )
+    evaluator.start()
+    watcher = _CheckpointWatcher(checkpoints_dir=checkpoints_dir, evaluator=evaluator)
+    watcher.start()
+    return watcher
+
+
 def _evaluate_dir_of_checkpoints(
     eval_func: typing.Callable[..., float],
     phase_model: EvalPhaseModel,
     journal: TrainingJournal,
+    gpu_groups: list[list[str]] | None = None,
 ) -> EvalResult:
-    """Run eval_func on all model checkpoints in a directory."""
-    # TODO: parallelize MMLU over available GPUs
+    """
+    Run eval_func on all model checkpoints in a directory.
 
+    With several gpu_groups, a checkpoint is evaluated on each group at the same time, and eval_func receives
+    the GPUs of its group as gpu_ids.
+    """
     # doing this to avoid removing checkpoints from same list that we're iterating over.
     checkpoints_todo = list(
         set(phase_model.checkpoints) - set(phase_model.finished_checkpoints)
     )
 
     if len(checkpoints_todo) == 0:
+        if phase_model.results:
+            # all evaluated while training
+            return TrainingJournal.best_checkpoint(phase_model=phase_model)
         raise RuntimeError(
             "No checkpoints were evaluated, 'checkpoints_todo' was empty in journal."
         )
 
+    gpu_groups = (gpu_groups or [])[: len(checkpoints_todo)]
+    evaluator = _CheckpointEvaluator(
+        eval_func=eval_func,
+        phase_model=phase_model,
+        journal=journal,
+        gpu_groups=gpu_groups if len(gpu_groups) > 1 else None,
+    )
     for checkpoint in checkpoints_todo:
-        logger.debug(str(checkpoint))
-        checkpoint_score = eval_func(model=checkpoint)
-
-        phase_model.results.append(
-            EvalResult(
-                score=checkpoint_score,
-                checkpoint=checkpoint,
-                ended_at_utc=TrainingJournal.now_utc(),
-            )
-        )
-
-        phase_model.finished_checkpoints.append(checkpoint)
-        journal.commit()
-
-        click.secho(
-            f"CHECKPOINT EVALUATION: {str(checkpoint)} SCORED {checkpoint_score}",
-            fg="red",
-            bg="cyan",
-        )
+        evaluator.put(checkpoint)
+    if len(evaluator.gpu_groups) > 1:
+        evaluator.start()
+    evaluator.join()
 
     return TrainingJournal.best_checkpoint(phase_model=phase_model)
@@ -7,6 +7,7 @@ import pathlib
 import sys
 
 # Local
+from ...configuration import DEFAULTS
 from ...configuration import _serve as serve_config
 from ...utils import is_model_gguf, is_model_safetensors
 from .common import CHAT_TEMPLATE_AUTO, LLAMA_CPP, VLLM
@@ -123,9 +124,20 @@ def get_backend_from_values(
     model_family,
     vllm_model_family,
     log_file,
+    parallel_slots=DEFAULTS.LLAMA_CPP_PARALLEL_SLOTS,
+    prompt_batch_size=DEFAULTS.LLAMA_CPP_PROMPT_BATCH_SIZE,
+    max_connections=DEFAULTS.LLAMA_CPP_MAX_CONNECTIONS,
+    pool_socket_path=None,
+    cuda_visible_devices=None,
 ) -> BackendServer:
+    """
+    Returns the server of the model with the given settings. While a server pool listens on
+    `pool_socket_path`, the returned server gets its endpoint from the pool instead of starting its own.
+    A vLLM server only uses the GPUs of `cuda_visible_devices`, if given.
+    """
     # Local
     from .llama_cpp import Server as llama_cpp_server
+    from .server_pool import PooledServer, is_server_pool_running
     from .vllm import Server as vllm_server
 
     model_path = pathlib.Path(model_path)
@@ -139,9 +151,10 @@ def get_backend_from_values(
     if not chat_template:
         chat_template = CHAT_TEMPLATE_AUTO
 
+    server: BackendServer
     if backend == LLAMA_CPP:
         # Instantiate the llama server
-        return llama_cpp_server(
+        server = llama_cpp_server(
             api_base=api_base,
             model_path=model_path,
             chat_template=chat_template,
@@ -152,10 +165,13 @@ def get_backend_from_values(
             port=port,
             log_file=log_file,
             num_threads=None,  # exists only as a flag not a config
+            parallel_slots=parallel_slots,
+            prompt_batch_size=prompt_batch_size,
+            max_connections=max_connections,
         )
-    if backend == VLLM:
+    elif backend == VLLM:
         # Instantiate the vllm server
-        return vllm_server(
+        server = vllm_server(
             api_base=api_base,
             model_family=vllm_model_family,
             model_path=model_path,
@@ -165,9 +181,35 @@ def get_backend_from_values(
             port=port,
             max_startup_attempts=max_startup_attempts,
             log_file=log_file,
+            cuda_visible_devices=cuda_visible_devices,
         )
-    print(f"\033[91mUnknown backend: {backend}\033[0m")
-    sys.exit(1)
+    else:
+        print(f"\033[91mUnknown backend: {backend}\033[0m")
+        sys.exit(1)
+
+    if pool_socket_path and is_server_pool_running(pool_socket_path):
+        # the settings the pool starts the server with, its logs go to the pool log
+        spec = {
+            "host": host,
+            "port": port,
+            "model_path": str(model_path),
+            "backend_name": backend,
+            "chat_template": chat_template,
+            "api_base": api_base,
+            "gpu_layers": gpu_layers,
+            "max_ctx_size": max_ctx_size,
+            "vllm_args": list(vllm_args or []),
+            "max_startup_attempts": max_startup_attempts,
+            "model_family": model_family,
+            "vllm_model_family": vllm_model_family,
+            "log_file": None,
+            "parallel_slots": parallel_slots,
+            "prompt_batch_size": prompt_batch_size,
+            "max_connections": max_connections,
+            "cuda_visible_devices": cuda_visible_devices,
+        }
+        return PooledServer(server, spec, pool_socket_path)
+    return server
 
 
 def select_backend(
@@ -175,6 +217,7 @@ def select_backend(
     backend: Optional[str] = None,
     model_path: pathlib.Path | None = None,
     log_file: pathlib.Path | None = None,
+    cuda_visible_devices: list[str] | None = None,
 ) -> BackendServer:
     logger.debug("Selecting backend for model %s", model_path)
 
@@ -192,4 +235,9 @@ def select_backend(
         vllm_model_family=cfg.vllm.llm_family,
         model_family=cfg.llama_cpp.llm_family,
         log_file=log_file,
+        parallel_slots=cfg.llama_cpp.parallel_slots,
+        prompt_batch_size=cfg.llama_cpp.prompt_batch_size,
+        max_connections=cfg.llama_cpp.max_connections,
+        pool_socket_path=cfg.pool.socket_path,
+        cuda_visible_devices=cuda_visible_devices,
     )
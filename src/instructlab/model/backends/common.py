@@ -5,6 +5,7 @@ import logging
 import multiprocessing
 import pathlib
 import socket
+import time
 import typing
 
 # Third Party
@@ -15,10 +16,12 @@ from instructlab.training.chat_templates import (
     ibm_legacy_tmpl as granite_llama,  # type: ignore
 )
 from instructlab.training.chat_templates import mistral_tmpl as mistral  # type: ignore
+import httpx
 
 # First Party
+from instructlab.client_utils import check_api_base
 from instructlab.common import SupportedModelArchitectures
-from instructlab.configuration import get_model_family
+from instructlab.configuration import get_api_base, get_model_family
 from instructlab.utils import get_model_arch, get_model_template_from_tokenizer
 
 # mypy: disable_error_code="import-untyped"
@@ -31,6 +34,9 @@ CHAT_TEMPLATE_AUTO = "auto"
 CHAT_TEMPLATE_TOKENIZER = "tokenizer"
 LLAMA_CPP = "llama-cpp"
 VLLM = "vllm"
+# Seconds between two health checks of a starting server, and the timeout of a check
+HEALTH_CHECK_INTERVAL = 0.1
+HEALTH_CHECK_TIMEOUT = 5.0
 templates = [
     {
         "family": "granite",
@@ -221,6 +227,38 @@ def free_tcp_ipv4_port(host: str) -> int:
         return int(s.getsockname()[-1])
 
 
+def is_server_healthy(client: httpx.Client, host: str, port: int) -> bool:
+    """
+    Returns True once the server on `host` and `port` answers its `/health` endpoint, i.e. once the model
+    is loaded and the API is served. Falls back to listing the models when the endpoint does not exist.
+    Each check is bounded by `HEALTH_CHECK_TIMEOUT`, whatever the timeout of `client`.
+    """
+    try:
+        response = client.get(
+            f"http://{host}:{port}/health", timeout=HEALTH_CHECK_TIMEOUT
+        )
+    except httpx.HTTPError:
+        return False
+    if response.status_code == httpx.codes.NOT_FOUND:
+        return check_api_base(get_api_base(host, port), client)
+    return response.status_code == httpx.codes.OK
+
+
+def wait_for_health(
+    host: str, port: int, process: multiprocessing.Process, deadline: float
+) -> bool:
+    """
+    Checks the health of the server of `process` on `host` and `port` until it is healthy, and returns True,
+    or returns False once the process exited or the `time.monotonic` `deadline` passed.
+    """
+    with httpx.Client(timeout=HEALTH_CHECK_TIMEOUT) as client:
+        while not is_server_healthy(client, host, port):
+            if not process.is_alive() or time.monotonic() > deadline:
+                return False
+            time.sleep(HEALTH_CHECK_INTERVAL)
+    return True
+
+
 def safe_close_all(resources: typing.Iterable[Closeable]):
     for resource in resources:
         with contextlib.suppress(Exception):
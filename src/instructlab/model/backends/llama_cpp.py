@@ -2,7 +2,7 @@
 
 # Standard
 from contextlib import redirect_stderr
-from time import sleep
+from time import monotonic
 from types import FrameType
 from typing import Optional, cast
 import asyncio
@@ -24,7 +24,8 @@ import uvicorn
 
 # Local
 from ...client_utils import check_api_base
-from ...configuration import get_api_base
+from ...configuration import DEFAULTS, get_api_base
+from ..token_counter import create_token_counter
 from .common import (
     API_ROOT_WELCOME_MESSAGE,
     CHAT_TEMPLATE_AUTO,
@@ -35,11 +36,19 @@ from .common import (
     get_model_template,
     is_temp_server_running,
     verify_template_exists,
+    wait_for_health,
 )
+from .metrics import ServerMetrics
+from .request_queue import RequestQueue, create_proxy_app, install_request_queue
 from .server import BackendServer, ServerConfig
 
 logger = logging.getLogger(__name__)
 
+# The model slots only listen locally, behind the proxy
+SLOT_HOST = "127.0.0.1"
+# Seconds a model slot is given to load its copy of the model, the slots of a server load theirs at once
+SLOT_STARTUP_TIMEOUT = 120
+
 
 class Server(BackendServer):
     def __init__(
@@ -54,6 +63,9 @@ class Server(BackendServer):
         max_ctx_size: int,
         num_threads: Optional[int],
         log_file: Optional[pathlib.Path] = None,
+        parallel_slots: int = DEFAULTS.LLAMA_CPP_PARALLEL_SLOTS,
+        prompt_batch_size: int = DEFAULTS.LLAMA_CPP_PROMPT_BATCH_SIZE,
+        max_connections: int = DEFAULTS.LLAMA_CPP_MAX_CONNECTIONS,
     ):
         sc = ServerConfig(api_base, log_file)
         super().__init__(
@@ -67,6 +79,9 @@ class Server(BackendServer):
         self.gpu_layers = gpu_layers
         self.max_ctx_size = max_ctx_size
         self.num_threads = num_threads
+        self.parallel_slots = parallel_slots
+        self.prompt_batch_size = prompt_batch_size
+        self.max_connections = max_connections
         self.queue: Optional[multiprocessing.Queue] = None
         self.process: multiprocessing.Process | None = None
 
@@ -84,6 +99,9 @@ class Server(BackendServer):
                 port=self.port,
                 log_file=self.config.log_file,
                 log_level=logger.getEffectiveLevel(),
+                parallel_slots=self.parallel_slots,
+                prompt_batch_size=self.prompt_batch_size,
+                max_connections=self.max_connections,
             )
         except ServerException as exc:
             raise exc
@@ -111,6 +129,9 @@ class Server(BackendServer):
                 "queue": self.queue,
                 "log_file": self.config.log_file,
                 "log_level": logger.getEffectiveLevel(),
+                "parallel_slots": self.parallel_slots,
+                "prompt_batch_size": self.prompt_batch_size,
+                "max_connections": self.max_connections,
             },
         )
 
@@ -134,24 +155,21 @@ class Server(BackendServer):
             self.process = self.create_server_process(self.port)
             self.process.start()
 
-            # in case the server takes some time to fail we wait a bit
             logger.debug("Waiting for the server to start...")
-            count = 0
-            while self.process.is_alive():
-                sleep(0.1)
-                if check_api_base(self.api_base, http_client):
-                    break
-                if count > 50:
-                    logger.error("failed to reach the API server")
-                    break
-                count += 1
-
-            logger.debug("Server started.")
+            startup_timeout = SLOT_STARTUP_TIMEOUT * self.parallel_slots
+            started = wait_for_health(
+                self.host, self.port, self.process, monotonic() + startup_timeout
+            )
 
             # if the queue is not empty it means the server failed to start
             if self.queue is not None and not self.queue.empty():
                 # pylint: disable=raise-missing-from
                 raise self.queue.get()
+            if not started:
+                raise ServerException(
+                    f"failed to reach the API server in {startup_timeout} seconds"
+                )
+            logger.debug("Server started.")
 
         except ServerException as exc:
             self.shutdown()
@@ -185,21 +203,59 @@ def server(
     queue: Optional[multiprocessing.Queue] = None,
     log_file: Optional[pathlib.Path] = None,
     log_level: int = logging.INFO,
+    parallel_slots: int = DEFAULTS.LLAMA_CPP_PARALLEL_SLOTS,
+    prompt_batch_size: int = DEFAULTS.LLAMA_CPP_PROMPT_BATCH_SIZE,
+    max_connections: int = DEFAULTS.LLAMA_CPP_MAX_CONNECTIONS,
 ):
-    """Start OpenAI-compatible server"""
+    """
+    Start OpenAI-compatible server
+
+    The completion requests wait in a first-in first-out queue for one of the `parallel_slots` model slots.
+    With several slots, each one is a llama.cpp server running in its own process, behind a proxy listening
+    on `host` and `port`. The metrics of the requests are served at `/metrics`.
+    """
+    if parallel_slots > 1:
+        serve_slots(
+            parallel_slots=parallel_slots,
+            host=host,
+            port=port,
+            queue=queue,
+            max_connections=max_connections,
+            log_level=log_level,
+            slot_kwargs={
+                "model_path": model_path,
+                "chat_template": chat_template,
+                "gpu_layers": gpu_layers,
+                "max_ctx_size": max_ctx_size,
+                "model_family": model_family,
+                "threads": threads,
+                "log_file": log_file,
+                "log_level": log_level,
+                "prompt_batch_size": prompt_batch_size,
+            },
+        )
+        return
+
     verbose = log_level == logging.DEBUG
     settings = Settings(
         host=host,
         port=port,
         model=model_path.as_posix(),
         n_ctx=max_ctx_size,
+        n_batch=prompt_batch_size,
         n_gpu_layers=gpu_layers,
         verbose=verbose,
+        # queued requests wait for the current one instead of interrupting it
+        interrupt_requests=False,
     )
 
     if threads is not None:
         settings.n_threads = threads
+    metrics = ServerMetrics(
+        model_name=model_path.name, count_tokens=create_token_counter(str(model_path))
+    )
     try:
+        start_time = monotonic()
         # When we run a logger with DEBUG, verbose mode is activated, create_app will initialize the Llama class which
         # will print the model configuration to stderr. We need to redirect stderr to the log_file
         # if specified.
@@ -215,10 +271,19 @@ def server(
                 app = create_app(settings=settings)
         else:
             app = create_app(settings=settings)
+        # the model is loaded when the application is created
+        metrics.model_load_seconds = monotonic() - start_time
 
         @app.get("/")
         def read_root():
             return {"message": API_ROOT_WELCOME_MESSAGE}
+
+        @app.get("/health")
+        def read_health():
+            # the model is loaded before the application serves requests
+            return {"status": "ok"}
+
+        install_request_queue(app, RequestQueue(slots=1), metrics)
     except ValueError as exc:
         if queue:
             queue.put(exc)
@@ -240,6 +305,7 @@ def server(
         app=app,
         host=host,
         port=port,
+        max_connections=max_connections,
     )
     s = UvicornServer(config)
 
@@ -260,17 +326,118 @@ def server(
         queue.join_thread()
 
 
-def get_uvicorn_config(app: fastapi.FastAPI, host: str, port: int) -> Config:
+def get_uvicorn_config(
+    app: fastapi.FastAPI,
+    host: str,
+    port: int,
+    max_connections: int = DEFAULTS.LLAMA_CPP_MAX_CONNECTIONS,
+) -> Config:
     return Config(
         app,
         host=host,
         port=port,
         log_level=logging.ERROR,
-        limit_concurrency=2,  # Make sure we only serve a single client at a time
-        timeout_keep_alive=0,  # prevent clients holding connections open (we only have 1)
+        # connections above the limit are answered with a 503 error, the others wait in the request queue.
+        # Idle keep-alive connections also count
+        limit_concurrency=max_connections,
+        # let the clients reuse their connection for the next request instead of reconnecting
+        timeout_keep_alive=DEFAULTS.LLAMA_CPP_KEEP_ALIVE_TIMEOUT,
     )
 
 
+def serve_slots(
+    parallel_slots: int,
+    host: str,
+    port: int,
+    queue: Optional[multiprocessing.Queue],
+    max_connections: int,
+    log_level: int,
+    slot_kwargs: dict,
+):
+    """
+    Starts `parallel_slots` llama.cpp servers on local ports, each one loading its own copy of the model,
+    and serves them behind a proxy on `host` and `port` until it is stopped. The slots are stopped with the
+    proxy, on SIGTERM too.
+    """
+    mpctx = multiprocessing.get_context(None)
+    slot_ports = [free_tcp_ipv4_port(SLOT_HOST) for _ in range(parallel_slots)]
+    slot_queue = mpctx.Queue()
+    slot_processes = [
+        mpctx.Process(
+            target=server,
+            kwargs={
+                **slot_kwargs,
+                "host": SLOT_HOST,
+                "port": slot_port,
+                "queue": slot_queue,
+                "max_connections": max_connections,
+            },
+        )
+        for slot_port in slot_ports
+    ]
+    slot_urls = [f"http://{SLOT_HOST}:{slot_port}" for slot_port in slot_ports]
+    previous_sigterm_handler = signal.signal(signal.SIGTERM, _exit_on_sigterm)
+    try:
+        for slot_process in slot_processes:
+            slot_process.start()
+        start_time = monotonic()
+        startup_timeout = SLOT_STARTUP_TIMEOUT * parallel_slots
+        for slot_process, slot_port, slot_url in zip(
+            slot_processes, slot_ports, slot_urls, strict=True
+        ):
+            if wait_for_health(
+                SLOT_HOST, slot_port, slot_process, start_time + startup_timeout
+            ):
+                continue
+            if slot_process.is_alive():
+                error = ServerException(
+                    f"model slot at {slot_url} did not start in {startup_timeout} seconds"
+                )
+            elif not slot_queue.empty():
+                error = slot_queue.get()
+            else:
+                error = ServerException(f"model slot at {slot_url} exited")
+            if queue:
+                queue.put(error)
+                return
+            raise ServerException(f"failed starting a model slot: {error}")
+        metrics = ServerMetrics(
+            model_name=slot_kwargs["model_path"].name,
+            count_tokens=create_token_counter(str(slot_kwargs["model_path"])),
+        )
+        metrics.model_load_seconds = monotonic() - start_time
+        logger.info(
+            f"Started {parallel_slots} model slots in {metrics.model_load_seconds:.1f} seconds"
+        )
+
+        app = create_proxy_app(
+            slot_urls, RequestQueue(slots=parallel_slots), metrics=metrics
+        )
+        s = UvicornServer(
+            get_uvicorn_config(
+                app=app, host=host, port=port, max_connections=max_connections
+            )
+        )
+        s.run()
+    finally:
+        for slot_process in slot_processes:
+            if slot_process.is_alive():
+                slot_process.terminate()
+        for slot_process in slot_processes:
+            slot_process.join(timeout=30)
+            if slot_process.is_alive():
+                slot_process.kill()
+                slot_process.join()
+        slot_queue.close()
+        slot_queue.join_thread()
+        signal.signal(signal.SIGTERM, previous_sigterm_handler)
+
+
+def _exit_on_sigterm(sig: int, frame: Optional[FrameType]) -> None:
+    # unwinds the stack, so that the model slots are stopped instead of left running
+    raise SystemExit(128 + sig)
+
+
 class UvicornServer(uvicorn.Server):
     """Override uvicorn.Server to handle SIGINT."""
 
@@ -0,0 +1,297 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Prometheus metrics of the llama.cpp server, served at `/metrics` under the names used by vLLM so that both
+backends can be scraped into the same dashboards.
+"""
+
+# Standard
+from typing import AsyncIterator, Optional
+import bisect
+import json
+import logging
+import time
+
+# First Party
+from instructlab.model.token_counter import (
+    MESSAGE_OVERHEAD_TOKENS,
+    TokenCounter,
+    approximate_token_count,
+)
+
+logger = logging.getLogger(__name__)
+
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Buckets of the vLLM histograms with the same names
+TIME_TO_FIRST_TOKEN_BUCKETS = [
+    0.001,
+    0.005,
+    0.01,
+    0.02,
+    0.04,
+    0.06,
+    0.08,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1.0,
+    2.5,
+    5.0,
+    7.5,
+    10.0,
+]
+TIME_PER_OUTPUT_TOKEN_BUCKETS = [
+    0.01,
+    0.025,
+    0.05,
+    0.075,
+    0.1,
+    0.15,
+    0.2,
+    0.3,
+    0.4,
+    0.5,
+    0.75,
+    1.0,
+    2.5,
+]
+REQUEST_LATENCY_BUCKETS = [
+    0.3,
+    0.5,
+    0.8,
+    1.0,
+    1.5,
+    2.0,
+    2.5,
+    5.0,
+    10.0,
+    15.0,
+    20.0,
+    30.0,
+    40.0,
+    50.0,
+    60.0,
+]
+
+
+class Histogram:
+    def __init__(self, buckets: list[float]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def samples(self, name: str, labels: str) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bucket, count in zip(self.buckets, self.counts, strict=True):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bucket}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        return lines
+
+
+class ServerMetrics:
+    """
+    Metrics of the completion requests answered by a server.
+
+    The token counts come from the `usage` of the responses. Streamed responses carry no usage: their
+    generated tokens are the streamed chunks, one per token, and their prompt tokens are counted with
+    `count_tokens`, without the chat template. Tokens per second are the rate of the token counters.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        count_tokens: TokenCounter = approximate_token_count,
+    ):
+        self.model_name = model_name
+        self.count_tokens = count_tokens
+        self.model_load_seconds = 0.0
+        self.request_success: dict[str, int] = {}
+        self.prompt_tokens = 0
+        self.generation_tokens = 0
+        self.time_to_first_token = Histogram(TIME_TO_FIRST_TOKEN_BUCKETS)
+        self.time_per_output_token = Histogram(TIME_PER_OUTPUT_TOKEN_BUCKETS)
+        self.request_queue_time = Histogram(REQUEST_LATENCY_BUCKETS)
+        self.e2e_request_latency = Histogram(REQUEST_LATENCY_BUCKETS)
+
+    async def observe(
+        self,
+        request_body: bytes,
+        body: AsyncIterator[bytes],
+        start_time: float,
+    ) -> AsyncIterator[bytes]:
+        """
+        Streams the `body` of the response to the completion request with `request_body`, received at
+        `start_time`, and records its metrics once it is complete.
+        """
+        try:
+            request = json.loads(request_body or b"{}")
+        except ValueError:
+            request = {}
+        stream = bool(request.get("stream"))
+        response = _CompletionResponse(stream)
+        first_token_time: Optional[float] = None
+        async for chunk in body:
+            response.feed(chunk)
+            if first_token_time is None and response.completion_tokens:
+                first_token_time = time.monotonic()
+            yield chunk
+        response.close()
+        end_time = time.monotonic()
+
+        if response.finish_reason is None:
+            # failed or interrupted requests
+            return
+        self.request_success[response.finish_reason] = (
+            self.request_success.get(response.finish_reason, 0) + 1
+        )
+        prompt_tokens = response.prompt_tokens
+        if prompt_tokens is None:
+            prompt_tokens = self._count_prompt_tokens(request)
+        self.prompt_tokens += prompt_tokens
+        self.generation_tokens += response.completion_tokens
+        self.e2e_request_latency.observe(end_time - start_time)
+        if first_token_time is not None and stream:
+            self.time_to_first_token.observe(first_token_time - start_time)
+            if response.completion_tokens > 1:
+                self.time_per_output_token.observe(
+                    (end_time - first_token_time) / (response.completion_tokens - 1)
+                )
+
+    def _count_prompt_tokens(self, request: dict) -> int:
+        if "messages" in request:
+            return sum(
+                self.count_tokens(message.get("content") or "")
+                + MESSAGE_OVERHEAD_TOKENS
+                for message in request["messages"]
+            )
+        prompt = request.get("prompt") or ""
+        prompts = prompt if isinstance(prompt, list) else [prompt]
+        return sum(self.count_tokens(p) for p in prompts if isinstance(p, str))
+
+    def render(self, queue_stats: dict) -> str:
+        """
+        Returns the metrics in the Prometheus text format, including the current state of the request queue
+        from `RequestQueue.stats`.
+        """
+        labels = f'model_name="{self.model_name}"'
+        lines = [
+            "# HELP vllm:num_requests_running Number of requests currently running.",
+            "# TYPE vllm:num_requests_running gauge",
+            f"vllm:num_requests_running{{{labels}}} {queue_stats['busy_slots']}",
+            "# HELP vllm:num_requests_waiting Number of requests waiting for a model slot.",
+            "# TYPE vllm:num_requests_waiting gauge",
+            f"vllm:num_requests_waiting{{{labels}}} {queue_stats['queue_depth']}",
+            "# HELP vllm:request_success_total Count of successfully processed requests.",
+            "# TYPE vllm:request_success_total counter",
+            *(
+                f'vllm:request_success_total{{{labels},finished_reason="{reason}"}} {count}'
+                for reason, count in sorted(self.request_success.items())
+            ),
+            "# HELP vllm:prompt_tokens_total Number of prefill tokens processed.",
+            "# TYPE vllm:prompt_tokens_total counter",
+            f"vllm:prompt_tokens_total{{{labels}}} {self.prompt_tokens}",
+            "# HELP vllm:generation_tokens_total Number of generation tokens processed.",
+            "# TYPE vllm:generation_tokens_total counter",
+            f"vllm:generation_tokens_total{{{labels}}} {self.generation_tokens}",
+        ]
+        for name, description, histogram in [
+            (
+                "vllm:time_to_first_token_seconds",
+                "Histogram of time to first token in seconds.",
+                self.time_to_first_token,
+            ),
+            (
+                "vllm:time_per_output_token_seconds",
+                "Histogram of time per output token in seconds.",
+                self.time_per_output_token,
+            ),
+            (
+                "vllm:request_queue_time_seconds",
+                "Histogram of time spent waiting for a model slot in seconds.",
+                self.request_queue_time,
+            ),
+            (
+                "vllm:e2e_request_latency_seconds",
+                "Histogram of end to end request latency in seconds.",
+                self.e2e_request_latency,
+            ),
+        ]:
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} histogram")
+            lines.extend(histogram.samples(name, labels))
+        lines.extend(
+            [
+                "# HELP ilab:model_load_seconds Time spent loading the model in seconds.",
+                "# TYPE ilab:model_load_seconds gauge",
+                f"ilab:model_load_seconds{{{labels}}} {self.model_load_seconds}",
+            ]
+        )
+        return "\n".join(lines) + "\n"
+
+
+class _CompletionResponse:
+    """
+    Incrementally parses the body of a completion response, streamed as server-sent events or not.
+    """
+
+    def __init__(self, stream: bool):
+        self.stream = stream
+        self.prompt_tokens: Optional[int] = None
+        self.completion_tokens = 0
+        self.finish_reason: Optional[str] = None
+        self._buffer = b""
+
+    def feed(self, chunk: bytes) -> None:
+        self._buffer += chunk
+        if not self.stream:
+            return
+        *lines, self._buffer = self._buffer.split(b"\n")
+        for line in lines:
+            self._parse_event(line.strip())
+
+    def close(self) -> None:
+        if self.stream:
+            self._parse_event(self._buffer.strip())
+            return
+        try:
+            response = json.loads(self._buffer)
+        except ValueError:
+            return
+        usage = response.get("usage") or {}
+        self.prompt_tokens = usage.get("prompt_tokens")
+        self.completion_tokens = usage.get("completion_tokens") or 0
+        self._parse_finish_reason(response)
+
+    def _parse_event(self, line: bytes) -> None:
+        if not line.startswith(b"data:"):
+            return
+        data = line[len(b"data:") :].strip()
+        if data == b"[DONE]":
+            return
+        try:
+            event = json.loads(data)
+        except ValueError:
+            return
+        for choice in event.get("choices") or []:
+            if choice.get("text") or (choice.get("delta") or {}).get("content"):
+                self.completion_tokens += 1
+        self._parse_finish_reason(event)
+
+    def _parse_finish_reason(self, response: dict) -> None:
+        for choice in response.get("choices") or []:
+            if choice.get("finish_reason"):
+                self.finish_reason = choice["finish_reason"]
@@ -0,0 +1,253 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Fair queueing of the requests sent to a llama.cpp server, and a proxy spreading them over several model slots
+served behind the same port. Both serve the metrics of the requests at `/metrics`.
+"""
+
+# Standard
+from typing import AsyncIterator, Callable, Optional
+import asyncio
+import contextlib
+import logging
+import time
+
+# Third Party
+from fastapi import FastAPI, Request
+from fastapi.responses import Response, StreamingResponse
+import httpx
+
+# Local
+from .common import API_ROOT_WELCOME_MESSAGE
+from .metrics import METRICS_CONTENT_TYPE, ServerMetrics
+
+logger = logging.getLogger(__name__)
+
+# Headers describing a single connection, which must not be forwarded by a proxy
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailers",
+    "transfer-encoding",
+    "upgrade",
+    "host",
+}
+
+
+class RequestQueue:
+    """
+    First-in first-out queue of the requests waiting for one of the `slots` model slots, each slot answering
+    one request at a time. Keeps track of the queue depth and of the time spent waiting for a slot.
+    """
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self._free_slots: asyncio.Queue[int] = asyncio.Queue()
+        for slot in range(slots):
+            self._free_slots.put_nowait(slot)
+        self.waiting = 0
+        self.requests = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    async def acquire(self) -> int:
+        """
+        Waits for a free slot, after the requests queued before, and returns it.
+        """
+        start_time = time.monotonic()
+        self.waiting += 1
+        try:
+            slot = await self._free_slots.get()
+        finally:
+            self.waiting -= 1
+        wait_seconds = time.monotonic() - start_time
+        self.requests += 1
+        self.wait_seconds_total += wait_seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+        return slot
+
+    def release(self, slot: int) -> None:
+        self._free_slots.put_nowait(slot)
+
+    def stats(self) -> dict:
+        return {
+            "slots": self.slots,
+            "busy_slots": self.slots - self._free_slots.qsize(),
+            "queue_depth": self.waiting,
+            "requests": self.requests,
+            "wait_seconds_total": self.wait_seconds_total,
+            "wait_seconds_max": self.wait_seconds_max,
+        }
+
+
+def install_request_queue(
+    app: FastAPI, queue: RequestQueue, metrics: Optional[ServerMetrics] = None
+) -> None:
+    """
+    Queues the POST requests of `app` in `queue`: a request holds its slot until its response, possibly
+    streamed, is complete. The queue statistics are served at `/queue`, and the `metrics` of the requests,
+    if given, at `/metrics`.
+    """
+
+    @app.middleware("http")
+    async def queue_requests(request: Request, call_next):
+        if request.method != "POST":
+            return await call_next(request)
+        start_time = time.monotonic()
+        # read before the slot is acquired, the body is cached for the route
+        request_body = await request.body()
+        slot = await queue.acquire()
+        queue_seconds = time.monotonic() - start_time
+        try:
+            response = await call_next(request)
+        except BaseException:
+            queue.release(slot)
+            raise
+        body = response.body_iterator
+        if response.status_code == 200:
+            body = _observe(
+                metrics, request, request_body, body, start_time, queue_seconds
+            )
+        response.body_iterator = _release_after(body, lambda: queue.release(slot))
+        return response
+
+    @app.get("/queue")
+    def queue_stats():
+        return queue.stats()
+
+    if metrics is not None:
+        _add_metrics_route(app, queue, metrics)
+
+
+def create_proxy_app(
+    slot_urls: list[str],
+    queue: RequestQueue,
+    client: Optional[httpx.AsyncClient] = None,
+    metrics: Optional[ServerMetrics] = None,
+) -> FastAPI:
+    """
+    Creates an application forwarding the requests to the llama.cpp servers at `slot_urls`, one per model slot.
+    POST requests wait in `queue` for a free slot, other requests are answered by the first slot.
+    The `metrics` of the requests, if given, are measured for all the slots at the proxy and served at
+    `/metrics`.
+    """
+    client = client or httpx.AsyncClient(timeout=None)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(_: FastAPI):
+        yield
+        await client.aclose()
+
+    app = FastAPI(title="llama.cpp slots proxy", lifespan=lifespan)
+
+    @app.get("/")
+    def read_root():
+        return {"message": API_ROOT_WELCOME_MESSAGE}
+
+    @app.get("/health")
+    def read_health():
+        # the proxy is started once all the slots are healthy
+        return {"status": "ok"}
+
+    @app.get("/queue")
+    def queue_stats():
+        return queue.stats()
+
+    if metrics is not None:
+        _add_metrics_route(app, queue, metrics)
+
+    @app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
+    async def forward(request: Request, path: str):
+        queued = request.method == "POST"
+        start_time = time.monotonic()
+        request_body = await request.body()
+        slot = await queue.acquire() if queued else 0
+        queue_seconds = time.monotonic() - start_time
+        try:
+            upstream_request = client.build_request(
+                request.method,
+                f"{slot_urls[slot]}/{path}",
+                params=request.query_params,
+                headers=[
+                    (name, value)
+                    for name, value in request.headers.raw
+                    if name.decode("latin-1").lower() not in HOP_BY_HOP_HEADERS
+                ],
+                content=request_body,
+            )
+            upstream = await client.send(upstream_request, stream=True)
+        except BaseException:
+            if queued:
+                queue.release(slot)
+            raise
+
+        async def close_upstream():
+            await upstream.aclose()
+
+        def done():
+            if queued:
+                queue.release(slot)
+
+        body = upstream.aiter_raw()
+        if queued and upstream.status_code == 200:
+            body = _observe(
+                metrics, request, request_body, body, start_time, queue_seconds
+            )
+        return StreamingResponse(
+            _release_after(body, done, close_upstream),
+            status_code=upstream.status_code,
+            headers={
+                name: value
+                for name, value in upstream.headers.items()
+                if name.lower() not in HOP_BY_HOP_HEADERS
+            },
+        )
+
+    return app
+
+
+def _add_metrics_route(app: FastAPI, queue: RequestQueue, metrics: ServerMetrics):
+    @app.get("/metrics")
+    def read_metrics():
+        return Response(
+            content=metrics.render(queue.stats()), media_type=METRICS_CONTENT_TYPE
+        )
+
+
+def _observe(
+    metrics: Optional[ServerMetrics],
+    request: Request,
+    request_body: bytes,
+    body: AsyncIterator[bytes],
+    start_time: float,
+    queue_seconds: float,
+) -> AsyncIterator[bytes]:
+    """
+    Records the `metrics` of the completion requests, once their response `body` is streamed.
+    """
+    if metrics is None or not request.url.path.endswith("/completions"):
+        return body
+    metrics.request_queue_time.observe(queue_seconds)
+    return metrics.observe(request_body, body, start_time)
+
+
+async def _release_after(
+    body: AsyncIterator[bytes],
+    release: Callable[[], None],
+    close: Optional[Callable] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Streams the `body` of a response, and calls `release` once it is complete or interrupted.
+    """
+    try:
+        async for chunk in body:
+            yield chunk
+    finally:
+        try:
+            if close is not None:
+                await close()
+        finally:
+            release()
@@ -0,0 +1,436 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+A long-lived local daemon keeping recently used model servers warm, so that back-to-back evaluate, generate
+and chat invocations on the same model do not load it again.
+
+The daemon listens on a Unix socket. Each connection carries a single request, a JSON line answered by a
+JSON line, or `{"error": ...}`:
+- `{"op": "acquire", "spec": ..., "pid": ...}` returns `{"api_base": ..., "lease": ...}`, the endpoint of a
+  server started with the `get_backend_from_values` arguments in `spec`, for the client process `pid`.
+- `{"op": "release", "lease": ...}` returns the server to the pool, where it stays warm.
+- `{"op": "list"}` returns `{"servers": [...]}`.
+"""
+
+# Standard
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+import json
+import logging
+import os
+import pathlib
+import socket
+import socketserver
+import threading
+import time
+import uuid
+
+# Third Party
+import httpx
+import psutil
+
+# Local
+from ...configuration import DEFAULTS
+from ...defaults import ILAB_PROCESS_STATUS, ILAB_PROCESS_TYPES
+from ...process.process import Process, ProcessRegistry
+from .common import LLAMA_CPP, VLLM
+from .server import BackendServer, ServerConfig
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two checks for idle servers and for leases of exited clients
+REAP_INTERVAL = 10.0
+# Seconds a client waits for the daemon to answer, except while a server starts
+CLIENT_TIMEOUT = 60.0
+
+ServerFactory = Callable[[dict[str, Any]], BackendServer]
+
+
+def _create_server(spec: dict[str, Any]) -> BackendServer:
+    # Local
+    from .backends import get_backend_from_values
+
+    return get_backend_from_values(**spec)
+
+
+def _uses_gpus(spec: dict[str, Any]) -> bool:
+    if spec.get("backend_name") == VLLM:
+        return True
+    return spec.get("backend_name") == LLAMA_CPP and spec.get("gpu_layers") != 0
+
+
+def _share_gpus(spec: dict[str, Any], other: dict[str, Any]) -> bool:
+    """
+    Returns True if the servers started with `spec` and `other` may both load their model on the same GPU.
+    """
+    if not (_uses_gpus(spec) and _uses_gpus(other)):
+        return False
+    devices = spec.get("cuda_visible_devices")
+    other_devices = other.get("cuda_visible_devices")
+    if devices is None or other_devices is None:
+        # a server restricted to no GPU may use any of them
+        return True
+    return bool(set(devices) & set(other_devices))
+
+
+class _PooledEntry:
+    def __init__(self, key: str, spec: dict[str, Any], server: BackendServer):
+        self.key = key
+        self.spec = spec
+        self.server = server
+        self.api_base: Optional[str] = None
+        # leases held by client processes, by lease id
+        self.leases: dict[str, int] = {}
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()
+
+    @property
+    def pid(self) -> Optional[int]:
+        process = getattr(self.server, "process", None)
+        return getattr(process, "pid", None)
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "model_path": str(self.server.model_path),
+            "backend": self.server.get_backend_type(),
+            "api_base": self.api_base,
+            "pid": self.pid,
+            "leases": len(self.leases),
+            "idle_seconds": round(time.monotonic() - self.last_used, 1),
+        }
+
+
+class _ServerPoolRequestHandler(socketserver.StreamRequestHandler):
+    server: "ServerPoolDaemon"
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            response = self.server.handle_request_message(request)
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            logger.exception("Failed to handle a server pool request")
+            response = {"error": str(exc)}
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class ServerPoolDaemon(socketserver.ThreadingUnixStreamServer):
+    """
+    Hands out the endpoints of warm model servers on the Unix socket at `socket_path`, by model and serving
+    settings.
+
+    At most `max_servers` servers are kept. Servers without leases are stopped, least recently used first,
+    to make room for a new server, when less than `min_available_memory` of the system memory is available,
+    and after `idle_timeout` seconds without use. As vLLM reserves most of the memory of its GPUs, the
+    servers without leases on the GPUs of a new vLLM server are stopped before it starts. Leases of exited client processes are dropped.
+    The daemon and its servers are tracked in the process registry.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        socket_path: str,
+        max_servers: int = DEFAULTS.SERVER_POOL_MAX_SERVERS,
+        idle_timeout: float = DEFAULTS.SERVER_POOL_IDLE_TIMEOUT,
+        min_available_memory: float = DEFAULTS.SERVER_POOL_MIN_AVAILABLE_MEMORY,
+        server_factory: ServerFactory = _create_server,
+        log_file: Optional[pathlib.Path] = None,
+        process_registry_file: Optional[pathlib.Path] = None,
+    ):
+        if os.path.exists(socket_path):
+            if is_server_pool_running(socket_path):
+                raise RuntimeError(
+                    f"A server pool is already listening on {socket_path}"
+                )
+            # left behind by a daemon that did not shut down cleanly
+            os.unlink(socket_path)
+        os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+        super().__init__(socket_path, _ServerPoolRequestHandler)
+        self.socket_path = socket_path
+        self.max_servers = max_servers
+        self.idle_timeout = idle_timeout
+        self.min_available_memory = min_available_memory
+        self.server_factory = server_factory
+        # least recently used first
+        self._entries: OrderedDict[str, _PooledEntry] = OrderedDict()
+        self._leases: dict[str, _PooledEntry] = {}
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+
+        self.local_uuid = str(uuid.uuid1())
+        self.log_file = log_file or pathlib.Path(
+            DEFAULTS.LOGS_DIR,
+            "server_pool",
+            f"server-pool-{self.local_uuid}.log",
+        )
+        # the daemon is not tracked without a registry
+        self.process_registry_file = process_registry_file
+        self._update_registry()
+        self._reaper = threading.Thread(target=self._reap, daemon=True)
+        self._reaper.start()
+
+    def handle_request_message(self, request: dict[str, Any]) -> dict[str, Any]:
+        op = request.get("op")
+        if op == "acquire":
+            return self.acquire(request["spec"], int(request["pid"]))
+        if op == "release":
+            self.release(request["lease"])
+            return {}
+        if op == "list":
+            with self._lock:
+                return {"servers": [e.to_json() for e in self._entries.values()]}
+        raise ValueError(f"Unknown server pool operation: {op}")
+
+    def acquire(self, spec: dict[str, Any], pid: int) -> dict[str, Any]:
+        """
+        Returns the endpoint of a warm server started with `spec`, starting one if needed, and leases it to
+        the client process `pid`.
+        """
+        key = json.dumps(spec, sort_keys=True)
+        lease = str(uuid.uuid4())
+        shutdowns: list[threading.Thread] = []
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                shutdowns = self._make_room(spec)
+                entry = _PooledEntry(key, spec, self.server_factory(spec))
+                self._entries[key] = entry
+            self._entries.move_to_end(key)
+            # held until the server is started, so that it is not evicted meanwhile
+            entry.leases[lease] = pid
+            self._leases[lease] = entry
+
+        try:
+            with entry.lock:
+                if entry.api_base is None:
+                    for shutdown in shutdowns:
+                        # the new server needs the memory they release
+                        shutdown.join()
+                    self._relieve_memory_pressure(entry)
+                    start_time = time.monotonic()
+                    entry.api_base = entry.server.run_detached(max_startup_retries=1)
+                    logger.info(
+                        f"Started a {entry.server.get_backend_type()} server for {entry.server.model_path} "
+                        f"at {entry.api_base} in {time.monotonic() - start_time:.1f} seconds"
+                    )
+                    self._update_registry()
+                else:
+                    logger.info(
+                        f"Reusing the warm server for {entry.server.model_path} at {entry.api_base}"
+                    )
+        except BaseException:
+            self.release(lease)
+            with self._lock:
+                if entry.api_base is None and not entry.leases:
+                    self._entries.pop(key, None)
+            raise
+        return {"api_base": entry.api_base, "lease": lease}
+
+    def release(self, lease: str) -> None:
+        with self._lock:
+            entry = self._leases.pop(lease, None)
+            if entry is not None:
+                entry.leases.pop(lease, None)
+                entry.last_used = time.monotonic()
+
+    def _make_room(self, spec: dict[str, Any]) -> list[threading.Thread]:
+        """
+        Stops idle servers, least recently used first, until fewer than `max_servers` are left, and the
+        idle servers on the GPUs of a new vLLM server started with `spec`. Returns their shutdowns, which
+        must finish before the new server starts. Called with the lock held.
+        """
+        shutdowns = []
+        if spec.get("backend_name") == VLLM:
+            for entry in list(self._entries.values()):
+                if not entry.leases and _share_gpus(spec, entry.spec):
+                    shutdowns.append(
+                        self._evict(entry, "to free its GPUs for a new vLLM server")
+                    )
+        while len(self._entries) >= self.max_servers:
+            idle = [entry for entry in self._entries.values() if not entry.leases]
+            if not idle:
+                logger.warning(
+                    f"All the {len(self._entries)} servers of the pool are in use, starting one more"
+                )
+                break
+            shutdowns.append(self._evict(idle[0], "to make room for a new server"))
+        return shutdowns
+
+    def _relieve_memory_pressure(self, new_entry: _PooledEntry) -> None:
+        """
+        Stops idle servers, least recently used first, while less than `min_available_memory` of the
+        system memory is available for `new_entry`. Each server is stopped before the memory is measured
+        again, so that only the servers needed are stopped.
+        """
+        while True:
+            with self._lock:
+                if not self._memory_pressure():
+                    return
+                idle = [
+                    entry
+                    for entry in self._entries.values()
+                    if not entry.leases and entry is not new_entry
+                ]
+                if not idle:
+                    logger.warning(
+                        "Low on memory, but all the servers of the pool are in use, starting one more"
+                    )
+                    return
+                shutdown = self._evict(idle[0], "to free memory for a new server")
+            shutdown.join()
+
+    def _memory_pressure(self) -> bool:
+        memory = psutil.virtual_memory()
+        return memory.available < self.min_available_memory * memory.total
+
+    def _evict(self, entry: _PooledEntry, reason: str) -> threading.Thread:
+        logger.info(f"Stopping the server for {entry.server.model_path} {reason}")
+        self._entries.pop(entry.key, None)
+        # shutting down may wait for the GPU memory to be released
+        shutdown = threading.Thread(target=self._shutdown_server, args=(entry,))
+        shutdown.start()
+        return shutdown
+
+    def _shutdown_server(self, entry: _PooledEntry) -> None:
+        try:
+            entry.server.shutdown()
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception(f"Failed to stop the server for {entry.server.model_path}")
+        self._update_registry()
+
+    def _reap(self) -> None:
+        while not self._closed.wait(REAP_INTERVAL):
+            self.reap()
+
+    def reap(self) -> None:
+        """
+        Drops the leases of exited clients, and stops the servers idle for more than `idle_timeout` seconds.
+        """
+        with self._lock:
+            for lease, entry in list(self._leases.items()):
+                if not psutil.pid_exists(entry.leases[lease]):
+                    logger.debug(f"Dropping the lease {lease} of an exited client")
+                    del self._leases[lease]
+                    del entry.leases[lease]
+                    entry.last_used = time.monotonic()
+            now = time.monotonic()
+            for entry in list(self._entries.values()):
+                if not entry.leases and now - entry.last_used > self.idle_timeout:
+                    self._evict(entry, f"idle for {self.idle_timeout} seconds")
+
+    def _update_registry(self) -> None:
+        if self.process_registry_file is None:
+            return
+        with self._lock:
+            children = [entry.pid for entry in self._entries.values() if entry.pid]
+        process = Process(
+            pid=os.getpid(),
+            log_path=self.log_file,
+            ptype=ILAB_PROCESS_TYPES.SERVER_POOL,
+            children=children,
+        )
+        if self._closed.is_set():
+            process.complete(ILAB_PROCESS_STATUS.DONE.value)
+        try:
+            ProcessRegistry(self.process_registry_file).load().add(
+                self.local_uuid, process
+            ).persist()
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception("Failed to update the process registry")
+
+    def server_close(self):
+        self._closed.set()
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+            self._leases.clear()
+        for entry in entries:
+            logger.info(f"Stopping the server for {entry.server.model_path}")
+            self._shutdown_server(entry)
+        self._update_registry()
+
+
+class PooledServer(BackendServer):
+    """
+    A `BackendServer` getting its endpoint from the `ServerPoolDaemon` listening on `socket_path`, which
+    starts `server` with the `get_backend_from_values` arguments in `spec` unless it is already warm.
+    Shutting it down returns the server to the pool. Running it in the foreground runs `server` itself.
+    """
+
+    def __init__(self, server: BackendServer, spec: dict[str, Any], socket_path: str):
+        super().__init__(
+            server.model_family,
+            server.model_path,
+            server.chat_template,
+            server.host,
+            server.port,
+            ServerConfig(server.config.api_base),
+        )
+        self.server = server
+        self.spec = spec
+        self.socket_path = socket_path
+        self.lease: Optional[str] = None
+
+    def run(self):
+        self.server.run()
+
+    def run_detached(
+        self,
+        http_client: httpx.Client | None = None,
+        background: bool = True,
+        foreground_allowed: bool = False,
+        max_startup_retries: int = 0,
+    ) -> str:
+        logger.info(f"Getting a model server from the pool at {self.socket_path}")
+        response = request_server_pool(
+            self.socket_path,
+            {"op": "acquire", "spec": self.spec, "pid": os.getpid()},
+            # the model server may have to start
+            timeout=None,
+        )
+        self.lease = response["lease"]
+        return response["api_base"]
+
+    def shutdown(self):
+        super().shutdown()
+        if self.lease is not None:
+            request_server_pool(
+                self.socket_path, {"op": "release", "lease": self.lease}
+            )
+            self.lease = None
+
+    def get_backend_type(self):
+        return self.server.get_backend_type()
+
+
+def request_server_pool(
+    socket_path: str,
+    request: dict[str, Any],
+    timeout: Optional[float] = CLIENT_TIMEOUT,
+) -> dict[str, Any]:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as f:
+            response = json.loads(f.readline())
+    if "error" in response:
+        raise RuntimeError(f"Server pool at {socket_path} failed: {response['error']}")
+    return response
+
+
+def is_server_pool_running(socket_path: str) -> bool:
+    """
+    Returns True if a process accepts connections on the Unix socket at `socket_path`.
+    """
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(socket_path):
+        return False
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            return False
+    return True
@@ -2,6 +2,7 @@
 
 # Standard
 from typing import List, Optional, Tuple
+import contextlib
 import json
 import logging
 import os
@@ -25,11 +26,13 @@ from ...configuration import get_api_base
 from .common import (
     CHAT_TEMPLATE_AUTO,
     CHAT_TEMPLATE_TOKENIZER,
+    HEALTH_CHECK_TIMEOUT,
     VLLM,
     Closeable,
     ServerException,
     free_tcp_ipv4_port,
     get_model_template,
+    is_server_healthy,
     safe_close_all,
     verify_template_exists,
 )
@@ -40,6 +43,12 @@ logger = logging.getLogger(__name__)
 # Useful for testing (mocking time.sleep for this module only)
 _sleep = time.sleep
 
+# Seconds between the first readiness checks of a starting server, doubled after each check up to the maximum
+HEALTH_CHECK_INITIAL_INTERVAL = 0.05
+HEALTH_CHECK_MAX_INTERVAL = 2.0
+# Startup attempts used to poll the list of models and sleep for 2 seconds, about 4 seconds each
+STARTUP_ATTEMPT_SECONDS = 4
+
 
 class Server(BackendServer):
     def __init__(
@@ -54,6 +63,7 @@ class Server(BackendServer):
         vllm_args: typing.Iterable[str] | None = (),
         max_startup_attempts: int | None = None,
         log_file: pathlib.Path | None = None,
+        cuda_visible_devices: typing.Iterable[str] | None = None,
     ):
         sc = ServerConfig(api_base, log_file)
         super().__init__(model_family, model_path, chat_template, host, port, sc)
@@ -64,6 +74,9 @@ class Server(BackendServer):
         self.vllm_args = list(vllm_args) if vllm_args is not None else []
         self.process: subprocess.Popen | None = None
         self.max_startup_attempts = max_startup_attempts
+        self.cuda_visible_devices = (
+            list(cuda_visible_devices) if cuda_visible_devices is not None else None
+        )
 
     def run(self):
         self.process, files = run_vllm(
@@ -75,6 +88,7 @@ class Server(BackendServer):
             self.vllm_args,
             self.background,
             log_file=self.config.log_file,
+            cuda_visible_devices=self.cuda_visible_devices,
         )
         self.register_resources(files)
 
@@ -99,6 +113,7 @@ class Server(BackendServer):
             self.vllm_args,
             background=background,
             log_file=self.config.log_file,
+            cuda_visible_devices=self.cuda_visible_devices,
         )
         self.register_resources(files)
         return server_process
@@ -119,42 +134,62 @@ class Server(BackendServer):
         logger.debug(f"Using available port {port} for temporary model serving.")
 
         temp_api_base = get_api_base(self.host, port)
+        start_time = time.monotonic()
         vllm_server_process = self.create_server_process(port, background)
-        logger.info("Starting a temporary vLLM server at %s", temp_api_base)
-        count = 0
-        # Each call to check_api_base takes >2s + 2s sleep
+        launch_seconds = time.monotonic() - start_time
+        logger.info(
+            "Starting a temporary vLLM server at %s, this might take a moment...",
+            temp_api_base,
+        )
         # Default to 120 if not specified (~8 mins of wait time)
         vllm_startup_max_attempts = self.max_startup_attempts or 120
-        start_time_secs = time.time()
-        while count < vllm_startup_max_attempts:
-            count += 1
-            # Check if the process is still alive
-            if vllm_server_process.poll():
-                if foreground_allowed and background:
+        deadline = start_time + vllm_startup_max_attempts * STARTUP_ATTEMPT_SECONDS
+        interval = HEALTH_CHECK_INITIAL_INTERVAL
+        checks = 0
+        # Poll through the caller's client, so the checks use its TLS settings
+        # and connection pool, and only own a client when none was passed
+        with (
+            contextlib.nullcontext(http_client)
+            if http_client is not None
+            else httpx.Client(timeout=HEALTH_CHECK_TIMEOUT)
+        ) as client:
+            while not is_server_healthy(client, self.host, port):
+                checks += 1
+                # Check if the process is still alive
+                if vllm_server_process.poll() is not None:
+                    if foreground_allowed and background:
+                        raise ServerException(
+                            "vLLM failed to start.  Retry with --enable-serving-output to learn more about the failure."
+                        )
+                    raise ServerException("vLLM failed to start.")
+                if time.monotonic() > deadline:
+                    duration = round(time.monotonic() - start_time, 1)
+                    logger.info(
+                        "Gave up waiting for vLLM server to start at %s after %s seconds",
+                        temp_api_base,
+                        duration,
+                    )
+                    shutdown_process(vllm_server_process, 20)
                     raise ServerException(
-                        "vLLM failed to start.  Retry with --enable-serving-output to learn more about the failure."
+                        f"vLLM failed to start up in {duration} seconds"
                     )
-                raise ServerException("vLLM failed to start.")
-            logger.info(
-                "Waiting for the vLLM server to start at %s, this might take a moment... Attempt: %s/%s",
-                temp_api_base,
-                count,
-                vllm_startup_max_attempts,
-            )
-            if check_api_base(temp_api_base, http_client):
-                logger.info("vLLM engine successfully started at %s", temp_api_base)
-                break
-            if count == vllm_startup_max_attempts:
-                logger.info(
-                    "Gave up waiting for vLLM server to start at %s after %s attempts",
+                logger.debug(
+                    "vLLM server at %s not ready yet, checking again in %.2f seconds",
                     temp_api_base,
-                    vllm_startup_max_attempts,
+                    interval,
                 )
-                duration = round(time.time() - start_time_secs, 1)
-                shutdown_process(vllm_server_process, 20)
-                # pylint: disable=raise-missing-from
-                raise ServerException(f"vLLM failed to start up in {duration} seconds")
-            _sleep(2)
+                _sleep(interval)
+                interval = min(interval * 2, HEALTH_CHECK_MAX_INTERVAL)
+        ready_seconds = time.monotonic() - start_time
+        logger.info(
+            "vLLM engine successfully started at %s in %.1f seconds "
+            "(process launch %.2f s, engine startup %.1f s, %d readiness checks)",
+            temp_api_base,
+            ready_seconds,
+            launch_seconds,
+            ready_seconds - launch_seconds,
+            checks + 1,
+        )
         return (vllm_server_process, temp_api_base)
 
     def run_detached(
@@ -261,6 +296,7 @@ def run_vllm(
     vllm_args: list[str],
     background: bool,
     log_file: pathlib.Path | None = None,
+    cuda_visible_devices: list[str] | None = None,
 ) -> typing.Tuple[subprocess.Popen, list[Closeable]]:
     """
     Start an OpenAI-compatible server with vLLM.
@@ -280,6 +316,7 @@ def run_vllm(
         background (bool):            Whether the stdout and stderr vLLM should be sent to /dev/null (True)
                                       or stay in the foreground(False).
         log_file (Path):              File to write stdout and stderr
+        cuda_visible_devices (list of str): GPUs the server is restricted to, all of them if None
     Returns:
         tuple: A tuple containing two values:
             vllm_process (subprocess.Popen): process of the vllm server
@@ -296,6 +333,8 @@ def run_vllm(
     vllm_env = os.environ.copy()
     # Reset vllm logging to the default (enabled)
     vllm_env.pop("VLLM_CONFIGURE_LOGGING", None)
+    if cuda_visible_devices is not None:
+        vllm_env["CUDA_VISIBLE_DEVICES"] = ",".join(cuda_visible_devices)
 
     try:
         # Note: start_new_session=True is needed to create a process group which will later be used
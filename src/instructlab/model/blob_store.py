@@ -0,0 +1,236 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Content-addressed store of model files. Each distinct file content is stored once under the ilab data directory,
+as `sha256/<digest>`, and the directories of downloaded models and training checkpoints are link farms over the
+store: their files are symbolic links to the blobs, shared by all the models with the same files. Blobs no model
+links to anymore are removed by `ilab model remove` and `ilab model gc`.
+"""
+
+# Standard
+from pathlib import Path
+from typing import Iterable, Optional
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import stat
+import time
+import uuid
+
+# First Party
+from instructlab.defaults import DEFAULTS
+
+logger = logging.getLogger(__name__)
+
+HASH_BLOCK_SIZE = 1024 * 1024
+# Blobs and temporary files younger than this are kept by garbage collection, a download may be linking them
+GC_GRACE_SECONDS = 3600
+
+
+def file_digest(path: Path) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+class BlobStore:
+    """
+    Blobs are read-only: writing to a link of the store raises instead of changing the files of every model
+    sharing the blob. Besides the default model, checkpoint and OCI cache directories, the store records the
+    directories it links into, so that garbage collection sees the models downloaded elsewhere.
+    """
+
+    def __init__(self, root: Optional[str | Path] = None):
+        self.root = Path(root or DEFAULTS.BLOBS_DIR)
+        self.blobs_dir = self.root / "sha256"
+        self.tmp_dir = self.root / "tmp"
+        self.roots_file = self.root / "roots.json"
+
+    def blob_path(self, digest: str) -> Path:
+        return self.blobs_dir / digest
+
+    def blob_of(self, path: Path) -> Optional[Path]:
+        """Returns the blob the link at path points to, None if path is not a link into the store."""
+        if not os.path.islink(path):
+            return None
+        target = Path(os.path.join(os.path.dirname(path), os.readlink(path)))
+        if Path(os.path.normpath(target.parent)) != Path(
+            os.path.normpath(self.blobs_dir)
+        ):
+            return None
+        return self.blobs_dir / target.name
+
+    def adopt(self, path: Path, digest: Optional[str] = None) -> Path:
+        """
+        Stores the content of the file at path, unless the store has it already, and replaces the file with a
+        link to the blob. digest is the sha256 of the content, computed if not given. Returns the blob.
+        """
+        path = Path(path)
+        blob = self.blob_of(path)
+        if blob is not None:
+            return blob
+        blob = self.blob_path(digest or file_digest(path))
+        if not blob.exists():
+            self.blobs_dir.mkdir(parents=True, exist_ok=True)
+            self.tmp_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.tmp_dir / uuid.uuid4().hex
+            try:
+                # no copy on the same file system
+                os.link(path, tmp_path)
+            except OSError:
+                shutil.copy2(path, tmp_path)
+            os.chmod(tmp_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            os.replace(tmp_path, blob)
+        else:
+            logger.debug(f"{path} is stored already as {blob.name}")
+        self.link(blob, path)
+        return blob
+
+    def link(self, blob: Path, path: Path) -> None:
+        """Replaces path, atomically if it exists, with a link to blob."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+        os.symlink(blob, tmp_path)
+        os.replace(tmp_path, path)
+
+    def adopt_tree(self, directory: Path) -> int:
+        """
+        Stores the files of directory, except those of hidden directories such as download caches, and
+        returns the number of bytes saved by the files the store had already.
+        """
+        directory = Path(directory)
+        self.register_root(directory)
+        saved_bytes = 0
+        for dirpath, dirnames, filenames in os.walk(directory):
+            dirnames[:] = [name for name in dirnames if not name.startswith(".")]
+            for filename in filenames:
+                path = Path(dirpath) / filename
+                if path.is_symlink() or not path.is_file():
+                    continue
+                size = path.stat().st_size
+                blob = self.blob_path(file_digest(path))
+                if blob.exists():
+                    saved_bytes += size
+                self.adopt(path, digest=blob.name)
+        if saved_bytes:
+            logger.info(
+                f"Saved {saved_bytes / 1024**2:.1f} MiB of files of {directory} stored already"
+            )
+        return saved_bytes
+
+    def detach_tree(self, directory: Path) -> None:
+        """Replaces the links of directory into the store with copies of the blobs, so they can be written."""
+        for dirpath, _, filenames in os.walk(directory):
+            for filename in filenames:
+                path = Path(dirpath) / filename
+                blob = self.blob_of(path)
+                if blob is None:
+                    continue
+                tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+                shutil.copyfile(blob, tmp_path)
+                os.replace(tmp_path, path)
+
+    def linked_blobs(self, directory: Path) -> set[Path]:
+        """Returns the blobs linked from the files of directory, or from directory if it is a file."""
+        directory = Path(directory)
+        if not directory.is_dir() or directory.is_symlink():
+            blob = self.blob_of(directory)
+            return {blob} if blob is not None else set()
+        blobs = set()
+        for dirpath, dirnames, filenames in os.walk(directory):
+            for name in filenames + dirnames:
+                blob = self.blob_of(Path(dirpath) / name)
+                if blob is not None:
+                    blobs.add(blob)
+        return blobs
+
+    def register_root(self, directory: Path) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / "roots.lock", "w", encoding="utf-8") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            roots = self._registered_roots()
+            path = str(Path(directory).resolve())
+            if path in roots:
+                return
+            tmp_path = self.roots_file.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(roots + [path]), encoding="utf-8")
+            os.replace(tmp_path, self.roots_file)
+
+    def _registered_roots(self) -> list[str]:
+        try:
+            return json.loads(self.roots_file.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return []
+        except ValueError as exc:
+            logger.warning(
+                f"Ignoring invalid blob store roots {self.roots_file}: {exc}"
+            )
+            return []
+
+    def roots(self) -> list[Path]:
+        """Returns the existing directories which may link into the store."""
+        roots = [
+            DEFAULTS.MODELS_DIR,
+            DEFAULTS.CHECKPOINTS_DIR,
+            DEFAULTS.OCI_DIR,
+            DEFAULTS.PHASED_DIR,
+            *self._registered_roots(),
+        ]
+        return [Path(root) for root in dict.fromkeys(roots) if os.path.isdir(root)]
+
+    def referenced_blobs(self) -> set[Path]:
+        blobs: set[Path] = set()
+        for root in self.roots():
+            blobs |= self.linked_blobs(root)
+        return blobs
+
+    def release(self, blobs: Iterable[Path]) -> int:
+        """
+        Removes the blobs no model links to anymore, once models linking to them are removed, and returns the
+        number of bytes freed.
+        """
+        blobs = set(blobs)
+        if not blobs:
+            return 0
+        return self._remove(blobs - self.referenced_blobs())
+
+    def collect_garbage(self, dry_run: bool = False) -> tuple[int, int]:
+        """
+        Removes the blobs no model links to, and the leftovers of interrupted downloads, apart from those
+        changed in the last GC_GRACE_SECONDS. Returns the number of blobs removed and of bytes freed.
+        """
+        if not self.blobs_dir.is_dir():
+            return 0, 0
+        deadline = time.time() - GC_GRACE_SECONDS
+        referenced = self.referenced_blobs()
+        garbage = {
+            blob
+            for blob in self.blobs_dir.iterdir()
+            if blob not in referenced and blob.lstat().st_ctime < deadline
+        }
+        if self.tmp_dir.is_dir():
+            garbage |= {
+                path
+                for path in self.tmp_dir.iterdir()
+                if path.lstat().st_ctime < deadline
+            }
+        if dry_run:
+            return len(garbage), sum(path.lstat().st_size for path in garbage)
+        return len(garbage), self._remove(garbage)
+
+    def _remove(self, paths: Iterable[Path]) -> int:
+        freed_bytes = 0
+        for path in paths:
+            try:
+                size = path.lstat().st_size
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            freed_bytes += size
+            logger.debug(f"Removed blob {path.name}")
+        return freed_bytes
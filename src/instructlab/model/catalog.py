@@ -0,0 +1,136 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+A persistent catalog of the model files and directories found by `ilab model list`.
+"""
+
+# Standard
+from pathlib import Path
+from typing import Iterable, Optional
+import hashlib
+import logging
+import os
+import sqlite3
+
+# First Party
+from instructlab.defaults import DEFAULTS
+from instructlab.utils import is_model_gguf, is_model_safetensors
+
+logger = logging.getLogger(__name__)
+
+
+class ModelCatalog:
+    """
+    SQLite index of whether a path holds a valid model, keyed by the path and the signature of its content.
+
+    The signature of a file is its modification time and size, the one of a directory is the name, modification
+    time and size of each of its files. Validating a model opens its safetensors files and parses its JSON files,
+    so only the entries whose signature changed since they were last listed are validated again.
+
+    The validated entries are written by `close` in a single short transaction, so that concurrent listings do
+    not wait for each other. A catalog that cannot be read only makes the listing slower.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        db_path = db_path or DEFAULTS.MODEL_CATALOG_FILE
+        try:
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            self._db = self._connect(db_path)
+        except (OSError, sqlite3.Error) as exc:
+            # a read-only data directory or a corrupted catalog only makes the listing slower
+            logger.debug(f"Not using the model catalog {db_path}: {exc}")
+            self._db = self._connect(":memory:")
+        self._seen: set[str] = set()
+        self._validated: list[tuple[str, int, int, str, bool]] = []
+
+    @staticmethod
+    def _connect(db_path: str) -> sqlite3.Connection:
+        # autocommit mode: the changes of a listing are committed in a single transaction by close()
+        db = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS models ("
+            "path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, "
+            "signature TEXT NOT NULL, is_model INTEGER NOT NULL)"
+        )
+        return db
+
+    def is_model_dir(self, path: Path, files: Iterable[str]) -> tuple[bool, int]:
+        """
+        Returns whether the directory path, with the given files, holds a safetensors or GGUF model, and the
+        total size of its files.
+        """
+        sha256 = hashlib.sha256()
+        size = 0
+        mtime_ns = 0
+        for name in sorted(files):
+            # follow the links to the blob store, the size is the one of the model files
+            try:
+                stat = Path(path, name).stat(follow_symlinks=True)
+            except OSError as exc:
+                logger.debug(f"Ignoring {name} of {path}: {exc}")
+                continue
+            size += stat.st_size
+            mtime_ns = max(mtime_ns, stat.st_mtime_ns)
+            sha256.update(f"{name}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode())
+        return (
+            self._lookup(
+                path,
+                mtime_ns,
+                size,
+                sha256.hexdigest(),
+                lambda: is_model_safetensors(path) or is_model_gguf(path),
+            ),
+            size,
+        )
+
+    def is_model_file(self, path: Path) -> bool:
+        """Returns whether the file path is a GGUF model."""
+        stat = path.stat()
+        return self._lookup(
+            path, stat.st_mtime_ns, stat.st_size, "", lambda: is_model_gguf(path)
+        )
+
+    def _lookup(self, path: Path, mtime_ns: int, size: int, signature: str, validate):
+        key = str(path.absolute())
+        self._seen.add(key)
+        try:
+            row = self._db.execute(
+                "SELECT is_model FROM models WHERE path = ? AND mtime_ns = ? AND size = ? AND signature = ?",
+                (key, mtime_ns, size, signature),
+            ).fetchone()
+        except sqlite3.Error as exc:
+            logger.debug(f"Failed to look up {key} in the model catalog: {exc}")
+            row = None
+        if row is not None:
+            return bool(row[0])
+        is_model = bool(validate())
+        logger.debug(f"Validated {key}: {'model' if is_model else 'not a model'}")
+        self._validated.append((key, mtime_ns, size, signature, is_model))
+        return is_model
+
+    def close(self, listed_dirs: Iterable[Path] = ()) -> None:
+        """
+        Forgets the entries of listed_dirs which were not looked up since the catalog was opened, they no
+        longer exist, and saves the catalog.
+        """
+        try:
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.executemany(
+                "INSERT OR REPLACE INTO models VALUES (?, ?, ?, ?, ?)", self._validated
+            )
+            for directory in listed_dirs:
+                prefix = os.path.join(str(Path(directory).absolute()), "")
+                stale = [
+                    (path,)
+                    for (path,) in self._db.execute(
+                        "SELECT path FROM models WHERE substr(path, 1, ?) = ?",
+                        (len(prefix), prefix),
+                    )
+                    if path not in self._seen
+                ]
+                self._db.executemany("DELETE FROM models WHERE path = ?", stale)
+            self._db.execute("COMMIT")
+        except sqlite3.Error as exc:
+            logger.debug(f"Failed to save the model catalog: {exc}")
+        finally:
+            self._db.close()
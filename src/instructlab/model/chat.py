@@ -1,6 +1,7 @@
 # SPDX-License-Identifier: Apache-2.0
 
 # Standard
+from concurrent.futures import Future, ThreadPoolExecutor
 from subprocess import CalledProcessError
 import datetime
 import json
@@ -34,10 +35,17 @@ from instructlab.client_utils import HttpClientParams
 # Local
 from ..client_utils import http_client
 from ..feature_gates import FeatureGating, FeatureScopes, GatedFeatures
+from ..rag.context_assembler import ContextAssembler
 from ..rag.document_store import DocumentStoreRetriever
 from ..rag.document_store_factory import create_document_retriever
 from ..utils import get_cli_helper_sysprompt, get_model_arch, get_sysprompt
 from .backends import backends
+from .token_counter import (
+    MessageTokenCounter,
+    TokenCounter,
+    approximate_token_count,
+    create_token_counter,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -91,6 +99,8 @@ class ConsoleChatBot:  # pylint: disable=too-many-instance-attributes
         model,
         client,
         retriever=None,
+        context_assembler=None,
+        count_tokens=None,
         vi_mode=False,
         prompt=True,
         vertical_overflow="ellipsis",
@@ -102,8 +112,18 @@ class ConsoleChatBot:  # pylint: disable=too-many-instance-attributes
         backend_type="",
         box=True,
     ):
+        if max_tokens and max_ctx_size is not None and max_tokens >= max_ctx_size:
+            # no room would be left for the prompt within the context window
+            raise ChatException(
+                f"The maximum number of tokens of a response ({max_tokens}) must be lower than the context size ({max_ctx_size})"
+            )
         self.client = client
         self.retriever: DocumentStoreRetriever | None = retriever
+        self.context_assembler: ContextAssembler | None = context_assembler
+        # token counts of the messages, to keep the conversation within the context window of llama.cpp
+        self.message_tokens = MessageTokenCounter(
+            count_tokens or approximate_token_count
+        )
         self.model = model
         self.vi_mode = vi_mode
         self.vertical_overflow = vertical_overflow
@@ -117,10 +137,20 @@ class ConsoleChatBot:  # pylint: disable=too-many-instance-attributes
 
         self.console = Console()
 
+        # the context is retrieved in a single background thread, one query at a time, keyed by the stripped query
+        self._retrieval_executor: ThreadPoolExecutor | None = None
+        self._retrievals: dict[str, Future] = {}
+        if retriever is not None:
+            self._retrieval_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="chat-retrieval"
+            )
+
         self.input = None
         if prompt:
             os.makedirs(os.path.dirname(PROMPT_HISTORY_FILEPATH), exist_ok=True)
             self.input = PromptSession(history=FileHistory(PROMPT_HISTORY_FILEPATH))
+            if retriever is not None:
+                self.input.default_buffer.on_text_changed += self._speculate_retrieval
         self.multiline = False
         self.multiline_mode = 0
 
@@ -128,6 +158,8 @@ class ConsoleChatBot:  # pylint: disable=too-many-instance-attributes
         self._reset_session()
 
     def _reset_session(self, hard=False):
+        # the context retrieved for the inputs of the previous session is not needed anymore
+        self._cancel_retrievals()
         if hard:
             self.loaded = {}
         self.info["messages"] = (
@@ -359,6 +391,101 @@ class ConsoleChatBot:  # pylint: disable=too-many-instance-attributes
         message = {"role": role, "content": content}
         self.info["messages"].append(message)
 
+    def _retrieve_context(self, query: str) -> str:
+        assert self.retriever is not None
+        if self.context_assembler is not None:
+            # keep the context within its token budget, so that it does not evict the conversation history
+            return self.context_assembler.assemble(
+                self.retriever.retrieve(user_query=query)
+            )
+        return self.retriever.augmented_context(user_query=query)
+
+    def _submit_retrieval(self, query: str) -> Future:
+        """
+        Starts retrieving the context of `query` in the background, unless it is already being retrieved.
+        The pending retrievals of other queries are cancelled.
+        """
+        assert self._retrieval_executor is not None
+        query = query.strip()
+        for other_query, future in list(self._retrievals.items()):
+            if other_query != query and future.cancel():
+                del self._retrievals[other_query]
+        future = self._retrievals.get(query)
+        if future is None:
+            future = self._retrieval_executor.submit(self._retrieve_context, query)
+            self._retrievals[query] = future
+        return future
+
+    def _cancel_retrievals(self):
+        """Cancels the retrievals that have not started, speculative ones of partial inputs included."""
+        for future in self._retrievals.values():
+            future.cancel()
+        self._retrievals.clear()
+
+    def close(self):
+        """Stops the background retrieval thread, once the retrieval it may be running is finished."""
+        self._retrievals.clear()
+        if self._retrieval_executor is not None:
+            self._retrieval_executor.shutdown(cancel_futures=True)
+            self._retrieval_executor = None
+
+    def _speculate_retrieval(self, buffer):
+        """
+        Called on each change of the input: in multiline mode, the context of the input is retrieved speculatively
+        each time a line is completed, so that it is already available if the input is submitted as is.
+        """
+        text = buffer.text
+        if (
+            self.multiline
+            and text.endswith("\n")
+            and text.strip()
+            and not text.lstrip().startswith("/")
+        ):
+            self._submit_retrieval(text)
+
+    def _prepare_turn(self, content: str) -> dict:
+        """
+        Adds the user message to the conversation, preceded by its RAG context if enabled, and returns the
+        parameters of the chat completion request. The context is retrieved in the background while the request
+        parameters are built and the history is tokenized. Only this preparation overlaps with the retrieval:
+        the request carries the retrieved context, so it is sent, and its response streamed, once the retrieval
+        is finished. In multiline mode, the retrieval usually started while the input was typed.
+        """
+        retrieval = None
+        if self.retriever is not None:
+            retrieval = self._submit_retrieval(content)
+
+        # Deal with temp multiline
+        if self.multiline_mode == 2:
+            self.multiline_mode = 0
+            self.multiline = not self.multiline
+
+        # Temperature parameters
+        create_params = {}
+        # https://platform.openai.com/docs/api-reference/chat/create#chat-create-temperature
+        create_params["temperature"] = self.temperature
+
+        if self.max_tokens:
+            create_params["max_tokens"] = self.max_tokens
+
+        if self.backend_type == backends.LLAMA_CPP:
+            # tokenize the new messages of the history while the context is retrieved
+            for message in self.info["messages"]:
+                self.message_tokens.count(message)
+            self.message_tokens.count({"role": "user", "content": content})
+
+        if retrieval is not None:
+            try:
+                context = retrieval.result()
+            finally:
+                # speculative retrievals of partial inputs are no longer needed
+                self._cancel_retrievals()
+            self._update_conversation(context, "assistant")
+
+        # Update message history and token counters
+        self._update_conversation(content, "user")
+        return create_params
+
     def _handle_list_contexts(self, _):
         # reconstruct contexts dict based on values passed at runtime
         context_dict = dict.fromkeys(CONTEXTS, None)
@@ -415,27 +542,8 @@ class ConsoleChatBot:  # pylint: disable=too-many-instance-attributes
         self.log_message(PROMPT_PREFIX + content + "\n\n")
 
         # if RAG is enabled, fetch context and insert into session
-        # TODO: what if context is already too long? note that current retriever implementation concatenates all docs
         # TODO: better way to check whether we should perform retrieval?
-        if self.retriever is not None:
-            context = self.retriever.augmented_context(user_query=content)
-            self._update_conversation(context, "assistant")
-
-        # Update message history and token counters
-        self._update_conversation(content, "user")
-
-        # Deal with temp multiline
-        if self.multiline_mode == 2:
-            self.multiline_mode = 0
-            self.multiline = not self.multiline
-
-        # Temperature parameters
-        create_params = {}
-        # https://platform.openai.com/docs/api-reference/chat/create#chat-create-temperature
-        create_params["temperature"] = self.temperature
-
-        if self.max_tokens:
-            create_params["max_tokens"] = self.max_tokens
+        create_params = self._prepare_turn(content)
 
         # Get and parse response
         try:
@@ -443,25 +551,22 @@ class ConsoleChatBot:  # pylint: disable=too-many-instance-attributes
                 # Loop to catch situations where we need to retry, such as context length exceeded
                 # We need to catch these errors before they hit the server or else it will crash.
                 # as of llama_cpp_python 0.3.z, BadRequestErrors cause the server to become unavailable
-                if self.backend_type == backends.LLAMA_CPP:
-                    total_context_size = 0
+                if (
+                    self.backend_type == backends.LLAMA_CPP
+                    and self.max_ctx_size is not None
+                ):
                     # this handling can apply to llama-cpp-python only. The exception handling below should still exist for vLLM.
-                    while True:
-                        # we need to loop this. If we only remove 1 message, but it isn't enough to fit our new message in, we can hit the error
-                        # if you have 3 messages in the list, and the last one is 127 tokens with a 128 context window, you need to drop the first two in order to fit the third
-                        for msg in self.info["messages"]:
-                            total_context_size += len(msg["content"])
-                        if (
-                            self.max_ctx_size is not None
-                            and self.max_ctx_size < total_context_size
-                            and len(self.info["messages"]) > 1
-                        ):
-                            self.info["messages"] = self.info["messages"][1:]
-                            logger.debug(
-                                "Message too large for context size. Dropping from queue."
-                            )
-                        else:
-                            break
+                    # drop as many of the oldest messages as needed for the prompt and the response to fit the context window
+                    # if you have 3 messages in the list, and the last one is 127 tokens with a 128 context window, you need to drop the first two in order to fit the third
+                    messages = self.message_tokens.trim(
+                        self.info["messages"],
+                        max_tokens=self.max_ctx_size - (self.max_tokens or 0),
+                    )
+                    if len(messages) < len(self.info["messages"]):
+                        logger.debug(
+                            f"Messages too large for context size. Dropping {len(self.info['messages']) - len(messages)} from queue."
+                        )
+                        self.info["messages"] = messages
                 try:
                     response = self.client.chat.completions.create(
                         model=self.model,
@@ -600,6 +705,15 @@ def chat_model(
     logs_dir,
     vi_mode,
     visible_overflow,
+    embedding_cache_dir=None,
+    embedding_cache_max_entries=0,
+    index_type=cfg.DEFAULTS.RETRIEVER_INDEX_TYPE,
+    nprobe=cfg.DEFAULTS.RETRIEVER_NPROBE,
+    retrieval_strategy=cfg.DEFAULTS.RETRIEVER_STRATEGY,
+    rrf_k=cfg.DEFAULTS.RETRIEVER_RRF_K,
+    rag_context_token_budget=cfg.DEFAULTS.RETRIEVER_CONTEXT_TOKEN_BUDGET,
+    retriever_socket_path=None,
+    server_pool_socket_path=None,
 ):
     """Runs a chat using the modified model"""
     if rag_enabled and not FeatureGating.feature_available(GatedFeatures.RAG):
@@ -655,6 +769,7 @@ def chat_model(
             vllm_model_family=vllm_model_family,
             vllm_args=vllm_args,
             max_startup_attempts=max_startup_attempts,
+            pool_socket_path=server_pool_socket_path,
         )
 
         backend_type = backend_instance.get_backend_type()
@@ -739,6 +854,14 @@ def chat_model(
             backend_type=backend_type,
             params=params,
             no_decoration=no_decoration,
+            embedding_cache_dir=embedding_cache_dir,
+            embedding_cache_max_entries=embedding_cache_max_entries,
+            index_type=index_type,
+            nprobe=nprobe,
+            retrieval_strategy=retrieval_strategy,
+            rrf_k=rrf_k,
+            rag_context_token_budget=rag_context_token_budget,
+            retriever_socket_path=retriever_socket_path,
         )
     except ChatException as exc:
         print(f"{RED}Executing chat failed with: {exc}{RESET}")
@@ -769,6 +892,14 @@ def chat_cli(
     visible_overflow,
     params,
     no_decoration,
+    embedding_cache_dir=None,
+    embedding_cache_max_entries=0,
+    index_type=cfg.DEFAULTS.RETRIEVER_INDEX_TYPE,
+    nprobe=cfg.DEFAULTS.RETRIEVER_NPROBE,
+    retrieval_strategy=cfg.DEFAULTS.RETRIEVER_STRATEGY,
+    rrf_k=cfg.DEFAULTS.RETRIEVER_RRF_K,
+    rag_context_token_budget=cfg.DEFAULTS.RETRIEVER_CONTEXT_TOKEN_BUDGET,
+    retriever_socket_path=None,
 ):
     """Starts a CLI-based chat with the server"""
     client = OpenAI(
@@ -806,6 +937,13 @@ def chat_cli(
     sys_prompt = CONTEXTS.get(context, "default")(get_model_arch(pathlib.Path(model)))
     loaded["messages"] = [{"role": "system", "content": sys_prompt}]
 
+    # the tokenizer of the model sizes the RAG context and the conversation sent to llama.cpp
+    count_tokens: TokenCounter | None = None
+    if (
+        rag_enabled and rag_context_token_budget > 0
+    ) or backend_type == backends.LLAMA_CPP:
+        count_tokens = create_token_counter(model)
+
     # Instantiate retriever if RAG is enabled
     if rag_enabled:
         logger.debug("RAG enabled for chat; initializing retriever")
@@ -814,10 +952,28 @@ def chat_cli(
             document_store_collection_name=collection_name,
             top_k=top_k,
             embedding_model_path=embedding_model_path,
+            embedding_cache_dir=embedding_cache_dir,
+            embedding_cache_max_entries=embedding_cache_max_entries,
+            index_type=index_type,
+            nprobe=nprobe,
+            strategy=retrieval_strategy,
+            rrf_k=rrf_k,
+            socket_path=retriever_socket_path,
+        )
+        # load the embedding model and the document store now, rather than at the first query
+        retriever.warm_up()
+        context_assembler = (
+            ContextAssembler(
+                count_tokens=count_tokens or approximate_token_count,
+                token_budget=rag_context_token_budget,
+            )
+            if rag_context_token_budget > 0
+            else None
         )
     else:
         logger.debug("RAG not enabled for chat; skipping retrieval setup")
         retriever: DocumentStoreRetriever | None = None
+        context_assembler = None
 
     # Session from CLI
     if session is not None:
@@ -842,6 +998,8 @@ def chat_cli(
         model if model is None else model,
         client=client,
         retriever=retriever,
+        context_assembler=context_assembler,
+        count_tokens=count_tokens,
         vi_mode=vi_mode,
         log_file=log_file,
         prompt=not qq,
@@ -854,41 +1012,49 @@ def chat_cli(
         box=not no_decoration,
     )
 
-    if not qq and session is None:
-        # Greet
-        ccb.greet(help=True)
-
-    # Use the input question to start with
-    if len(question) > 0:
-        question = " ".join(question)
-        if not qq:
-            print(f"{PROMPT_PREFIX}{question}")
-        try:
-            ccb.start_prompt(logger, content=question)
-        except ChatException as exc:
-            raise ChatException(f"API issue found while executing chat: {exc}") from exc
-        except (ChatQuitException, KeyboardInterrupt, EOFError):
+    try:
+        if not qq and session is None:
+            # Greet
+            ccb.greet(help=True)
+
+        # Use the input question to start with
+        if len(question) > 0:
+            question = " ".join(question)
+            if not qq:
+                print(f"{PROMPT_PREFIX}{question}")
+            try:
+                ccb.start_prompt(logger, content=question)
+            except ChatException as exc:
+                raise ChatException(
+                    f"API issue found while executing chat: {exc}"
+                ) from exc
+            except (ChatQuitException, KeyboardInterrupt, EOFError):
+                return
+
+        if qq:
             return
 
-    if qq:
-        return
+        # load the history
+        if session is not None:
+            ccb._load_session_history(loaded)
 
-    # load the history
-    if session is not None:
-        ccb._load_session_history(loaded)
+        # Start chatting
+        while True:
+            try:
+                ccb.start_prompt(logger)
+            except KeyboardInterrupt:
+                continue
+            except ChatException as exc:
+                raise ChatException(
+                    f"API issue found while executing chat: {exc}"
+                ) from exc
+            except httpx.RemoteProtocolError as exc:
+                raise ChatException("Connection to the server was closed") from exc
+            except (ChatQuitException, EOFError):
+                return
 
-    # Start chatting
-    while True:
-        try:
-            ccb.start_prompt(logger)
-        except KeyboardInterrupt:
-            continue
-        except ChatException as exc:
-            raise ChatException(f"API issue found while executing chat: {exc}") from exc
-        except httpx.RemoteProtocolError as exc:
-            raise ChatException("Connection to the server was closed") from exc
-        except (ChatQuitException, EOFError):
-            return
+    finally:
+        ccb.close()
 
 
 def is_openai_server_and_serving_model(
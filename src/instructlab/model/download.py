@@ -18,7 +18,12 @@ from huggingface_hub.errors import GatedRepoError
 # First Party
 from instructlab.configuration import DEFAULTS
 from instructlab.defaults import DEFAULT_INDENT
+from instructlab.model.blob_store import BlobStore
 from instructlab.model.list import list_and_print_models
+from instructlab.model.oci_registry import (
+    OCIRegistryClient,
+    OCIRegistryUnsupportedError,
+)
 from instructlab.utils import (
     check_skopeo_version,
     is_huggingface_repo,
@@ -100,7 +105,7 @@ class HFDownloader(ModelDownloader):
 
     def download_gguf(self) -> None:
         try:
-            hf_hub_download(
+            model_path = hf_hub_download(
                 token=self.hf_token,
                 repo_id=self.repository,
                 revision=self.release,
@@ -113,6 +118,10 @@ class HFDownloader(ModelDownloader):
                 f"\nDownloading GGUF model failed with the following Hugging Face Hub error:\n{DEFAULT_INDENT}{exc}"
             ) from exc
 
+        blob_store = BlobStore()
+        blob_store.register_root(self.download_dest)
+        blob_store.adopt(Path(model_path))
+
     def download_entire_hf_repo(self) -> None:
         try:
             local_dir = os.path.join(self.download_dest, self.repository)
@@ -129,6 +138,8 @@ class HFDownloader(ModelDownloader):
                 f"\nDownloading safetensors model failed with the following Hugging Face Hub error:\n{DEFAULT_INDENT}{exc}"
             ) from exc
 
+        BlobStore().adopt_tree(Path(local_dir))
+
 
 class OCIDownloader(ModelDownloader):
     """
@@ -136,6 +147,22 @@ class OCIDownloader(ModelDownloader):
     We are leveraging OCI v1.1 for this functionality
     """
 
+    def __init__(
+        self,
+        log_level,
+        repository: str,
+        release: str,
+        download_dest: Path,
+        max_concurrency: int = DEFAULTS.OCI_DOWNLOAD_MAX_CONCURRENCY,
+    ) -> None:
+        super().__init__(
+            log_level=log_level,
+            repository=repository,
+            release=release,
+            download_dest=download_dest,
+        )
+        self.max_concurrency = max_concurrency
+
     @staticmethod
     def _extract_sha(sha: str):
         return re.search("sha256:(.*)", sha)
@@ -188,23 +215,7 @@ class OCIDownloader(ModelDownloader):
 
         return oci_model_file_map
 
-    def download(self):
-        logger.info(
-            f"Downloading model from OCI registry:\n{DEFAULT_INDENT}Model: {self.repository}@{self.release}\n{DEFAULT_INDENT}Destination: {self.download_dest}"
-        )
-
-        # raise an exception if user specified tag/SHA embedded in repository instead of specifying --release
-        match = re.search(r"^(?:[^:]*:){2}(.*)$", self.repository)
-        if match:
-            raise ValueError(
-                f"\nInvalid repository supplied:\n{DEFAULT_INDENT}Please specify tag/version '{match.group(1)}' via --release"
-            )
-
-        model_name = self.repository.split("/")[-1]
-        os.makedirs(os.path.join(self.download_dest, model_name), exist_ok=True)
-        oci_dir = f"{DEFAULTS.OCI_DIR}/{model_name}"
-        os.makedirs(oci_dir, exist_ok=True)
-
+    def _skopeo_copy(self, oci_dir: str) -> None:
         # Check if skopeo is installed and the version is at least 1.9
         check_skopeo_version()
 
@@ -226,25 +237,47 @@ class OCIDownloader(ModelDownloader):
                 f"\nFailed to run skopeo command:\n{DEFAULT_INDENT}{e}.\n{DEFAULT_INDENT}stderr: {e.stderr}"
             ) from e
 
+    def download(self):
+        logger.info(
+            f"Downloading model from OCI registry:\n{DEFAULT_INDENT}Model: {self.repository}@{self.release}\n{DEFAULT_INDENT}Destination: {self.download_dest}"
+        )
+
+        # raise an exception if user specified tag/SHA embedded in repository instead of specifying --release
+        match = re.search(r"[:@]([^/:@]*)$", self.repository.removeprefix("docker://"))
+        if match:
+            raise ValueError(
+                f"\nInvalid repository supplied:\n{DEFAULT_INDENT}Please specify tag/version '{match.group(1)}' via --release"
+            )
+
+        model_name = self.repository.split("/")[-1]
+        os.makedirs(os.path.join(self.download_dest, model_name), exist_ok=True)
+        oci_dir = f"{DEFAULTS.OCI_DIR}/{model_name}"
+        os.makedirs(oci_dir, exist_ok=True)
+
+        # the layers are stored once for all the models and releases sharing them
+        blob_store = BlobStore()
+        client = OCIRegistryClient.from_repository(
+            self.repository, max_concurrency=self.max_concurrency, blob_store=blob_store
+        )
+        try:
+            client.pull(self.release, Path(oci_dir))
+        except OCIRegistryUnsupportedError as exc:
+            logger.info(f"Downloading the model with skopeo instead: {exc}")
+            self._skopeo_copy(oci_dir)
+
         file_map = self._build_oci_model_file_map(oci_dir)
         if not file_map:
             raise LookupError("\nFailed to find OCI image blob hashes.")
 
+        blob_store.register_root(self.download_dest)
         blob_dir = f"{oci_dir}/blobs/sha256/"
         for name, dest in file_map.items():
             dest_model_path = Path(self.download_dest) / model_name / str(dest)
-            # unlink any existing version of the file
-            if dest_model_path.exists():
-                dest_model_path.unlink()
-
-            if not dest_model_path.parent.exists():
-                dest_model_path.parent.mkdir(parents=True)
-
-            # create symlink to files in cache to avoid redownloading if model has been downloaded before
-            os.symlink(
-                os.path.join(blob_dir, name),
-                dest_model_path,
-            )
+            # the digest of the layer is verified by the download, link the blob in the cache to the store to
+            # avoid redownloading it if the model has been downloaded before
+            blob = blob_store.adopt(Path(blob_dir, name), digest=name)
+            # replaces any existing version of the file
+            blob_store.link(blob, dest_model_path)
 
 
 def download_models(
@@ -254,6 +287,7 @@ def download_models(
     filenames: List[str],
     model_dir: Path,
     hf_token: str,
+    oci_max_concurrency: int = DEFAULTS.OCI_DOWNLOAD_MAX_CONCURRENCY,
 ):
     """Downloads model from a specified repository"""
     downloader: ModelDownloader
@@ -268,6 +302,7 @@ def download_models(
                 repository=repository,
                 release=release,
                 download_dest=model_dir,
+                max_concurrency=oci_max_concurrency,
             )
         elif is_huggingface_repo(repository):
             downloader = HFDownloader(
@@ -756,6 +756,7 @@ def launch_server(
     gpus: int | None,
     backend: str | None,
     enable_serving_output: bool,
+    cuda_visible_devices: list[str] | None = None,
 ) -> tuple:
     eval_serve.backend = backend = get_backend(backend, model)
 
@@ -813,7 +814,9 @@ def launch_server(
 
     eval_serve.model_path = model
 
-    backend_instance = backends.select_backend(eval_serve, backend)
+    backend_instance = backends.select_backend(
+        eval_serve, backend, cuda_visible_devices=cuda_visible_devices
+    )
     try:
         # http_client is handling tls params
         api_base = backend_instance.run_detached(
@@ -0,0 +1,343 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Client of the OCI distribution API pulling model images into an OCI image layout, as `skopeo copy` does. The
+blobs are fetched concurrently and verified against their digest while they are streamed. An interrupted blob
+is kept in the layout and resumed with an HTTP range request by the next pull.
+"""
+
+# Standard
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Optional
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+# Third Party
+import httpx
+
+# First Party
+from instructlab.model.blob_store import BlobStore
+
+logger = logging.getLogger(__name__)
+
+OCI_MANIFEST = "application/vnd.oci.image.manifest.v1+json"
+OCI_INDEX = "application/vnd.oci.image.index.v1+json"
+DOCKER_MANIFEST = "application/vnd.docker.distribution.manifest.v2+json"
+DOCKER_MANIFEST_LIST = "application/vnd.docker.distribution.manifest.list.v2+json"
+MANIFEST_TYPES = (OCI_MANIFEST, DOCKER_MANIFEST)
+INDEX_TYPES = (OCI_INDEX, DOCKER_MANIFEST_LIST)
+REF_NAME_ANNOTATION = "org.opencontainers.image.ref.name"
+
+DOCKER_HUB_REGISTRY = "registry-1.docker.io"
+# Attempts at resuming a blob whose download is interrupted by a network error
+BLOB_ATTEMPTS = 3
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+
+class OCIRegistryError(Exception):
+    """Error raised when a model image cannot be pulled from an OCI registry"""
+
+
+class OCIRegistryUnsupportedError(OCIRegistryError):
+    """
+    Error raised when the registry needs something the client does not support, such as an authentication
+    scheme or credentials it cannot find, and skopeo should be used instead
+    """
+
+
+def parse_repository(repository: str) -> tuple[str, str]:
+    """Splits a `docker://` repository into the registry host and the repository name."""
+    location = repository.removeprefix("docker://")
+    host, _, name = location.partition("/")
+    # a first path component that is not a host name is a Docker Hub namespace
+    if not name or ("." not in host and ":" not in host and host != "localhost"):
+        host, name = "docker.io", location
+    if host == "docker.io":
+        host = DOCKER_HUB_REGISTRY
+        if "/" not in name:
+            name = f"library/{name}"
+    return host, name
+
+
+def registry_credentials(registry: str) -> Optional[str]:
+    """
+    Returns the base64 encoded `user:password` of registry found in the authentication files used by skopeo,
+    podman and docker, None if there are none.
+    """
+    auth_files = [
+        os.environ.get("REGISTRY_AUTH_FILE"),
+        os.path.join(os.environ.get("XDG_RUNTIME_DIR", ""), "containers", "auth.json"),
+        os.path.expanduser("~/.config/containers/auth.json"),
+        os.path.expanduser("~/.docker/config.json"),
+    ]
+    hosts = [registry]
+    if registry == DOCKER_HUB_REGISTRY:
+        hosts += ["docker.io", "https://index.docker.io/v1/"]
+    for auth_file in auth_files:
+        if not auth_file or not os.path.isfile(auth_file):
+            continue
+        try:
+            with open(auth_file, encoding="utf-8") as f:
+                auths = json.load(f).get("auths", {})
+        except (OSError, ValueError) as exc:
+            logger.debug(f"Ignoring registry authentication file {auth_file}: {exc}")
+            continue
+        for host in hosts:
+            if auths.get(host, {}).get("auth"):
+                return auths[host]["auth"]
+    return None
+
+
+def _parse_challenge(header: str) -> tuple[str, dict[str, str]]:
+    scheme, _, params = header.partition(" ")
+    return scheme.lower(), dict(re.findall(r'(\w+)="([^"]*)"', params))
+
+
+class OCIRegistryClient:
+    """
+    Pulls the images of repository from registry. Registries on localhost are reached over plain HTTP, like
+    the container tools do, the others over HTTPS.
+    """
+
+    def __init__(
+        self,
+        registry: str,
+        repository: str,
+        max_concurrency: int = 4,
+        blob_store: Optional[BlobStore] = None,
+        client: Optional[httpx.Client] = None,
+    ):
+        self.registry = registry
+        self.repository = repository
+        self.max_concurrency = max_concurrency
+        self.blob_store = blob_store
+        host = registry.rsplit(":", 1)[0]
+        scheme = "http" if host in ("localhost", "127.0.0.1") else "https"
+        self.base_url = f"{scheme}://{registry}/v2/{repository}"
+        self.client = client or httpx.Client(
+            follow_redirects=True,
+            timeout=httpx.Timeout(60.0, connect=10.0),
+            limits=httpx.Limits(max_connections=max_concurrency + 1),
+        )
+        self._token: Optional[str] = None
+        self._token_lock = threading.Lock()
+
+    @classmethod
+    def from_repository(cls, repository: str, **kwargs) -> "OCIRegistryClient":
+        registry, name = parse_repository(repository)
+        return cls(registry, name, **kwargs)
+
+    def pull(self, reference: str, oci_dir: Path) -> str:
+        """
+        Pulls the image tagged, or with digest, reference into the OCI image layout oci_dir and returns the
+        digest of its manifest.
+        """
+        oci_dir = Path(oci_dir)
+        manifest, media_type, digest = self._get_manifest(reference)
+        if media_type in INDEX_TYPES:
+            # model images have a single manifest, the first one like skopeo without a platform to match
+            descriptor = json.loads(manifest)["manifests"][0]
+            manifest, media_type, digest = self._get_manifest(descriptor["digest"])
+        if media_type not in MANIFEST_TYPES:
+            raise OCIRegistryError(f"Unsupported manifest type {media_type}")
+
+        blobs_dir = oci_dir / "blobs" / "sha256"
+        blobs_dir.mkdir(parents=True, exist_ok=True)
+        image = json.loads(manifest)
+        descriptors = [image["config"], *image["layers"]]
+        start_time = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            fetched_bytes = sum(
+                executor.map(lambda d: self._fetch_blob(d, oci_dir), descriptors)
+            )
+        elapsed = time.monotonic() - start_time
+        logger.info(
+            f"Downloaded {fetched_bytes / 1024**2:.1f} MiB in {elapsed:.1f}s ({fetched_bytes / 1024**2 / max(elapsed, 1e-6):.1f} MiB/s)"
+        )
+
+        (blobs_dir / digest.removeprefix("sha256:")).write_bytes(manifest)
+        self._write_layout(oci_dir, reference, media_type, digest, len(manifest))
+        return digest
+
+    def _get_manifest(self, reference: str) -> tuple[bytes, str, str]:
+        response = self._request(
+            "GET",
+            f"{self.base_url}/manifests/{reference}",
+            headers={"Accept": ", ".join(MANIFEST_TYPES + INDEX_TYPES)},
+        )
+        manifest = response.content
+        digest = f"sha256:{hashlib.sha256(manifest).hexdigest()}"
+        if reference.startswith("sha256:") and digest != reference:
+            raise OCIRegistryError(
+                f"Manifest {reference} does not match its digest {digest}"
+            )
+        media_type = response.headers.get("Content-Type", "").split(";")[0]
+        return manifest, media_type or json.loads(manifest).get("mediaType"), digest
+
+    def _fetch_blob(self, descriptor: dict, oci_dir: Path) -> int:
+        """Fetches the blob of descriptor, unless it is in the layout or the blob store, and returns its fetched bytes."""
+        digest = descriptor["digest"]
+        algorithm, _, hex_digest = digest.partition(":")
+        if algorithm != "sha256":
+            raise OCIRegistryError(f"Unsupported digest algorithm of blob {digest}")
+        path = oci_dir / "blobs" / "sha256" / hex_digest
+        if path.exists():
+            logger.debug(f"Blob {digest} is downloaded already")
+            return 0
+        if self.blob_store is not None:
+            blob = self.blob_store.blob_path(hex_digest)
+            if blob.exists():
+                logger.debug(f"Blob {digest} is stored already")
+                self.blob_store.link(blob, path)
+                return 0
+
+        partial_path = oci_dir / "partial" / hex_digest
+        partial_path.parent.mkdir(parents=True, exist_ok=True)
+        for attempt in range(1, BLOB_ATTEMPTS + 1):
+            try:
+                sha256, size, fetched_bytes = self._stream_blob(digest, partial_path)
+                break
+            except httpx.TransportError as exc:
+                if attempt == BLOB_ATTEMPTS:
+                    raise OCIRegistryError(
+                        f"Failed to download blob {digest}: {exc}"
+                    ) from exc
+                logger.warning(
+                    f"Download of blob {digest} interrupted, resuming it: {exc}"
+                )
+
+        if size != descriptor["size"] or f"sha256:{sha256.hexdigest()}" != digest:
+            partial_path.unlink()
+            raise OCIRegistryError(
+                f"Blob {digest} of {descriptor['size']} bytes does not match the {size} bytes downloaded with digest sha256:{sha256.hexdigest()}"
+            )
+        os.replace(partial_path, path)
+        return fetched_bytes
+
+    def _stream_blob(self, digest: str, partial_path: Path) -> tuple[Any, int, int]:
+        """
+        Appends the rest of the blob to partial_path, from its end with a range request if it exists. Returns
+        the sha256 of the content, computed while it is streamed, its size and the number of bytes fetched.
+        """
+        offset = partial_path.stat().st_size if partial_path.exists() else 0
+        sha256 = hashlib.sha256()
+        if offset:
+            with open(partial_path, "rb") as f:
+                for block in iter(lambda: f.read(STREAM_CHUNK_SIZE), b""):
+                    sha256.update(block)
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        url = f"{self.base_url}/blobs/{digest}"
+        response = self._request("GET", url, headers=headers, stream=True)
+        with contextlib.closing(response):
+            if response.status_code == 416:
+                # nothing left to fetch, the partial blob is verified by the caller
+                return sha256, offset, 0
+            if offset and response.status_code != 206:
+                logger.debug(f"Registry ignored the range request, refetching {digest}")
+                offset = 0
+                sha256 = hashlib.sha256()
+            elif offset:
+                logger.debug(f"Resuming blob {digest} at {offset} bytes")
+            size = offset
+            with open(partial_path, "r+b" if offset else "wb") as f:
+                f.seek(offset)
+                f.truncate()
+                for chunk in response.iter_bytes():
+                    f.write(chunk)
+                    sha256.update(chunk)
+                    size += len(chunk)
+        return sha256, size, size - offset
+
+    def _write_layout(
+        self, oci_dir: Path, reference: str, media_type: str, digest: str, size: int
+    ):
+        (oci_dir / "oci-layout").write_text(
+            json.dumps({"imageLayoutVersion": "1.0.0"}), encoding="utf-8"
+        )
+        index_path = oci_dir / "index.json"
+        try:
+            index = json.loads(index_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            index = {"schemaVersion": 2, "manifests": []}
+        descriptor = {"mediaType": media_type, "digest": digest, "size": size}
+        if not reference.startswith("sha256:"):
+            descriptor["annotations"] = {REF_NAME_ANNOTATION: reference}
+        # the image pulled last comes first, it is the one the downloader links the model files to
+        index["manifests"] = [descriptor] + [
+            manifest
+            for manifest in index["manifests"]
+            if manifest["digest"] != digest
+            and manifest.get("annotations", {}).get(REF_NAME_ANNOTATION) != reference
+        ]
+        tmp_path = index_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(index), encoding="utf-8")
+        os.replace(tmp_path, index_path)
+
+    def _request(
+        self, method: str, url: str, headers: Optional[dict] = None, stream=False
+    ) -> httpx.Response:
+        headers = dict(headers or {})
+        for attempt in range(2):
+            if self._token:
+                headers["Authorization"] = self._token
+            request = self.client.build_request(method, url, headers=headers)
+            try:
+                response = self.client.send(request, stream=stream)
+            except httpx.ConnectError as exc:
+                # e.g. a proxy or certificates configured for the container tools only
+                raise OCIRegistryUnsupportedError(
+                    f"Failed to connect to registry {self.registry}: {exc}"
+                ) from exc
+            if response.status_code != 401 or attempt:
+                break
+            response.close()
+            self._authenticate(response.headers.get("WWW-Authenticate", ""))
+        if response.status_code == 401:
+            response.close()
+            raise OCIRegistryUnsupportedError(
+                f"Registry {self.registry} denied access to {self.repository}"
+            )
+        if response.status_code >= 400 and response.status_code != 416:
+            if stream:
+                response.read()
+            response.close()
+            raise OCIRegistryError(
+                f"{method} {url} failed with status {response.status_code}: {response.text[:200]}"
+            )
+        return response
+
+    def _authenticate(self, challenge: str) -> None:
+        with self._token_lock:
+            scheme, params = _parse_challenge(challenge)
+            credentials = registry_credentials(self.registry)
+            if scheme == "basic":
+                if credentials is None:
+                    raise OCIRegistryUnsupportedError(
+                        f"No credentials found for registry {self.registry}"
+                    )
+                self._token = f"Basic {credentials}"
+                return
+            if scheme != "bearer" or "realm" not in params:
+                raise OCIRegistryUnsupportedError(
+                    f"Unsupported authentication challenge of registry {self.registry}: {challenge}"
+                )
+            query = {"scope": params.get("scope", f"repository:{self.repository}:pull")}
+            if "service" in params:
+                query["service"] = params["service"]
+            headers = {}
+            if credentials is not None:
+                headers["Authorization"] = f"Basic {credentials}"
+            response = self.client.get(params["realm"], params=query, headers=headers)
+            if response.status_code != 200:
+                raise OCIRegistryUnsupportedError(
+                    f"Failed to get a token from {params['realm']}: status {response.status_code}"
+                )
+            token = response.json()
+            self._token = f"Bearer {token.get('token') or token['access_token']}"
@@ -1,10 +1,11 @@
 # Standard
 import datetime
 import enum
-import fcntl
 import logging
 import os
 import pathlib
+import tempfile
+import threading
 import typing
 import uuid
 
@@ -48,12 +49,15 @@ class EvalPhaseModel(pydantic.BaseModel):
     ended_at_utc: datetime.datetime | None = None
     checkpoints: list[pydantic.DirectoryPath]
     finished_checkpoints: list[pydantic.DirectoryPath] = []
+    # checkpoints being evaluated, evaluated again if the run is interrupted
+    in_flight_checkpoints: list[pydantic.DirectoryPath] = []
     results: list[EvalResult] = []
     best_checkpoint: EvalResult | None = None
 
     @pydantic.field_serializer(
         "checkpoints",
         "finished_checkpoints",
+        "in_flight_checkpoints",
     )
     def pathlibPath_list_to_str(self, paths: list[pathlib.Path]) -> list[str]:
         return [str(path) for path in paths]
@@ -122,6 +126,8 @@ class TrainingJournal:
 
         self.was_loaded: bool = False
         self.journalfile = journalfile
+        # serializes the commits of the threads evaluating checkpoints
+        self._commit_lock = threading.Lock()
         if journalfile.is_file():
             logger.debug(f"Received journal that is a file: {journalfile}")
             with open(journalfile, "r", encoding="utf-8") as f:
@@ -151,23 +157,30 @@ class TrainingJournal:
         if create_new:
             self.create_empty_journal()
 
-        # try dumping before we open file for writing so yaml parsing can fail before we
-        # destroy file content.
-        _ = yaml.safe_dump(self.journal.model_dump())
+        with self._commit_lock:
+            # try dumping before we open file for writing so yaml parsing can fail before we
+            # destroy file content.
+            _ = yaml.safe_dump(self.journal.model_dump())
 
-        # implementation by @leseb
-        with open(self.journalfile, "w", encoding="utf-8") as f:
-            # Acquire an exclusive lock to prevent other processes from writing
-            fcntl.flock(f, fcntl.LOCK_EX)
-
-            # Write journal's content
-            yaml.safe_dump(data=self.journal.model_dump(), stream=f)
-
-            # Flush the buffer to ensure data is moved to OS buffer
-            f.flush()
-
-            # Call fsync to ensure the data is physically written to disk
-            os.fsync(f.fileno())
+            # write a temporary file next to the journal and replace the journal with it, so
+            # that readers and concurrent writers never see a truncated journal
+            fd, tmp_name = tempfile.mkstemp(
+                dir=self.journalfile.parent, prefix=f".{self.journalfile.name}."
+            )
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    # Write journal's content
+                    yaml.safe_dump(data=self.journal.model_dump(), stream=f)
+
+                    # Flush the buffer to ensure data is moved to OS buffer
+                    f.flush()
+
+                    # Call fsync to ensure the data is physically written to disk
+                    os.fsync(f.fileno())
+                os.replace(tmp_name, self.journalfile)
+            except BaseException:
+                os.unlink(tmp_name)
+                raise
         logger.debug("Model written to disk")
 
     @property
@@ -6,6 +6,7 @@ import shutil
 # First Party
 from instructlab.configuration import DEFAULTS
 from instructlab.model.backends.backends import is_model_gguf, is_model_safetensors
+from instructlab.model.blob_store import BlobStore
 
 logger = logging.getLogger(__name__)
 
@@ -46,6 +47,9 @@ def remove_model(model: str, model_dir: str):
         )
 
     # Remove the specified file or directory.
+    oci_dir = Path(DEFAULTS.OCI_DIR) / cache_model_path
+    blob_store = BlobStore()
+    blobs = blob_store.linked_blobs(model_path) | blob_store.linked_blobs(oci_dir)
     try:
         if model_path.is_file():
             logger.debug(f"Removing model file: {model}.")
@@ -56,9 +60,12 @@ def remove_model(model: str, model_dir: str):
         logger.debug(f"Model {model} has been removed.")
 
         # Remove cache if exists
-        oci_dir = Path(DEFAULTS.OCI_DIR) / cache_model_path
         if oci_dir.exists():
             shutil.rmtree(oci_dir)
             logger.debug(f"Cache for model '{model}' has been removed.")
+
+        # Remove the files no other model shares
+        freed_bytes = blob_store.release(blobs)
+        logger.debug(f"Freed {freed_bytes} bytes of stored model files.")
     except OSError as e:
         raise RemovalError(f"Error while trying to remove {model}: {e}") from e
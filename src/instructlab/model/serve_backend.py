@@ -8,7 +8,7 @@ import sys
 
 # First Party
 from instructlab import log
-from instructlab.configuration import write_config
+from instructlab.configuration import DEFAULTS, write_config
 from instructlab.model.backends import backends
 from instructlab.model.backends.common import ServerException
 from instructlab.model.backends.server import BackendServer
@@ -61,6 +61,8 @@ def serve_backend(
     gpus: int | None,
     host: str,
     port: int,
+    parallel_slots: int = DEFAULTS.LLAMA_CPP_PARALLEL_SLOTS,
+    prompt_batch_size: int = DEFAULTS.LLAMA_CPP_PROMPT_BATCH_SIZE,
 ) -> None:
     """Core server functionality to be called from the CLI"""
     # Configure logging
@@ -101,6 +103,9 @@ def serve_backend(
             max_ctx_size=max_ctx_size,
             num_threads=num_threads,
             log_file=log_file,
+            parallel_slots=parallel_slots,
+            prompt_batch_size=prompt_batch_size,
+            max_connections=ctx.obj.config.serve.llama_cpp.max_connections,
         )
     elif backend == backends.VLLM:
         # Third Party
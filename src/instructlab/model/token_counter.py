@@ -0,0 +1,101 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Counts the tokens of a text with the tokenizer of the served model, to size prompts against the context window.
+"""
+
+# Standard
+from typing import Callable
+import logging
+import math
+import os
+import pathlib
+
+logger = logging.getLogger(__name__)
+
+# Average number of characters per token, used when the tokenizer of the model is not available
+CHARS_PER_TOKEN = 4
+# Tokens added by the chat template around the content of each message, e.g. the role markers
+MESSAGE_OVERHEAD_TOKENS = 4
+
+TokenCounter = Callable[[str], int]
+
+
+def approximate_token_count(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def create_token_counter(model: str | None) -> TokenCounter:
+    """
+    Returns a function counting the tokens of a text with the tokenizer of `model`: the Hugging Face tokenizer
+    of a safetensors model directory, or the vocabulary of a GGUF model file.
+    Falls back to an estimate of `CHARS_PER_TOKEN` characters per token when the model is not available locally,
+    e.g. when chatting with a remote endpoint.
+    """
+    model_path = pathlib.Path(model) if model else None
+    try:
+        if model_path is not None and model_path.is_dir():
+            # pylint: disable=import-outside-toplevel
+            # Third Party
+            from transformers import AutoTokenizer
+
+            tokenizer = AutoTokenizer.from_pretrained(model_path)
+            logger.debug(f"Counting tokens with the tokenizer of {model_path}")
+            return lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+        if model_path is not None and model_path.is_file():
+            # pylint: disable=import-outside-toplevel
+            # Third Party
+            from llama_cpp import Llama
+
+            # only the vocabulary is loaded, not the weights
+            llm = Llama(
+                model_path=os.fspath(model_path), vocab_only=True, verbose=False
+            )
+            logger.debug(f"Counting tokens with the vocabulary of {model_path}")
+            return lambda text: len(
+                llm.tokenize(text.encode("utf-8"), add_bos=False, special=True)
+            )
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        logger.debug(f"Failed to load the tokenizer of {model_path}: {exc}")
+    logger.debug(
+        f"Tokenizer of {model} not available, estimating {CHARS_PER_TOKEN} characters per token"
+    )
+    return approximate_token_count
+
+
+class MessageTokenCounter:
+    """
+    Counts the tokens of chat messages with `count_tokens`, caching the count of each message content so that
+    a message is only tokenized once, however many turns it stays in the conversation.
+    """
+
+    def __init__(self, count_tokens: TokenCounter):
+        self.count_tokens = count_tokens
+        self._counts: dict[str, int] = {}
+
+    def count(self, message: dict) -> int:
+        content = message.get("content") or ""
+        tokens = self._counts.get(content)
+        if tokens is None:
+            tokens = self.count_tokens(content)
+            self._counts[content] = tokens
+        return tokens + MESSAGE_OVERHEAD_TOKENS
+
+    def trim(self, messages: list[dict], max_tokens: int) -> list[dict]:
+        """
+        Returns the most recent `messages` fitting in `max_tokens`, dropping the oldest ones first.
+        The last message is always kept, even when it does not fit on its own.
+        """
+        counts = [self.count(message) for message in messages]
+        total = sum(counts)
+        start = 0
+        while start < len(messages) - 1 and total > max_tokens:
+            total -= counts[start]
+            start += 1
+        kept = messages[start:]
+        # forget the messages that left the conversation
+        self._counts = {
+            content: self._counts[content]
+            for content in (message.get("content") or "" for message in kept)
+        }
+        return kept
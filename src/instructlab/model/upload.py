@@ -1,14 +1,24 @@
 # SPDX-License-Identifier: Apache-2.0
 
 # Standard
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any
 import abc
+import hashlib
+import json
 import logging
+import math
 import os
 import re
 import subprocess
+import threading
+import time
 
 # Third Party
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config as BotocoreConfig
+from botocore.exceptions import ClientError
 from huggingface_hub import HfApi
 import boto3
 
@@ -300,18 +310,82 @@ class OCIModelUploader(ModelUploader):
         )
 
 
+# S3 multipart uploads have at most 10000 parts
+S3_MAX_PARTS = 10000
+
+
+class S3UploadManifest:
+    """
+    Local record of the files, and parts of files, of an S3 upload already stored in the bucket, so that an
+    interrupted upload resumes where it stopped. Files are recorded by key with their size and modification
+    time, a file changed since is uploaded again.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.lock = threading.Lock()
+        self.files: dict[str, dict[str, Any]] = {}
+        if path.is_file():
+            try:
+                self.files = json.loads(path.read_text(encoding="utf-8"))["files"]
+            except (ValueError, KeyError) as exc:
+                logger.warning(f"Ignoring invalid S3 upload manifest {path}: {exc}")
+
+    def file_entry(self, key: str, size: int, mtime_ns: int) -> dict[str, Any]:
+        """Returns the record of the file uploaded to key, a new one if the file changed."""
+        with self.lock:
+            entry = self.files.get(key)
+            if (
+                entry is None
+                or entry.get("size") != size
+                or entry.get("mtime_ns") != mtime_ns
+            ):
+                entry = {"size": size, "mtime_ns": mtime_ns, "parts": {}}
+                self.files[key] = entry
+            return entry
+
+    def save(self) -> None:
+        """Writes the manifest, the caller holds the lock."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"files": self.files}), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def remove(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
 class S3ModelUploader(ModelUploader):
-    """Class to handle uploading models to S3"""
+    """
+    Class to handle uploading models to S3
+
+    Up to max_files files are uploaded at the same time. Files larger than chunk_size_mb are uploaded in parts
+    of that size, max_concurrency parts of a file at the same time, and the stored parts are recorded in a
+    manifest under manifest_dir so that an interrupted upload resumes with the parts left.
+    """
 
     def __init__(
         self,
         model: str,
         destination: str,
+        max_files: int = DEFAULTS.S3_UPLOAD_MAX_FILES,
+        max_concurrency: int = DEFAULTS.S3_UPLOAD_MAX_CONCURRENCY,
+        chunk_size_mb: int = DEFAULTS.S3_UPLOAD_CHUNK_SIZE_MB,
+        manifest_dir: str | None = None,
     ) -> None:
         super().__init__(
             model=model,
             destination=destination,
         )
+        self.max_files = max_files
+        self.max_concurrency = max_concurrency
+        self.chunk_size = chunk_size_mb * 1024 * 1024
+        self.manifest_dir = Path(manifest_dir or DEFAULTS.S3_UPLOADS_DIR)
+        self.transfer_config = TransferConfig(
+            multipart_threshold=self.chunk_size,
+            multipart_chunksize=self.chunk_size,
+            max_concurrency=max_concurrency,
+        )
 
     def upload(self) -> None:
         """
@@ -358,41 +432,189 @@ class S3ModelUploader(ModelUploader):
         self.destination is used as the bucket name and self.model is used as the key
         raises S3UploadError if the upload fails for any reason
         """
-        try:
-            s3_client = boto3.client("s3")
-            resp = s3_client.upload_file(
-                Filename=self.local_model_path,
-                Bucket=self.destination,
-                Key=self.model,
-            )
-            logger.debug(f"S3 Client response:\n{resp}")
-        except Exception as exc:
-            raise S3UploadError(self.local_model_path, exc) from exc
-        logger.info(
-            f"\nUploading model at {self.local_model_path} succeeded!",
-        )
+        self.upload_files([(self.local_model_path, self.model)])
 
     def upload_folder(self) -> None:
         """upload_folder initializes a boto3 S3 client and attempts to upload the model at self.local_model_path
         self.destination is used as the bucket name and self.model is used as the key
         raises S3UploadError if the upload fails for any reason
         """
-        try:
-            s3_client = boto3.client("s3")
-            s3_directory = self.model
-            for path in self.local_model_path.rglob("*"):
-                if path.is_file():
-                    s3_path = os.path.join(
+        s3_directory = self.model
+        self.upload_files(
+            [
+                (
+                    path,
+                    os.path.join(
                         s3_directory, str(path.relative_to(self.local_model_path))
-                    )
-                    resp = s3_client.upload_file(
-                        Filename=str(path),
-                        Bucket=self.destination,
-                        Key=s3_path,
-                    )
-                    logger.debug(f"S3 Client response for {str(path)}:\n{resp}")
+                    ),
+                )
+                for path in sorted(self.local_model_path.rglob("*"))
+                if path.is_file()
+            ]
+        )
+
+    def upload_files(self, files: list[tuple[Path, str]]) -> None:
+        """Uploads the files to their keys concurrently, resuming an interrupted upload of the model"""
+        manifest = S3UploadManifest(self.manifest_path())
+        start_time = time.monotonic()
+        try:
+            s3_client = boto3.client(
+                "s3",
+                config=BotocoreConfig(
+                    max_pool_connections=self.max_files * self.max_concurrency
+                ),
+            )
+            with ThreadPoolExecutor(
+                max_workers=self.max_files, thread_name_prefix="s3-upload"
+            ) as executor:
+                futures = [
+                    executor.submit(self._upload_one, s3_client, manifest, path, key)
+                    for path, key in files
+                ]
+                try:
+                    uploaded_bytes = sum(future.result() for future in futures)
+                except BaseException:
+                    # the parts in flight finish and are recorded in the manifest
+                    executor.shutdown(cancel_futures=True)
+                    raise
         except Exception as exc:
             raise S3UploadError(self.local_model_path, exc) from exc
+        manifest.remove()
+
+        elapsed = time.monotonic() - start_time
+        logger.info(
+            f"Uploaded {uploaded_bytes / 1024**2:.1f} MiB in {elapsed:.1f}s ({uploaded_bytes / 1024**2 / max(elapsed, 1e-6):.1f} MiB/s)"
+        )
         logger.info(
             f"\nUploading model at {self.local_model_path} succeeded!",
         )
+
+    def manifest_path(self) -> Path:
+        upload_id = hashlib.sha256(
+            f"{self.local_model_path.resolve()}\0{self.destination}\0{self.model}".encode()
+        ).hexdigest()
+        return self.manifest_dir / f"{upload_id}.json"
+
+    def _upload_one(
+        self, s3_client, manifest: S3UploadManifest, path: Path, key: str
+    ) -> int:
+        """Uploads a file, unless already uploaded, and returns the number of bytes sent"""
+        stat = path.stat()
+        entry = manifest.file_entry(key, stat.st_size, stat.st_mtime_ns)
+        if entry.get("completed"):
+            logger.debug(f"Skipping {path}, already uploaded to {key}")
+            return 0
+
+        if stat.st_size <= self.chunk_size:
+            resp = s3_client.upload_file(
+                Filename=str(path),
+                Bucket=self.destination,
+                Key=key,
+                Config=self.transfer_config,
+            )
+            logger.debug(f"S3 Client response for {str(path)}:\n{resp}")
+            uploaded_bytes = stat.st_size
+        else:
+            uploaded_bytes = self._upload_parts(s3_client, manifest, entry, path, key)
+
+        with manifest.lock:
+            entry["completed"] = True
+            entry.pop("parts", None)
+            manifest.save()
+        return uploaded_bytes
+
+    def _upload_parts(
+        self,
+        s3_client,
+        manifest: S3UploadManifest,
+        entry: dict[str, Any],
+        path: Path,
+        key: str,
+    ) -> int:
+        size = entry["size"]
+        part_size = max(self.chunk_size, math.ceil(size / S3_MAX_PARTS))
+        upload_id = entry.get("upload_id")
+        if upload_id is not None and entry.get("part_size") == part_size:
+            stored_parts = self._stored_parts(s3_client, key, upload_id)
+            if stored_parts is None:
+                upload_id = None
+            else:
+                # parts recorded locally whose upload the bucket did not keep are sent again
+                entry["parts"] = {
+                    number: etag
+                    for number, etag in entry["parts"].items()
+                    if stored_parts.get(int(number)) == etag
+                }
+                logger.debug(
+                    f"Resuming upload of {path} with {len(entry['parts'])} parts stored"
+                )
+        else:
+            upload_id = None
+        if upload_id is None:
+            upload_id = s3_client.create_multipart_upload(
+                Bucket=self.destination, Key=key
+            )["UploadId"]
+            with manifest.lock:
+                entry.update(upload_id=upload_id, part_size=part_size, parts={})
+                manifest.save()
+
+        part_count = math.ceil(size / part_size)
+
+        def upload_part(number: int) -> int:
+            with open(path, "rb") as f:
+                f.seek((number - 1) * part_size)
+                data = f.read(part_size)
+            etag = s3_client.upload_part(
+                Bucket=self.destination,
+                Key=key,
+                UploadId=upload_id,
+                PartNumber=number,
+                Body=data,
+            )["ETag"]
+            with manifest.lock:
+                entry["parts"][str(number)] = etag
+                manifest.save()
+            return len(data)
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            uploaded_bytes = sum(
+                executor.map(
+                    upload_part,
+                    [
+                        number
+                        for number in range(1, part_count + 1)
+                        if str(number) not in entry["parts"]
+                    ],
+                )
+            )
+
+        resp = s3_client.complete_multipart_upload(
+            Bucket=self.destination,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={
+                "Parts": [
+                    {"PartNumber": number, "ETag": entry["parts"][str(number)]}
+                    for number in range(1, part_count + 1)
+                ]
+            },
+        )
+        logger.debug(f"S3 Client response for {str(path)}:\n{resp}")
+        return uploaded_bytes
+
+    def _stored_parts(
+        self, s3_client, key: str, upload_id: str
+    ) -> dict[int, str] | None:
+        """Returns the ETags of the parts stored by a multipart upload, or None if it no longer exists"""
+        parts: dict[int, str] = {}
+        try:
+            for page in s3_client.get_paginator("list_parts").paginate(
+                Bucket=self.destination, Key=key, UploadId=upload_id
+            ):
+                for part in page.get("Parts", []):
+                    parts[part["PartNumber"]] = part["ETag"]
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") == "NoSuchUpload":
+                return None
+            raise
+        return parts
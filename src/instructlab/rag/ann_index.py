@@ -0,0 +1,185 @@
+"""
+An approximate nearest-neighbour index for the document embeddings, to avoid scoring every stored embedding
+at each retrieval.
+"""
+
+# Standard
+from typing import Iterable, Optional, Union
+import hashlib
+import logging
+import math
+import os
+
+# Third Party
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+IVF_INDEX_SUFFIX = ".ivf.npz"
+# the embeddings are saved apart from the rest of the index, uncompressed, to be memory-mapped
+IVF_EMBEDDINGS_SUFFIX = ".embeddings.npy"
+KMEANS_ITERATIONS = 10
+KMEANS_MAX_TRAINING_SAMPLES_PER_LIST = 256
+
+
+def ivf_index_path(document_store_uri: str) -> str:
+    """
+    Returns the location of the IVF index of the document store at `document_store_uri`.
+    """
+    return document_store_uri + IVF_INDEX_SUFFIX
+
+
+def documents_fingerprint(ids: Iterable[str]) -> str:
+    """
+    Returns a digest of the given document ids, whatever their order, identifying the content of a document store.
+    """
+    sha256 = hashlib.sha256()
+    for doc_id in sorted(ids):
+        sha256.update(doc_id.encode("utf-8") + b"\n")
+    return sha256.hexdigest()
+
+
+class IVFIndex:
+    """
+    An inverted file (IVF) index over the document embeddings.
+
+    The embeddings are partitioned in `n_lists` clusters with a spherical k-means. A query is only scored
+    against the embeddings of the `nprobe` clusters whose centroids are the most similar to the query:
+    higher `nprobe` values improve the recall at the cost of a higher latency.
+    Scores are computed with the dot product, like the default similarity of the in-memory document store.
+
+    The `fingerprint` of the indexed documents, from `documents_fingerprint`, tells whether the index is up to date
+    with a document store. The embeddings are memory-mapped when the index is loaded, so that only the pages of the
+    probed clusters are read.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        embeddings: np.ndarray,
+        centroids: np.ndarray,
+        list_offsets: np.ndarray,
+        fingerprint: str = "",
+    ):
+        # embeddings are sorted by cluster: the rows of list `i` are in `list_offsets[i]:list_offsets[i+1]`
+        self.ids = ids
+        self.embeddings = embeddings
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.fingerprint = fingerprint
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(
+        cls,
+        ids: list[str],
+        embeddings: Union[list[list[float]], np.ndarray],
+        n_lists: Optional[int] = None,
+    ) -> "IVFIndex":
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(ids) or len(ids) == 0:
+            raise ValueError(
+                f"Expected one embedding per document, got {vectors.shape} embeddings for {len(ids)} documents"
+            )
+        if n_lists is None:
+            n_lists = max(1, int(math.sqrt(len(ids))))
+        n_lists = min(n_lists, len(ids))
+
+        centroids = _train_centroids(vectors, n_lists)
+        assignments = np.argmax(_normalize(vectors) @ centroids.T, axis=1)
+        order = np.argsort(assignments, kind="stable")
+        list_offsets = np.searchsorted(assignments[order], np.arange(n_lists + 1))
+        logger.debug(f"Built IVF index with {n_lists} lists for {len(ids)} documents")
+        return cls(
+            ids=np.asarray(ids)[order],
+            embeddings=vectors[order],
+            centroids=centroids,
+            list_offsets=list_offsets,
+            fingerprint=documents_fingerprint(ids),
+        )
+
+    def search(
+        self, query_embedding: list[float], top_k: int, nprobe: int
+    ) -> list[tuple[str, float]]:
+        """
+        Returns the ids and scores of the `top_k` documents most similar to `query_embedding`, sorted
+        by decreasing score.
+        """
+        query = np.asarray(query_embedding, dtype=np.float32)
+        nprobe = max(1, min(nprobe, len(self.centroids)))
+        probed_lists = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        rows = np.concatenate(
+            [
+                np.arange(self.list_offsets[i], self.list_offsets[i + 1])
+                for i in probed_lists
+            ]
+        )
+        if len(rows) == 0:
+            return []
+
+        scores = self.embeddings[rows] @ query
+        top_k = min(top_k, len(rows))
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(str(self.ids[rows[i]]), float(scores[i])) for i in best]
+
+    def save(self, path: str):
+        # write to temporary files first, so that readers never load a partial index
+        embeddings_path = _embeddings_path(path)
+        np.save(embeddings_path + ".tmp.npy", self.embeddings)
+        os.replace(embeddings_path + ".tmp.npy", embeddings_path)
+        tmp_path = path + ".tmp.npz"
+        np.savez(
+            tmp_path,
+            ids=self.ids,
+            centroids=self.centroids,
+            list_offsets=self.list_offsets,
+            fingerprint=np.array(self.fingerprint),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        with np.load(path) as data:
+            return cls(
+                ids=data["ids"],
+                embeddings=np.load(_embeddings_path(path), mmap_mode="r"),
+                centroids=data["centroids"],
+                list_offsets=data["list_offsets"],
+                fingerprint=str(data["fingerprint"]),
+            )
+
+
+def _embeddings_path(index_path: str) -> str:
+    return os.path.splitext(index_path)[0] + IVF_EMBEDDINGS_SUFFIX
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, np.finfo(np.float32).tiny)
+
+
+def _train_centroids(vectors: np.ndarray, n_lists: int) -> np.ndarray:
+    """
+    Spherical k-means over a sample of the given vectors.
+    """
+    rng = np.random.default_rng(42)
+    samples = _normalize(vectors)
+    max_samples = n_lists * KMEANS_MAX_TRAINING_SAMPLES_PER_LIST
+    if len(samples) > max_samples:
+        samples = samples[rng.choice(len(samples), max_samples, replace=False)]
+
+    centroids = samples[rng.choice(len(samples), n_lists, replace=False)]
+    for _ in range(KMEANS_ITERATIONS):
+        assignments = np.argmax(samples @ centroids.T, axis=1)
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=n_lists)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        non_empty = counts > 0
+        # empty clusters keep their previous centroid
+        sums = centroids.copy()
+        sums[non_empty] = np.add.reduceat(samples[order], starts[non_empty], axis=0)
+        centroids = _normalize(sums)
+    return centroids
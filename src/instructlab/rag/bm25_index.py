@@ -0,0 +1,194 @@
+"""
+A sparse BM25 index over the document contents, complementing the dense embedding retrieval for queries
+that depend on exact terms, like product codes and identifiers.
+"""
+
+# Standard
+import logging
+from typing import Optional
+import math
+import os
+import re
+
+# Third Party
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BM25_INDEX_SUFFIX = ".bm25.npz"
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# words, optionally joined by the separators found in identifiers like `ABC-123` or `v1.2.3`
+_TOKEN_PATTERN = re.compile(r"\w+(?:[-./:]\w+)*")
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def bm25_index_path(document_store_uri: str) -> str:
+    """
+    Returns the location of the BM25 index of the document store at `document_store_uri`.
+    """
+    return document_store_uri + BM25_INDEX_SUFFIX
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Splits the text in lowercase terms. Compound identifiers are indexed both as a whole and word by word.
+    """
+    terms = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        terms.append(token)
+        words = _WORD_PATTERN.findall(token)
+        if len(words) > 1:
+            terms.extend(words)
+    return terms
+
+
+class BM25Index:
+    """
+    An inverted index scoring the documents with Okapi BM25.
+
+    The sorted vocabulary is stored as the concatenated UTF-8 bytes of the terms in `term_bytes`, the i-th term
+    being at `term_byte_offsets[i]:term_byte_offsets[i+1]`, so that long terms do not widen every entry.
+    The postings of each term are stored contiguously: the documents containing the i-th term and the term
+    frequencies are in `postings_docs` and `postings_tfs` at `term_offsets[i]:term_offsets[i+1]`.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        doc_lengths: np.ndarray,
+        term_bytes: np.ndarray,
+        term_byte_offsets: np.ndarray,
+        term_offsets: np.ndarray,
+        postings_docs: np.ndarray,
+        postings_tfs: np.ndarray,
+    ):
+        self.ids = ids
+        self.doc_lengths = doc_lengths
+        self.term_bytes = term_bytes
+        self.term_byte_offsets = term_byte_offsets
+        self.term_offsets = term_offsets
+        self.postings_docs = postings_docs
+        self.postings_tfs = postings_tfs
+        self._avg_doc_length = max(float(doc_lengths.mean()), 1.0) if len(ids) else 1.0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, ids: list[str], texts: list[str]) -> "BM25Index":
+        if len(ids) != len(texts):
+            raise ValueError(
+                f"Expected one text per document, got {len(texts)} texts for {len(ids)} documents"
+            )
+        postings: dict[str, list[tuple[int, int]]] = {}
+        doc_lengths = np.zeros(len(ids), dtype=np.int32)
+        for doc, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lengths[doc] = len(tokens)
+            counts: dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((doc, tf))
+
+        # UTF-8 preserves the code point order of the sorted terms
+        terms = sorted(postings)
+        encoded = [term.encode("utf-8") for term in terms]
+        term_byte_offsets = np.concatenate(
+            ([0], np.cumsum([len(term) for term in encoded], dtype=np.int64))
+        )
+        sizes = [len(postings[term]) for term in terms]
+        term_offsets = np.concatenate(([0], np.cumsum(sizes, dtype=np.int64)))
+        postings_docs = np.empty(term_offsets[-1], dtype=np.int32)
+        postings_tfs = np.empty(term_offsets[-1], dtype=np.int32)
+        for i, term in enumerate(terms):
+            entries = np.asarray(postings[term], dtype=np.int32)
+            postings_docs[term_offsets[i] : term_offsets[i + 1]] = entries[:, 0]
+            postings_tfs[term_offsets[i] : term_offsets[i + 1]] = entries[:, 1]
+        logger.debug(
+            f"Built BM25 index with {len(terms)} terms for {len(ids)} documents"
+        )
+        return cls(
+            ids=np.asarray(ids),
+            doc_lengths=doc_lengths,
+            term_bytes=np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            term_byte_offsets=term_byte_offsets,
+            term_offsets=term_offsets,
+            postings_docs=postings_docs,
+            postings_tfs=postings_tfs,
+        )
+
+    def search(self, query: str, top_k: int) -> list[tuple[str, float]]:
+        """
+        Returns the ids and scores of the `top_k` documents best matching the terms of `query`, sorted
+        by decreasing score. Documents sharing no term with the query are not returned.
+        """
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for term in set(tokenize(query)):
+            i = self._find_term(term)
+            if i is None:
+                continue
+            start, end = self.term_offsets[i], self.term_offsets[i + 1]
+            docs = self.postings_docs[start:end]
+            tfs = self.postings_tfs[start:end].astype(np.float32)
+            idf = math.log(1 + (len(self.ids) - len(docs) + 0.5) / (len(docs) + 0.5))
+            norms = BM25_K1 * (
+                1 - BM25_B + BM25_B * self.doc_lengths[docs] / self._avg_doc_length
+            )
+            scores[docs] += idf * tfs * (BM25_K1 + 1) / (tfs + norms)
+
+        matches = np.flatnonzero(scores)
+        top_k = min(top_k, len(matches))
+        if top_k == 0:
+            return []
+        best = matches[np.argpartition(-scores[matches], top_k - 1)[:top_k]]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(str(self.ids[i]), float(scores[i])) for i in best]
+
+    def _find_term(self, term: str) -> Optional[int]:
+        """
+        Returns the position of `term` in the vocabulary, found by binary search, or None.
+        """
+        encoded = term.encode("utf-8")
+        low, high = 0, len(self.term_byte_offsets) - 1
+        while low < high:
+            middle = (low + high) // 2
+            start, end = self.term_byte_offsets[middle : middle + 2]
+            candidate = self.term_bytes[start:end].tobytes()
+            if candidate == encoded:
+                return middle
+            if candidate < encoded:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def save(self, path: str):
+        # write to a temporary file first, so that readers never load a partial index
+        tmp_path = path + ".tmp.npz"
+        np.savez(
+            tmp_path,
+            ids=self.ids,
+            doc_lengths=self.doc_lengths,
+            term_bytes=self.term_bytes,
+            term_byte_offsets=self.term_byte_offsets,
+            term_offsets=self.term_offsets,
+            postings_docs=self.postings_docs,
+            postings_tfs=self.postings_tfs,
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with np.load(path) as data:
+            return cls(
+                ids=data["ids"],
+                doc_lengths=data["doc_lengths"],
+                term_bytes=data["term_bytes"],
+                term_byte_offsets=data["term_byte_offsets"],
+                term_offsets=data["term_offsets"],
+                postings_docs=data["postings_docs"],
+                postings_tfs=data["postings_tfs"],
+            )
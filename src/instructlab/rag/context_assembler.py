@@ -0,0 +1,73 @@
+"""
+Assembles the retrieved chunks in the RAG context of a chat turn, within a token budget.
+"""
+
+# Standard
+from typing import Callable
+import logging
+import re
+
+# First Party
+from instructlab.rag.document_store import RetrievedChunk
+
+logger = logging.getLogger(__name__)
+
+# Chunks whose word n-grams are mostly found in an already selected chunk are considered duplicates
+SHINGLE_SIZE = 5
+DUPLICATE_OVERLAP = 0.8
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+class ContextAssembler:
+    """
+    Packs the best retrieved chunks in at most `token_budget` tokens, as counted by `count_tokens`.
+
+    Chunks are considered by decreasing score. Chunks overlapping an already selected chunk by more than
+    `DUPLICATE_OVERLAP` of their word `SHINGLE_SIZE`-grams are skipped, as are the chunks that do not fit
+    in the remaining budget, so that smaller chunks with lower scores can still be selected.
+    """
+
+    def __init__(self, count_tokens: Callable[[str], int], token_budget: int):
+        self.count_tokens = count_tokens
+        self.token_budget = token_budget
+
+    def assemble(self, chunks: list[RetrievedChunk]) -> str:
+        ranked = sorted(
+            chunks,
+            key=lambda chunk: chunk.score if chunk.score is not None else 0.0,
+            reverse=True,
+        )
+        selected: list[str] = []
+        selected_shingles: set[tuple[str, ...]] = set()
+        used_tokens = 0
+        duplicates = 0
+        for chunk in ranked:
+            shingles = _shingles(chunk.content)
+            if not shingles:
+                continue
+            if len(shingles & selected_shingles) > DUPLICATE_OVERLAP * len(shingles):
+                duplicates += 1
+                continue
+            # selected chunks are joined by a newline
+            tokens = self.count_tokens(chunk.content) + (1 if selected else 0)
+            if used_tokens + tokens > self.token_budget:
+                continue
+            selected.append(chunk.content)
+            selected_shingles |= shingles
+            used_tokens += tokens
+
+        logger.debug(
+            f"RAG context: {len(selected)} of {len(chunks)} chunks selected, {duplicates} duplicates, "
+            f"{used_tokens}/{self.token_budget} tokens"
+        )
+        return "\n".join(selected)
+
+
+def _shingles(text: str) -> set[tuple[str, ...]]:
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return {tuple(words)} if words else set()
+    return {
+        tuple(words[i : i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
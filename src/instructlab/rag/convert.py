@@ -5,11 +5,17 @@
 # which instantiates the CLI command and calls out to the methods in this file.
 
 # Standard
+from concurrent.futures import ProcessPoolExecutor
+from importlib.metadata import version
+from itertools import repeat
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Optional
+import hashlib
 import json
 import logging
+import multiprocessing
 import os
+import shutil
 import tempfile
 import time
 
@@ -25,13 +31,19 @@ from xdg_base_dirs import xdg_data_dirs, xdg_data_home
 import yaml
 
 # First Party
+from instructlab.defaults import DEFAULTS
 from instructlab.rag.taxonomy_utils import lookup_knowledge_files
 from instructlab.utils import clear_directory
 
 logger = logging.getLogger(__name__)
 
+# Document converter of each conversion worker process, created by _init_worker
+_worker_converter = None
 
-def convert_documents_from_taxonomy(taxonomy_path, taxonomy_base, output_dir):
+
+def convert_documents_from_taxonomy(
+    taxonomy_path, taxonomy_base, output_dir, cache_dir=None, workers=1
+):
     """
     Converts documents from a taxonomy. It uses the tempfile module to create a temporary directory that is
     deleted when the function returns. It then uses the lookup_knowledge_files function from the instructlab-sdg
@@ -45,13 +57,20 @@ def convert_documents_from_taxonomy(taxonomy_path, taxonomy_base, output_dir):
         logger.info(f"Found {len(knowledge_files)} knowledge files")
         logger.info(f"{knowledge_files}")
 
-        convert_documents_from_folder(temp_dir, output_dir)
+        convert_documents_from_folder(
+            temp_dir, output_dir, cache_dir=cache_dir, workers=workers
+        )
 
 
-def convert_documents_from_folder(input_dir, output_dir):
+def convert_documents_from_folder(input_dir, output_dir, cache_dir=None, workers=1):
     """
     Convert user documents from a given `input_dir` folder to the given `output_dir` folder, using docling converters.
     Latest version of docling schema is used (currently, v2).
+
+    When a `cache_dir` is given, converted documents are also stored there, keyed on the content of the source
+    file, the Docling version and the pipeline options, and unchanged documents are copied from the cache
+    instead of being converted again. With more than one `workers`, the documents are converted in parallel
+    by a pool of processes, each one with its own document converter.
     """
     logger.info(f"Processing {input_dir} to {output_dir}")
 
@@ -60,13 +79,62 @@ def convert_documents_from_folder(input_dir, output_dir):
     source_files = _load_source_files(input_dir=input_dir)
     logger.info(f"Transforming source files {[p.name for p in source_files]}")
 
-    doc_converter = _initialize_docling()
     start_time = time.time()
-    conv_results = doc_converter.convert_all(
-        source_files,
-        raises_on_error=False,
-    )
-    _, _, failure_count = _export_documents(conv_results, output_dir=Path(output_dir))
+    pipeline_options = _pipeline_options()
+    cache_entries: dict[str, Path] = {}
+    if cache_dir:
+        settings = _conversion_settings(pipeline_options)
+        for source_file in source_files:
+            key = _conversion_cache_key(source_file, settings)
+            cache_entries[source_file.name] = Path(cache_dir) / key[:2] / f"{key}.json"
+    cached_files = {p for p in source_files if _is_cached(cache_entries.get(p.name))}
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    for source_file in cached_files:
+        shutil.copyfile(
+            cache_entries[source_file.name],
+            Path(output_dir) / f"{source_file.stem}.json",
+        )
+    if cached_files:
+        logger.info(
+            f"Reusing {len(cached_files)} documents from the conversion cache {cache_dir}"
+        )
+
+    missing_files = [p for p in source_files if p not in cached_files]
+    if not missing_files:
+        failure_count = 0
+    elif workers > 1 and len(missing_files) > 1:
+        logger.info(
+            f"Converting {len(missing_files)} documents with {workers} processes"
+        )
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(missing_files)),
+            mp_context=multiprocessing.get_context(
+                DEFAULTS.MULTIPROCESSING_START_METHOD
+            ),
+            initializer=_init_worker,
+            initargs=(pipeline_options,),
+        ) as executor:
+            counts = list(
+                executor.map(
+                    _convert_in_worker,
+                    missing_files,
+                    repeat(Path(output_dir)),
+                    [cache_entries.get(p.name) for p in missing_files],
+                )
+            )
+        success_count, partial_success_count, failure_count = (
+            sum(c) for c in zip(*counts, strict=True)
+        )
+        _log_conversion_counts(success_count, partial_success_count, failure_count)
+    else:
+        doc_converter = _initialize_docling(pipeline_options)
+        conv_results = doc_converter.convert_all(
+            missing_files,
+            raises_on_error=False,
+        )
+        _, _, failure_count = _export_documents(
+            conv_results, output_dir=Path(output_dir), cache_entries=cache_entries
+        )
     end_time = time.time() - start_time
     logger.info(f"Document conversion complete in {end_time:.2f} seconds.")
 
@@ -76,6 +144,57 @@ def convert_documents_from_folder(input_dir, output_dir):
         )
 
 
+def _conversion_settings(pipeline_options: PdfPipelineOptions) -> str:
+    """
+    Returns a serialized description of the conversion settings: a change of Docling version or of the pipeline
+    options invalidates the cached conversions.
+    """
+    return json.dumps(
+        {
+            "docling": version("docling"),
+            "docling-core": version("docling-core"),
+            "pipeline_options": pipeline_options.model_dump(mode="json"),
+        },
+        sort_keys=True,
+    )
+
+
+def _conversion_cache_key(source_file: Path, settings: str) -> str:
+    """
+    Returns the SHA-256 digest of the content and extension of the given file and of the conversion settings.
+    """
+    digest = hashlib.sha256(settings.encode("utf-8"))
+    digest.update(source_file.suffix.lower().encode("utf-8"))
+    with source_file.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _is_cached(cache_entry: Optional[Path]) -> bool:
+    return cache_entry is not None and cache_entry.is_file()
+
+
+def _init_worker(pipeline_options: PdfPipelineOptions):
+    """
+    Creates the document converter of a conversion worker process.
+    """
+    global _worker_converter  # pylint: disable=W0603
+    _worker_converter = _initialize_docling(pipeline_options)
+
+
+def _convert_in_worker(
+    source_file: Path, output_dir: Path, cache_entry: Optional[Path]
+) -> tuple[int, int, int]:
+    assert _worker_converter is not None
+    conv_results = _worker_converter.convert_all([source_file], raises_on_error=False)
+    return _export_documents(
+        conv_results,
+        output_dir=output_dir,
+        cache_entries={source_file.name: cache_entry} if cache_entry else None,
+    )
+
+
 def _load_source_files(input_dir) -> list[Path]:
     """
     Takes an input directory as an argument and returns a list of paths to all the files in that directory.
@@ -91,6 +210,7 @@ def _load_source_files(input_dir) -> list[Path]:
 def _export_documents(
     conv_results: Iterable[ConversionResult],
     output_dir: Path,
+    cache_entries: Optional[dict[str, Path]] = None,
 ):
     """
     Exports documents based on the conversion results.
@@ -106,6 +226,8 @@ def _export_documents(
     Finally, the function logs a message indicating the total number of documents processed, the number
     of successful conversions, the number of partially successful conversions, and
     the number of failed conversions. It then returns the three counters as a tuple.
+    Successfully converted documents whose file name is in `cache_entries` are also written to the
+    corresponding conversion cache entry.
     """
     output_dir.mkdir(parents=True, exist_ok=True)
 
@@ -120,6 +242,9 @@ def _export_documents(
 
             with (output_dir / f"{doc_filename}.json").open("w") as fp:
                 fp.write(json.dumps(conv_res.document.export_to_dict()))
+            cache_entry = (cache_entries or {}).get(conv_res.input.file.name)
+            if cache_entry is not None:
+                _write_cache_entry(output_dir / f"{doc_filename}.json", cache_entry)
         elif conv_res.status == ConversionStatus.PARTIAL_SUCCESS:
             logger.info(
                 f"Document {conv_res.input.file} was partially converted with the following errors:"
@@ -131,12 +256,29 @@ def _export_documents(
             logger.info(f"Document {conv_res.input.file} failed to convert.")
             failure_count += 1
 
+    _log_conversion_counts(success_count, partial_success_count, failure_count)
+    return success_count, partial_success_count, failure_count
+
+
+def _log_conversion_counts(
+    success_count: int, partial_success_count: int, failure_count: int
+):
     logger.info(
         f"Processed {success_count + partial_success_count + failure_count} docs, "
         f"of which {failure_count} failed "
         f"and {partial_success_count} were partially converted."
     )
-    return success_count, partial_success_count, failure_count
+
+
+def _write_cache_entry(converted_file: Path, cache_entry: Path):
+    """
+    Copies a converted document to the conversion cache. The entry is renamed into place, so that concurrent
+    conversions never read a partially written entry.
+    """
+    cache_entry.parent.mkdir(parents=True, exist_ok=True)
+    tmp_entry = cache_entry.with_suffix(f".{os.getpid()}.tmp")
+    shutil.copyfile(converted_file, tmp_entry)
+    os.replace(tmp_entry, cache_entry)
 
 
 # Adapted from part of sdg/generate_data.py:_sdg_init and sdg/utils/chunkers.py:DocumentChunker
@@ -146,10 +288,10 @@ def _export_documents(
 #  {xdg_data_home()}/instructlab/sdg/config.yaml.  This seems like a non-standard way to configure
 #  InstructLab functionality.  As part of unifying the code base, we should reconsider how this
 #  is configured.
-def _initialize_docling():
+def _pipeline_options() -> PdfPipelineOptions:
     """
-    Initializes a Docling document converter for converting files (e.g., PDF) to Docling JSON format for use by
-    the Docling chunkers.
+    Returns the options of the Docling PDF pipeline: the Docling models path from the SDG configuration, and
+    the available OCR engine, if any.
     """
     data_dirs = [os.path.join(xdg_data_home(), "instructlab", "sdg")]
     data_dirs.extend(os.path.join(dir, "instructlab", "sdg") for dir in xdg_data_dirs())
@@ -179,6 +321,16 @@ def _initialize_docling():
     if ocr_options is not None:
         pipeline_options.do_ocr = True
         pipeline_options.ocr_options = ocr_options
+    return pipeline_options
+
+
+def _initialize_docling(pipeline_options: Optional[PdfPipelineOptions] = None):
+    """
+    Initializes a Docling document converter for converting files (e.g., PDF) to Docling JSON format for use by
+    the Docling chunkers.
+    """
+    if pipeline_options is None:
+        pipeline_options = _pipeline_options()
 
     _load_converter_and_format_options()
     doc_converter = DocumentConverter(  # pylint: disable=E0602
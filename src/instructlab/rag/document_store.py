@@ -7,6 +7,18 @@ the generated context.
 
 # Standard
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class RetrievedChunk:
+    """
+    A document chunk matching a user query, with its relevance score when the retriever provides one.
+    """
+
+    content: str
+    score: Optional[float] = None
 
 
 class DocumentStoreRetriever(ABC):
@@ -30,6 +42,24 @@ class DocumentStoreRetriever(ABC):
           str: The augmented context to use in a RAG chat.
         """
 
+    def retrieve(self, user_query: str) -> list[RetrievedChunk]:
+        """
+        Retrieve the chunks matching the given `user_query`, sorted by decreasing relevance.
+        The default implementation returns the whole augmented context as a single chunk.
+
+        Params:
+          user_query: The original user query.
+        Returns:
+          list[RetrievedChunk]: The matching chunks.
+        """
+        return [RetrievedChunk(content=self.augmented_context(user_query=user_query))]
+
+    def warm_up(self) -> None:  # noqa: B027
+        """
+        Load the resources needed to answer a query, so that the first call to `augmented_context` does not
+        pay for them. The default implementation does nothing.
+        """
+
 
 class DocumentStoreIngestor(ABC):
     """
@@ -1,7 +1,9 @@
 # Standard
+from typing import Optional
 import logging
 
 # First Party
+from instructlab.defaults import DEFAULTS
 from instructlab.rag.document_store import DocumentStoreIngestor, DocumentStoreRetriever
 
 logger = logging.getLogger(__name__)
@@ -12,6 +14,13 @@ def create_document_retriever(
     document_store_collection_name: str,
     top_k: int,
     embedding_model_path: str,
+    embedding_cache_dir: Optional[str] = None,
+    embedding_cache_max_entries: int = 0,
+    index_type: str = DEFAULTS.RETRIEVER_INDEX_TYPE,
+    nprobe: int = DEFAULTS.RETRIEVER_NPROBE,
+    strategy: str = DEFAULTS.RETRIEVER_STRATEGY,
+    rrf_k: int = DEFAULTS.RETRIEVER_RRF_K,
+    socket_path: Optional[str] = None,
 ) -> DocumentStoreRetriever:
     """
     Creates a `DocumentStoreRetriever` instance using the provided settings.
@@ -21,11 +30,52 @@ def create_document_retriever(
         document_store_collection_name: Name of the document store collection from which the embeddings are retrieved.
         top_k: Number of documents to retrieve at each request.
         embedding_model_path: Path of the embedding model used to generate the query embeddings.
+        embedding_cache_dir: Directory of the persistent embedding cache, or `None` to disable it.
+        embedding_cache_max_entries: Maximum number of embeddings in the cache, 0 disables it.
+        index_type: Type of embedding index, `flat` for exhaustive retrieval or `ivf` for approximate nearest-neighbour retrieval.
+        nprobe: Number of clusters of the `ivf` index scanned for each query.
+        strategy: Retrieval strategy, `dense` for embedding retrieval or `hybrid` to fuse it with BM25 retrieval.
+        rrf_k: Constant of the reciprocal rank fusion of the `hybrid` strategy.
+        socket_path: Unix socket of a retriever daemon, used instead of a local retriever while the daemon is running
+            with the same settings.
 
     Returns:
         An instance of `DocumentStoreRetriever` according to the provided settings.
     """
 
+    # First Party
+    from instructlab.rag.retriever_daemon import (
+        SocketDocumentStoreRetriever,
+        is_retriever_daemon_running,
+        request_retriever_daemon,
+        retriever_settings,
+    )
+
+    if socket_path and is_retriever_daemon_running(socket_path):
+        settings = retriever_settings(
+            document_store_uri=document_store_uri,
+            document_store_collection_name=document_store_collection_name,
+            top_k=top_k,
+            embedding_model_path=embedding_model_path,
+            index_type=index_type,
+            nprobe=nprobe,
+            strategy=strategy,
+            rrf_k=rrf_k,
+        )
+        try:
+            daemon_settings = request_retriever_daemon(
+                socket_path, {"op": "settings"}
+            ).get("settings")
+        except (OSError, ValueError, RuntimeError) as exc:
+            logger.debug(f"Failed to get the settings of the retriever daemon: {exc}")
+            daemon_settings = None
+        if daemon_settings == settings:
+            logger.debug(f"Using the retriever daemon at {socket_path}")
+            return SocketDocumentStoreRetriever(socket_path=socket_path)
+        logger.warning(
+            f"The retriever daemon at {socket_path} serves another document store or other retrieval settings, using a local retriever"
+        )
+
     # First Party
     from instructlab.rag.haystack.document_store_factory import (
         create_in_memory_document_retriever,
@@ -43,6 +93,12 @@ def create_document_retriever(
         document_store_collection_name=document_store_collection_name,
         top_k=top_k,
         embedding_model_path=embedding_model_path,
+        embedding_cache_dir=embedding_cache_dir,
+        embedding_cache_max_entries=embedding_cache_max_entries,
+        index_type=index_type,
+        nprobe=nprobe,
+        strategy=strategy,
+        rrf_k=rrf_k,
     )
 
 
@@ -50,6 +106,17 @@ def create_document_store_ingestor(
     document_store_uri: str,
     document_store_collection_name: str,
     embedding_model_path: str,
+    incremental: bool = False,
+    embedding_dtype: str = DEFAULTS.DOCUMENT_STORE_EMBEDDING_DTYPE,
+    embedding_quantization: str = DEFAULTS.DOCUMENT_STORE_EMBEDDING_QUANTIZATION,
+    embedding_cache_dir: Optional[str] = None,
+    embedding_cache_max_entries: int = 0,
+    embedding_batch_size: int = DEFAULTS.EMBEDDING_BATCH_SIZE,
+    embedding_model_dtype: str = DEFAULTS.EMBEDDING_DTYPE,
+    embedding_device: Optional[str] = None,
+    embedding_processes: int = 0,
+    chunking_workers: int = DEFAULTS.CHUNKING_WORKERS,
+    stream_batch_size: int = 0,
 ) -> DocumentStoreIngestor:
     """
     Creates a `DocumentStoreIngestor` instance using the provided settings.
@@ -59,6 +126,17 @@ def create_document_store_ingestor(
         document_store_collection_name: Name of the document store collection from which the embeddings are retrieved.
         top_k: Number of documents to retrieve at each request.
         embedding_model_path: Path of the embedding model used to generate the query embeddings.
+        incremental: Update the existing document store by ingesting only the new or changed documents.
+        embedding_dtype: Data type of the embeddings saved in the document store, `float32` or `float16`.
+        embedding_quantization: Quantization of the embeddings scanned before rescoring, `none`, `int8` or `binary`.
+        embedding_cache_dir: Directory of the persistent embedding cache, or `None` to disable it.
+        embedding_cache_max_entries: Maximum number of embeddings in the cache, 0 disables it.
+        embedding_batch_size: Number of chunks embedded at once.
+        embedding_model_dtype: Precision of the embedding model, `float32`, `float16`, `bfloat16` or `int8`.
+        embedding_device: Device running the embedding model, or `None` to detect it automatically.
+        embedding_processes: Number of CPU processes encoding the chunks, 0 or 1 encodes in the current process.
+        chunking_workers: Number of worker processes splitting the documents into chunks.
+        stream_batch_size: Number of documents ingested and checkpointed at once, 0 ingests all the documents at once.
 
     Returns:
         An instance of `DocumentStoreIngestor` according to the provided settings.
@@ -73,4 +151,15 @@ def create_document_store_ingestor(
         document_store_uri=document_store_uri,
         document_store_collection_name=document_store_collection_name,
         embedding_model_path=embedding_model_path,
+        incremental=incremental,
+        embedding_dtype=embedding_dtype,
+        embedding_quantization=embedding_quantization,
+        embedding_cache_dir=embedding_cache_dir,
+        embedding_cache_max_entries=embedding_cache_max_entries,
+        embedding_batch_size=embedding_batch_size,
+        embedding_model_dtype=embedding_model_dtype,
+        embedding_device=embedding_device,
+        embedding_processes=embedding_processes,
+        chunking_workers=chunking_workers,
+        stream_batch_size=stream_batch_size,
     )
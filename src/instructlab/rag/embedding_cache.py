@@ -0,0 +1,273 @@
+"""
+A persistent cache of the embeddings computed by an embedding model, shared by the ingestion and retrieval pipelines.
+"""
+
+# Standard
+from contextlib import contextmanager
+from typing import Optional
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+
+# Third Party
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBEDDINGS_FILE = "embeddings.npy"
+INDEX_FILE = "index.db"
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalizes the given text before computing its cache key: surrounding and repeated whitespaces
+    do not affect the cache lookup.
+    """
+    return " ".join(text.split())
+
+
+class EmbeddingCache:
+    """
+    On-disk cache of the embeddings generated by a given embedding model.
+
+    Embeddings are stored in a memory-mapped float32 array of `max_entries` rows, saved in `.npy` format.
+    An SQLite index maps the hash of the normalized text to the row of the array where its embedding is stored,
+    together with the last access time of the entry: when the cache is full, the least recently used entries are evicted.
+
+    Each embedding model has its own folder under `cache_dir`, so that the same cache location can be shared
+    by different models.
+    """
+
+    def __init__(self, cache_dir: str, embedding_model_id: str, max_entries: int):
+        if max_entries <= 0:
+            raise ValueError(
+                f"Embedding cache size must be a positive integer, got {max_entries}"
+            )
+        self.embedding_model_id = embedding_model_id
+        self.max_entries = max_entries
+        self.cache_dir = os.path.join(
+            cache_dir,
+            hashlib.sha256(embedding_model_id.encode("utf-8")).hexdigest()[:16],
+        )
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._embeddings: Optional[np.memmap] = None
+
+        # autocommit mode: transactions are explicitly started to serialize concurrent writers
+        self._db = sqlite3.connect(
+            os.path.join(self.cache_dir, INDEX_FILE), timeout=30, isolation_level=None
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, slot INTEGER NOT NULL UNIQUE, last_access REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS entries_last_access ON entries(last_access)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self._db.execute(
+            "INSERT OR IGNORE INTO metadata VALUES ('embedding_model_id', ?)",
+            (embedding_model_id,),
+        )
+
+        dimension = self._db.execute(
+            "SELECT value FROM metadata WHERE name = 'dimension'"
+        ).fetchone()
+        if dimension is not None:
+            with self._transaction():
+                self._open_embeddings(int(dimension[0]))
+
+    def get(self, texts: list[str]) -> list[Optional[list[float]]]:
+        """
+        Looks up the embeddings of the given `texts`.
+
+        Returns:
+            A list with the cached embedding of each text, or `None` if the text is not in the cache.
+        """
+        keys = [_cache_key(text) for text in texts]
+        slots = self._lookup_slots(keys) if self._embeddings is not None else {}
+
+        results: list[Optional[list[float]]] = []
+        for key in keys:
+            slot = slots.get(key)
+            if slot is None or self._embeddings is None:
+                self.misses += 1
+                results.append(None)
+            else:
+                self.hits += 1
+                results.append(self._embeddings[slot].tolist())
+
+        if slots:
+            now = time.time()
+            self._db.executemany(
+                "UPDATE entries SET last_access = ? WHERE key = ?",
+                [(now, key) for key in slots],
+            )
+        return results
+
+    def put(self, texts: list[str], embeddings: list[list[float]]):
+        """
+        Stores the `embeddings` of the given `texts`, evicting the least recently used entries if the cache is full.
+        """
+        if len(texts) != len(embeddings):
+            raise ValueError(
+                f"Expected one embedding per text, got {len(embeddings)} embeddings for {len(texts)} texts"
+            )
+        # only the latest entries fit when the batch is larger than the cache
+        entries = dict(
+            zip([_cache_key(text) for text in texts], embeddings, strict=True)
+        )
+        entries = dict(list(entries.items())[-self.max_entries :])
+        if not entries:
+            return
+
+        with self._transaction():
+            if self._embeddings is None:
+                self._initialize_embeddings(len(next(iter(entries.values()))))
+            assert self._embeddings is not None
+
+            existing = self._lookup_slots(list(entries))
+            new_keys = [key for key in entries if key not in existing]
+            free_slots = self._allocate_slots(len(new_keys), exclude=set(existing))
+
+            now = time.time()
+            slots = {**existing, **dict(zip(new_keys, free_slots, strict=True))}
+            for key, slot in slots.items():
+                self._embeddings[slot] = np.asarray(entries[key], dtype=np.float32)
+            self._embeddings.flush()
+            self._db.executemany(
+                "INSERT OR REPLACE INTO entries (key, slot, last_access) VALUES (?, ?, ?)",
+                [(key, slot, now) for key, slot in slots.items()],
+            )
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns the hit, miss and eviction counters of the current session and the number of cached entries.
+        """
+        (entries,) = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+        }
+
+    def close(self):
+        self._db.close()
+        self._embeddings = None
+
+    def _lookup_slots(self, keys: list[str]) -> dict[str, int]:
+        slots: dict[str, int] = {}
+        unique_keys = list(set(keys))
+        # stay below the maximum number of SQL parameters
+        for i in range(0, len(unique_keys), 500):
+            batch = unique_keys[i : i + 500]
+            slots.update(
+                self._db.execute(
+                    f"SELECT key, slot FROM entries WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+            )
+        return slots
+
+    @contextmanager
+    def _transaction(self):
+        # IMMEDIATE transactions serialize the writers sharing the same cache folder
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def _allocate_slots(self, count: int, exclude: set[str]) -> list[int]:
+        """
+        Returns `count` free rows of the embeddings array, evicting the least recently used entries when needed.
+        Entries whose key is in `exclude` are never evicted.
+        """
+        (used,) = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()
+        # rows are allocated contiguously, so the free ones are at the end of the array
+        slots = list(range(used, min(used + count, self.max_entries)))
+        missing = count - len(slots)
+        if missing > 0:
+            evicted = [
+                (key, slot)
+                for key, slot in self._db.execute(
+                    "SELECT key, slot FROM entries ORDER BY last_access LIMIT ?",
+                    (missing + len(exclude),),
+                ).fetchall()
+                if key not in exclude
+            ][:missing]
+            self._db.executemany(
+                "DELETE FROM entries WHERE key = ?", [(key,) for key, _ in evicted]
+            )
+            self.evictions += len(evicted)
+            slots.extend(slot for _, slot in evicted)
+        return slots
+
+    def _initialize_embeddings(self, dimension: int):
+        self._db.execute(
+            "INSERT OR REPLACE INTO metadata VALUES ('dimension', ?)", (str(dimension),)
+        )
+        self._open_embeddings(dimension)
+
+    def _open_embeddings(self, dimension: int):
+        path = os.path.join(self.cache_dir, EMBEDDINGS_FILE)
+        if os.path.exists(path):
+            embeddings = np.load(path, mmap_mode="r+")
+            if embeddings.shape[1] != dimension:
+                raise ValueError(
+                    f"Embedding cache at {self.cache_dir} stores vectors of size {embeddings.shape[1]}, expected {dimension}"
+                )
+            if embeddings.shape[0] == self.max_entries:
+                self._embeddings = embeddings
+                return
+            self._resize_embeddings(path, embeddings, dimension)
+        else:
+            self._embeddings = np.lib.format.open_memmap(
+                path, mode="w+", dtype=np.float32, shape=(self.max_entries, dimension)
+            )
+
+    def _resize_embeddings(self, path: str, embeddings: np.memmap, dimension: int):
+        """
+        Resizes the embeddings array to the configured `max_entries`: when shrinking, the entries stored
+        beyond the new size are dropped.
+        """
+        logger.info(
+            f"Resizing embedding cache at {self.cache_dir} from {embeddings.shape[0]} to {self.max_entries} entries"
+        )
+        self._db.execute("DELETE FROM entries WHERE slot >= ?", (self.max_entries,))
+        # compact the remaining entries into the first rows of the new array
+        rows = self._db.execute(
+            "SELECT key, slot FROM entries ORDER BY slot"
+        ).fetchall()
+        resized_path = path + ".tmp"
+        resized = np.lib.format.open_memmap(
+            resized_path,
+            mode="w+",
+            dtype=np.float32,
+            shape=(self.max_entries, dimension),
+        )
+        for new_slot, (_, slot) in enumerate(rows):
+            resized[new_slot] = embeddings[slot]
+        resized.flush()
+        del embeddings, resized
+        os.replace(resized_path, path)
+        self._db.execute("UPDATE entries SET slot = -slot - 1")
+        self._db.executemany(
+            "UPDATE entries SET slot = ? WHERE key = ?",
+            [(new_slot, key) for new_slot, (key, _) in enumerate(rows)],
+        )
+        self._embeddings = np.load(path, mmap_mode="r+")
+
+
+def _cache_key(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
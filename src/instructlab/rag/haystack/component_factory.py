@@ -1,45 +1,73 @@
 # Standard
+from typing import Optional
 import logging
 
 # Third Party
 from haystack.components.converters import TextFileToDocument  # type: ignore
-from haystack.components.embedders import (  # type: ignore
-    SentenceTransformersDocumentEmbedder,
-    SentenceTransformersTextEmbedder,
-)
+from haystack.components.embedders import SentenceTransformersTextEmbedder  # type: ignore
 from haystack.components.retrievers import InMemoryEmbeddingRetriever  # type: ignore
 from haystack.components.writers import DocumentWriter  # type: ignore
 from haystack.document_stores.in_memory import InMemoryDocumentStore  # type: ignore
 from haystack.document_stores.types import DuplicatePolicy  # type: ignore
 
 # First Party
+from instructlab.defaults import DEFAULTS
+from instructlab.rag.ann_index import IVFIndex
+from instructlab.rag.embedding_cache import EmbeddingCache
+from instructlab.rag.haystack.components.cached_embedders import (
+    CachedDocumentEmbedder,
+    CachedTextEmbedder,
+)
+from instructlab.rag.haystack.components.document_embedder import (
+    BatchedDocumentEmbedder,
+)
 from instructlab.rag.haystack.components.document_splitter import (
     DoclingDocumentSplitter,
 )
+from instructlab.rag.haystack.components.hybrid_retriever import HybridRetriever
+from instructlab.rag.haystack.components.ivf_retriever import IVFEmbeddingRetriever
+from instructlab.rag.haystack.memory_mapped_document_store import (
+    MemoryMappedDocumentStore,
+)
 
 logger = logging.getLogger(__name__)
 
 
 def create_document_writer(
-    document_store_uri: str, document_store_collection_name: str
+    document_store_uri: str,
+    document_store_collection_name: str,
+    drop_old: bool = True,
+    embedding_dtype: str = DEFAULTS.DOCUMENT_STORE_EMBEDDING_DTYPE,
+    embedding_quantization: str = DEFAULTS.DOCUMENT_STORE_EMBEDDING_QUANTIZATION,
 ) -> DocumentWriter:
     return DocumentWriter(
         create_document_store(
             document_store_uri=document_store_uri,
             document_store_collection_name=document_store_collection_name,
-            drop_old=True,
+            drop_old=drop_old,
+            embedding_dtype=embedding_dtype,
+            embedding_quantization=embedding_quantization,
         ),
         policy=DuplicatePolicy.SKIP,
     )
 
 
 def create_document_store(
-    document_store_uri: str, document_store_collection_name: str, drop_old: bool
+    document_store_uri: str,
+    document_store_collection_name: str,
+    drop_old: bool,
+    embedding_dtype: str = DEFAULTS.DOCUMENT_STORE_EMBEDDING_DTYPE,
+    embedding_quantization: str = DEFAULTS.DOCUMENT_STORE_EMBEDDING_QUANTIZATION,
 ):
     if not drop_old:
-        # Retrieve use case: load from file
-        return InMemoryDocumentStore.load_from_disk(document_store_uri)
-    return InMemoryDocumentStore()
+        # Retrieve use case: load from file, memory-mapping the stored embeddings
+        document_store = MemoryMappedDocumentStore.load_from_disk(document_store_uri)
+        document_store.embedding_dtype = embedding_dtype
+        document_store.embedding_quantization = embedding_quantization
+        return document_store
+    return MemoryMappedDocumentStore(
+        embedding_dtype=embedding_dtype, embedding_quantization=embedding_quantization
+    )
 
 
 def create_retriever(
@@ -52,8 +80,50 @@ def create_retriever(
     )
 
 
-def create_document_embedder(embedding_model_path: str):
-    return SentenceTransformersDocumentEmbedder(model=embedding_model_path)
+def create_ivf_retriever(
+    top_k: int,
+    document_store: InMemoryDocumentStore,
+    index: IVFIndex,
+    nprobe: int,
+):
+    return IVFEmbeddingRetriever(
+        document_store=document_store,
+        index=index,
+        top_k=top_k,
+        nprobe=nprobe,
+    )
+
+
+def create_hybrid_retriever(
+    top_k: int,
+    document_store: InMemoryDocumentStore,
+    dense_retriever,
+    index_path: str,
+    rrf_k: int,
+):
+    return HybridRetriever(
+        document_store=document_store,
+        dense_retriever=dense_retriever,
+        index_path=index_path,
+        top_k=top_k,
+        rrf_k=rrf_k,
+    )
+
+
+def create_document_embedder(
+    embedding_model_path: str,
+    batch_size: int = DEFAULTS.EMBEDDING_BATCH_SIZE,
+    dtype: str = DEFAULTS.EMBEDDING_DTYPE,
+    device: Optional[str] = None,
+    encode_processes: int = 0,
+):
+    return BatchedDocumentEmbedder(
+        model=embedding_model_path,
+        batch_size=batch_size,
+        dtype=dtype,
+        device=device,
+        encode_processes=encode_processes,
+    )
 
 
 def create_text_embedder(embedding_model_path: str):
@@ -62,13 +132,38 @@ def create_text_embedder(embedding_model_path: str):
     )
 
 
+def create_embedding_cache(
+    embedding_model_path: str,
+    cache_dir: Optional[str],
+    cache_max_entries: int,
+) -> Optional[EmbeddingCache]:
+    if not cache_dir or cache_max_entries <= 0:
+        return None
+    return EmbeddingCache(
+        cache_dir=cache_dir,
+        embedding_model_id=embedding_model_path,
+        max_entries=cache_max_entries,
+    )
+
+
+def create_cached_document_embedder(embedder, embedding_cache: EmbeddingCache):
+    return CachedDocumentEmbedder(embedder=embedder, cache=embedding_cache)
+
+
+def create_cached_text_embedder(embedder, embedding_cache: EmbeddingCache):
+    return CachedTextEmbedder(embedder=embedder, cache=embedding_cache)
+
+
 def create_converter():
     return TextFileToDocument()
 
 
-def create_splitter(embedding_model_path: str):
+def create_splitter(
+    embedding_model_path: str, workers: int = DEFAULTS.CHUNKING_WORKERS
+):
     return DoclingDocumentSplitter(
         embedding_model_id=embedding_model_path,
         content_format="json",
         max_tokens=150,
+        workers=workers,
     )
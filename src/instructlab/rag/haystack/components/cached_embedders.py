@@ -0,0 +1,83 @@
+# Standard
+from typing import Any, Dict, List
+import logging
+
+# Third Party
+from haystack import Document, component  # type: ignore
+
+# First Party
+from instructlab.rag.embedding_cache import EmbeddingCache
+
+logger = logging.getLogger(__name__)
+
+
+@component
+class CachedDocumentEmbedder:
+    """
+    Wraps a Haystack document embedder to look up the document embeddings in an `EmbeddingCache` first.
+    Only the documents missing from the cache are sent to the wrapped embedder, and their embeddings are
+    added to the cache. The wrapped embedder is warmed up at the first cache miss, so that the embedding
+    model is not loaded at all when every document is found in the cache.
+    """
+
+    def __init__(self, embedder: Any, cache: EmbeddingCache):
+        self.embedder = embedder
+        self.cache = cache
+
+    @component.output_types(documents=List[Document])
+    def run(self, documents: List[Document]) -> Dict[str, List[Document]]:
+        cached_embeddings = self.cache.get([doc.content or "" for doc in documents])
+        misses = [
+            doc
+            for doc, embedding in zip(documents, cached_embeddings, strict=True)
+            if embedding is None
+        ]
+        logger.debug(
+            f"Embedding cache: {len(documents) - len(misses)} hits, {len(misses)} misses"
+        )
+
+        embedded: List[Document] = []
+        if misses:
+            _warm_up(self.embedder)
+            embedded = self.embedder.run(documents=misses)["documents"]
+            self.cache.put(
+                [doc.content or "" for doc in embedded],
+                [doc.embedding for doc in embedded],
+            )
+
+        # the wrapped embedder returns the documents in the same order they were received
+        embedded_iter = iter(embedded)
+        results = []
+        for doc, embedding in zip(documents, cached_embeddings, strict=True):
+            if embedding is None:
+                results.append(next(embedded_iter))
+            else:
+                doc.embedding = embedding
+                results.append(doc)
+        return {"documents": results}
+
+
+@component
+class CachedTextEmbedder:
+    """
+    Wraps a Haystack text embedder to look up the text embedding in an `EmbeddingCache` first.
+    The wrapped embedder is warmed up at the first cache miss.
+    """
+
+    def __init__(self, embedder: Any, cache: EmbeddingCache):
+        self.embedder = embedder
+        self.cache = cache
+
+    @component.output_types(embedding=List[float])
+    def run(self, text: str) -> Dict[str, List[float]]:
+        (embedding,) = self.cache.get([text])
+        if embedding is None:
+            _warm_up(self.embedder)
+            embedding = self.embedder.run(text=text)["embedding"]
+            self.cache.put([text], [embedding])
+        return {"embedding": embedding}
+
+
+def _warm_up(embedder: Any):
+    if hasattr(embedder, "warm_up"):
+        embedder.warm_up()
@@ -0,0 +1,148 @@
+# Standard
+from typing import Any, Dict, List, Optional, cast
+import copy
+import logging
+import time
+
+# Third Party
+from haystack import Document, component  # type: ignore
+from haystack.components.embedders import SentenceTransformersDocumentEmbedder  # type: ignore
+from haystack.core.serialization import (  # type: ignore
+    default_from_dict,
+    default_to_dict,
+)
+from haystack.utils import ComponentDevice  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EMBEDDING_MODEL_DTYPES = ["float32", "float16", "bfloat16", "int8"]
+
+
+@component
+class BatchedDocumentEmbedder(SentenceTransformersDocumentEmbedder):
+    """
+    A `SentenceTransformersDocumentEmbedder` with tunable batching, precision and placement of the embedding model.
+
+    * `dtype` loads the model weights in `float16` or `bfloat16`, or quantizes the linear layers of the model
+      to `int8` for CPU inference.
+    * `device` selects the device of the model, e.g. `cpu`, `cuda:0` or `mps`. It is detected automatically when not set.
+    * `encode_processes` greater than 1 encodes the documents with a pool of CPU processes, each one holding
+      a copy of the model. The pool is started at the first run and stopped by `close`.
+
+    Each run logs the achieved throughput, in chunks per second.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        batch_size: int = 32,
+        dtype: str = "float32",
+        device: Optional[str] = None,
+        encode_processes: int = 0,
+    ):
+        if dtype not in SUPPORTED_EMBEDDING_MODEL_DTYPES:
+            raise ValueError(
+                f"Unsupported embedding model dtype {dtype}, expected one of {SUPPORTED_EMBEDDING_MODEL_DTYPES}"
+            )
+        # @component rebuilds the class: parent methods are called explicitly, as super() would fail
+        SentenceTransformersDocumentEmbedder.__init__(
+            self,
+            model=model,
+            device=ComponentDevice.from_str(device) if device else None,
+            batch_size=batch_size,
+            progress_bar=logger.isEnabledFor(logging.DEBUG),
+            model_kwargs={"torch_dtype": dtype}
+            if dtype in ["float16", "bfloat16"]
+            else None,
+        )
+        self.dtype = dtype
+        self.encode_processes = encode_processes
+        self._pool: Optional[Dict[str, Any]] = None
+
+    def warm_up(self):
+        if self.embedding_backend is not None:
+            return
+        SentenceTransformersDocumentEmbedder.warm_up(self)
+        if self.dtype == "int8":
+            if self.device.to_torch_str() != "cpu":
+                logger.warning(
+                    f"int8 quantization is only supported on CPU, running the embedding model on {self.device.to_torch_str()} in float32"
+                )
+                return
+            # Third Party
+            import torch
+
+            logger.debug("Quantizing the linear layers of the embedding model to int8")
+            # haystack caches and shares the backend and its model between embedders:
+            # quantize a copy of the model, held by a copy of the backend
+            backend = copy.copy(self.embedding_backend)
+            backend.model = torch.quantization.quantize_dynamic(
+                self.embedding_backend.model,
+                {torch.nn.Linear},
+                dtype=torch.qint8,
+                inplace=False,
+            )
+            self.embedding_backend = backend
+
+    @component.output_types(documents=List[Document])
+    def run(self, documents: List[Document]):
+        start_time = time.time()
+        if self.encode_processes > 1 and len(documents) > 1:
+            result = self._run_in_pool(documents)
+        else:
+            result = SentenceTransformersDocumentEmbedder.run(self, documents=documents)
+        elapsed = time.time() - start_time
+        if documents:
+            logger.info(
+                f"Embedded {len(documents)} chunks in {elapsed:.2f} seconds "
+                f"({len(documents) / max(elapsed, 1e-6):.1f} chunks/s)"
+            )
+        return result
+
+    def close(self):
+        """
+        Stops the pool of encoding processes, if any.
+        """
+        if self._pool is not None:
+            self.embedding_backend.model.stop_multi_process_pool(self._pool)
+            self._pool = None
+
+    def _run_in_pool(self, documents: List[Document]) -> Dict[str, List[Document]]:
+        if self.embedding_backend is None:
+            raise RuntimeError(
+                "The embedding model has not been loaded. Please call warm_up() before running."
+            )
+        model = self.embedding_backend.model
+        if self._pool is None:
+            logger.debug(f"Starting {self.encode_processes} encoding processes")
+            self._pool = model.start_multi_process_pool(
+                target_devices=["cpu"] * self.encode_processes
+            )
+        embeddings = model.encode_multi_process(
+            [doc.content or "" for doc in documents],
+            self._pool,
+            batch_size=self.batch_size,
+        )
+        for doc, embedding in zip(documents, embeddings, strict=True):
+            doc.embedding = embedding.tolist()
+        return {"documents": documents}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes the component to a dictionary.
+        """
+        return default_to_dict(  # type: ignore[no-any-return]
+            self,
+            model=self.model,
+            batch_size=self.batch_size,
+            dtype=self.dtype,
+            device=self.device.to_torch_str(),
+            encode_processes=self.encode_processes,
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BatchedDocumentEmbedder":
+        """
+        Deserializes the component from a dictionary.
+        """
+        return cast("BatchedDocumentEmbedder", default_from_dict(cls, data))
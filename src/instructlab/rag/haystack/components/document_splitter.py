@@ -1,6 +1,8 @@
 # Standard
-from typing import Any, Dict, List, cast
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, cast
 import logging
+import multiprocessing
 
 # Third Party
 from docling_core.transforms.chunker.hybrid_chunker import HybridChunker
@@ -24,11 +26,31 @@ logger = logging.getLogger(__name__)
 
 @component
 class DoclingDocumentSplitter:
-    def __init__(self, embedding_model_id=None, content_format=None, max_tokens=None):
+    """
+    Splits Docling JSON documents into chunks using the `HybridChunker` of Docling.
+
+    When `workers` is greater than 1, the documents are sharded across a pool of worker processes, started at
+    the first run and stopped by `close`. Each worker creates its own chunker and tokenizer once, and reuses them
+    for all the documents it receives, across runs.
+    Chunks are returned in the same order as the input documents, whatever the number of workers.
+    """
+
+    def __init__(
+        self,
+        embedding_model_id=None,
+        content_format=None,
+        max_tokens=None,
+        workers: int = 1,
+    ):
+        if workers < 1:
+            raise ValueError(f"Number of workers must be at least 1, got {workers}")
         self.__chunker = HybridChunker(
             tokenizer=embedding_model_id, max_tokens=max_tokens
         )
         self.__embedding_model_id = embedding_model_id
+        self.__max_tokens = max_tokens
+        self.__workers = workers
+        self.__executor: Optional[ProcessPoolExecutor] = None
 
         if content_format not in DEFAULTS.SUPPORTED_CONTENT_FORMATS:
             raise ValueError(
@@ -45,17 +67,63 @@ class DoclingDocumentSplitter:
                 "DoclingDocumentSplitter expects a List of Documents as input."
             )
 
-        split_docs = []
         for doc in documents:
             if doc.content is None:
                 raise ValueError(f"Missing content for document ID {doc.id}.")
 
-            chunks = self._split_with_docling(doc.meta["file_path"], doc.content)
-            current_split_docs = [Document(content=chunk) for chunk in chunks]
+        split_docs = []
+        for doc, chunks in zip(
+            documents, self._split_documents(documents), strict=True
+        ):
+            # Propagate the source metadata so that chunks can be tracked back to their original file
+            current_split_docs = [
+                Document(content=chunk, meta={**doc.meta, "split_id": split_id})
+                for split_id, chunk in enumerate(chunks)
+            ]
             split_docs.extend(current_split_docs)
 
         return {"documents": split_docs}
 
+    def _split_documents(self, documents: List[Document]) -> List[List[str]]:
+        workers = min(self.__workers, len(documents))
+        if workers <= 1:
+            return [
+                self._split_with_docling(doc.meta["file_path"], cast(str, doc.content))
+                for doc in documents
+            ]
+
+        if self.__executor is None:
+            logger.debug(f"Starting {self.__workers} splitter workers")
+            self.__executor = ProcessPoolExecutor(
+                max_workers=self.__workers,
+                mp_context=multiprocessing.get_context(
+                    DEFAULTS.MULTIPROCESSING_START_METHOD
+                ),
+                initializer=_init_worker,
+                initargs=(
+                    self.__embedding_model_id,
+                    self.__content_format,
+                    self.__max_tokens,
+                ),
+            )
+        logger.debug(f"Splitting {len(documents)} documents with {workers} workers")
+        # map returns the results in the order of the submitted documents
+        return list(
+            self.__executor.map(
+                _split_in_worker,
+                [doc.meta["file_path"] for doc in documents],
+                [doc.content for doc in documents],
+            )
+        )
+
+    def close(self):
+        """
+        Stops the pool of worker processes, if any.
+        """
+        if self.__executor is not None:
+            self.__executor.shutdown()
+            self.__executor = None
+
     def _split_with_docling(self, file_path: str, text: str) -> List[str]:
         if self.__content_format == "json":
             try:
@@ -92,6 +160,8 @@ class DoclingDocumentSplitter:
             self,
             embedding_model_id=self.__embedding_model_id,
             content_format=self.__content_format,
+            max_tokens=self.__max_tokens,
+            workers=self.__workers,
         )
 
     @classmethod
@@ -100,3 +170,21 @@ class DoclingDocumentSplitter:
         Deserializes the component from a dictionary.
         """
         return cast("DoclingDocumentSplitter", default_from_dict(cls, data))
+
+
+# Splitter instance of the current worker process, created once by `_init_worker`
+_worker_splitter: Optional[DoclingDocumentSplitter] = None
+
+
+def _init_worker(embedding_model_id, content_format, max_tokens):
+    global _worker_splitter  # pylint: disable=global-statement
+    _worker_splitter = DoclingDocumentSplitter(
+        embedding_model_id=embedding_model_id,
+        content_format=content_format,
+        max_tokens=max_tokens,
+    )
+
+
+def _split_in_worker(file_path: str, text: str) -> List[str]:
+    assert _worker_splitter is not None
+    return _worker_splitter._split_with_docling(file_path, text)
@@ -0,0 +1,98 @@
+# Standard
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import logging
+
+# Third Party
+from haystack import Document, component  # type: ignore
+from haystack.document_stores.in_memory import InMemoryDocumentStore  # type: ignore
+
+# First Party
+from instructlab.rag.bm25_index import BM25Index
+
+logger = logging.getLogger(__name__)
+
+# Number of candidates retrieved by each ranking, relative to `top_k`
+CANDIDATES_PER_RESULT = 4
+
+
+@component
+class HybridRetriever:
+    """
+    Fuses the rankings of a dense embedding retriever and of a sparse `BM25Index` with reciprocal rank
+    fusion (RRF): each document scores `1 / (rrf_k + rank)` in each ranking it appears in.
+
+    The BM25 index is loaded from `index_path` at warm-up, or at the first run. The retriever falls back
+    to the dense ranking alone when the index is missing or does not match the document store.
+    """
+
+    def __init__(
+        self,
+        document_store: InMemoryDocumentStore,
+        dense_retriever: Any,
+        index_path: str,
+        top_k: int,
+        rrf_k: int,
+    ):
+        self.document_store = document_store
+        self.dense_retriever = dense_retriever
+        self.index_path = index_path
+        self.top_k = top_k
+        self.rrf_k = rrf_k
+        self._index: Optional[BM25Index] = None
+        self._index_loaded = False
+
+    def warm_up(self):
+        if self._index_loaded:
+            return
+        self._index_loaded = True
+        if not Path(self.index_path).exists():
+            logger.warning(
+                f"BM25 index not found at {self.index_path}, falling back to dense retrieval. Run `ilab rag ingest` to build it."
+            )
+            return
+        index = BM25Index.load(self.index_path)
+        if len(index) != self.document_store.count_documents():
+            logger.warning(
+                f"BM25 index at {self.index_path} is out of date ({len(index)} indexed documents, "
+                f"{self.document_store.count_documents()} stored documents), falling back to dense retrieval. "
+                "Run `ilab rag ingest` to rebuild it."
+            )
+            return
+        logger.debug(f"Loaded BM25 index from {self.index_path}")
+        self._index = index
+
+    @component.output_types(documents=List[Document])
+    def run(
+        self,
+        query_embedding: List[float],
+        query: Optional[str] = None,
+        top_k: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        self.warm_up()
+        top_k = top_k or self.top_k
+        candidates = top_k * CANDIDATES_PER_RESULT
+        dense_documents = self.dense_retriever.run(
+            query_embedding=query_embedding, top_k=candidates
+        )["documents"]
+        if self._index is None or not query:
+            return {"documents": dense_documents[:top_k]}
+
+        scores: Dict[str, float] = {}
+        rankings = [
+            [doc.id for doc in dense_documents],
+            [doc_id for doc_id, _ in self._index.search(query, top_k=candidates)],
+        ]
+        for ranking in rankings:
+            for rank, doc_id in enumerate(ranking, start=1):
+                scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (self.rrf_k + rank)
+
+        documents = []
+        for doc_id in sorted(scores, key=scores.__getitem__, reverse=True)[:top_k]:
+            doc = self.document_store.storage.get(doc_id)
+            if doc is None:
+                logger.warning(f"Document {doc_id} not found in the document store")
+                continue
+            documents.append(replace(doc, score=scores[doc_id], embedding=None))
+        return {"documents": documents}
@@ -0,0 +1,50 @@
+# Standard
+from dataclasses import replace
+from typing import Any, Dict, List, Optional
+import logging
+
+# Third Party
+from haystack import Document, component  # type: ignore
+from haystack.document_stores.in_memory import InMemoryDocumentStore  # type: ignore
+
+# First Party
+from instructlab.rag.ann_index import IVFIndex
+
+logger = logging.getLogger(__name__)
+
+
+@component
+class IVFEmbeddingRetriever:
+    """
+    Retrieves the documents most similar to the query embedding using an `IVFIndex` built at ingestion time,
+    instead of scoring every document of the store.
+    The matching documents are then read from the given `InMemoryDocumentStore`.
+    """
+
+    def __init__(
+        self,
+        document_store: InMemoryDocumentStore,
+        index: IVFIndex,
+        top_k: int,
+        nprobe: int,
+    ):
+        self.document_store = document_store
+        self.index = index
+        self.top_k = top_k
+        self.nprobe = nprobe
+
+    @component.output_types(documents=List[Document])
+    def run(
+        self, query_embedding: List[float], top_k: Optional[int] = None
+    ) -> Dict[str, Any]:
+        matches = self.index.search(
+            query_embedding, top_k=top_k or self.top_k, nprobe=self.nprobe
+        )
+        documents = []
+        for doc_id, score in matches:
+            doc = self.document_store.storage.get(doc_id)
+            if doc is None:
+                logger.warning(f"Document {doc_id} not found in the document store")
+                continue
+            documents.append(replace(doc, score=score, embedding=None))
+        return {"documents": documents}
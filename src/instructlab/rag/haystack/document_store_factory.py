@@ -4,9 +4,11 @@
 #     ElasticsearchDocumentStore,
 # )
 # Standard
+from typing import Optional
 import logging
 
 # First Party
+from instructlab.defaults import DEFAULTS
 from instructlab.rag.document_store import DocumentStoreIngestor, DocumentStoreRetriever
 from instructlab.rag.haystack.document_store_ingestor import (
     HaystackDocumentStoreIngestor,
@@ -22,6 +24,17 @@ def create_in_memory_document_store(
     document_store_uri: str,
     document_store_collection_name: str,
     embedding_model_path: str,
+    incremental: bool = False,
+    embedding_dtype: str = DEFAULTS.DOCUMENT_STORE_EMBEDDING_DTYPE,
+    embedding_quantization: str = DEFAULTS.DOCUMENT_STORE_EMBEDDING_QUANTIZATION,
+    embedding_cache_dir: Optional[str] = None,
+    embedding_cache_max_entries: int = 0,
+    embedding_batch_size: int = DEFAULTS.EMBEDDING_BATCH_SIZE,
+    embedding_model_dtype: str = DEFAULTS.EMBEDDING_DTYPE,
+    embedding_device: Optional[str] = None,
+    embedding_processes: int = 0,
+    chunking_workers: int = DEFAULTS.CHUNKING_WORKERS,
+    stream_batch_size: int = 0,
 ) -> DocumentStoreIngestor:
     """
     Creates a `DocumentStoreIngestor` based on Haystack components.
@@ -31,6 +44,17 @@ def create_in_memory_document_store(
         document_store_uri=document_store_uri,
         document_store_collection_name=document_store_collection_name,
         embedding_model_path=embedding_model_path,
+        incremental=incremental,
+        embedding_dtype=embedding_dtype,
+        embedding_quantization=embedding_quantization,
+        embedding_cache_dir=embedding_cache_dir,
+        embedding_cache_max_entries=embedding_cache_max_entries,
+        embedding_batch_size=embedding_batch_size,
+        embedding_model_dtype=embedding_model_dtype,
+        embedding_device=embedding_device,
+        embedding_processes=embedding_processes,
+        chunking_workers=chunking_workers,
+        stream_batch_size=stream_batch_size,
     )
 
 
@@ -39,6 +63,12 @@ def create_in_memory_document_retriever(
     document_store_collection_name: str,
     top_k: int,
     embedding_model_path: str,
+    embedding_cache_dir: Optional[str] = None,
+    embedding_cache_max_entries: int = 0,
+    index_type: str = DEFAULTS.RETRIEVER_INDEX_TYPE,
+    nprobe: int = DEFAULTS.RETRIEVER_NPROBE,
+    strategy: str = DEFAULTS.RETRIEVER_STRATEGY,
+    rrf_k: int = DEFAULTS.RETRIEVER_RRF_K,
 ) -> DocumentStoreRetriever:
     """
     Creates a `DocumentStoreRetriever` based on Haystack components.
@@ -49,4 +79,10 @@ def create_in_memory_document_retriever(
         document_store_collection_name=document_store_collection_name,
         top_k=top_k,
         embedding_model_path=embedding_model_path,
+        embedding_cache_dir=embedding_cache_dir,
+        embedding_cache_max_entries=embedding_cache_max_entries,
+        index_type=index_type,
+        nprobe=nprobe,
+        strategy=strategy,
+        rrf_k=rrf_k,
     )
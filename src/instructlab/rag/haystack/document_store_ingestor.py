@@ -1,24 +1,40 @@
 # Standard
 from pathlib import Path
+from typing import Optional
 import glob
+import hashlib
+import json
 import logging
 import os
+import time
 
 # Third Party
 from haystack import Pipeline  # type: ignore
 from haystack.components.preprocessors import DocumentCleaner  # type: ignore
+from haystack.core.serialization import component_to_dict  # type: ignore
 
 # First Party
+from instructlab.defaults import DEFAULTS
+from instructlab.rag.ann_index import IVFIndex, ivf_index_path
+from instructlab.rag.bm25_index import BM25Index, bm25_index_path
 from instructlab.rag.document_store import DocumentStoreIngestor
+from instructlab.rag.embedding_cache import EmbeddingCache
 from instructlab.rag.haystack.component_factory import (
+    create_cached_document_embedder,
     create_converter,
     create_document_embedder,
     create_document_writer,
+    create_embedding_cache,
     create_splitter,
 )
 
 logger = logging.getLogger(__name__)
 
+# Metadata keys used to track the chunks back to their source file
+SOURCE_FILE_META = "source_file"
+SOURCE_FINGERPRINT_META = "source_fingerprint"
+CHECKPOINT_SUFFIX = ".checkpoint"
+
 
 class HaystackDocumentStoreIngestor(DocumentStoreIngestor):
     """
@@ -35,6 +51,33 @@ class HaystackDocumentStoreIngestor(DocumentStoreIngestor):
 
     The output of the `ingest_documents` method is tuple with the completion status and the number
     of documents written to the document store.
+
+    Every chunk is tagged with the relative path of its source file and a fingerprint computed from the
+    file content and the settings of the splitter and embedder components. When `incremental` is set,
+    the existing document store is loaded from `document_store_uri` and only the new or changed source
+    files are processed, while the chunks of removed or changed files are deleted from the store.
+
+    The document store is saved as a `MemoryMappedDocumentStore`: the embeddings are written to a contiguous
+    `embedding_dtype` array next to the document text and metadata, and are memory-mapped when the store is loaded.
+    When `embedding_quantization` is set, a quantized copy of the embeddings is also saved, and its size and
+    retrieval recall compared to the full embeddings are reported at the end of the ingestion.
+
+    At the end of the ingestion, an `IVFIndex` of the stored embeddings is saved next to the document store,
+    to be used by the approximate nearest-neighbour retriever.
+
+    When `stream_batch_size` is set, the source documents are sent through the pipeline in micro-batches
+    of `stream_batch_size` documents. After each micro-batch, its chunks are appended to the document store on
+    disk and dropped from memory, so that neither the peak memory nor the I/O of a micro-batch depend on the size
+    of the corpus, and a checkpoint is written next to the document store. If the ingestion is interrupted, the
+    next one resumes from the last checkpoint like an incremental ingestion: the source files already ingested
+    are not processed again.
+
+    The document embedder batches the chunks according to `embedding_batch_size` and can run the embedding model
+    in reduced precision (`embedding_model_dtype`), on a given `embedding_device` or in a pool of
+    `embedding_processes` CPU processes. The ingestion throughput is reported in chunks per second.
+
+    When `embedding_cache_dir` is set, the document embeddings are looked up in a persistent `EmbeddingCache`
+    before running the embedding model, and the cache statistics are reported at the end of the ingestion.
     """
 
     def __init__(
@@ -42,13 +85,54 @@ class HaystackDocumentStoreIngestor(DocumentStoreIngestor):
         document_store_uri: str,
         document_store_collection_name: str,
         embedding_model_path: str,
+        incremental: bool = False,
+        embedding_dtype: str = DEFAULTS.DOCUMENT_STORE_EMBEDDING_DTYPE,
+        embedding_quantization: str = DEFAULTS.DOCUMENT_STORE_EMBEDDING_QUANTIZATION,
+        embedding_cache_dir: Optional[str] = None,
+        embedding_cache_max_entries: int = 0,
+        embedding_batch_size: int = DEFAULTS.EMBEDDING_BATCH_SIZE,
+        embedding_model_dtype: str = DEFAULTS.EMBEDDING_DTYPE,
+        embedding_device: Optional[str] = None,
+        embedding_processes: int = 0,
+        chunking_workers: int = DEFAULTS.CHUNKING_WORKERS,
+        stream_batch_size: int = 0,
     ):
         super().__init__()
         self.document_store_uri = document_store_uri
+        self.embedding_model_path = embedding_model_path
+        self.embedding_model_dtype = embedding_model_dtype
+        self.stream_batch_size = stream_batch_size
+        store_exists = Path(document_store_uri).exists()
+        resume = store_exists and Path(checkpoint_path(document_store_uri)).exists()
+        if resume:
+            logger.info(
+                f"Found an interrupted ingestion for {document_store_uri}, resuming it"
+            )
+        self.incremental = (incremental or resume) and store_exists
+        if incremental and not self.incremental:
+            logger.info(
+                f"No document store found at {document_store_uri}, running a full ingestion"
+            )
+        self._embedding_cache = create_embedding_cache(
+            embedding_model_path=_embedding_model_id(
+                embedding_model_path, embedding_model_dtype
+            ),
+            cache_dir=embedding_cache_dir,
+            cache_max_entries=embedding_cache_max_entries,
+        )
         self._pipeline = _create_pipeline(
             document_store_uri=document_store_uri,
             document_store_collection_name=document_store_collection_name,
             embedding_model_path=embedding_model_path,
+            drop_old=not self.incremental,
+            embedding_dtype=embedding_dtype,
+            embedding_quantization=embedding_quantization,
+            embedding_cache=self._embedding_cache,
+            embedding_batch_size=embedding_batch_size,
+            embedding_model_dtype=embedding_model_dtype,
+            embedding_device=embedding_device,
+            embedding_processes=embedding_processes,
+            chunking_workers=chunking_workers,
         )
         _connect_components(self._pipeline)
 
@@ -58,45 +142,288 @@ class HaystackDocumentStoreIngestor(DocumentStoreIngestor):
             pattern = "docling-artifacts/" + pattern
 
         try:
-            self._pipeline.run(
-                {"converter": {"sources": glob.glob(os.path.join(input_dir, pattern))}}
-            )
             document_store = self._pipeline.get_component(
                 "document_writer"
             ).document_store
+            source_files = {
+                source: os.path.relpath(source, input_dir)
+                for source in glob.glob(os.path.join(input_dir, pattern))
+            }
+            settings_digest = self._settings_digest()
+            fingerprints = {
+                source_file: _source_fingerprint(source, settings_digest)
+                for source, source_file in source_files.items()
+            }
+            sources = list(source_files)
+            if self.incremental:
+                sources = self._prune_document_store(
+                    document_store, source_files, fingerprints
+                )
+
+            if sources:
+                start_time = time.time()
+                documents_written = 0
+                batch_size = self.stream_batch_size or len(sources)
+                if self.stream_batch_size:
+                    # the micro-batches are appended to the store, as pruned above
+                    document_store.save_to_disk(self.document_store_uri)
+                for start in range(0, len(sources), batch_size):
+                    batch = sources[start : start + batch_size]
+                    result = self._pipeline.run(
+                        {
+                            "converter": {
+                                "sources": batch,
+                                "meta": [
+                                    {
+                                        SOURCE_FILE_META: source_files[source],
+                                        SOURCE_FINGERPRINT_META: fingerprints[
+                                            source_files[source]
+                                        ],
+                                    }
+                                    for source in batch
+                                ],
+                            }
+                        }
+                    )
+                    documents_written += result["document_writer"]["documents_written"]
+                    if self.stream_batch_size:
+                        self._save_checkpoint(
+                            document_store, start + len(batch), len(sources)
+                        )
+                elapsed = time.time() - start_time
+                logger.info(
+                    f"Ingested {documents_written} chunks in {elapsed:.2f} seconds "
+                    f"({documents_written / max(elapsed, 1e-6):.1f} chunks/s)"
+                )
+            else:
+                logger.info("No new or changed documents to ingest")
             logger.info(f"count_documents: {document_store.count_documents()}")
+            if self._embedding_cache is not None:
+                stats = self._embedding_cache.stats()
+                logger.info(
+                    f"Embedding cache: {stats['hits']} hits, {stats['misses']} misses, "
+                    f"{stats['evictions']} evictions, {stats['entries']} cached entries"
+                )
 
             # Final step required for InMemory document store
             document_store.save_to_disk(self.document_store_uri)
             logger.info(f"Saved document store as: {self.document_store_uri}")
+            self._log_quantization_report(document_store)
+            self._save_ivf_index(document_store)
+            self._save_bm25_index(document_store)
+            Path(checkpoint_path(self.document_store_uri)).unlink(missing_ok=True)
             return True, document_store.count_documents()
         except Exception as e:
             logger.error(f"Ingestion attempt failed: {e}")
             return False, -1
+        finally:
+            document_embedder = self._pipeline.get_component("document_embedder")
+            # unwrap the embedding cache, if any
+            document_embedder = getattr(
+                document_embedder, "embedder", document_embedder
+            )
+            if hasattr(document_embedder, "close"):
+                document_embedder.close()
+            document_splitter = self._pipeline.get_component("document_splitter")
+            if hasattr(document_splitter, "close"):
+                document_splitter.close()
+
+    def _save_checkpoint(self, document_store, processed: int, total: int):
+        """
+        Appends the chunks of the last micro-batch to the document store on disk, releasing their memory,
+        so that an interrupted ingestion can resume from this point.
+        """
+        document_store.append_to_disk(self.document_store_uri)
+        with open(checkpoint_path(self.document_store_uri), "w", encoding="utf-8") as f:
+            json.dump({"processed": processed, "total": total}, f)
+        logger.info(
+            f"Checkpoint: {processed}/{total} documents ingested, {document_store.count_documents()} chunks in the document store"
+        )
+
+    def _log_quantization_report(self, document_store):
+        report = document_store.quantization_report()
+        if report is None:
+            return
+        logger.info(
+            f"Quantized embeddings: {report['quantized_bytes'] / 2**20:.1f} MiB in memory instead of "
+            f"{report['embeddings_bytes'] / 2**20:.1f} MiB "
+            f"({report['embeddings_bytes'] / max(report['quantized_bytes'], 1):.1f}x smaller), "
+            f"recall@{report['top_k']} of the quantized retrieval: {report['recall']:.3f}"
+        )
+
+    def _save_ivf_index(self, document_store):
+        """
+        Builds the approximate nearest-neighbour index used by the `ivf` retriever and saves it next to the document store.
+        """
+        index_path = ivf_index_path(self.document_store_uri)
+        ids, embeddings = document_store.embedding_matrix()
+        if not ids:
+            Path(index_path).unlink(missing_ok=True)
+            return
+        start_time = time.time()
+        IVFIndex.build(ids=ids, embeddings=embeddings).save(index_path)
+        logger.info(
+            f"Saved IVF index as: {index_path} (built in {time.time() - start_time:.3f} seconds)"
+        )
+
+    def _save_bm25_index(self, document_store):
+        """
+        Builds the sparse index used by the `hybrid` retriever and saves it next to the document store.
+        """
+        index_path = bm25_index_path(self.document_store_uri)
+        documents = list(document_store.storage.values())
+        if not documents:
+            Path(index_path).unlink(missing_ok=True)
+            return
+        start_time = time.time()
+        BM25Index.build(
+            ids=[doc.id for doc in documents],
+            texts=[doc.content or "" for doc in documents],
+        ).save(index_path)
+        logger.info(
+            f"Saved BM25 index as: {index_path} (built in {time.time() - start_time:.3f} seconds)"
+        )
+
+    def _settings_digest(self) -> str:
+        """
+        Digest of the settings affecting the generated chunks and embeddings: any change in these settings
+        invalidates the chunks already stored in the document store.
+        """
+        document_splitter = component_to_dict(
+            self._pipeline.get_component("document_splitter"), "document_splitter"
+        )
+        # the number of workers does not change the generated chunks
+        document_splitter.get("init_parameters", {}).pop("workers", None)
+        settings = {
+            "embedding_model_path": _embedding_model_id(
+                self.embedding_model_path, self.embedding_model_dtype
+            ),
+            "document_splitter": document_splitter,
+        }
+        return hashlib.sha256(
+            json.dumps(settings, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
+    def _prune_document_store(
+        self,
+        document_store,
+        source_files: dict[str, str],
+        fingerprints: dict[str, str],
+    ) -> list[str]:
+        """
+        Deletes from the `document_store` the chunks of the source files that were removed or changed
+        since the last ingestion and returns the sources that must be (re)ingested.
+        """
+        # read the stored chunks directly, to avoid loading their embeddings
+        stored_documents = list(document_store.storage.values())
+        if any(SOURCE_FINGERPRINT_META not in doc.meta for doc in stored_documents):
+            logger.warning(
+                "Document store contains chunks without source fingerprint, all documents will be ingested again"
+            )
+            document_store.delete_documents(
+                document_ids=[doc.id for doc in stored_documents]
+            )
+            return list(source_files)
+
+        stored_fingerprints: dict[str, set[str]] = {}
+        for doc in stored_documents:
+            stored_fingerprints.setdefault(doc.meta[SOURCE_FILE_META], set()).add(
+                doc.meta[SOURCE_FINGERPRINT_META]
+            )
+        outdated_files = {
+            source_file
+            for source_file, stored in stored_fingerprints.items()
+            if stored != {fingerprints.get(source_file)}
+        }
+        if outdated_files:
+            document_store.delete_documents(
+                document_ids=[
+                    doc.id
+                    for doc in stored_documents
+                    if doc.meta[SOURCE_FILE_META] in outdated_files
+                ]
+            )
+
+        pending_sources = [
+            source
+            for source, source_file in source_files.items()
+            if source_file not in stored_fingerprints or source_file in outdated_files
+        ]
+        logger.info(
+            f"Incremental ingestion: {len(pending_sources)} new or changed documents, "
+            f"{len(outdated_files.difference(fingerprints))} removed documents, "
+            f"{len(source_files) - len(pending_sources)} unchanged documents"
+        )
+        return pending_sources
+
+
+def checkpoint_path(document_store_uri: str) -> str:
+    """
+    Returns the location of the checkpoint of an in-progress streaming ingestion into `document_store_uri`.
+    """
+    return document_store_uri + CHECKPOINT_SUFFIX
+
+
+def _embedding_model_id(embedding_model_path: str, embedding_model_dtype: str) -> str:
+    """
+    Identifies the embeddings generated by the given model: reduced precisions generate slightly different embeddings.
+    """
+    if embedding_model_dtype == DEFAULTS.EMBEDDING_DTYPE:
+        return embedding_model_path
+    return f"{embedding_model_path}@{embedding_model_dtype}"
+
+
+def _source_fingerprint(file_path: str, settings_digest: str) -> str:
+    sha256 = hashlib.sha256(settings_digest.encode("utf-8"))
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
 
 
 def _create_pipeline(
     document_store_uri: str,
     document_store_collection_name: str,
     embedding_model_path: str,
+    drop_old: bool = True,
+    embedding_dtype: str = DEFAULTS.DOCUMENT_STORE_EMBEDDING_DTYPE,
+    embedding_quantization: str = DEFAULTS.DOCUMENT_STORE_EMBEDDING_QUANTIZATION,
+    embedding_cache: Optional[EmbeddingCache] = None,
+    embedding_batch_size: int = DEFAULTS.EMBEDDING_BATCH_SIZE,
+    embedding_model_dtype: str = DEFAULTS.EMBEDDING_DTYPE,
+    embedding_device: Optional[str] = None,
+    embedding_processes: int = 0,
+    chunking_workers: int = DEFAULTS.CHUNKING_WORKERS,
 ) -> Pipeline:
     pipeline = Pipeline()
     pipeline.add_component(instance=create_converter(), name="converter")
     pipeline.add_component(instance=DocumentCleaner(), name="document_cleaner")
     # TODO make the params configurable
     pipeline.add_component(
-        instance=create_splitter(embedding_model_path=embedding_model_path),
+        instance=create_splitter(
+            embedding_model_path=embedding_model_path, workers=chunking_workers
+        ),
         name="document_splitter",
     )
-    # TODO make this more generic
-    pipeline.add_component(
-        instance=create_document_embedder(embedding_model_path=embedding_model_path),
-        name="document_embedder",
+    document_embedder = create_document_embedder(
+        embedding_model_path=embedding_model_path,
+        batch_size=embedding_batch_size,
+        dtype=embedding_model_dtype,
+        device=embedding_device,
+        encode_processes=embedding_processes,
     )
+    if embedding_cache is not None:
+        document_embedder = create_cached_document_embedder(
+            document_embedder, embedding_cache
+        )
+    pipeline.add_component(instance=document_embedder, name="document_embedder")
     pipeline.add_component(
         instance=create_document_writer(
             document_store_uri=document_store_uri,
             document_store_collection_name=document_store_collection_name,
+            drop_old=drop_old,
+            embedding_dtype=embedding_dtype,
+            embedding_quantization=embedding_quantization,
         ),
         name="document_writer",
     )
@@ -1,21 +1,33 @@
 # SPDX-License-Identifier: Apache-2.0
 
 # Standard
+from pathlib import Path
+from typing import Any, Optional
 import logging
+import time
 
 # Third Party
 from haystack import Pipeline  # type: ignore
 
 # First Party
-from instructlab.rag.document_store import DocumentStoreRetriever
+from instructlab.defaults import DEFAULTS
+from instructlab.rag.ann_index import IVFIndex, documents_fingerprint, ivf_index_path
+from instructlab.rag.bm25_index import bm25_index_path
+from instructlab.rag.document_store import DocumentStoreRetriever, RetrievedChunk
 from instructlab.rag.haystack.component_factory import (
+    create_cached_text_embedder,
     create_document_store,
+    create_embedding_cache,
+    create_hybrid_retriever,
+    create_ivf_retriever,
     create_retriever,
     create_text_embedder,
 )
 
 logger = logging.getLogger(__name__)
 
+WARM_UP_QUERY = "warm up"
+
 
 class HaystackDocumentStoreRetriever(DocumentStoreRetriever):
     """
@@ -28,6 +40,17 @@ class HaystackDocumentStoreRetriever(DocumentStoreRetriever):
     * A document retriever receiving the embedded query and returning the matching documents from the document store.
 
     The output of the `augmented_context` method is the concatenation of the matching documents.
+
+    When `embedding_cache_dir` is set, the query embeddings are looked up in a persistent `EmbeddingCache`
+    before running the embedding model.
+
+    When `index_type` is `ivf`, the document retriever uses the `IVFIndex` saved next to the document store
+    at ingestion time, scanning only `nprobe` clusters of embeddings for each query.
+
+    When `strategy` is `hybrid`, the ranking of the document retriever is fused with the ranking of the BM25 index
+    saved next to the document store at ingestion time, using reciprocal rank fusion with constant `rrf_k`.
+
+    `warm_up` loads the embedding model and runs a first query, so that the first user query does not stall.
     """
 
     def __init__(
@@ -36,23 +59,63 @@ class HaystackDocumentStoreRetriever(DocumentStoreRetriever):
         document_store_collection_name: str,
         top_k: int,
         embedding_model_path: str,
+        embedding_cache_dir: Optional[str] = None,
+        embedding_cache_max_entries: int = 0,
+        index_type: str = DEFAULTS.RETRIEVER_INDEX_TYPE,
+        nprobe: int = DEFAULTS.RETRIEVER_NPROBE,
+        strategy: str = DEFAULTS.RETRIEVER_STRATEGY,
+        rrf_k: int = DEFAULTS.RETRIEVER_RRF_K,
     ):
         super().__init__()
+        self._strategy = strategy
         self._pipeline = _create_pipeline(
             document_store_uri=document_store_uri,
             document_store_collection_name=document_store_collection_name,
             top_k=top_k,
             embedding_model_path=embedding_model_path,
+            embedding_cache_dir=embedding_cache_dir,
+            embedding_cache_max_entries=embedding_cache_max_entries,
+            index_type=index_type,
+            nprobe=nprobe,
+            strategy=strategy,
+            rrf_k=rrf_k,
         )
         _connect_components(self._pipeline)
 
-    def augmented_context(self, user_query: str) -> str:
-        results = self._pipeline.run(
-            {
-                "embedder": {"text": user_query},
-            }
+    def warm_up(self) -> None:
+        start_time = time.time()
+        # the embedding model wrapped by the embedding cache is loaded too: the first cache miss must not stall
+        embedder: Any = self._pipeline.get_component("embedder")
+        embedder = getattr(embedder, "embedder", embedder)
+        if hasattr(embedder, "warm_up"):
+            embedder.warm_up()
+        embedding = embedder.run(text=WARM_UP_QUERY)["embedding"]
+        logger.debug(
+            f"Embedding model warmed up in {time.time() - start_time:.2f} seconds"
         )
-        context = "\n".join([doc.content for doc in results["retriever"]["documents"]])
+
+        # a first retrieval reads the stored embeddings, paging in the memory-mapped document store
+        start_time = time.time()
+        document_retriever: Any = self._pipeline.get_component("retriever")
+        if hasattr(document_retriever, "warm_up"):
+            document_retriever.warm_up()
+        document_retriever.run(query_embedding=embedding)
+        logger.debug(
+            f"Document store warmed up in {time.time() - start_time:.2f} seconds"
+        )
+
+    def retrieve(self, user_query: str) -> list[RetrievedChunk]:
+        data = {"embedder": {"text": user_query}}
+        if self._strategy == "hybrid":
+            data["retriever"] = {"query": user_query}
+        results = self._pipeline.run(data)
+        return [
+            RetrievedChunk(content=doc.content, score=doc.score)
+            for doc in results["retriever"]["documents"]
+        ]
+
+    def augmented_context(self, user_query: str) -> str:
+        context = "\n".join(chunk.content for chunk in self.retrieve(user_query))
 
         logger.debug("-" * 10)
         logger.debug(f"RAG context is {context}")
@@ -66,17 +129,53 @@ def _create_pipeline(
     document_store_collection_name: str,
     top_k: int,
     embedding_model_path: str,
+    embedding_cache_dir: Optional[str] = None,
+    embedding_cache_max_entries: int = 0,
+    index_type: str = DEFAULTS.RETRIEVER_INDEX_TYPE,
+    nprobe: int = DEFAULTS.RETRIEVER_NPROBE,
+    strategy: str = DEFAULTS.RETRIEVER_STRATEGY,
+    rrf_k: int = DEFAULTS.RETRIEVER_RRF_K,
 ) -> Pipeline:
     document_store = create_document_store(
         document_store_uri=document_store_uri,
         document_store_collection_name=document_store_collection_name,
         drop_old=False,
     )
-    document_retriever = create_retriever(
-        top_k=top_k,
-        document_store=document_store,
+    index = (
+        _load_ivf_index(
+            document_store_uri, documents_fingerprint(document_store.storage)
+        )
+        if index_type == "ivf"
+        else None
     )
+    if index is not None:
+        document_retriever = create_ivf_retriever(
+            top_k=top_k,
+            document_store=document_store,
+            index=index,
+            nprobe=nprobe,
+        )
+    else:
+        document_retriever = create_retriever(
+            top_k=top_k,
+            document_store=document_store,
+        )
+    if strategy == "hybrid":
+        document_retriever = create_hybrid_retriever(
+            top_k=top_k,
+            document_store=document_store,
+            dense_retriever=document_retriever,
+            index_path=bm25_index_path(document_store_uri),
+            rrf_k=rrf_k,
+        )
     text_embedder = create_text_embedder(embedding_model_path=embedding_model_path)
+    embedding_cache = create_embedding_cache(
+        embedding_model_path=embedding_model_path,
+        cache_dir=embedding_cache_dir,
+        cache_max_entries=embedding_cache_max_entries,
+    )
+    if embedding_cache is not None:
+        text_embedder = create_cached_text_embedder(text_embedder, embedding_cache)
     pipeline = Pipeline()
     pipeline.add_component("embedder", text_embedder)
     pipeline.add_component("retriever", document_retriever)
@@ -85,3 +184,23 @@ def _create_pipeline(
 
 def _connect_components(pipeline: Pipeline):
     pipeline.connect("embedder.embedding", "retriever.query_embedding")
+
+
+def _load_ivf_index(
+    document_store_uri: str, documents_fingerprint: str
+) -> Optional[IVFIndex]:
+    index_path = ivf_index_path(document_store_uri)
+    if not Path(index_path).exists():
+        logger.warning(
+            f"IVF index not found at {index_path}, falling back to exhaustive retrieval. Run `ilab rag ingest` to build it."
+        )
+        return None
+    index = IVFIndex.load(index_path)
+    if index.fingerprint != documents_fingerprint:
+        logger.warning(
+            f"IVF index at {index_path} is out of date (it does not index the stored documents), "
+            "falling back to exhaustive retrieval. Run `ilab rag ingest` to rebuild it."
+        )
+        return None
+    logger.debug(f"Loaded IVF index from {index_path}")
+    return index
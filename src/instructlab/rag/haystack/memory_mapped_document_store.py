@@ -0,0 +1,576 @@
+# Standard
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import json
+import logging
+import os
+
+# Third Party
+from haystack import Document  # type: ignore
+from haystack.document_stores.in_memory import InMemoryDocumentStore  # type: ignore
+from haystack.utils.filters import document_matches_filter  # type: ignore
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STORE_FORMAT = "instructlab-mmap-v1"
+EMBEDDINGS_SUFFIX = ".embeddings.npy"
+SUPPORTED_EMBEDDING_DTYPES = ["float32", "float16"]
+QUANTIZED_EMBEDDINGS_SUFFIX = ".codes.npz"
+# Documents appended by `append_to_disk`, one JSON line each, and their embedding rows, in raw bytes
+APPENDED_DOCUMENTS_SUFFIX = ".appended.jsonl"
+APPENDED_EMBEDDINGS_SUFFIX = ".appended.embeddings"
+MERGED_EMBEDDINGS_SUFFIX = ".merged.npy"
+SUPPORTED_EMBEDDING_QUANTIZATIONS = ["none", "int8", "binary"]
+# Number of candidates per requested document found by the quantized scan and rescored with the full embeddings
+RESCORE_FACTORS = {"int8": 4, "binary": 10}
+# Number of quantized embeddings scored at once by the quantized scan
+SCAN_BATCH_SIZE = 65536
+# Number of stored embeddings sampled as queries to measure the recall of the quantized retrieval
+QUANTIZATION_REPORT_QUERIES = 50
+# Number of embeddings copied at once when saving the document store
+SAVE_BATCH_SIZE = 4096
+# Same scaling factor used by InMemoryDocumentStore to scale the dot product scores
+DOT_PRODUCT_SCALING_FACTOR = 100
+# Number of set bits of each byte value, to compute the Hamming distance of binary codes
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class MemoryMappedDocumentStore(InMemoryDocumentStore):
+    """
+    An `InMemoryDocumentStore` whose embeddings are saved to disk in a contiguous `.npy` array instead of being
+    serialized as JSON together with the documents.
+
+    `save_to_disk` writes the document text and metadata to a compact JSON side table at the given path, and the
+    embeddings, as `float32` or `float16` according to `embedding_dtype`, to a `.npy` file next to it.
+    `load_from_disk` memory-maps the embeddings file read-only: loading is fast, the resident memory only grows
+    with the pages that are actually read and the pages are shared by all the processes opening the same store.
+    The embeddings are also memory-mapped after each `save_to_disk`, so that saving the store periodically bounds
+    the memory used by the embeddings of the documents written in the meantime.
+
+    `append_to_disk` appends the documents written since the last save to append-only files next to a saved store,
+    and drops them from memory: writing a large store in batches costs I/O proportional to each batch, and only
+    the current batch is kept in memory. The appended documents are merged into the store by the next
+    `save_to_disk`, or by `load_from_disk` when the store was not saved again, e.g. after an interrupted ingestion.
+
+    When `embedding_quantization` is `int8` or `binary`, `save_to_disk` also writes a quantized copy of the embeddings
+    to a `.codes.npz` file: `int8` codes with a scale per embedding, 4 times smaller than `float32`, or the sign bits
+    of the embeddings, 32 times smaller. The codes are loaded in memory, and `embedding_retrieval` scans them to find
+    `RESCORE_FACTORS` times more candidates than requested, which are then rescored with the full embeddings: only
+    the pages of the shortlisted embeddings are read from the memory-mapped file.
+
+    Loaded documents are not indexed for BM25 retrieval. Document stores saved by `InMemoryDocumentStore.save_to_disk`
+    can also be loaded, and are converted to the new format at the next save.
+    """
+
+    def __init__(
+        self,
+        embedding_dtype: str = "float32",
+        embedding_quantization: str = "none",
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        if embedding_dtype not in SUPPORTED_EMBEDDING_DTYPES:
+            raise ValueError(
+                f"Unsupported embedding dtype {embedding_dtype}, expected one of {SUPPORTED_EMBEDDING_DTYPES}"
+            )
+        if embedding_quantization not in SUPPORTED_EMBEDDING_QUANTIZATIONS:
+            raise ValueError(
+                f"Unsupported embedding quantization {embedding_quantization}, expected one of {SUPPORTED_EMBEDDING_QUANTIZATIONS}"
+            )
+        self.embedding_dtype = embedding_dtype
+        self.embedding_quantization = embedding_quantization
+        # embeddings of the documents loaded from disk: the row of each document is tracked in `_rows`,
+        # while documents written afterwards keep their embedding in the `Document` instance
+        self._embeddings: Optional[np.ndarray] = None
+        self._rows: Dict[str, int] = {}
+        self._row_ids: List[str] = []
+        # quantized embeddings of the loaded documents, in the same rows as `_embeddings`
+        self._quantization = "none"
+        self._codes: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._norms: Optional[np.ndarray] = None
+        # path of the last save or load, and number of documents appended to it since then
+        self._saved_path: Optional[str] = None
+        self._appended_count = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = super().to_dict()
+        data["init_parameters"]["embedding_dtype"] = self.embedding_dtype
+        data["init_parameters"]["embedding_quantization"] = self.embedding_quantization
+        return data
+
+    def count_documents(self) -> int:
+        return super().count_documents() + self._appended_count
+
+    def save_to_disk(self, path: str) -> None:
+        if self._appended_count:
+            assert self._saved_path is not None
+            self._merge_appended(self._saved_path)
+        documents = list(self.storage.values())
+        ids = [
+            doc.id
+            for doc in documents
+            if doc.id in self._rows or doc.embedding is not None
+        ]
+        dimension = len(self._embedding(ids[0]) or []) if ids else 0
+
+        # the current embeddings file can be memory-mapped: write a new one and replace it
+        embeddings_path = path + EMBEDDINGS_SUFFIX
+        tmp_path = embeddings_path + ".tmp"
+        embeddings = np.lib.format.open_memmap(
+            tmp_path,
+            mode="w+",
+            dtype=self.embedding_dtype,
+            shape=(len(ids), dimension),
+        )
+        # copy the embeddings in slices to bound the memory used by the save
+        for start in range(0, len(ids), SAVE_BATCH_SIZE):
+            batch = ids[start : start + SAVE_BATCH_SIZE]
+            mapped = [self._rows[doc_id] for doc_id in batch if doc_id in self._rows]
+            if len(mapped) == len(batch):
+                assert self._embeddings is not None
+                embeddings[start : start + len(batch)] = self._embeddings[mapped]
+            else:
+                embeddings[start : start + len(batch)] = np.asarray(
+                    [self._embedding(doc_id) for doc_id in batch], dtype=np.float32
+                )
+        embeddings.flush()
+        codes_path = path + QUANTIZED_EMBEDDINGS_SUFFIX
+        quantized = self.embedding_quantization != "none" and bool(ids)
+        if quantized:
+            _save_quantized_embeddings(
+                codes_path, embeddings, self.embedding_quantization
+            )
+        else:
+            Path(codes_path).unlink(missing_ok=True)
+        del embeddings
+        os.replace(tmp_path, embeddings_path)
+
+        config = super().to_dict()["init_parameters"]
+        data = {
+            "format": STORE_FORMAT,
+            "config": config,
+            "embeddings": {
+                "file": os.path.basename(embeddings_path),
+                "dtype": self.embedding_dtype,
+                "ids": ids,
+                "quantization": self.embedding_quantization if quantized else "none",
+                "codes_file": os.path.basename(codes_path) if quantized else None,
+            },
+            "documents": [
+                replace(doc, embedding=None).to_dict(flatten=False) for doc in documents
+            ],
+        }
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(path + ".tmp", path)
+
+        # from now on the saved embeddings are read from the file, releasing their memory
+        self._map_embeddings(embeddings_path, ids, codes_path if quantized else None)
+        for doc in documents:
+            if doc.embedding is not None:
+                self.storage[doc.id] = replace(doc, embedding=None)
+        # the saved store includes the appended documents, if any
+        for suffix in [
+            APPENDED_DOCUMENTS_SUFFIX,
+            APPENDED_EMBEDDINGS_SUFFIX,
+            MERGED_EMBEDDINGS_SUFFIX,
+        ]:
+            Path(path + suffix).unlink(missing_ok=True)
+        self._saved_path = path
+
+    def append_to_disk(self, path: str) -> None:
+        """
+        Appends the documents written since the last save to the store saved at `path`, and drops them from memory.
+        Until the next `save_to_disk`, they are only counted by `count_documents`.
+        """
+        if path != self._saved_path:
+            raise ValueError(
+                f"Cannot append to {path}: the document store was not saved there"
+            )
+        documents = [doc for doc in self.storage.values() if doc.embedding is not None]
+        if not documents:
+            return
+        embeddings = np.asarray(
+            [doc.embedding for doc in documents], dtype=self.embedding_dtype
+        )
+        # the rows are written first: a document line is only written once its row is on disk
+        with open(path + APPENDED_EMBEDDINGS_SUFFIX, "ab") as f:
+            f.write(embeddings.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        with open(path + APPENDED_DOCUMENTS_SUFFIX, "a", encoding="utf-8") as f:
+            for doc in documents:
+                line = {
+                    "dtype": self.embedding_dtype,
+                    "dimension": embeddings.shape[1],
+                    "document": replace(doc, embedding=None).to_dict(flatten=False),
+                }
+                f.write(json.dumps(line) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.delete_documents([doc.id for doc in documents])
+        self._appended_count += len(documents)
+
+    @classmethod
+    def load_from_disk(cls, path: str) -> "MemoryMappedDocumentStore":
+        if not Path(path).exists():
+            raise FileNotFoundError(f"File {path} not found.")
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+
+        if data.get("format") != STORE_FORMAT:
+            logger.info(
+                f"Document store at {path} is in JSON format, it will be converted at the next save"
+            )
+            legacy_store = InMemoryDocumentStore.load_from_disk(path)
+            document_store = cls(
+                embedding_similarity_function=legacy_store.embedding_similarity_function
+            )
+            document_store.write_documents(legacy_store.filter_documents())
+            return document_store
+
+        embeddings_info = data["embeddings"]
+        document_store = cls(
+            embedding_dtype=embeddings_info["dtype"],
+            embedding_quantization=embeddings_info.get("quantization", "none"),
+            **data["config"],
+        )
+        # documents are added to the storage directly, skipping the BM25 statistics
+        for doc in data["documents"]:
+            document = Document.from_dict(doc)
+            document_store.storage[document.id] = document
+        codes_file = embeddings_info.get("codes_file")
+        document_store._map_embeddings(
+            os.path.join(os.path.dirname(path), embeddings_info["file"]),
+            embeddings_info["ids"],
+            os.path.join(os.path.dirname(path), codes_file) if codes_file else None,
+        )
+        document_store._saved_path = path
+        if Path(path + APPENDED_DOCUMENTS_SUFFIX).exists():
+            logger.info(
+                f"Merging the documents appended to {path} since it was last saved"
+            )
+            document_store._merge_appended(path)
+            document_store.save_to_disk(path)
+        return document_store
+
+    def delete_documents(self, document_ids: List[str]) -> None:
+        # also called when a document is overwritten: its embedding is no longer the mapped one.
+        # Loaded documents have no BM25 statistics to revert
+        untracked = [
+            doc_id
+            for doc_id in document_ids
+            if doc_id in self.storage and doc_id not in self._bm25_attr
+        ]
+        for doc_id in untracked:
+            del self.storage[doc_id]
+        for doc_id in document_ids:
+            self._rows.pop(doc_id, None)
+        super().delete_documents(
+            [doc_id for doc_id in document_ids if doc_id not in untracked]
+        )
+
+    def filter_documents(
+        self, filters: Optional[Dict[str, Any]] = None
+    ) -> List[Document]:
+        documents = super().filter_documents(filters)
+        if not getattr(self, "return_embedding", True):
+            return documents
+        return [
+            replace(doc, embedding=self._embedding(doc.id))
+            if doc.id in self._rows
+            else doc
+            for doc in documents
+        ]
+
+    def embedding_retrieval(
+        self,
+        query_embedding: List[float],
+        filters: Optional[Dict[str, Any]] = None,
+        top_k: int = 10,
+        scale_score: bool = False,
+        return_embedding: Optional[bool] = False,
+    ) -> List[Document]:
+        if len(query_embedding) == 0:
+            raise ValueError("query_embedding should be a non-empty list of floats.")
+        if return_embedding is None:
+            return_embedding = getattr(self, "return_embedding", False)
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        if not filters and self._codes is not None:
+            ids, vectors = self._shortlisted_embeddings(query, top_k)
+        else:
+            ids, vectors = self._candidate_embeddings(filters)
+        if len(ids) == 0:
+            logger.warning("No Documents found with embeddings. Returning empty list.")
+            return []
+
+        scores = self._scores(query, vectors)
+        if scale_score:
+            if self.embedding_similarity_function == "cosine":
+                scores = (scores + 1) / 2
+            else:
+                scores = 1 / (1 + np.exp(-scores / DOT_PRODUCT_SCALING_FACTOR))
+
+        top_k = min(top_k, len(ids))
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [
+            replace(
+                self.storage[ids[i]],
+                score=float(scores[i]),
+                embedding=vectors[i].tolist() if return_embedding else None,
+            )
+            for i in best
+        ]
+
+    def embedding_matrix(self) -> tuple[List[str], np.ndarray]:
+        """
+        Returns the ids of the documents with an embedding and their embeddings, one row per document.
+        """
+        return self._candidate_embeddings(filters=None)
+
+    def quantization_report(
+        self, queries: int = QUANTIZATION_REPORT_QUERIES, top_k: int = 10
+    ) -> Optional[Dict[str, float]]:
+        """
+        Compares the quantized embeddings with the full ones: returns their size in bytes and the recall of the
+        quantized retrieval, the average fraction of the exact `top_k` documents it finds for `queries` stored
+        embeddings sampled as queries. Returns `None` when the loaded embeddings are not quantized.
+        """
+        if self._codes is None or self._embeddings is None:
+            return None
+        assert self._scales is not None and self._norms is not None
+        ids, vectors = self._candidate_embeddings(filters=None)
+        top_k = min(top_k, len(ids))
+        rng = np.random.default_rng(0)
+        sample = rng.choice(len(ids), size=min(queries, len(ids)), replace=False)
+        hits = 0.0
+        for i in sample:
+            scores = self._scores(vectors[i], vectors)
+            exact = {ids[j] for j in np.argpartition(-scores, top_k - 1)[:top_k]}
+            quantized = self.embedding_retrieval(vectors[i].tolist(), top_k=top_k)
+            hits += len(exact.intersection(doc.id for doc in quantized)) / top_k
+        return {
+            "embeddings_bytes": float(self._embeddings.nbytes),
+            "quantized_bytes": float(
+                self._codes.nbytes + self._scales.nbytes + self._norms.nbytes
+            ),
+            "recall": hits / len(sample),
+            "top_k": top_k,
+        }
+
+    def _merge_appended(self, path: str) -> None:
+        """
+        Adds the documents appended to the store saved at `path` to the loaded documents, copying the loaded
+        embeddings and the appended ones to a new memory-mapped file.
+        """
+        lines = []
+        with open(path + APPENDED_DOCUMENTS_SUFFIX, encoding="utf-8") as f:
+            for raw_line in f:
+                try:
+                    lines.append(json.loads(raw_line))
+                except json.JSONDecodeError:
+                    # partially written by an interrupted append
+                    break
+        appended = None
+        if lines:
+            appended = np.memmap(
+                path + APPENDED_EMBEDDINGS_SUFFIX,
+                dtype=lines[0]["dtype"],
+                mode="r",
+                shape=(len(lines), lines[0]["dimension"]),
+            )
+        mapped = [doc_id for doc_id in self._row_ids if doc_id in self._rows]
+        ids = mapped + [line["document"]["id"] for line in lines]
+        dimension = appended.shape[1] if appended is not None else 0
+        if self._embeddings is not None:
+            dimension = self._embeddings.shape[1]
+
+        merged_path = path + MERGED_EMBEDDINGS_SUFFIX
+        embeddings = np.lib.format.open_memmap(
+            merged_path + ".tmp",
+            mode="w+",
+            dtype=self.embedding_dtype,
+            shape=(len(ids), dimension),
+        )
+        for start in range(0, len(mapped), SAVE_BATCH_SIZE):
+            batch = mapped[start : start + SAVE_BATCH_SIZE]
+            assert self._embeddings is not None
+            embeddings[start : start + len(batch)] = self._embeddings[
+                [self._rows[doc_id] for doc_id in batch]
+            ]
+        if appended is not None:
+            for start in range(0, len(appended), SAVE_BATCH_SIZE):
+                rows = appended[start : start + SAVE_BATCH_SIZE]
+                offset = len(mapped) + start
+                embeddings[offset : offset + len(rows)] = rows
+        embeddings.flush()
+        del embeddings, appended
+        os.replace(merged_path + ".tmp", merged_path)
+
+        self._map_embeddings(merged_path, ids)
+        for line in lines:
+            document = Document.from_dict(line["document"])
+            self.storage[document.id] = document
+        self._appended_count = 0
+
+    def _map_embeddings(
+        self, embeddings_path: str, ids: List[str], codes_path: Optional[str] = None
+    ):
+        self._row_ids = ids
+        self._rows = {doc_id: row for row, doc_id in enumerate(ids)}
+        self._embeddings = np.load(embeddings_path, mmap_mode="r") if ids else None
+        self._quantization = "none"
+        self._codes = self._scales = self._norms = None
+        if codes_path is not None:
+            with np.load(codes_path) as codes:
+                self._quantization = str(codes["quantization"])
+                self._codes = codes["codes"]
+                self._scales = codes["scales"]
+                self._norms = codes["norms"]
+
+    def _embedding(self, doc_id: str) -> Optional[List[float]]:
+        if doc_id in self._rows and self._embeddings is not None:
+            return self._embeddings[self._rows[doc_id]].astype(np.float32).tolist()
+        doc = self.storage.get(doc_id)
+        return doc.embedding if doc is not None else None
+
+    def _scores(self, query: np.ndarray, vectors: np.ndarray) -> np.ndarray:
+        if self.embedding_similarity_function == "cosine":
+            query = query / max(float(np.linalg.norm(query)), 1e-12)
+            norms = np.linalg.norm(vectors, axis=1)
+            return (vectors @ query) / np.where(norms == 0.0, 1.0, norms)
+        return vectors @ query
+
+    def _shortlisted_embeddings(
+        self, query: np.ndarray, top_k: int
+    ) -> tuple[List[str], np.ndarray]:
+        """
+        Scans the quantized embeddings of the loaded documents and returns the best candidates, with their full
+        embeddings, together with the documents written since the store was loaded.
+        """
+        assert self._codes is not None and self._scales is not None
+        assert self._norms is not None and self._embeddings is not None
+        scores = np.empty(len(self._row_ids), dtype=np.float32)
+        query_bits = np.packbits(query > 0)
+        # scan the codes in slices to bound the memory used by the intermediate arrays
+        for start in range(0, len(scores), SCAN_BATCH_SIZE):
+            codes = self._codes[start : start + SCAN_BATCH_SIZE]
+            end = start + len(codes)
+            if self._quantization == "binary":
+                # fewer differing sign bits is better
+                scores[start:end] = -_POPCOUNT[codes ^ query_bits].sum(
+                    axis=1, dtype=np.int32
+                )
+            else:
+                scores[start:end] = self._scales[start:end] * (
+                    codes.astype(np.float32) @ query
+                )
+        cosine = self.embedding_similarity_function == "cosine"
+        if self._quantization == "int8" and cosine:
+            scores /= np.where(self._norms == 0.0, 1.0, self._norms)
+        if len(self._rows) != len(self._row_ids):
+            # some loaded documents were deleted or overwritten
+            valid = np.fromiter(
+                (doc_id in self._rows for doc_id in self._row_ids),
+                dtype=bool,
+                count=len(self._row_ids),
+            )
+            scores = np.where(valid, scores, -np.inf)
+
+        shortlist_size = min(
+            top_k * RESCORE_FACTORS[self._quantization], len(self._rows)
+        )
+        rows = np.empty(0, dtype=np.int64)
+        if shortlist_size > 0:
+            rows = np.argpartition(-scores, shortlist_size - 1)[:shortlist_size]
+            # read the memory-mapped embeddings in file order
+            rows = np.sort(rows)
+        ids = [self._row_ids[row] for row in rows]
+        vectors = [np.asarray(self._embeddings[rows], dtype=np.float32)]
+        unmapped = [
+            doc
+            for doc in self.storage.values()
+            if doc.id not in self._rows and doc.embedding is not None
+        ]
+        if unmapped:
+            ids += [doc.id for doc in unmapped]
+            vectors.append(
+                np.asarray([doc.embedding for doc in unmapped], dtype=np.float32)
+            )
+        return ids, np.concatenate(vectors)
+
+    def _candidate_embeddings(
+        self, filters: Optional[Dict[str, Any]]
+    ) -> tuple[List[str], np.ndarray]:
+        if (
+            not filters
+            and self._embeddings is not None
+            and len(self._rows) == len(self.storage) == len(self._row_ids)
+        ):
+            # no document was added or removed since the store was loaded: score the whole array
+            return self._row_ids, np.asarray(self._embeddings, dtype=np.float32)
+
+        documents = [
+            doc
+            for doc in self.storage.values()
+            if not filters or document_matches_filter(filters=filters, document=doc)
+        ]
+        mapped = [doc.id for doc in documents if doc.id in self._rows]
+        unmapped = [
+            doc
+            for doc in documents
+            if doc.id not in self._rows and doc.embedding is not None
+        ]
+        vectors = [np.asarray([doc.embedding for doc in unmapped], dtype=np.float32)]
+        if mapped:
+            assert self._embeddings is not None
+            vectors.insert(
+                0,
+                self._embeddings[[self._rows[doc_id] for doc_id in mapped]].astype(
+                    np.float32
+                ),
+            )
+        vectors = [v for v in vectors if len(v) > 0]
+        if not vectors:
+            return [], np.zeros((0, 0), dtype=np.float32)
+        return mapped + [doc.id for doc in unmapped], np.concatenate(vectors)
+
+
+def _save_quantized_embeddings(path: str, embeddings: np.ndarray, quantization: str):
+    """
+    Saves the quantized `embeddings` to the `.npz` file at `path`, along with the scale and norm of each embedding.
+    """
+    count, dimension = embeddings.shape
+    codes = np.empty(
+        (count, dimension) if quantization == "int8" else (count, (dimension + 7) // 8),
+        dtype=np.int8 if quantization == "int8" else np.uint8,
+    )
+    scales = np.ones(count, dtype=np.float32)
+    norms = np.empty(count, dtype=np.float32)
+    for start in range(0, count, SAVE_BATCH_SIZE):
+        batch = np.asarray(embeddings[start : start + SAVE_BATCH_SIZE], np.float32)
+        end = start + len(batch)
+        norms[start:end] = np.linalg.norm(batch, axis=1)
+        if quantization == "int8":
+            # symmetric scalar quantization of each embedding to [-127, 127]
+            batch_scales = np.abs(batch).max(axis=1) / 127
+            batch_scales[batch_scales == 0.0] = 1.0
+            scales[start:end] = batch_scales
+            codes[start:end] = np.rint(batch / batch_scales[:, None]).clip(-127, 127)
+        else:
+            codes[start:end] = np.packbits(batch > 0, axis=1)
+
+    tmp_path = path + ".tmp.npz"
+    np.savez(
+        tmp_path,
+        quantization=np.array(quantization),
+        codes=codes,
+        scales=scales,
+        norms=norms,
+    )
+    os.replace(tmp_path, path)
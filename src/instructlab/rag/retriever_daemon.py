@@ -0,0 +1,159 @@
+"""
+A long-lived local daemon serving a `DocumentStoreRetriever` over a Unix socket, so that several chat sessions
+share one warmed-up document store and embedding model instead of loading their own.
+
+Each connection carries a single request, a JSON line answered by a JSON line, or `{"error": ...}`:
+- `{"query": ...}` returns `{"chunks": [{"content": ..., "score": ...}, ...]}`.
+- `{"op": "settings"}` returns `{"settings": ...}`, the `retriever_settings` of the served retriever, so that
+  clients only use the daemon when it serves the document store and retrieval settings they ask for.
+"""
+
+# Standard
+from dataclasses import asdict
+from typing import Any, Optional
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+
+# First Party
+from instructlab.rag.document_store import DocumentStoreRetriever, RetrievedChunk
+
+logger = logging.getLogger(__name__)
+
+# Seconds a client waits for the daemon to answer a query
+CLIENT_TIMEOUT = 60.0
+
+
+class _RetrieverRequestHandler(socketserver.StreamRequestHandler):
+    server: "RetrieverDaemon"
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            if request.get("op") == "settings":
+                response = {"settings": self.server.settings}
+            else:
+                chunks = self.server.retrieve(request["query"])
+                response = {"chunks": [asdict(chunk) for chunk in chunks]}
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            logger.exception("Failed to retrieve the context of a query")
+            response = {"error": str(exc)}
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class RetrieverDaemon(socketserver.ThreadingUnixStreamServer):
+    """
+    Serves the given `retriever`, created with the `retriever_settings` in `settings`, on the Unix socket at
+    `socket_path`. Connections are handled in separate threads, while queries are run one at a time on the
+    shared retriever.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        retriever: DocumentStoreRetriever,
+        socket_path: str,
+        settings: Optional[dict[str, Any]] = None,
+    ):
+        if os.path.exists(socket_path):
+            if is_retriever_daemon_running(socket_path):
+                raise RuntimeError(
+                    f"A retriever daemon is already listening on {socket_path}"
+                )
+            # left behind by a daemon that did not shut down cleanly
+            os.unlink(socket_path)
+        os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+        super().__init__(socket_path, _RetrieverRequestHandler)
+        self.retriever = retriever
+        self.socket_path = socket_path
+        self.settings = settings
+        self._lock = threading.Lock()
+
+    def retrieve(self, user_query: str) -> list[RetrievedChunk]:
+        with self._lock:
+            return self.retriever.retrieve(user_query=user_query)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+class SocketDocumentStoreRetriever(DocumentStoreRetriever):
+    """
+    A `DocumentStoreRetriever` forwarding the queries to a `RetrieverDaemon` listening on `socket_path`.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = CLIENT_TIMEOUT):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def retrieve(self, user_query: str) -> list[RetrievedChunk]:
+        response = request_retriever_daemon(
+            self.socket_path, {"query": user_query}, self.timeout
+        )
+        return [RetrievedChunk(**chunk) for chunk in response["chunks"]]
+
+    def augmented_context(self, user_query: str) -> str:
+        context = "\n".join(chunk.content for chunk in self.retrieve(user_query))
+        logger.debug("-" * 10)
+        logger.debug(f"RAG context is {context}")
+        logger.debug("-" * 10)
+        return context
+
+
+def retriever_settings(
+    document_store_uri: str,
+    document_store_collection_name: str,
+    top_k: int,
+    embedding_model_path: str,
+    index_type: str,
+    nprobe: int,
+    strategy: str,
+    rrf_k: int,
+) -> dict[str, Any]:
+    """Returns the settings deciding the context a retriever returns, with absolute paths."""
+    return {
+        "document_store_uri": os.path.abspath(document_store_uri),
+        "document_store_collection_name": document_store_collection_name,
+        "top_k": top_k,
+        "embedding_model_path": os.path.abspath(embedding_model_path),
+        "index_type": index_type,
+        "nprobe": nprobe,
+        "strategy": strategy,
+        "rrf_k": rrf_k,
+    }
+
+
+def request_retriever_daemon(
+    socket_path: str, request: dict[str, Any], timeout: float = CLIENT_TIMEOUT
+) -> dict[str, Any]:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as f:
+            response = json.loads(f.readline())
+    if "error" in response:
+        raise RuntimeError(
+            f"Retriever daemon at {socket_path} failed: {response['error']}"
+        )
+    return response
+
+
+def is_retriever_daemon_running(socket_path: str) -> bool:
+    """
+    Returns True if a process accepts connections on the Unix socket at `socket_path`.
+    """
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(socket_path):
+        return False
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            return False
+    return True
@@ -42,6 +42,10 @@ from . import common
 from .common import CLI_HELPER_SYS_PROMPT, SYSTEM_PROMPTS, SupportedModelArchitectures
 from .defaults import DEFAULT_INDENT, DEFAULTS, RECOMMENDED_SCOPEO_VERSION
 
+if typing.TYPE_CHECKING:
+    # First Party
+    from instructlab.model.catalog import ModelCatalog
+
 # mypy: disable_error_code="import-untyped"
 
 logger = logging.getLogger(__name__)
@@ -845,7 +849,7 @@ def _analyze_gguf(entry: Path) -> AnalyzeModelResult:
 
 
 def _analyze_dir(
-    entry: Path, list_checkpoints: bool, directory: Path
+    entry: Path, list_checkpoints: bool, directory: Path, catalog: "ModelCatalog"
 ) -> List[AnalyzeModelResult]:
     actual_model_name = ""
     all_files_sizes = 0
@@ -867,9 +871,9 @@ def _analyze_dir(
         # any lower level dir: `instructlab/granite-7b-lab/.huggingface/download.....`
         # so, check if model is valid Safetensor, GGUF, or list it regardless w/ `--list-checkpoints`
         # if --list-checkpoints is specified, we will list all checkpoints in the checkpoints dir regardless of the validity
-        if is_model_safetensors(Path(normalized_path)) or is_model_gguf(
-            Path(normalized_path)
-        ):
+        # the catalog validates the directory again only if its files changed since the last listing
+        is_model, files_sizes = catalog.is_model_dir(Path(normalized_path), files)
+        if is_model:
             actual_model_name = printed_parts
             all_files_sizes = 0
             add_model = True
@@ -878,12 +882,7 @@ def _analyze_dir(
                 logging.debug("Including model regardless of model validity")
             else:
                 continue
-        for f in files:
-            # stat each file in the dir, add the size in Bytes, then convert to proper magnitude
-            full_file = os.path.join(root, f)
-            # do not follow symlinks, we only want to list the models dir ones
-            stat = Path(full_file).stat(follow_symlinks=True)
-            all_files_sizes += stat.st_size
+        all_files_sizes += files_sizes
         adjusted_all_sizes, magnitude = convert_bytes_to_proper_mag(all_files_sizes)
         if add_model:
             # add to table
@@ -916,17 +915,26 @@ def list_models(
     Returns:
         List[AnalyzeResult]: Results of the listing operation.
     """
+    # First Party
+    from instructlab.model.catalog import ModelCatalog
+
     # if we want to list checkpoints, add that dir to our list
     if list_checkpoints:
         model_dirs.append(Path(DEFAULTS.CHECKPOINTS_DIR))
     data: List[AnalyzeModelResult] = []
-    for directory in model_dirs:
-        for entry in Path(directory).iterdir():
-            # if file, just tally the size. This must be a GGUF.
-            if entry.is_file() and is_model_gguf(entry):
-                data.append(_analyze_gguf(entry))
-            elif entry.is_dir():
-                data.extend(_analyze_dir(entry, list_checkpoints, directory))
+    catalog = ModelCatalog()
+    try:
+        for directory in model_dirs:
+            for entry in Path(directory).iterdir():
+                # if file, just tally the size. This must be a GGUF.
+                if entry.is_file() and catalog.is_model_file(entry):
+                    data.append(_analyze_gguf(entry))
+                elif entry.is_dir():
+                    data.extend(
+                        _analyze_dir(entry, list_checkpoints, directory, catalog)
+                    )
+    finally:
+        catalog.close(model_dirs)
     return data
 
 
@@ -0,0 +1,64 @@
+# Third Party
+import numpy as np
+import pytest
+
+# First Party
+from instructlab.rag.ann_index import IVFIndex, documents_fingerprint, ivf_index_path
+
+
+@pytest.fixture(name="embeddings")
+def fixture_embeddings():
+    # well separated clusters of embeddings
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(8, 32))
+    return np.concatenate(
+        [center + rng.normal(scale=0.05, size=(50, 32)) for center in centers]
+    ).astype(np.float32)
+
+
+def test_ivf_index_search(embeddings):
+    ids = [f"doc-{i}" for i in range(len(embeddings))]
+    index = IVFIndex.build(ids, embeddings.tolist())
+    assert len(index) == len(ids)
+    assert len(index.centroids) == int(np.sqrt(len(ids)))
+
+    query = embeddings[42]
+    expected = [ids[i] for i in np.argsort(-(embeddings @ query))[:5]]
+    results = index.search(query.tolist(), top_k=5, nprobe=4)
+    assert [doc_id for doc_id, _ in results] == expected
+    scores = [score for _, score in results]
+    assert scores == pytest.approx(
+        sorted((embeddings @ query).tolist(), reverse=True)[:5], rel=1e-5
+    )
+
+
+def test_ivf_index_exhaustive_search(embeddings):
+    ids = [f"doc-{i}" for i in range(len(embeddings))]
+    index = IVFIndex.build(ids, embeddings.tolist(), n_lists=10)
+    # probing every list is equivalent to an exhaustive search
+    results = index.search(embeddings[0].tolist(), top_k=len(ids) + 1, nprobe=100)
+    assert sorted(doc_id for doc_id, _ in results) == sorted(ids)
+
+
+def test_ivf_index_save_and_load(tmp_path, embeddings):
+    ids = [f"doc-{i}" for i in range(len(embeddings))]
+    index = IVFIndex.build(ids, embeddings.tolist())
+    path = ivf_index_path(str(tmp_path / "embeddings.db"))
+    index.save(path)
+
+    loaded = IVFIndex.load(path)
+    assert len(loaded) == len(index)
+    # the embeddings are read from disk on demand
+    assert isinstance(loaded.embeddings, np.memmap)
+    assert loaded.fingerprint == documents_fingerprint(reversed(ids))
+    assert loaded.fingerprint != documents_fingerprint(ids[1:] + ["doc-x"])
+    assert loaded.search(embeddings[7].tolist(), 3, 2) == index.search(
+        embeddings[7].tolist(), 3, 2
+    )
+
+
+def test_ivf_index_invalid_embeddings():
+    with pytest.raises(ValueError):
+        IVFIndex.build(["a", "b"], [[1.0, 2.0]])
+    with pytest.raises(ValueError):
+        IVFIndex.build([], [])
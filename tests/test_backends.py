@@ -4,18 +4,20 @@ from unittest.mock import patch
 import json
 import os
 import pathlib
+import signal
 import socket
 import sys
 
 # Third Party
 from click.testing import CliRunner
 from safetensors.torch import save_file
+import httpx
 import pytest
 import torch
 
 # First Party
 from instructlab import lab
-from instructlab.model.backends import backends, common
+from instructlab.model.backends import backends, common, vllm
 from instructlab.model.backends.vllm import build_vllm_cmd, get_argument
 from instructlab.utils import is_model_safetensors
 from tests.test_feature_gates import dev_preview
@@ -472,3 +474,110 @@ def test_get_argument(flag, args_list, expected_flag, expected_value):
     result_flag, result_value = get_argument(flag, args_list)
     assert result_flag == expected_flag
     assert result_value == expected_value
+
+
+def test_vllm_readiness_checks_back_off(tmp_path: pathlib.Path):
+    server = vllm.Server(
+        api_base="http://127.0.0.1:8000/v1",
+        model_family="granite",
+        model_path=tmp_path,
+        chat_template="auto",
+        host="127.0.0.1",
+        port=8000,
+    )
+    process = mock.MagicMock()
+    process.poll.return_value = None
+    with (
+        mock.patch.object(vllm, "check_api_base", return_value=False),
+        mock.patch.object(server, "create_server_process", return_value=process),
+        mock.patch.object(
+            vllm, "is_server_healthy", side_effect=[False, False, False, True]
+        ),
+        mock.patch.object(vllm, "_sleep") as m_sleep,
+    ):
+        _, api_base = server._ensure_server()
+
+    assert api_base.startswith("http://127.0.0.1:")
+    assert [c.args[0] for c in m_sleep.call_args_list] == [0.05, 0.1, 0.2]
+
+
+def test_vllm_readiness_checks_use_the_http_client(tmp_path: pathlib.Path):
+    server = vllm.Server(
+        api_base="http://127.0.0.1:8000/v1",
+        model_family="granite",
+        model_path=tmp_path,
+        chat_template="auto",
+        host="127.0.0.1",
+        port=8000,
+    )
+    process = mock.MagicMock()
+    process.poll.return_value = None
+    http_client = mock.MagicMock(spec=httpx.Client)
+    http_client.get.side_effect = [
+        httpx.ConnectError("not listening"),
+        httpx.Response(httpx.codes.OK),
+    ]
+    with (
+        mock.patch.object(vllm, "check_api_base", return_value=False),
+        mock.patch.object(server, "create_server_process", return_value=process),
+        mock.patch.object(vllm, "_sleep"),
+    ):
+        server._ensure_server(http_client=http_client)
+
+    assert http_client.get.call_count == 2
+    url = http_client.get.call_args.args[0]
+    assert url.startswith("http://127.0.0.1:") and url.endswith("/health")
+    assert http_client.get.call_args.kwargs["timeout"] == common.HEALTH_CHECK_TIMEOUT
+    http_client.close.assert_not_called()
+
+
+def test_wait_for_health_gives_up_on_exit_and_deadline():
+    process = mock.Mock()
+    process.is_alive.return_value = True
+    with (
+        mock.patch.object(common, "is_server_healthy", side_effect=[False, True]),
+        mock.patch.object(common.time, "sleep") as m_sleep,
+    ):
+        assert common.wait_for_health("127.0.0.1", 8000, process, float("inf"))
+    assert m_sleep.call_count == 1
+
+    with (
+        mock.patch.object(common, "is_server_healthy", return_value=False),
+        mock.patch.object(common.time, "sleep"),
+    ):
+        assert not common.wait_for_health("127.0.0.1", 8000, process, 0)
+        process.is_alive.return_value = False
+        assert not common.wait_for_health("127.0.0.1", 8000, process, float("inf"))
+
+
+def test_llama_cpp_slots_are_stopped_when_one_does_not_start():
+    # Local
+    from instructlab.model.backends import llama_cpp
+
+    slot_processes = [mock.Mock(), mock.Mock()]
+    for slot_process in slot_processes:
+        slot_process.is_alive.return_value = True
+    mpctx = mock.Mock()
+    mpctx.Process.side_effect = slot_processes
+    sigterm_handler = signal.getsignal(signal.SIGTERM)
+    with (
+        mock.patch.object(llama_cpp.multiprocessing, "get_context", return_value=mpctx),
+        mock.patch.object(llama_cpp, "wait_for_health", side_effect=[True, False]),
+        pytest.raises(common.ServerException, match="did not start in 240 seconds"),
+    ):
+        llama_cpp.serve_slots(
+            parallel_slots=2,
+            host="127.0.0.1",
+            port=8000,
+            queue=None,
+            max_connections=64,
+            log_level=0,
+            slot_kwargs={},
+        )
+
+    for slot_process in slot_processes:
+        slot_process.start.assert_called_once()
+        slot_process.terminate.assert_called_once()
+        # still running after being terminated
+        slot_process.kill.assert_called_once()
+    assert signal.getsignal(signal.SIGTERM) == sigterm_handler
@@ -0,0 +1,120 @@
+# Standard
+from pathlib import Path
+import hashlib
+import os
+
+# Third Party
+from click.testing import CliRunner
+
+# First Party
+from instructlab import lab
+from instructlab.configuration import DEFAULTS
+from instructlab.model import blob_store
+from instructlab.model.blob_store import BlobStore, file_digest
+from instructlab.model.remove import remove_model
+
+
+CONFIG = '{"model_type": "granite"}'
+
+
+def write_model(model_dir, weights: bytes):
+    model_dir.mkdir(parents=True)
+    (model_dir / "config.json").write_text(CONFIG)
+    (model_dir / "tokenizer.json").write_text("{}")
+    (model_dir / "tokenizer_config.json").write_text('{"bos_token": "<s>"}')
+    (model_dir / "pytorch_model.bin").write_bytes(weights)
+
+
+def test_adopt_tree_shares_equal_files(tmp_path):
+    store = BlobStore(tmp_path / "blobs")
+    write_model(tmp_path / "models" / "a", b"weights-a")
+    write_model(tmp_path / "models" / "b", b"weights-b")
+
+    assert store.adopt_tree(tmp_path / "models" / "a") == 0
+    shared_bytes = sum(
+        path.stat().st_size
+        for path in (tmp_path / "models" / "b").iterdir()
+        if path.name != "pytorch_model.bin"
+    )
+    assert store.adopt_tree(tmp_path / "models" / "b") == shared_bytes
+
+    config_a = tmp_path / "models" / "a" / "config.json"
+    config_b = tmp_path / "models" / "b" / "config.json"
+    assert config_a.is_symlink() and config_b.is_symlink()
+    assert store.blob_of(config_a) == store.blob_of(config_b)
+    assert config_b.read_text() == CONFIG
+    assert len(list(store.blobs_dir.iterdir())) == 5
+    # adopting again is a no-op
+    assert store.adopt_tree(tmp_path / "models" / "a") == 0
+
+
+def test_adopt_trusts_given_digest(tmp_path):
+    store = BlobStore(tmp_path / "blobs")
+    layer = tmp_path / "oci" / "blobs" / "sha256" / "0123"
+    layer.parent.mkdir(parents=True)
+    layer.write_bytes(b"layer")
+    blob = store.adopt(layer, digest="0123")
+    assert blob == store.blob_path("0123")
+    assert store.blob_of(layer) == blob
+
+    store.link(blob, tmp_path / "model" / "pytorch_model.bin")
+    assert (tmp_path / "model" / "pytorch_model.bin").read_bytes() == b"layer"
+
+
+def test_detach_tree_makes_checkpoints_writable(tmp_path):
+    store = BlobStore(tmp_path / "blobs")
+    checkpoint = tmp_path / "hf_format" / "samples_10"
+    write_model(checkpoint, b"weights")
+    store.adopt_tree(checkpoint.parent)
+
+    store.detach_tree(checkpoint.parent)
+    weights = checkpoint / "pytorch_model.bin"
+    assert not weights.is_symlink()
+    weights.write_bytes(b"new weights")
+    blob = store.blob_path(hashlib.sha256(b"weights").hexdigest())
+    assert blob.read_bytes() == b"weights"
+    assert file_digest(weights) == hashlib.sha256(b"new weights").hexdigest()
+
+
+def test_remove_model_releases_unshared_blobs(cli_runner: CliRunner):
+    models_dir = Path(DEFAULTS.MODELS_DIR) / "instructlab"
+    store = BlobStore()
+    for name, weights in (("a", b"weights-a"), ("b", b"weights-b")):
+        write_model(models_dir / name, weights)
+        store.adopt_tree(models_dir / name)
+    assert len(list(store.blobs_dir.iterdir())) == 5
+
+    remove_model("instructlab/a", DEFAULTS.MODELS_DIR)
+
+    # the config and tokenizer are still used by the other model
+    assert {blob.name for blob in store.blobs_dir.iterdir()} == {
+        file_digest(path) for path in (models_dir / "b").iterdir()
+    }
+
+
+def test_model_gc(cli_runner: CliRunner, monkeypatch):
+    store = BlobStore()
+    model_dir = Path(DEFAULTS.CHECKPOINTS_DIR) / "hf_format" / "samples_1"
+    write_model(model_dir, b"weights")
+    store.adopt_tree(model_dir)
+    os.unlink(model_dir / "pytorch_model.bin")
+
+    # the unused blob is too recent to be collected, a download may link it
+    result = cli_runner.invoke(lab.ilab, ["--config=DEFAULT", "model", "gc"])
+    assert result.exit_code == 0, result.output
+    assert "Freed 0.0 MiB of 0 unused model files." in result.output
+
+    monkeypatch.setattr(blob_store, "GC_GRACE_SECONDS", -3600)
+    result = cli_runner.invoke(
+        lab.ilab, ["--config=DEFAULT", "model", "gc", "--dry-run"]
+    )
+    assert result.exit_code == 0, result.output
+    assert "Would free 0.0 MiB of 1 unused model files." in result.output
+    assert len(list(store.blobs_dir.iterdir())) == 4
+
+    result = cli_runner.invoke(lab.ilab, ["--config=DEFAULT", "model", "gc"])
+    assert result.exit_code == 0, result.output
+    assert "Freed 0.0 MiB of 1 unused model files." in result.output
+    assert {blob.name for blob in store.blobs_dir.iterdir()} == {
+        file_digest(path) for path in model_dir.iterdir()
+    }
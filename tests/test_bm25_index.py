@@ -0,0 +1,83 @@
+# Standard
+import math
+
+# Third Party
+import pytest
+
+# First Party
+from instructlab.rag.bm25_index import (
+    BM25_B,
+    BM25_K1,
+    BM25Index,
+    bm25_index_path,
+    tokenize,
+)
+
+TEXTS = [
+    "The ABC-123 router supports firmware v2.1 and later.",
+    "The XYZ-900 switch is configured from the web console.",
+    "Routers and switches are configured from the web console.",
+    "Firmware updates are published every quarter.",
+]
+
+
+def test_tokenize():
+    assert tokenize("Order ABC-123, v1.2") == [
+        "order",
+        "abc-123",
+        "abc",
+        "123",
+        "v1.2",
+        "v1",
+        "2",
+    ]
+
+
+def test_bm25_index_search():
+    ids = [f"doc-{i}" for i in range(len(TEXTS))]
+    index = BM25Index.build(ids, TEXTS)
+    assert len(index) == len(TEXTS)
+
+    results = index.search("ABC-123 firmware", top_k=10)
+    assert [doc_id for doc_id, _ in results] == ["doc-0", "doc-3"]
+    assert index.search("xyz-900", top_k=10)[0][0] == "doc-1"
+    assert index.search("unknown terms", top_k=10) == []
+    assert len(index.search("configured console", top_k=1)) == 1
+
+    # single term query: the score is the BM25 weight of the term in the document
+    (doc_id, score), *_ = index.search("quarter", top_k=1)
+    assert doc_id == "doc-3"
+    lengths = [len(tokenize(text)) for text in TEXTS]
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[3] / (sum(lengths) / len(TEXTS)))
+    idf = math.log(1 + (len(TEXTS) - 1 + 0.5) / (1 + 0.5))
+    assert score == pytest.approx(idf * (BM25_K1 + 1) / (1 + norm), rel=1e-5)
+
+
+def test_bm25_index_save_and_load(tmp_path):
+    ids = [f"doc-{i}" for i in range(len(TEXTS))]
+    index = BM25Index.build(ids, TEXTS)
+    path = bm25_index_path(str(tmp_path / "store.db"))
+    index.save(path)
+
+    loaded = BM25Index.load(path)
+    assert len(loaded) == len(index)
+    for query in ["web console", "router firmware", "abc-123"]:
+        expected = index.search(query, top_k=3)
+        results = loaded.search(query, top_k=3)
+        assert [doc_id for doc_id, _ in results] == [doc_id for doc_id, _ in expected]
+        assert [score for _, score in results] == pytest.approx(
+            [score for _, score in expected]
+        )
+
+
+def test_bm25_index_vocabulary_size():
+    # a single long term does not widen the storage of the other terms
+    texts = ["a" * 10000, "Café déjà vu", "naïve résumé"]
+    index = BM25Index.build(["doc-0", "doc-1", "doc-2"], texts)
+    assert index.term_bytes.nbytes == sum(
+        len(term.encode("utf-8")) for term in set(tokenize(" ".join(texts)))
+    )
+    assert index.search("café", top_k=10)[0][0] == "doc-1"
+    assert index.search("résumé", top_k=10)[0][0] == "doc-2"
+    assert index.search("a" * 10000, top_k=10)[0][0] == "doc-0"
+    assert index.search("cafe", top_k=10) == []
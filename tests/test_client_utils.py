@@ -0,0 +1,86 @@
+# Standard
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import logging
+import threading
+
+# Third Party
+import pytest
+
+# First Party
+from instructlab import client_utils
+from instructlab.client_utils import configure_http_pool, http_client, pool_stats
+from instructlab.defaults import DEFAULTS
+
+TLS_PARAMS = {
+    "tls_client_cert": None,
+    "tls_client_key": None,
+    "tls_client_passwd": None,
+    "tls_insecure": True,
+}
+
+
+@pytest.fixture(autouse=True)
+def reset_http_pool():
+    yield
+    configure_http_pool(
+        max_connections=DEFAULTS.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=DEFAULTS.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=DEFAULTS.HTTP_KEEPALIVE_EXPIRY,
+        http2=False,
+    )
+    client_utils._clients.clear()
+
+
+def test_http_client_is_shared():
+    client = http_client(TLS_PARAMS)
+    assert http_client(dict(TLS_PARAMS)) is client
+    assert http_client({**TLS_PARAMS, "tls_insecure": False}) is not client
+
+    # a closed client is replaced
+    client.close()
+    assert http_client(TLS_PARAMS) is not client
+
+    # the clients created after a pool configuration change use the new settings
+    configure_http_pool(
+        max_connections=4,
+        max_keepalive_connections=2,
+        keepalive_expiry=1.0,
+        http2=False,
+    )
+    assert http_client(TLS_PARAMS) is not client
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+def test_http_client_reuses_connections(caplog):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/models"
+    try:
+        with caplog.at_level(logging.DEBUG, logger="instructlab.client_utils"):
+            for _ in range(3):
+                assert http_client(TLS_PARAMS).get(url).status_code == 200
+        # the connection is kept alive and reused by the following requests
+        assert pool_stats(http_client(TLS_PARAMS)) == {
+            "connections": 1,
+            "requests": 3,
+            "reused": 2,
+        }
+        assert (
+            f"GET {url} HTTP/1.1: 1 pooled connections, 2/3 requests on reused connections"
+            in caplog.text
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
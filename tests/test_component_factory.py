@@ -2,6 +2,7 @@
 import pytest
 
 # First Party
+from instructlab.rag.ann_index import IVFIndex
 from instructlab.rag.haystack import component_factory as f
 
 
@@ -19,7 +20,7 @@ def test_converter():
 def test_document_embedder():
     embedder = f.create_document_embedder(embedding_model_path="foo")
     assert embedder is not None
-    assert type(embedder).__name__ == "SentenceTransformersDocumentEmbedder"
+    assert type(embedder).__name__ == "BatchedDocumentEmbedder"
 
 
 def test_text_embedder():
@@ -34,9 +35,18 @@ def test_retriever(document_store):
     assert type(retriever).__name__ == "InMemoryEmbeddingRetriever"
 
 
+def test_ivf_retriever(document_store):
+    index = IVFIndex.build(["a", "b"], [[1.0, 0.0], [0.0, 1.0]])
+    retriever = f.create_ivf_retriever(
+        top_k=10, document_store=document_store, index=index, nprobe=1
+    )
+    assert retriever is not None
+    assert type(retriever).__name__ == "IVFEmbeddingRetriever"
+
+
 def test_document_store(document_store):
     assert document_store is not None
-    assert type(document_store).__name__ == "InMemoryDocumentStore"
+    assert type(document_store).__name__ == "MemoryMappedDocumentStore"
 
 
 def test_document_writer(document_store):  # pylint: disable=unused-argument
@@ -48,3 +58,19 @@ def test_document_writer(document_store):  # pylint: disable=unused-argument
 def test_document_splitter():
     with pytest.raises(OSError) as _:
         f.create_splitter("foo")
+
+
+def test_embedding_cache(tmp_path):
+    assert f.create_embedding_cache("foo", None, 10) is None
+    assert f.create_embedding_cache("foo", str(tmp_path), 0) is None
+    cache = f.create_embedding_cache("foo", str(tmp_path), 10)
+    assert type(cache).__name__ == "EmbeddingCache"
+
+    embedder = f.create_cached_document_embedder(
+        f.create_document_embedder(embedding_model_path="foo"), cache
+    )
+    assert type(embedder).__name__ == "CachedDocumentEmbedder"
+    embedder = f.create_cached_text_embedder(
+        f.create_text_embedder(embedding_model_path="foo"), cache
+    )
+    assert type(embedder).__name__ == "CachedTextEmbedder"
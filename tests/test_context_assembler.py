@@ -0,0 +1,74 @@
+# First Party
+from instructlab.model.token_counter import (
+    MESSAGE_OVERHEAD_TOKENS,
+    MessageTokenCounter,
+    approximate_token_count,
+    create_token_counter,
+)
+from instructlab.rag.context_assembler import ContextAssembler
+from instructlab.rag.document_store import RetrievedChunk
+
+
+def count_words(text: str) -> int:
+    return len(text.split())
+
+
+def test_context_assembler_packs_best_chunks():
+    chunks = [
+        RetrievedChunk(content="one two three four five six", score=0.5),
+        RetrievedChunk(content="alpha beta gamma", score=0.9),
+        RetrievedChunk(content="a b c d e f g h i j", score=0.7),
+        RetrievedChunk(content="x y", score=0.1),
+    ]
+    assembler = ContextAssembler(count_tokens=count_words, token_budget=13)
+    # the 10 words chunk does not fit after the best one, smaller chunks still do
+    assert assembler.assemble(chunks) == (
+        "alpha beta gamma\none two three four five six\nx y"
+    )
+    assert ContextAssembler(count_words, token_budget=2).assemble(chunks) == "x y"
+
+
+def test_context_assembler_skips_overlapping_chunks():
+    text = "the quick brown fox jumps over the lazy dog near the river bank"
+    chunks = [
+        RetrievedChunk(content=text, score=0.9),
+        # overlapping window of the same text, and an exact duplicate
+        RetrievedChunk(content=text.split(" ", 2)[2] + " today", score=0.8),
+        RetrievedChunk(content=text, score=0.7),
+        RetrievedChunk(content="a different chunk about something else", score=0.6),
+    ]
+    assembler = ContextAssembler(count_tokens=count_words, token_budget=100)
+    assert assembler.assemble(chunks) == (
+        f"{text}\na different chunk about something else"
+    )
+
+
+def test_token_counter_fallback():
+    count_tokens = create_token_counter(None)
+    assert count_tokens is approximate_token_count
+    assert count_tokens("12345678") == 2
+    assert create_token_counter("/no/such/model.gguf") is approximate_token_count
+
+
+def test_message_token_counter_trims_oldest_messages():
+    calls = []
+
+    def count_tokens(text: str) -> int:
+        calls.append(text)
+        return count_words(text)
+
+    counter = MessageTokenCounter(count_tokens)
+    messages = [
+        {"role": "user", "content": "one two three"},
+        {"role": "assistant", "content": "four five"},
+        {"role": "user", "content": "six"},
+    ]
+    assert counter.count(messages[0]) == 3 + MESSAGE_OVERHEAD_TOKENS
+    assert counter.trim(messages, max_tokens=100) == messages
+    max_tokens = 3 + 2 * MESSAGE_OVERHEAD_TOKENS
+    assert counter.trim(messages, max_tokens=max_tokens) == messages[1:]
+    # each message content is only tokenized once
+    assert sorted(calls) == sorted(message["content"] for message in messages)
+    # the last message is kept even if it does not fit
+    assert counter.trim(messages[1:], max_tokens=0) == messages[2:]
+    assert len(calls) == len(messages)
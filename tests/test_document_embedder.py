@@ -0,0 +1,63 @@
+# Standard
+from unittest.mock import MagicMock
+
+# Third Party
+from haystack import Document  # type: ignore
+import numpy as np
+import pytest
+
+# First Party
+from instructlab.rag.haystack.components.document_embedder import (
+    BatchedDocumentEmbedder,
+)
+
+
+def test_document_embedder_settings():
+    embedder = BatchedDocumentEmbedder(
+        model="foo", batch_size=64, dtype="bfloat16", device="cpu"
+    )
+    assert embedder.batch_size == 64
+    assert embedder.model_kwargs == {"torch_dtype": "bfloat16"}
+    assert embedder.device.to_torch_str() == "cpu"
+
+    data = embedder.to_dict()
+    assert data["init_parameters"] == {
+        "model": "foo",
+        "batch_size": 64,
+        "dtype": "bfloat16",
+        "device": "cpu",
+        "encode_processes": 0,
+    }
+    assert BatchedDocumentEmbedder.from_dict(data).dtype == "bfloat16"
+
+
+def test_document_embedder_invalid_dtype():
+    with pytest.raises(ValueError):
+        BatchedDocumentEmbedder(model="foo", dtype="int4")
+
+
+def test_document_embedder_process_pool():
+    embedder = BatchedDocumentEmbedder(
+        model="foo", batch_size=8, device="cpu", encode_processes=2
+    )
+    model = MagicMock()
+    model.start_multi_process_pool.return_value = {"processes": []}
+    model.encode_multi_process.side_effect = lambda texts, pool, batch_size: (
+        np.arange(len(texts) * 2, dtype=np.float32).reshape(len(texts), 2)
+    )
+    embedder.embedding_backend = MagicMock(model=model)
+
+    documents = [Document(content=f"chunk {i}") for i in range(3)]
+    for _ in range(2):
+        result = embedder.run(documents=documents)["documents"]
+    assert [doc.embedding for doc in result] == [[0.0, 1.0], [2.0, 3.0], [4.0, 5.0]]
+    # the pool is started once and reused across runs
+    model.start_multi_process_pool.assert_called_once_with(
+        target_devices=["cpu", "cpu"]
+    )
+    model.encode_multi_process.assert_called_with(
+        ["chunk 0", "chunk 1", "chunk 2"], {"processes": []}, batch_size=8
+    )
+
+    embedder.close()
+    model.stop_multi_process_pool.assert_called_once_with({"processes": []})
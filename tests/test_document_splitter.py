@@ -1,4 +1,5 @@
 # Standard
+from concurrent.futures import ThreadPoolExecutor
 from typing import Iterator
 from unittest.mock import patch
 import glob
@@ -56,6 +57,42 @@ def test_document_splitter(document_splitter):
     assert len(docs) > 0
 
 
+@dev_preview
+def test_document_splitter_with_workers(document_splitter):
+    converter = TextFileToDocument()
+    sources = sorted(
+        glob.glob("tests/testdata/temp_datasets_documents/docling-artifacts/*.json")
+    )
+    docs = converter.run(sources=sources * 3)["documents"]
+    expected = document_splitter.run(documents=docs)["documents"]
+
+    # worker threads share the patched chunker, while worker processes would not
+    with (
+        patch(
+            "instructlab.rag.haystack.components.document_splitter.HybridChunker",
+            side_effect=lambda tokenizer, max_tokens: MockChunker(),
+        ),
+        patch(
+            "instructlab.rag.haystack.components.document_splitter.ProcessPoolExecutor",
+            side_effect=lambda mp_context, **kwargs: ThreadPoolExecutor(**kwargs),
+        ) as executor_class,
+    ):
+        splitter = DoclingDocumentSplitter(content_format="json", workers=2)
+        result = splitter.run(documents=docs)["documents"]
+        # the workers are reused by the next runs
+        assert splitter.run(documents=docs[:2])["documents"]
+        splitter.close()
+
+    assert executor_class.call_count == 1
+    assert [doc.content for doc in result] == [doc.content for doc in expected]
+    assert [doc.meta for doc in result] == [doc.meta for doc in expected]
+
+
+def test_document_splitter_invalid_workers():
+    with pytest.raises(ValueError):
+        DoclingDocumentSplitter(content_format="json", workers=0)
+
+
 @dev_preview
 def test_wrong_documents_type(document_splitter):
     with pytest.raises(TypeError):
@@ -1,20 +1,28 @@
 # Standard
 from unittest.mock import patch
+import json
 import os
 import shutil
 import tempfile
 
 # Third Party
 from haystack import Document, component  # type: ignore
-from haystack.document_stores.in_memory import InMemoryDocumentStore  # type: ignore
 import pytest
 
 # First Party
+from instructlab.rag.ann_index import ivf_index_path
+from instructlab.rag.bm25_index import BM25Index, bm25_index_path
 from instructlab.rag.document_store import DocumentStoreIngestor, DocumentStoreRetriever
 from instructlab.rag.document_store_factory import (
     create_document_retriever,
     create_document_store_ingestor,
 )
+from instructlab.rag.haystack.components.hybrid_retriever import HybridRetriever
+from instructlab.rag.haystack.components.ivf_retriever import IVFEmbeddingRetriever
+from instructlab.rag.haystack.document_store_ingestor import checkpoint_path
+from instructlab.rag.haystack.memory_mapped_document_store import (
+    MemoryMappedDocumentStore,
+)
 from tests.test_feature_gates import dev_preview
 
 
@@ -35,6 +43,19 @@ class TextEmbedderMock:
         return {"embedding": embedding}
 
 
+@component
+class CountingDocumentEmbedderMock:
+    def __init__(self, embedded_documents: list[Document]):
+        self.embedded_documents = embedded_documents
+
+    @component.output_types(documents=list[Document])
+    def run(self, documents: list[Document]):
+        self.embedded_documents.extend(documents)
+        for doc in documents:
+            doc.embedding = [float(v * 0.5) for v in range(10)]
+        return {"documents": documents}
+
+
 @component
 class DocumentSplitterMock:
     @component.output_types(documents=list[Document])
@@ -45,25 +66,29 @@ class DocumentSplitterMock:
 @pytest.fixture(name="mock_create_splitter")
 def fixture_mock_create_splitter():
     with patch(
-        "instructlab.rag.haystack.component_factory.create_splitter"
+        "instructlab.rag.haystack.document_store_ingestor.create_splitter"
     ) as mock_function:
-        mock_function.side_effect = lambda embedding_model_path: DocumentSplitterMock()
+        mock_function.side_effect = (
+            lambda embedding_model_path, **kwargs: DocumentSplitterMock()
+        )
         yield mock_function
 
 
 @pytest.fixture(name="mock_create_document_embedder")
 def fixture_mock_create_document_embedder():
     with patch(
-        "instructlab.rag.haystack.component_factory.create_document_embedder"
+        "instructlab.rag.haystack.document_store_ingestor.create_document_embedder"
     ) as mock_function:
-        mock_function.side_effect = lambda embedding_model_path: DocumentEmbedderMock()
+        mock_function.side_effect = (
+            lambda embedding_model_path, **kwargs: DocumentEmbedderMock()
+        )
         yield mock_function
 
 
 @pytest.fixture(name="mock_create_text_embedder")
 def fixture_mock_create_text_embedder():
     with patch(
-        "instructlab.rag.haystack.component_factory.create_text_embedder"
+        "instructlab.rag.haystack.document_store_retriever.create_text_embedder"
     ) as mock_function:
         mock_function.side_effect = lambda embedding_model_path: TextEmbedderMock()
         yield mock_function
@@ -101,7 +126,7 @@ def test_document_store_ingest_and_retrieve_for_in_memory_store(
         assert count > 0
 
         # Validate document store collection
-        document_store = InMemoryDocumentStore.load_from_disk(document_store_uri)
+        document_store = MemoryMappedDocumentStore.load_from_disk(document_store_uri)
         documents = document_store.filter_documents()
         assert len(documents) == 1
         documents_count = document_store.count_documents()
@@ -127,8 +152,256 @@ def test_document_store_ingest_and_retrieve_for_in_memory_store(
         )
         assert type(retriever).__name__ == "HaystackDocumentStoreRetriever"
 
+        retriever.warm_up()
         context = retriever.augmented_context(user_query="What is knowledge")
 
         assert context is not None
         assert len(context) > 0
         assert "familiarity with individuals" in context
+
+
+@dev_preview
+def test_document_store_incremental_ingest(
+    mock_create_splitter,
+) -> None:  # pylint: disable=unused-argument
+    embedded_documents: list[Document] = []
+
+    with (
+        tempfile.TemporaryDirectory() as temp_dir,
+        patch(
+            "instructlab.rag.haystack.document_store_ingestor.create_document_embedder",
+            side_effect=lambda **_: CountingDocumentEmbedderMock(embedded_documents),
+        ),
+    ):
+        input_dir = os.path.join(temp_dir, "input")
+        shutil.copytree("tests/testdata/temp_datasets_documents", input_dir)
+        document_store_uri = os.path.join(temp_dir, "ingest.db")
+
+        def ingest() -> int:
+            ingestor = create_document_store_ingestor(
+                document_store_uri=document_store_uri,
+                document_store_collection_name="default",
+                embedding_model_path="foo",
+                incremental=True,
+            )
+            result, count = ingestor.ingest_documents(input_dir)
+            assert result is True
+            return count
+
+        # First run creates the store from scratch
+        assert ingest() == 1
+        assert len(embedded_documents) == 1
+
+        # Unchanged documents are not embedded again
+        embedded_documents.clear()
+        assert ingest() == 1
+        assert len(embedded_documents) == 0
+
+        # A new document is the only one to be embedded
+        artifacts_dir = os.path.join(input_dir, "docling-artifacts")
+        shutil.copy(
+            os.path.join(artifacts_dir, "knowledge-wiki.json"),
+            os.path.join(artifacts_dir, "knowledge-wiki-copy.json"),
+        )
+        assert ingest() == 2
+        assert len(embedded_documents) == 1
+
+        # Removed documents are deleted from the store
+        embedded_documents.clear()
+        os.remove(os.path.join(artifacts_dir, "knowledge-wiki-copy.json"))
+        assert ingest() == 1
+        assert len(embedded_documents) == 0
+
+        documents = MemoryMappedDocumentStore.load_from_disk(
+            document_store_uri
+        ).filter_documents()
+        assert [doc.meta["source_file"] for doc in documents] == [
+            os.path.join("docling-artifacts", "knowledge-wiki.json")
+        ]
+
+
+@dev_preview
+def test_document_store_ingest_with_embedding_cache(
+    mock_create_splitter,
+) -> None:  # pylint: disable=unused-argument
+    embedded_documents: list[Document] = []
+
+    with (
+        tempfile.TemporaryDirectory() as temp_dir,
+        patch(
+            "instructlab.rag.haystack.document_store_ingestor.create_document_embedder",
+            side_effect=lambda **_: CountingDocumentEmbedderMock(embedded_documents),
+        ),
+    ):
+        cache_dir = os.path.join(temp_dir, "cache")
+        for expected_embedded in [1, 0]:
+            embedded_documents.clear()
+            ingestor = create_document_store_ingestor(
+                document_store_uri=os.path.join(temp_dir, "ingest.db"),
+                document_store_collection_name="default",
+                embedding_model_path="foo",
+                embedding_cache_dir=cache_dir,
+                embedding_cache_max_entries=10,
+            )
+            result, count = ingestor.ingest_documents(
+                "tests/testdata/temp_datasets_documents"
+            )
+            assert result is True
+            assert count == 1
+            # the second ingestion finds every chunk in the cache
+            assert len(embedded_documents) == expected_embedded
+
+        documents = MemoryMappedDocumentStore.load_from_disk(
+            os.path.join(temp_dir, "ingest.db")
+        ).filter_documents()
+        assert documents[0].embedding == [float(v * 0.5) for v in range(10)]
+
+
+@dev_preview
+def test_document_store_streaming_ingest_resume(
+    mock_create_splitter,
+) -> None:  # pylint: disable=unused-argument
+    embedded_documents: list[Document] = []
+    failing_batches: list[int] = []
+
+    @component
+    class FailingDocumentEmbedderMock:
+        @component.output_types(documents=list[Document])
+        def run(self, documents: list[Document]):
+            if failing_batches and failing_batches.pop(0) == 0:
+                raise RuntimeError("interrupted")
+            embedded_documents.extend(documents)
+            for doc in documents:
+                doc.embedding = [float(v * 0.5) for v in range(10)]
+            return {"documents": documents}
+
+    with (
+        tempfile.TemporaryDirectory() as temp_dir,
+        patch(
+            "instructlab.rag.haystack.document_store_ingestor.create_document_embedder",
+            side_effect=lambda **_: FailingDocumentEmbedderMock(),
+        ),
+    ):
+        input_dir = os.path.join(temp_dir, "input")
+        os.makedirs(input_dir)
+        for i in range(5):
+            shutil.copy(
+                "tests/testdata/temp_datasets_documents/docling-artifacts/knowledge-wiki.json",
+                os.path.join(input_dir, f"knowledge-wiki-{i}.json"),
+            )
+        document_store_uri = os.path.join(temp_dir, "ingest.db")
+
+        def ingest() -> tuple[bool, int]:
+            ingestor = create_document_store_ingestor(
+                document_store_uri=document_store_uri,
+                document_store_collection_name="default",
+                embedding_model_path="foo",
+                stream_batch_size=2,
+            )
+            return ingestor.ingest_documents(input_dir)
+
+        # The third micro-batch fails, after two checkpoints
+        failing_batches.extend([1, 1, 0])
+        assert ingest() == (False, -1)
+        assert len(embedded_documents) == 4
+        with open(checkpoint_path(document_store_uri), encoding="utf-8") as f:
+            assert json.load(f) == {"processed": 4, "total": 5}
+
+        # The next ingestion only processes the remaining document
+        embedded_documents.clear()
+        assert ingest() == (True, 5)
+        assert len(embedded_documents) == 1
+        assert not os.path.exists(checkpoint_path(document_store_uri))
+        assert MemoryMappedDocumentStore.load_from_disk(
+            document_store_uri
+        ).embedding_matrix()[1].shape == (5, 10)
+
+
+@dev_preview
+def test_document_store_ivf_retrieval(
+    mock_create_splitter, mock_create_document_embedder, mock_create_text_embedder
+) -> None:  # pylint: disable=unused-argument
+    with tempfile.TemporaryDirectory() as temp_dir:
+        document_store_uri = os.path.join(temp_dir, "ingest.db")
+        ingestor = create_document_store_ingestor(
+            document_store_uri=document_store_uri,
+            document_store_collection_name="default",
+            embedding_model_path="foo",
+        )
+        result, _ = ingestor.ingest_documents("tests/testdata/temp_datasets_documents")
+        assert result is True
+        assert os.path.exists(ivf_index_path(document_store_uri))
+
+        retriever = create_document_retriever(
+            document_store_uri=document_store_uri,
+            document_store_collection_name="default",
+            top_k=20,
+            embedding_model_path="foo",
+            index_type="ivf",
+            nprobe=1,
+        )
+        # the index is up to date with the document store
+        assert isinstance(
+            retriever._pipeline.get_component("retriever"), IVFEmbeddingRetriever
+        )
+        context = retriever.augmented_context(user_query="What is knowledge")
+        assert "familiarity with individuals" in context
+
+
+@dev_preview
+def test_document_store_hybrid_retrieval(
+    mock_create_splitter, mock_create_document_embedder, mock_create_text_embedder
+) -> None:  # pylint: disable=unused-argument
+    with tempfile.TemporaryDirectory() as temp_dir:
+        document_store_uri = os.path.join(temp_dir, "ingest.db")
+        ingestor = create_document_store_ingestor(
+            document_store_uri=document_store_uri,
+            document_store_collection_name="default",
+            embedding_model_path="foo",
+        )
+        result, _ = ingestor.ingest_documents("tests/testdata/temp_datasets_documents")
+        assert result is True
+        assert len(BM25Index.load(bm25_index_path(document_store_uri))) == 1
+
+        retriever = create_document_retriever(
+            document_store_uri=document_store_uri,
+            document_store_collection_name="default",
+            top_k=20,
+            embedding_model_path="foo",
+            strategy="hybrid",
+        )
+        retriever.warm_up()
+        context = retriever.augmented_context(user_query="What is knowledge")
+        assert "familiarity with individuals" in context
+
+
+def test_hybrid_retriever_fusion(tmp_path) -> None:
+    documents = [Document(id=f"doc-{i}", content=f"chunk {i}") for i in range(4)]
+    document_store = MemoryMappedDocumentStore()
+    document_store.write_documents(documents)
+    index_path = str(tmp_path / "index.bm25.npz")
+    BM25Index.build(
+        ids=[doc.id for doc in documents],
+        texts=["alpha", "beta", "gamma SKU-42", "delta"],
+    ).save(index_path)
+
+    @component
+    class DenseRetrieverMock:
+        @component.output_types(documents=list[Document])
+        def run(self, query_embedding: list[float], top_k: int):  # pylint: disable=unused-argument
+            return {"documents": documents[:top_k]}
+
+    retriever = HybridRetriever(
+        document_store=document_store,
+        dense_retriever=DenseRetrieverMock(),
+        index_path=index_path,
+        top_k=2,
+        rrf_k=60,
+    )
+    results = retriever.run(query_embedding=[0.0], query="sku-42")["documents"]
+    # doc-2 is ranked third by the dense retriever and first by BM25
+    assert [doc.id for doc in results] == ["doc-2", "doc-0"]
+    assert results[0].score == pytest.approx(1 / 63 + 1 / 61)
+    # without a query, only the dense ranking is used
+    results = retriever.run(query_embedding=[0.0])["documents"]
+    assert [doc.id for doc in results] == ["doc-0", "doc-1"]
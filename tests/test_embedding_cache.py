@@ -0,0 +1,65 @@
+# Standard
+import os
+
+# Third Party
+import pytest
+
+# First Party
+from instructlab.rag.embedding_cache import EmbeddingCache
+
+
+def test_embedding_cache_hits_and_misses(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "foo", max_entries=10)
+    assert cache.get(["a", "b"]) == [None, None]
+
+    cache.put(["a", "b"], [[1.0, 2.0], [3.0, 4.0]])
+    # keys are computed on the normalized text
+    assert cache.get([" a ", "b", "c"]) == [[1.0, 2.0], [3.0, 4.0], None]
+    assert cache.stats() == {"hits": 2, "misses": 3, "evictions": 0, "entries": 2}
+
+
+def test_embedding_cache_is_persistent(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "foo", max_entries=10)
+    cache.put(["a"], [[1.0, 2.0]])
+    cache.close()
+
+    cache = EmbeddingCache(str(tmp_path), "foo", max_entries=10)
+    assert cache.get(["a"]) == [[1.0, 2.0]]
+    # each embedding model has its own cache
+    other_cache = EmbeddingCache(str(tmp_path), "bar", max_entries=10)
+    assert other_cache.get(["a"]) == [None]
+    assert cache.cache_dir != other_cache.cache_dir
+    assert os.path.exists(os.path.join(cache.cache_dir, "embeddings.npy"))
+
+
+def test_embedding_cache_evicts_least_recently_used(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "foo", max_entries=2)
+    cache.put(["a"], [[1.0]])
+    cache.put(["b"], [[2.0]])
+    # make "a" the most recently used entry
+    assert cache.get(["a"]) == [[1.0]]
+    cache.put(["c"], [[3.0]])
+
+    assert cache.get(["a", "b", "c"]) == [[1.0], None, [3.0]]
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["entries"] == 2
+
+
+def test_embedding_cache_resize(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "foo", max_entries=3)
+    cache.put(["a", "b", "c"], [[1.0], [2.0], [3.0]])
+    cache.close()
+
+    cache = EmbeddingCache(str(tmp_path), "foo", max_entries=5)
+    assert cache.get(["a", "b", "c"]) == [[1.0], [2.0], [3.0]]
+    cache.put(["d", "e"], [[4.0], [5.0]])
+    cache.close()
+
+    cache = EmbeddingCache(str(tmp_path), "foo", max_entries=2)
+    assert cache.stats()["entries"] == 2
+    assert cache.get(["a", "b"]) == [[1.0], [2.0]]
+
+
+def test_embedding_cache_invalid_size(tmp_path):
+    with pytest.raises(ValueError):
+        EmbeddingCache(str(tmp_path), "foo", max_entries=0)
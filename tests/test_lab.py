@@ -121,6 +121,7 @@ subcommands: list[Command] = [
     Command(("model", "download")),
     Command(("model", "evaluate"), ("--benchmark", "mmlu")),
     Command(("model", "serve")),
+    Command(("model", "pool")),
     Command(("model", "test")),
     Command(("model", "train")),
     Command(("model", "list")),
@@ -129,12 +130,14 @@ subcommands: list[Command] = [
         ("--model", "foo", "--destination", "bar"),
     ),
     Command(("model", "remove"), ("--model", "test-model")),
+    Command(("model", "gc")),
     Command(("data",), needs_config=False, should_fail=False),
     Command(("data", "generate")),
     Command(("data", "list")),
     Command(("rag",), needs_config=False, should_fail=False),
     Command(("rag", "convert")),
     Command(("rag", "ingest")),
+    Command(("rag", "serve")),
     Command(("system",), needs_config=False, should_fail=False),
     Command(("system", "info"), needs_config=False, should_fail=False),
     Command(("taxonomy",), needs_config=False, should_fail=False),
@@ -60,6 +60,13 @@ class TestLabDownload:
     def test_download(
         self, mock_list_repo_files, mock_hf_hub_download, cli_runner: CliRunner
     ):
+        def hf_hub_download(local_dir, filename, **_):
+            model_path = Path(local_dir, filename)
+            model_path.parent.mkdir(parents=True, exist_ok=True)
+            model_path.write_text(filename)
+            return str(model_path)
+
+        mock_hf_hub_download.side_effect = hf_hub_download
         result = cli_runner.invoke(
             lab.ilab,
             [
@@ -74,6 +81,11 @@ class TestLabDownload:
         ), f"command finished with an unexpected exit code. {result.stdout}"
         assert mock_list_repo_files.call_count == 4
         assert mock_hf_hub_download.call_count == 4
+        # the downloaded files are moved to the blob store
+        assert all(
+            Path(call.kwargs["local_dir"], call.kwargs["filename"]).is_symlink()
+            for call in mock_hf_hub_download.call_args_list
+        )
 
     @patch(
         "instructlab.model.download.hf_hub_download",
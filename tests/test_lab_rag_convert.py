@@ -22,7 +22,10 @@ from docling.document_converter import FormatOption  # type: ignore  # noqa: F40
 # First Party
 from instructlab import lab
 from instructlab.feature_gates import FeatureGating, FeatureScopes, GatedFeatures
-from instructlab.rag.convert import _load_converter_and_format_options
+from instructlab.rag.convert import (
+    _load_converter_and_format_options,
+    convert_documents_from_folder,
+)
 from tests.test_feature_gates import dev_preview
 
 
@@ -156,6 +159,32 @@ def test_convert_md_from_taxonomy(tmp_path: Path):
     run_rag_convert_test(params, expected_strings, expected_output_file, True)
 
 
+def test_convert_reuses_cached_documents(tmp_path: Path):
+    """
+    Verifies that converting the same directory twice with a conversion cache only converts the documents once.
+    """
+    converted_files = []
+
+    class CountingDocumentConverter(MockDocumentConverter):
+        def convert_all(self, source, raises_on_error=True):
+            source = list(source)
+            converted_files.extend(p.name for p in source)
+            return super().convert_all(source, raises_on_error=raises_on_error)
+
+    test_output_dir = tmp_path / "convert-outputs"
+    _load_converter_and_format_options()
+    with patch("instructlab.rag.convert.DocumentConverter", CountingDocumentConverter):
+        for _ in range(2):
+            convert_documents_from_folder(
+                "tests/testdata/documents/md",
+                test_output_dir,
+                cache_dir=tmp_path / "cache",
+            )
+            assert (test_output_dir / "hello.json").exists()
+    assert converted_files == ["hello.md"]
+    assert len(list((tmp_path / "cache").glob("*/*.json"))) == 1
+
+
 # Note that there is no test for converting pdf from taxonomy.  The tests above verify that you can convert
 # both PDF and md and that you can convert from both a directory and a taxonomy.  Testing a PDF from a
 # taxonomy too seems redundant, and these tests are already taking a lot of time so I don't want to add
@@ -60,7 +60,8 @@ def test_rag_ingest_errors_with_useful_message_when_not_enabled():
     side_effect=(
         lambda document_store_uri,
         document_store_collection_name,
-        embedding_model_path: MockDocumentStoreIngestor(document_store_uri)
+        embedding_model_path,
+        **kwargs: MockDocumentStoreIngestor(document_store_uri)
     ),
 )
 @dev_preview
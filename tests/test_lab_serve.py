@@ -320,6 +320,8 @@ def test_max_stable_vram_wait():
         ("gpu_layers", 1),
         ("num_threads", 1),
         ("max_ctx_size", 1),
+        ("parallel_slots", 1),
+        ("prompt_batch_size", 1),
         (
             "supported_param",
             0,
@@ -5,10 +5,12 @@
 from pathlib import Path
 from unittest import mock
 from unittest.mock import patch
+import functools
 import json
 import os
 import platform
 import sys
+import threading
 import typing
 
 # Third Party
@@ -17,7 +19,13 @@ import pytest
 
 # First Party
 from instructlab import lab
-from instructlab.configuration import DEFAULTS
+from instructlab.configuration import DEFAULTS, get_default_config
+from instructlab.model import accelerated_train
+from instructlab.model.phased_training import (
+    EvalPhaseModel,
+    EvalResult,
+    TrainingJournal,
+)
 from instructlab.train import linux_train
 
 INPUT_DIR = "test_generated"
@@ -795,3 +803,223 @@ class TestLabTrain:
         passed_train_args = accelerated_train_mock.call_args.kwargs["train_args"]
 
         assert not passed_train_args.accelerate_full_state_at_epoch
+
+
+def test_evaluate_checkpoints_on_gpu_groups(tmp_path):
+    checkpoints = []
+    for samples in (100, 200, 300, 400):
+        checkpoint = tmp_path / f"samples_{samples}"
+        checkpoint.mkdir()
+        checkpoints.append(checkpoint)
+    journal = TrainingJournal(tmp_path / "journal.yaml")
+    phase_model = EvalPhaseModel(checkpoints=checkpoints)
+    # the first checkpoint was evaluated before a crash
+    phase_model.finished_checkpoints.append(checkpoints[0])
+    phase_model.results.append(EvalResult(score=1.0, checkpoint=checkpoints[0]))
+    journal.journal.eval_2 = phase_model
+
+    # both groups evaluate a checkpoint before any evaluation finishes
+    barrier = threading.Barrier(2, timeout=5)
+    started = []
+    evaluated = []
+
+    def eval_func(model, gpu_ids):
+        started.append(model)
+        if len(started) <= 2:
+            barrier.wait()
+        evaluated.append((model, gpu_ids))
+        return int(model.name.rsplit("_", maxsplit=1)[-1]) / 100
+
+    best = accelerated_train._evaluate_dir_of_checkpoints(
+        eval_func=eval_func,
+        phase_model=phase_model,
+        journal=journal,
+        gpu_groups=[["0", "1"], ["2", "3"]],
+    )
+    assert best.checkpoint == checkpoints[3]
+    assert sorted(model for model, _ in evaluated) == checkpoints[1:]
+    assert {tuple(gpu_ids) for _, gpu_ids in evaluated} == {("0", "1"), ("2", "3")}
+
+    # every result is in the journal on disk
+    saved = TrainingJournal(tmp_path / "journal.yaml").journal.eval_2
+    assert saved is not None
+    assert sorted(saved.finished_checkpoints) == checkpoints
+    assert sorted(result.score for result in saved.results) == [1.0, 2.0, 3.0, 4.0]
+
+
+def test_mtbench_output_dir_per_checkpoint(tmp_path):
+    eval_cache = tmp_path / "eval_cache"
+    checkpoints = [tmp_path / f"samples_{samples}" for samples in (100, 200)]
+    for checkpoint in checkpoints:
+        checkpoint.mkdir()
+    # left by an interrupted evaluation of the first checkpoint
+    judgment = eval_cache / "samples_100" / "model_judgment" / "judge_single.jsonl"
+    judgment.parent.mkdir(parents=True)
+    judgment.write_text("{}", encoding="utf-8")
+    journal = TrainingJournal(tmp_path / "journal.yaml")
+    journal.journal.eval_2 = phase_model = EvalPhaseModel(checkpoints=checkpoints)
+
+    # both groups generate answers before any evaluation finishes
+    barrier = threading.Barrier(2, timeout=5)
+    output_dirs = {}
+
+    def make_evaluator(model_name, output_dir, **_):
+        output_dirs[model_name] = Path(output_dir)
+        evaluator = mock.MagicMock()
+        evaluator.gen_answers.side_effect = lambda *args, **kwargs: barrier.wait()
+        evaluator.judge_answers.return_value = (1.0,)
+        return evaluator
+
+    eval_func = functools.partial(
+        accelerated_train._mtbench,
+        eval_serve=get_default_config().serve,
+        eval_gpus=2,
+        eval_cache=eval_cache,
+        mtbench_judge=tmp_path / "judge",
+        enable_serving_output=False,
+    )
+    with (
+        patch("instructlab.eval.mt_bench.MTBenchEvaluator", side_effect=make_evaluator),
+        patch(
+            "instructlab.model.evaluate.launch_server",
+            return_value=(mock.MagicMock(), "http://127.0.0.1:8000/v1", 2),
+        ),
+    ):
+        accelerated_train._evaluate_dir_of_checkpoints(
+            eval_func=eval_func,
+            phase_model=phase_model,
+            journal=journal,
+            gpu_groups=[["0", "1"], ["2", "3"]],
+        )
+
+    assert output_dirs == {
+        "samples_100": eval_cache / "samples_100",
+        "samples_200": eval_cache / "samples_200",
+    }
+    assert not judgment.exists()
+
+
+def test_eval_gpu_groups(monkeypatch):
+    eval_serve = get_default_config().serve
+    monkeypatch.setenv("CUDA_VISIBLE_DEVICES", "2,3,5,7,9")
+    assert accelerated_train._eval_gpu_groups(eval_serve, eval_gpus=2) == [
+        ["2", "3"],
+        ["5", "7"],
+    ]
+    # a single evaluation uses all the GPUs
+    assert accelerated_train._eval_gpu_groups(eval_serve, eval_gpus=3) == []
+    assert accelerated_train._eval_gpu_groups(eval_serve, eval_gpus=None) == []
+
+
+def save_checkpoint(checkpoint: Path):
+    checkpoint.mkdir(parents=True)
+    (checkpoint / "config.json").write_text("{}", encoding="utf-8")
+    (checkpoint / "model.safetensors").write_bytes(b"weights")
+
+
+def test_pipelined_eval_of_saved_checkpoints(tmp_path):
+    checkpoints_dir = tmp_path / "hf_format"
+    journal = TrainingJournal(tmp_path / "journal.yaml")
+    journal.journal.eval_2 = phase_model = EvalPhaseModel(checkpoints=[])
+
+    def eval_func(model, gpu_ids):
+        assert gpu_ids == ["2", "3"]
+        if model.name == "samples_200":
+            raise RuntimeError("evaluation failed")
+        return 1.0
+
+    evaluator = accelerated_train._CheckpointEvaluator(
+        eval_func, phase_model, journal, gpu_groups=[["2", "3"]]
+    )
+    watcher = accelerated_train._CheckpointWatcher(checkpoints_dir, evaluator)
+    save_checkpoint(checkpoints_dir / "samples_100")
+    # checkpoints are queued once their files stop changing
+    watcher.poll()
+    assert not phase_model.checkpoints
+    watcher.poll()
+    assert phase_model.checkpoints == [checkpoints_dir / "samples_100"]
+
+    evaluator.start()
+    save_checkpoint(checkpoints_dir / "samples_200")
+    (checkpoints_dir / "samples_300").mkdir()
+    watcher.poll()
+    watcher.poll()
+    with pytest.raises(RuntimeError, match="evaluation failed"):
+        evaluator.join()
+
+    # the interrupted evaluation is tracked in the journal on disk
+    saved = TrainingJournal(tmp_path / "journal.yaml").journal.eval_2
+    assert saved is not None
+    assert saved.checkpoints == [
+        checkpoints_dir / "samples_100",
+        checkpoints_dir / "samples_200",
+    ]
+    assert saved.finished_checkpoints == [checkpoints_dir / "samples_100"]
+    assert saved.in_flight_checkpoints == [checkpoints_dir / "samples_200"]
+
+    accelerated_train._recover_in_flight_evaluations(saved)
+    assert not saved.in_flight_checkpoints
+
+    # evaluating it again discards the output of the interrupted evaluation
+    eval_cache = tmp_path / "eval_cache"
+    (eval_cache / "samples_200" / "model_answer").mkdir(parents=True)
+    (eval_cache / "samples_100" / "model_answer").mkdir(parents=True)
+    output_dir = accelerated_train._checkpoint_eval_cache(
+        eval_cache, checkpoints_dir / "samples_200"
+    )
+    assert output_dir == eval_cache / "samples_200"
+    assert not any(output_dir.iterdir())
+    assert (eval_cache / "samples_100" / "model_answer").is_dir()
+
+
+def test_pipelined_eval_skips_checkpoints_of_interrupted_training(tmp_path):
+    checkpoints_dir = tmp_path / "hf_format"
+    journal = TrainingJournal(tmp_path / "journal.yaml")
+    # evaluated before the interruption, then phase 2 training starts over
+    save_checkpoint(checkpoints_dir / "samples_100")
+    save_checkpoint(checkpoints_dir / "samples_200")
+    journal.journal.eval_2 = EvalPhaseModel(
+        checkpoints=[checkpoints_dir / "samples_100"],
+        finished_checkpoints=[checkpoints_dir / "samples_100"],
+        results=[EvalResult(score=9.0, checkpoint=checkpoints_dir / "samples_100")],
+    )
+
+    watcher = accelerated_train._start_pipelined_eval(
+        journal=journal,
+        checkpoints_dir=checkpoints_dir,
+        eval_func=lambda model, gpu_ids: 1.0,
+        gpu_groups=[["2", "3"]],
+    )
+    assert watcher is not None
+    watcher.stop()
+    phase_model = journal.journal.eval_2
+    assert phase_model is not None
+    assert not phase_model.results
+    assert not phase_model.finished_checkpoints
+
+    evaluator = accelerated_train._CheckpointEvaluator(
+        lambda model, gpu_ids: 1.0, phase_model, journal, gpu_groups=[["2", "3"]]
+    )
+    watcher = accelerated_train._CheckpointWatcher(checkpoints_dir, evaluator)
+    watcher.poll()
+    watcher.poll()
+    assert not phase_model.checkpoints
+
+    # the first checkpoint is saved again by the new training
+    (checkpoints_dir / "samples_100" / "model.safetensors").write_bytes(b"new weights")
+    watcher.poll()
+    watcher.poll()
+    assert phase_model.checkpoints == [checkpoints_dir / "samples_100"]
+
+
+def test_journal_commits_from_threads(tmp_path):
+    journal = TrainingJournal(tmp_path / "journal.yaml")
+    journal.journal.eval_2 = EvalPhaseModel(checkpoints=[])
+    threads = [threading.Thread(target=journal.commit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # the journal is replaced as a whole, no temporary file is left behind
+    assert TrainingJournal(tmp_path / "journal.yaml").was_loaded
+    assert [path.name for path in tmp_path.iterdir()] == ["journal.yaml"]
@@ -2,17 +2,23 @@
 
 # Standard
 from unittest.mock import MagicMock, Mock, patch
+import logging
+import os
 import pathlib
 import struct
 
 # Third Party
 from click.testing import CliRunner
 from gguf.constants import GGUF_MAGIC
+import boto3
+import moto
+import pytest
 
 # First Party
 from instructlab import lab
 from instructlab.configuration import DEFAULTS
 from instructlab.defaults import DEFAULT_INDENT
+from instructlab.model.upload import S3ModelUploader, S3UploadError
 from tests.test_backends import create_safetensors_or_bin_model_files
 
 
@@ -409,3 +415,77 @@ class TestLabUpload:
             f"Invalid S3 destination supplied:\n{DEFAULT_INDENT}Please specify valid S3 bucket URL syntax via --destination"
             in result.output
         )
+
+    @pytest.fixture(name="s3_bucket")
+    def fixture_s3_bucket(self, monkeypatch):
+        monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+        monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+        monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+        with moto.mock_aws():
+            s3_client = boto3.client("s3")
+            s3_client.create_bucket(Bucket="testbucket")
+            yield s3_client
+
+    def test_upload_folder_s3_resumes_interrupted_upload(
+        self, tmp_path: pathlib.Path, s3_bucket, caplog
+    ):
+        model_dir = tmp_path / "model"
+        model_dir.mkdir()
+        (model_dir / "config.json").write_text("{}", encoding="utf-8")
+        # three parts of 5 MiB, 5 MiB and 2 MiB
+        weights = os.urandom(12 * 1024 * 1024)
+        (model_dir / "model.safetensors").write_bytes(weights)
+        uploader = S3ModelUploader(
+            model=str(model_dir),
+            destination="testbucket",
+            max_files=2,
+            max_concurrency=2,
+            chunk_size_mb=5,
+            manifest_dir=str(tmp_path / "manifests"),
+        )
+        uploader.is_model_path_or_name()
+
+        create_client = boto3.client
+        sent_parts = []
+
+        def client(*args, fail_part=None, **kwargs):
+            s3_client = create_client(*args, **kwargs)
+            upload_part = s3_client.upload_part
+
+            def record_upload_part(**params):
+                if params["PartNumber"] == fail_part:
+                    raise ConnectionError("connection lost")
+                sent_parts.append(params["PartNumber"])
+                return upload_part(**params)
+
+            s3_client.upload_part = record_upload_part
+            return s3_client
+
+        with (
+            patch(
+                "instructlab.model.upload.boto3.client",
+                side_effect=lambda *args, **kwargs: client(
+                    *args, fail_part=3, **kwargs
+                ),
+            ),
+            pytest.raises(S3UploadError, match="connection lost"),
+        ):
+            uploader.upload_folder()
+        assert sorted(sent_parts) == [1, 2]
+        assert uploader.manifest_path().is_file()
+
+        sent_parts.clear()
+        caplog.set_level(logging.INFO)
+        with patch("instructlab.model.upload.boto3.client", side_effect=client):
+            uploader.upload_folder()
+        # only the part left is sent again
+        assert sent_parts == [3]
+        assert "Uploaded 2.0 MiB" in caplog.text
+        assert not uploader.manifest_path().exists()
+
+        stored = s3_bucket.get_object(
+            Bucket="testbucket", Key="model/model.safetensors"
+        )
+        assert stored["Body"].read() == weights
+        stored = s3_bucket.get_object(Bucket="testbucket", Key="model/config.json")
+        assert stored["Body"].read() == b"{}"
@@ -0,0 +1,236 @@
+# Standard
+import json
+import os
+
+# Third Party
+from haystack import Document  # type: ignore
+from haystack.document_stores.in_memory import InMemoryDocumentStore  # type: ignore
+import numpy as np
+import pytest
+
+# First Party
+from instructlab.rag.haystack.memory_mapped_document_store import (
+    APPENDED_DOCUMENTS_SUFFIX,
+    APPENDED_EMBEDDINGS_SUFFIX,
+    EMBEDDINGS_SUFFIX,
+    QUANTIZED_EMBEDDINGS_SUFFIX,
+    MemoryMappedDocumentStore,
+)
+
+
+def _documents(count: int) -> list[Document]:
+    rng = np.random.default_rng(0)
+    return [
+        Document(
+            content=f"chunk {i}",
+            meta={"source_file": f"doc{i % 3}.json"},
+            embedding=rng.normal(size=8).astype(np.float32).tolist(),
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("similarity", ["dot_product", "cosine"])
+def test_embedding_retrieval_matches_in_memory_store(tmp_path, similarity):
+    documents = _documents(50)
+    reference = InMemoryDocumentStore(embedding_similarity_function=similarity)
+    reference.write_documents(documents)
+    document_store = MemoryMappedDocumentStore(embedding_similarity_function=similarity)
+    document_store.write_documents(documents)
+    path = str(tmp_path / "store.db")
+    document_store.save_to_disk(path)
+
+    loaded = MemoryMappedDocumentStore.load_from_disk(path)
+    assert isinstance(loaded._embeddings, np.memmap)
+    query = documents[7].embedding
+    for scale_score in [False, True]:
+        expected = reference.embedding_retrieval(
+            query, top_k=5, scale_score=scale_score
+        )
+        actual = loaded.embedding_retrieval(query, top_k=5, scale_score=scale_score)
+        assert [doc.id for doc in actual] == [doc.id for doc in expected]
+        assert [doc.score for doc in actual] == pytest.approx(
+            [doc.score for doc in expected], rel=1e-4
+        )
+        assert all(doc.embedding is None for doc in actual)
+
+
+def test_save_and_load(tmp_path):
+    documents = _documents(10)
+    document_store = MemoryMappedDocumentStore(embedding_dtype="float16")
+    document_store.write_documents(documents)
+    path = str(tmp_path / "store.db")
+    document_store.save_to_disk(path)
+
+    # embeddings are not serialized in the JSON side table
+    with open(path, encoding="utf-8") as f:
+        assert all(doc["embedding"] is None for doc in json.load(f)["documents"])
+    embeddings = np.load(path + EMBEDDINGS_SUFFIX)
+    assert embeddings.dtype == np.float16
+    assert embeddings.shape == (10, 8)
+
+    loaded = MemoryMappedDocumentStore.load_from_disk(path)
+    assert loaded.embedding_dtype == "float16"
+    assert loaded.count_documents() == 10
+    by_id = {doc.id: doc for doc in loaded.filter_documents()}
+    for doc in documents:
+        assert by_id[doc.id].content == doc.content
+        assert by_id[doc.id].meta == doc.meta
+        assert by_id[doc.id].embedding == pytest.approx(doc.embedding, abs=1e-2)
+
+
+def test_update_loaded_store(tmp_path):
+    documents = _documents(10)
+    document_store = MemoryMappedDocumentStore()
+    document_store.write_documents(documents[:8])
+    path = str(tmp_path / "store.db")
+    document_store.save_to_disk(path)
+
+    loaded = MemoryMappedDocumentStore.load_from_disk(path)
+    loaded.delete_documents([documents[0].id])
+    loaded.write_documents(documents[8:])
+    results = loaded.embedding_retrieval(documents[9].embedding, top_k=3)
+    assert results[0].id == documents[9].id
+    assert documents[0].id not in [
+        doc.id for doc in loaded.embedding_retrieval(documents[0].embedding, top_k=9)
+    ]
+    results = loaded.embedding_retrieval(
+        documents[1].embedding,
+        filters={"field": "meta.source_file", "operator": "==", "value": "doc1.json"},
+    )
+    assert results[0].id == documents[1].id
+    assert {doc.meta["source_file"] for doc in results} == {"doc1.json"}
+
+    # saving over the memory-mapped file keeps both loaded and new embeddings
+    loaded.save_to_disk(path)
+    reloaded = MemoryMappedDocumentStore.load_from_disk(path)
+    assert reloaded.count_documents() == 9
+    assert len(np.load(path + EMBEDDINGS_SUFFIX)) == 9
+    assert reloaded.embedding_retrieval(documents[8].embedding, top_k=1)[0].id == (
+        documents[8].id
+    )
+
+
+def test_save_releases_embeddings(tmp_path):
+    documents = _documents(10)
+    document_store = MemoryMappedDocumentStore()
+    path = str(tmp_path / "store.db")
+    for batch in [documents[:5], documents[5:]]:
+        document_store.write_documents(batch)
+        document_store.save_to_disk(path)
+        # saved embeddings are memory-mapped instead of being kept in the documents
+        assert all(doc.embedding is None for doc in document_store.storage.values())
+
+    ids, embeddings = document_store.embedding_matrix()
+    assert ids == [doc.id for doc in documents]
+    assert embeddings.shape == (10, 8)
+    results = document_store.embedding_retrieval(documents[2].embedding, top_k=1)
+    assert results[0].id == documents[2].id
+
+
+def test_load_legacy_document_store(tmp_path):
+    documents = _documents(5)
+    legacy_store = InMemoryDocumentStore()
+    legacy_store.write_documents(documents)
+    path = str(tmp_path / "store.db")
+    legacy_store.save_to_disk(path)
+
+    loaded = MemoryMappedDocumentStore.load_from_disk(path)
+    assert loaded.count_documents() == 5
+    assert loaded.embedding_retrieval(documents[3].embedding, top_k=1)[0].id == (
+        documents[3].id
+    )
+    loaded.save_to_disk(path)
+    assert os.path.exists(path + EMBEDDINGS_SUFFIX)
+
+
+def test_unsupported_embedding_dtype():
+    with pytest.raises(ValueError):
+        MemoryMappedDocumentStore(embedding_dtype="int4")
+    with pytest.raises(ValueError):
+        MemoryMappedDocumentStore(embedding_quantization="int4")
+
+
+@pytest.mark.parametrize("quantization", ["int8", "binary"])
+@pytest.mark.parametrize("similarity", ["dot_product", "cosine"])
+def test_quantized_embedding_retrieval(tmp_path, quantization, similarity):
+    rng = np.random.default_rng(0)
+    documents = [
+        Document(content=f"chunk {i}", embedding=rng.normal(size=64).tolist())
+        for i in range(200)
+    ]
+    reference = InMemoryDocumentStore(embedding_similarity_function=similarity)
+    reference.write_documents(documents)
+    document_store = MemoryMappedDocumentStore(
+        embedding_quantization=quantization,
+        embedding_similarity_function=similarity,
+    )
+    document_store.write_documents(documents)
+    path = str(tmp_path / "store.db")
+    document_store.save_to_disk(path)
+    assert os.path.exists(path + QUANTIZED_EMBEDDINGS_SUFFIX)
+
+    loaded = MemoryMappedDocumentStore.load_from_disk(path)
+    assert loaded.embedding_quantization == quantization
+    # the shortlisted candidates are rescored with the full embeddings
+    query = documents[7].embedding
+    expected = reference.embedding_retrieval(query, top_k=3)
+    actual = loaded.embedding_retrieval(query, top_k=3)
+    assert actual[0].id == documents[7].id
+    assert actual[0].score == pytest.approx(expected[0].score, rel=1e-4)
+
+    report = loaded.quantization_report(queries=20, top_k=5)
+    assert report is not None
+    assert report["quantized_bytes"] < report["embeddings_bytes"]
+    assert report["recall"] > 0.5
+
+    # deleted and new documents are handled next to the quantized scan
+    loaded.delete_documents([documents[7].id])
+    new_document = Document(content="new", embedding=rng.normal(size=64).tolist())
+    loaded.write_documents([new_document])
+    assert documents[7].id not in [
+        doc.id for doc in loaded.embedding_retrieval(query, top_k=10)
+    ]
+    results = loaded.embedding_retrieval(new_document.embedding, top_k=1)
+    assert results[0].id == new_document.id
+
+    # the quantized embeddings are removed when the quantization is disabled
+    loaded.embedding_quantization = "none"
+    loaded.save_to_disk(path)
+    assert not os.path.exists(path + QUANTIZED_EMBEDDINGS_SUFFIX)
+    assert MemoryMappedDocumentStore.load_from_disk(path).quantization_report() is None
+
+
+def test_append_to_disk(tmp_path):
+    documents = _documents(10)
+    document_store = MemoryMappedDocumentStore()
+    path = str(tmp_path / "store.db")
+    with pytest.raises(ValueError):
+        document_store.append_to_disk(path)
+    document_store.write_documents(documents[:4])
+    document_store.save_to_disk(path)
+    for batch in [documents[4:7], documents[7:]]:
+        document_store.write_documents(batch)
+        document_store.append_to_disk(path)
+        # only the saved documents are kept in memory
+        assert len(document_store.storage) == 4
+    assert document_store.count_documents() == 10
+    with open(path + APPENDED_DOCUMENTS_SUFFIX, encoding="utf-8") as f:
+        assert len(f.readlines()) == 6
+
+    # saving the store merges the appended documents
+    other_path = str(tmp_path / "other.db")
+    document_store.save_to_disk(other_path)
+    assert len(document_store.storage) == 10
+    ids, embeddings = document_store.embedding_matrix()
+    assert ids == [doc.id for doc in documents]
+    assert embeddings == pytest.approx(np.asarray([doc.embedding for doc in documents]))
+    assert len(np.load(other_path + EMBEDDINGS_SUFFIX)) == 10
+
+    # so does loading the store they were appended to
+    loaded = MemoryMappedDocumentStore.load_from_disk(path)
+    assert loaded.count_documents() == 10
+    assert loaded.embedding_matrix()[0] == ids
+    assert len(np.load(path + EMBEDDINGS_SUFFIX)) == 10
+    assert not os.path.exists(path + APPENDED_DOCUMENTS_SUFFIX)
+    assert not os.path.exists(path + APPENDED_EMBEDDINGS_SUFFIX)
@@ -0,0 +1,101 @@
+# Standard
+from pathlib import Path
+from unittest import mock
+import os
+
+# First Party
+from instructlab.model import catalog
+from instructlab.model.catalog import ModelCatalog
+from instructlab.utils import list_models
+from tests.common import create_gguf_file
+
+
+def write_model(model_dir: Path):
+    model_dir.mkdir(parents=True)
+    for name in ("config.json", "tokenizer.json", "tokenizer_config.json"):
+        (model_dir / name).write_text("{}")
+    (model_dir / "pytorch_model.bin").write_bytes(b"weights")
+
+
+def listed(models_dir: Path, validations) -> dict[str, str]:
+    with (
+        mock.patch.object(
+            catalog, "is_model_safetensors", wraps=catalog.is_model_safetensors
+        ) as is_model_safetensors,
+        mock.patch.object(catalog, "is_model_gguf", wraps=catalog.is_model_gguf),
+    ):
+        models = list_models([models_dir], False)
+    validations[:] = [call.args[0].name for call in is_model_safetensors.mock_calls]
+    return {model.model_name: model.model_size for model in models}
+
+
+def test_list_models_validates_changed_models_only(tmp_path_home):
+    models_dir = tmp_path_home / "models"
+    write_model(models_dir / "instructlab" / "granite")
+    write_model(models_dir / "instructlab" / "merlinite")
+    create_gguf_file(models_dir)
+    validations: list[str] = []
+
+    models = listed(models_dir, validations)
+    assert models == {
+        "instructlab/granite": "13.0 B",
+        "instructlab/merlinite": "13.0 B",
+        "test-model.gguf": "4.0 B",
+    }
+    assert sorted(validations) == ["granite", "instructlab", "merlinite"]
+
+    # nothing changed, nothing is validated again
+    assert listed(models_dir, validations) == models
+    assert not validations
+
+    weights = models_dir / "instructlab" / "granite" / "pytorch_model.bin"
+    weights.write_bytes(b"new weights")
+    os.utime(weights, ns=(1, 1))
+    assert listed(models_dir, validations)["instructlab/granite"] == "17.0 B"
+    assert validations == ["granite"]
+
+
+def test_catalog_forgets_removed_models(tmp_path):
+    models_dir = tmp_path / "models"
+    write_model(models_dir / "instructlab" / "granite")
+    db_path = str(tmp_path / "catalog.db")
+    model_catalog = ModelCatalog(db_path)
+    model_dir = models_dir / "instructlab" / "granite"
+    assert model_catalog.is_model_dir(model_dir, os.listdir(model_dir)) == (True, 13)
+    model_catalog.close([models_dir])
+
+    model_catalog = ModelCatalog(db_path)
+    model_catalog.close([models_dir])
+    model_catalog = ModelCatalog(db_path)
+    assert model_catalog._db.execute("SELECT * FROM models").fetchall() == []
+    model_catalog.close()
+
+
+def test_catalog_does_not_block_concurrent_listings(tmp_path):
+    model_dir = tmp_path / "models" / "instructlab" / "granite"
+    write_model(model_dir)
+    db_path = str(tmp_path / "catalog.db")
+    first = ModelCatalog(db_path)
+    assert first.is_model_dir(model_dir, os.listdir(model_dir)) == (True, 13)
+
+    # a listing running meanwhile neither waits for the first one nor fails
+    second = ModelCatalog(db_path)
+    second._db.execute("PRAGMA busy_timeout = 0")
+    assert second.is_model_dir(model_dir, os.listdir(model_dir)) == (True, 13)
+    second.close()
+    first.close()
+
+    with mock.patch.object(catalog, "is_model_safetensors") as is_model_safetensors:
+        third = ModelCatalog(db_path)
+        assert third.is_model_dir(model_dir, os.listdir(model_dir)) == (True, 13)
+        third.close()
+    is_model_safetensors.assert_not_called()
+
+
+def test_catalog_lookup_errors_validate_the_model(tmp_path):
+    model_dir = tmp_path / "models" / "instructlab" / "granite"
+    write_model(model_dir)
+    model_catalog = ModelCatalog(str(tmp_path / "catalog.db"))
+    model_catalog._db.execute("DROP TABLE models")
+    assert model_catalog.is_model_dir(model_dir, os.listdir(model_dir)) == (True, 13)
+    model_catalog.close()
@@ -1,7 +1,9 @@
 # Standard
+from types import SimpleNamespace
 from unittest.mock import MagicMock
 import contextlib
 import logging
+import threading
 
 # Third Party
 from click.testing import CliRunner
@@ -12,7 +14,10 @@ import pytest
 # First Party
 from instructlab import lab
 from instructlab.feature_gates import FeatureGating, FeatureScopes, GatedFeatures
+from instructlab.model.backends import backends
 from instructlab.model.chat import ChatException, ConsoleChatBot
+from instructlab.rag.context_assembler import ContextAssembler
+from instructlab.rag.document_store import RetrievedChunk
 from tests.test_feature_gates import dev_preview
 
 logger = logging.getLogger(__name__)
@@ -60,6 +65,120 @@ def test_retriever_is_called_when_present():
         retriever.augmented_context.assert_called_with(user_query=user_query)
 
 
+@dev_preview
+def test_retrieved_context_is_assembled_within_budget():
+    retriever = MagicMock()
+    retriever.retrieve.return_value = [
+        RetrievedChunk(content="short chunk", score=0.5),
+        RetrievedChunk(content="a much longer chunk of context", score=0.9),
+    ]
+    chatbot = ConsoleChatBot(
+        model="/var/model/file",
+        client=None,
+        retriever=retriever,
+        context_assembler=ContextAssembler(
+            count_tokens=lambda text: len(text.split()), token_budget=4
+        ),
+        loaded={},
+    )
+    with pytest.raises(ChatException):
+        chatbot.start_prompt(content="test", logger=logger)
+    retriever.retrieve.assert_called_with(user_query="test")
+    retriever.augmented_context.assert_not_called()
+    assert {"role": "assistant", "content": "short chunk"} in chatbot.info["messages"]
+
+
+@dev_preview
+def test_speculative_retrieval_of_multiline_input():
+    retriever = MagicMock()
+    retriever.augmented_context.side_effect = lambda user_query: f"about {user_query}"
+    chatbot = ConsoleChatBot(
+        model="/var/model/file", client=None, retriever=retriever, loaded={}
+    )
+    chatbot.multiline = True
+    # each completed line of the input is retrieved in advance, as the input buffer changes
+    chatbot._speculate_retrieval(SimpleNamespace(text="first line\n"))
+    chatbot._speculate_retrieval(SimpleNamespace(text="first line\nsecond"))
+    chatbot._speculate_retrieval(SimpleNamespace(text="first line\nsecond line\n"))
+    with pytest.raises(ChatException):
+        chatbot.start_prompt(content="first line\nsecond line\n", logger=logger)
+    # the submitted input was already retrieved
+    retriever.augmented_context.assert_called_with(user_query="first line\nsecond line")
+    assert retriever.augmented_context.call_count <= 2
+    assert {
+        "role": "assistant",
+        "content": "about first line\nsecond line",
+    } in chatbot.info["messages"]
+    assert not chatbot._retrievals
+
+
+@dev_preview
+def test_retrievals_are_cancelled_on_new_session_and_close():
+    retrieving = threading.Event()
+    finish = threading.Event()
+
+    def augmented_context(user_query):
+        retrieving.set()
+        finish.wait(timeout=5)
+        return f"about {user_query}"
+
+    retriever = MagicMock()
+    retriever.augmented_context.side_effect = augmented_context
+    chatbot = ConsoleChatBot(
+        model="/var/model/file", client=None, retriever=retriever, loaded={}
+    )
+    running = chatbot._submit_retrieval("first line\n")
+    assert retrieving.wait(timeout=5)
+    queued = chatbot._submit_retrieval("first line\nsecond line\n")
+    with pytest.raises(KeyboardInterrupt):
+        chatbot._handle_new_session("/n")
+    assert queued.cancelled()
+    assert not chatbot._retrievals
+
+    finish.set()
+    chatbot.close()
+    # the running retrieval is finished before the thread stops
+    assert running.result() == "about first line"
+    assert chatbot._retrieval_executor is None
+
+
+def test_llama_cpp_history_is_trimmed_to_context_size():
+    client = MagicMock()
+    chatbot = ConsoleChatBot(
+        model="/var/model/file",
+        client=client,
+        loaded={},
+        count_tokens=lambda text: len(text.split()),
+        max_ctx_size=30,
+        max_tokens=10,
+        backend_type=backends.LLAMA_CPP,
+    )
+    chatbot.info["messages"] = [
+        {"role": "user", "content": "an old question " * 3},
+        {"role": "assistant", "content": "an old answer"},
+    ]
+    with pytest.raises(ChatException):
+        chatbot.start_prompt(content="a new question", logger=logger)
+    # 20 tokens left for the prompt, with the overhead of each message
+    messages = client.chat.completions.create.call_args.kwargs["messages"]
+    assert messages == [
+        {"role": "assistant", "content": "an old answer"},
+        {"role": "user", "content": "a new question"},
+    ]
+
+
+def test_max_tokens_must_fit_in_context_size():
+    with pytest.raises(ChatException, match="context size"):
+        ConsoleChatBot(
+            model="/var/model/file",
+            client=MagicMock(),
+            loaded={},
+            max_ctx_size=4096,
+            max_tokens=4096,
+            backend_type=backends.LLAMA_CPP,
+        )
+
+
 def test_list_contexts_and_decoration():
     chatbot = ConsoleChatBot(model="/var/model/file", client=None, loaded={})
 
@@ -0,0 +1,253 @@
+# Standard
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+import hashlib
+import json
+import re
+import threading
+
+# Third Party
+import pytest
+
+# First Party
+from instructlab.configuration import DEFAULTS
+from instructlab.model.download import OCIDownloader
+from instructlab.model.oci_registry import (
+    OCI_MANIFEST,
+    OCIRegistryClient,
+    OCIRegistryError,
+    parse_repository,
+)
+
+WEIGHTS = bytes(range(256)) * 4096
+CONFIG = b'{"architectures": ["GraniteForCausalLM"]}'
+
+
+def digest(content: bytes) -> str:
+    return f"sha256:{hashlib.sha256(content).hexdigest()}"
+
+
+class RegistryHandler(BaseHTTPRequestHandler):
+    """Stand-in of a `registry:2` registry serving the model image of `models/granite`"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+    def do_GET(self):
+        registry = self.server.registry  # type: ignore[attr-defined]
+        registry.requests.append((self.path, self.headers.get("Range")))
+        if self.path.startswith("/token"):
+            return self.reply(200, json.dumps({"token": "secret"}).encode())
+        if self.headers.get("Authorization") != registry.authorization:
+            self.send_response(401)
+            self.send_header("WWW-Authenticate", registry.challenge)
+            self.send_header("Content-Length", "0")
+            return self.end_headers()
+        match = re.fullmatch(r"/v2/models/granite/(manifests|blobs)/(.+)", self.path)
+        if match is None or match.group(2) not in registry.content:
+            return self.reply(404, b"")
+        content = registry.content[match.group(2)]
+        if match.group(1) == "manifests":
+            return self.reply(200, content, OCI_MANIFEST)
+        if match.group(2) in registry.corrupted:
+            content = content[::-1]
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header:
+            start = int(re.fullmatch(r"bytes=(\d+)-", range_header).group(1))
+            if start >= len(content):
+                return self.reply(416, b"")
+        status = 206 if range_header else 200
+        if match.group(2) in registry.interrupted:
+            # the connection drops half way through the blob
+            registry.interrupted.remove(match.group(2))
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(content) - start))
+            self.end_headers()
+            self.wfile.write(content[start : len(content) // 2])
+            self.close_connection = True
+            return None
+        return self.reply(status, content[start:])
+
+    def reply(self, status: int, body: bytes, content_type="application/octet-stream"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class Registry:
+    def __init__(self, port: int):
+        self.requests: list[tuple[str, str | None]] = []
+        self.interrupted: set[str] = set()
+        self.corrupted: set[str] = set()
+        self.authorization = "Bearer secret"
+        self.challenge = (
+            f'Bearer realm="http://127.0.0.1:{port}/token",service="registry"'
+        )
+        layers = [(WEIGHTS, "model.safetensors"), (CONFIG, "config.json")]
+        manifest = json.dumps(
+            {
+                "schemaVersion": 2,
+                "mediaType": OCI_MANIFEST,
+                "config": {
+                    "mediaType": "application/vnd.oci.image.config.v1+json",
+                    "digest": digest(b"{}"),
+                    "size": 2,
+                },
+                "layers": [
+                    {
+                        "mediaType": "application/vnd.oci.image.layer.v1.tar",
+                        "digest": digest(content),
+                        "size": len(content),
+                        "annotations": {"org.opencontainers.image.title": title},
+                    }
+                    for content, title in layers
+                ],
+            }
+        ).encode()
+        self.content = {
+            "1.0": manifest,
+            digest(b"{}"): b"{}",
+            **{digest(content): content for content, _ in layers},
+        }
+
+    def blob_requests(self, content: bytes) -> list[str | None]:
+        return [
+            range_header
+            for path, range_header in self.requests
+            if path.endswith(digest(content))
+        ]
+
+
+@pytest.fixture(name="registry")
+def fixture_registry():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RegistryHandler)
+    server.registry = Registry(server.server_port)  # type: ignore[attr-defined]
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def registry_client(server, **kwargs) -> OCIRegistryClient:
+    return OCIRegistryClient(
+        f"127.0.0.1:{server.server_port}", "models/granite", **kwargs
+    )
+
+
+def test_parse_repository():
+    assert parse_repository("docker://quay.io/ai-lab/models/granite") == (
+        "quay.io",
+        "ai-lab/models/granite",
+    )
+    assert parse_repository("docker://localhost:5000/granite") == (
+        "localhost:5000",
+        "granite",
+    )
+    assert parse_repository("docker://granite") == (
+        "registry-1.docker.io",
+        "library/granite",
+    )
+
+
+def test_pull_into_oci_layout(registry, tmp_path):
+    manifest_digest = registry_client(registry).pull("1.0", tmp_path)
+
+    assert manifest_digest == digest(registry.registry.content["1.0"])
+    index = json.loads((tmp_path / "index.json").read_text())
+    assert index["manifests"][0]["digest"] == manifest_digest
+    assert (tmp_path / "blobs" / "sha256" / digest(WEIGHTS)[7:]).read_bytes() == (
+        WEIGHTS
+    )
+    # pulling again fetches the manifest only
+    requests = len(registry.registry.requests)
+    registry_client(registry).pull("1.0", tmp_path)
+    assert [path for path, _ in registry.registry.requests[requests:]] == [
+        "/v2/models/granite/manifests/1.0",
+        "/token?scope=repository%3Amodels%2Fgranite%3Apull&service=registry",
+        "/v2/models/granite/manifests/1.0",
+    ]
+
+
+def test_pull_resumes_interrupted_blob(registry, tmp_path):
+    registry.registry.interrupted.add(digest(WEIGHTS))
+    registry_client(registry).pull("1.0", tmp_path)
+
+    assert registry.registry.blob_requests(WEIGHTS) == [
+        None,
+        f"bytes={len(WEIGHTS) // 2}-",
+    ]
+    assert (tmp_path / "blobs" / "sha256" / digest(WEIGHTS)[7:]).read_bytes() == (
+        WEIGHTS
+    )
+    assert not list((tmp_path / "partial").iterdir())
+
+
+def test_pull_resumes_partial_blob_of_previous_pull(registry, tmp_path):
+    partial_path = tmp_path / "partial" / digest(WEIGHTS)[7:]
+    partial_path.parent.mkdir()
+    partial_path.write_bytes(WEIGHTS[:1000])
+    registry_client(registry).pull("1.0", tmp_path)
+
+    assert registry.registry.blob_requests(WEIGHTS) == ["bytes=1000-"]
+    assert (tmp_path / "blobs" / "sha256" / digest(WEIGHTS)[7:]).read_bytes() == (
+        WEIGHTS
+    )
+
+
+def test_pull_rejects_corrupted_blob(registry, tmp_path):
+    registry.registry.corrupted.add(digest(WEIGHTS))
+    with pytest.raises(OCIRegistryError, match="does not match"):
+        registry_client(registry).pull("1.0", tmp_path)
+
+    assert not (tmp_path / "blobs" / "sha256" / digest(WEIGHTS)[7:]).exists()
+    assert not (tmp_path / "partial" / digest(WEIGHTS)[7:]).exists()
+    assert not (tmp_path / "index.json").exists()
+
+
+def test_oci_downloader_links_model_files(registry, tmp_path):
+    downloader = OCIDownloader(
+        log_level="INFO",
+        repository=f"docker://127.0.0.1:{registry.server_port}/models/granite",
+        release="1.0",
+        download_dest=tmp_path / "models",
+    )
+    with (
+        mock.patch.object(DEFAULTS, "_cache_home", str(tmp_path / "cache")),
+        mock.patch.object(DEFAULTS, "_data_dir", str(tmp_path / "data")),
+    ):
+        downloader.download()
+
+    model_dir = tmp_path / "models" / "granite"
+    assert (model_dir / "model.safetensors").read_bytes() == WEIGHTS
+    assert (model_dir / "config.json").read_bytes() == CONFIG
+    assert (model_dir / "config.json").resolve().parent == (
+        tmp_path / "data" / "blobs" / "sha256"
+    )
+
+
+def test_oci_downloader_falls_back_to_skopeo(registry, tmp_path):
+    registry.registry.challenge = 'Basic realm="registry"'
+    downloader = OCIDownloader(
+        log_level="INFO",
+        repository=f"docker://127.0.0.1:{registry.server_port}/models/granite",
+        release="1.0",
+        download_dest=tmp_path / "models",
+    )
+    with (
+        mock.patch.dict("os.environ", {"REGISTRY_AUTH_FILE": str(tmp_path / "none")}),
+        mock.patch.object(DEFAULTS, "_cache_home", str(tmp_path / "cache")),
+        mock.patch.object(
+            OCIDownloader, "_skopeo_copy", side_effect=RuntimeError("skopeo")
+        ) as skopeo_copy,
+        pytest.raises(RuntimeError, match="skopeo"),
+    ):
+        downloader.download()
+    skopeo_copy.assert_called_once_with(str(Path(tmp_path, "cache", "oci", "granite")))
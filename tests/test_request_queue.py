@@ -0,0 +1,174 @@
+# Standard
+import asyncio
+import json
+
+# Third Party
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import httpx
+
+# First Party
+from instructlab.model.backends.metrics import ServerMetrics
+from instructlab.model.backends.request_queue import (
+    RequestQueue,
+    create_proxy_app,
+    install_request_queue,
+)
+
+
+def test_request_queue_is_fifo():
+    async def run():
+        queue = RequestQueue(slots=1)
+        order = []
+
+        async def request(name: str):
+            slot = await queue.acquire()
+            order.append(name)
+            await asyncio.sleep(0.01)
+            queue.release(slot)
+
+        first = await queue.acquire()
+        tasks = [asyncio.create_task(request(name)) for name in "abc"]
+        await asyncio.sleep(0.01)
+        assert queue.stats()["queue_depth"] == 3
+        assert queue.stats()["busy_slots"] == 1
+        queue.release(first)
+        await asyncio.gather(*tasks)
+        return queue, order
+
+    queue, order = asyncio.run(run())
+    assert order == ["a", "b", "c"]
+    stats = queue.stats()
+    assert stats["requests"] == 4
+    assert stats["queue_depth"] == 0
+    assert stats["busy_slots"] == 0
+    assert stats["wait_seconds_max"] >= 0.01
+    assert stats["wait_seconds_total"] >= stats["wait_seconds_max"]
+
+
+def test_proxy_spreads_requests_over_slots():
+    slot_urls = ["http://slot0", "http://slot1"]
+    received = []
+
+    async def stream_body(body: bytes):
+        yield body
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        received.append((request.url.host, request.url.path, request.content))
+        # streamed like the responses of a llama.cpp server
+        return httpx.Response(
+            200,
+            headers={"content-type": "application/json"},
+            content=stream_body(json.dumps({"slot": request.url.host}).encode()),
+        )
+
+    queue = RequestQueue(slots=len(slot_urls))
+    app = create_proxy_app(
+        slot_urls,
+        queue,
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+    with TestClient(app) as client:
+        # completions are answered by the free slots in turn
+        for slot in ["slot0", "slot1", "slot0"]:
+            response = client.post("/v1/chat/completions", json={"messages": []})
+            assert response.json() == {"slot": slot}
+        # other requests are answered by the first slot, without queueing
+        assert client.get("/v1/models").json() == {"slot": "slot0"}
+        stats = client.get("/queue").json()
+
+    assert received[0] == ("slot0", "/v1/chat/completions", b'{"messages":[]}')
+    assert stats["slots"] == 2
+    assert stats["requests"] == 3
+    assert stats["busy_slots"] == 0
+
+
+def parse_metrics(text: str) -> dict[str, float]:
+    return {
+        name: float(value)
+        for name, value in (
+            line.rsplit(" ", 1) for line in text.splitlines() if line[:1] != "#"
+        )
+    }
+
+
+def test_proxy_metrics_of_streamed_completions():
+    events = [
+        {"choices": [{"delta": {"role": "assistant"}, "finish_reason": None}]},
+        {"choices": [{"delta": {"content": "Hello"}, "finish_reason": None}]},
+        {"choices": [{"delta": {"content": " world"}, "finish_reason": None}]},
+        {"choices": [{"delta": {}, "finish_reason": "stop"}]},
+    ]
+
+    async def stream_events():
+        for event in events:
+            yield f"data: {json.dumps(event)}\r\n\r\n".encode()
+        yield b"data: [DONE]\r\n\r\n"
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200,
+            headers={"content-type": "text/event-stream"},
+            content=stream_events(),
+        )
+
+    metrics = ServerMetrics(model_name="model.gguf", count_tokens=lambda text: 3)
+    metrics.model_load_seconds = 1.5
+    app = create_proxy_app(
+        ["http://slot0"],
+        RequestQueue(slots=1),
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        metrics=metrics,
+    )
+    with TestClient(app) as client:
+        response = client.post(
+            "/v1/chat/completions",
+            json={"stream": True, "messages": [{"role": "user", "content": "Hi"}]},
+        )
+        assert response.text.count("data:") == len(events) + 1
+        response = client.get("/metrics")
+
+    assert response.headers["content-type"].startswith("text/plain")
+    samples = parse_metrics(response.text)
+    labels = 'model_name="model.gguf"'
+    assert (
+        samples[f'vllm:request_success_total{{{labels},finished_reason="stop"}}'] == 1
+    )
+    assert samples[f"vllm:prompt_tokens_total{{{labels}}}"] == 3 + 4
+    assert samples[f"vllm:generation_tokens_total{{{labels}}}"] == 2
+    assert samples[f"vllm:time_to_first_token_seconds_count{{{labels}}}"] == 1
+    assert samples[f"vllm:time_per_output_token_seconds_count{{{labels}}}"] == 1
+    assert samples[f"vllm:request_queue_time_seconds_count{{{labels}}}"] == 1
+    assert (
+        samples[f'vllm:e2e_request_latency_seconds_bucket{{{labels},le="+Inf"}}'] == 1
+    )
+    assert samples[f"vllm:num_requests_running{{{labels}}}"] == 0
+    assert samples[f"ilab:model_load_seconds{{{labels}}}"] == 1.5
+
+
+def test_server_metrics_of_completions():
+    app = FastAPI()
+
+    @app.post("/v1/completions")
+    def completions():
+        return {
+            "choices": [{"text": "four", "finish_reason": "length"}],
+            "usage": {"prompt_tokens": 5, "completion_tokens": 16},
+        }
+
+    metrics = ServerMetrics(model_name="model.gguf")
+    install_request_queue(app, RequestQueue(slots=1), metrics)
+    with TestClient(app) as client:
+        for _ in range(2):
+            assert client.post("/v1/completions", json={"prompt": "2+2="}).json()
+        samples = parse_metrics(client.get("/metrics").text)
+
+    labels = 'model_name="model.gguf"'
+    assert (
+        samples[f'vllm:request_success_total{{{labels},finished_reason="length"}}'] == 2
+    )
+    assert samples[f"vllm:prompt_tokens_total{{{labels}}}"] == 10
+    assert samples[f"vllm:generation_tokens_total{{{labels}}}"] == 32
+    # only measured on streamed responses
+    assert samples[f"vllm:time_to_first_token_seconds_count{{{labels}}}"] == 0
+    assert samples[f"vllm:e2e_request_latency_seconds_count{{{labels}}}"] == 2
@@ -0,0 +1,107 @@
+# Standard
+from unittest import mock
+import os
+import threading
+
+# Third Party
+import pytest
+
+# First Party
+from instructlab.defaults import DEFAULTS
+from instructlab.rag.document_store import DocumentStoreRetriever
+from instructlab.rag.document_store_factory import create_document_retriever
+from instructlab.rag.retriever_daemon import (
+    RetrieverDaemon,
+    SocketDocumentStoreRetriever,
+    is_retriever_daemon_running,
+    retriever_settings,
+)
+
+
+class EchoRetriever(DocumentStoreRetriever):
+    def augmented_context(self, user_query: str) -> str:
+        if not user_query:
+            raise ValueError("empty query")
+        return f"context of {user_query}"
+
+
+def echo_settings(top_k=3):
+    return retriever_settings(
+        document_store_uri="unused",
+        document_store_collection_name="unused",
+        top_k=top_k,
+        embedding_model_path="unused",
+        index_type=DEFAULTS.RETRIEVER_INDEX_TYPE,
+        nprobe=DEFAULTS.RETRIEVER_NPROBE,
+        strategy=DEFAULTS.RETRIEVER_STRATEGY,
+        rrf_k=DEFAULTS.RETRIEVER_RRF_K,
+    )
+
+
+@pytest.fixture(name="socket_path")
+def fixture_socket_path(tmp_path):
+    # Unix socket paths are limited to about 100 characters
+    return os.path.join(os.path.relpath(tmp_path), "retriever.sock")
+
+
+def test_retriever_daemon(socket_path):
+    assert not is_retriever_daemon_running(socket_path)
+    daemon = RetrieverDaemon(EchoRetriever(), socket_path, settings=echo_settings())
+    thread = threading.Thread(target=daemon.serve_forever)
+    thread.start()
+    try:
+        assert is_retriever_daemon_running(socket_path)
+        with pytest.raises(RuntimeError):
+            RetrieverDaemon(EchoRetriever(), socket_path)
+
+        retriever = create_document_retriever(
+            document_store_uri="unused",
+            document_store_collection_name="unused",
+            top_k=3,
+            embedding_model_path="unused",
+            socket_path=socket_path,
+        )
+        assert isinstance(retriever, SocketDocumentStoreRetriever)
+        retriever.warm_up()
+        assert retriever.augmented_context("foo") == "context of foo"
+        with pytest.raises(RuntimeError, match="empty query"):
+            retriever.augmented_context("")
+    finally:
+        daemon.shutdown()
+        daemon.server_close()
+        thread.join()
+    assert not os.path.exists(socket_path)
+
+
+@pytest.mark.parametrize("settings", [None, echo_settings(top_k=5)])
+def test_retriever_daemon_with_other_settings(socket_path, settings):
+    daemon = RetrieverDaemon(EchoRetriever(), socket_path, settings=settings)
+    thread = threading.Thread(target=daemon.serve_forever)
+    thread.start()
+    try:
+        with mock.patch(
+            "instructlab.rag.haystack.document_store_factory.create_in_memory_document_retriever"
+        ) as create_local:
+            retriever = create_document_retriever(
+                document_store_uri="unused",
+                document_store_collection_name="unused",
+                top_k=3,
+                embedding_model_path="unused",
+                socket_path=socket_path,
+            )
+        assert retriever is create_local.return_value
+    finally:
+        daemon.shutdown()
+        daemon.server_close()
+        thread.join()
+
+
+def test_retriever_daemon_replaces_stale_socket(socket_path):
+    daemon = RetrieverDaemon(EchoRetriever(), socket_path)
+    # the socket file is left behind, but nothing accepts connections anymore
+    daemon.socket.close()
+    assert os.path.exists(socket_path)
+    assert not is_retriever_daemon_running(socket_path)
+
+    daemon = RetrieverDaemon(EchoRetriever(), socket_path)
+    daemon.server_close()
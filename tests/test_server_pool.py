@@ -0,0 +1,195 @@
+# Standard
+from unittest import mock
+import json
+import os
+import pathlib
+import threading
+import time
+
+# Third Party
+import pytest
+
+# First Party
+from instructlab.model.backends.server import BackendServer, ServerConfig
+from instructlab.model.backends.server_pool import (
+    PooledServer,
+    ServerPoolDaemon,
+    is_server_pool_running,
+    request_server_pool,
+)
+
+
+class FakeServer(BackendServer):
+    started: list[str] = []
+    stopped: list[str] = []
+
+    def __init__(self, spec: dict):
+        super().__init__(
+            "granite",
+            pathlib.Path(spec["model_path"]),
+            "auto",
+            "127.0.0.1",
+            8000,
+            ServerConfig("http://127.0.0.1:8000/v1"),
+        )
+        self.process = mock.Mock(pid=os.getpid())
+
+    def run(self):
+        pass
+
+    def run_detached(
+        self,
+        http_client=None,
+        background=True,
+        foreground_allowed=False,
+        max_startup_retries=0,
+    ):
+        self.started.append(str(self.model_path))
+        return f"http://127.0.0.1:{8000 + len(self.started)}/v1"
+
+    def shutdown(self):
+        self.stopped.append(str(self.model_path))
+
+    def get_backend_type(self):
+        return "llama-cpp"
+
+
+@pytest.fixture(name="socket_path")
+def fixture_socket_path(tmp_path):
+    # Unix socket paths are limited to about 100 characters
+    return os.path.join(os.path.relpath(tmp_path), "server_pool.sock")
+
+
+@pytest.fixture(name="daemon")
+def fixture_daemon(socket_path, tmp_path):
+    FakeServer.started = []
+    FakeServer.stopped = []
+    daemon = ServerPoolDaemon(
+        socket_path,
+        max_servers=1,
+        server_factory=FakeServer,
+        log_file=tmp_path / "server-pool.log",
+        process_registry_file=tmp_path / "process_registry.json",
+    )
+    thread = threading.Thread(target=daemon.serve_forever)
+    thread.start()
+    yield daemon
+    daemon.shutdown()
+    daemon.server_close()
+    thread.join()
+
+
+def pooled_server(socket_path: str, model_path: str) -> PooledServer:
+    spec = {"model_path": model_path}
+    return PooledServer(FakeServer(spec), spec, socket_path)
+
+
+def wait_for_shutdowns(count: int):
+    # servers are stopped in the background
+    deadline = time.monotonic() + 5
+    while len(FakeServer.stopped) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(FakeServer.stopped) == count
+
+
+def test_server_pool_reuses_warm_servers(daemon, socket_path, tmp_path):
+    assert is_server_pool_running(socket_path)
+
+    server = pooled_server(socket_path, "model-a")
+    api_base = server.run_detached()
+    server.shutdown()
+    assert server.lease is None
+    # the second client gets the warm server of the first one
+    assert pooled_server(socket_path, "model-a").run_detached() == api_base
+    assert FakeServer.started == ["model-a"]
+
+    servers = request_server_pool(socket_path, {"op": "list"})["servers"]
+    assert [(s["model_path"], s["leases"]) for s in servers] == [("model-a", 1)]
+
+    registry = json.loads((tmp_path / "process_registry.json").read_text())
+    assert registry[daemon.local_uuid]["type"] == "Server Pool"
+    assert registry[daemon.local_uuid]["children_pids"] == [os.getpid()]
+
+
+def test_server_pool_evicts_least_recently_used_idle_server(daemon, socket_path):
+    first = pooled_server(socket_path, "model-a")
+    first.run_detached()
+    # model-a is still in use, so the pool grows beyond max_servers
+    second = pooled_server(socket_path, "model-b")
+    second.run_detached()
+    assert FakeServer.started == ["model-a", "model-b"]
+    first.shutdown()
+    second.shutdown()
+
+    pooled_server(socket_path, "model-c").run_detached()
+    wait_for_shutdowns(2)
+    assert sorted(FakeServer.stopped) == ["model-a", "model-b"]
+
+
+def test_server_pool_frees_gpus_for_vllm_servers(daemon):
+    daemon.max_servers = 8
+
+    def spec(model_path, backend_name, cuda_visible_devices=None, gpu_layers=-1):
+        return {
+            "model_path": model_path,
+            "backend_name": backend_name,
+            "gpu_layers": gpu_layers,
+            "cuda_visible_devices": cuda_visible_devices,
+        }
+
+    for idle_spec in (
+        spec("model-a", "vllm", ["0", "1"]),
+        spec("model-b", "vllm", ["2", "3"]),
+        spec("model-c", "llama-cpp", gpu_layers=0),
+    ):
+        daemon.release(daemon.acquire(idle_spec, pid=os.getpid())["lease"])
+
+    # the idle server on its GPUs is stopped before the new vLLM server starts
+    daemon.acquire(spec("model-d", "vllm", ["1"]), pid=os.getpid())
+    assert FakeServer.stopped == ["model-a"]
+    # without CUDA_VISIBLE_DEVICES, it may use any GPU, but the servers in use and
+    # on the CPU are left running
+    daemon.acquire(spec("model-e", "vllm"), pid=os.getpid())
+    assert FakeServer.stopped == ["model-a", "model-b"]
+    # llama.cpp servers only take the GPU memory they need
+    daemon.acquire(spec("model-f", "llama-cpp", ["0"]), pid=os.getpid())
+    assert FakeServer.stopped == ["model-a", "model-b"]
+    assert FakeServer.started == [f"model-{name}" for name in "abcdef"]
+
+
+def test_server_pool_reaps_idle_servers_and_exited_clients(daemon, socket_path):
+    daemon.acquire({"model_path": "model-a"}, pid=2**22 + 1)
+    daemon.idle_timeout = 0
+    with mock.patch("psutil.pid_exists", return_value=False):
+        daemon.reap()
+    wait_for_shutdowns(1)
+    assert request_server_pool(socket_path, {"op": "list"})["servers"] == []
+
+
+def test_server_pool_replaces_stale_socket(socket_path):
+    daemon = ServerPoolDaemon(socket_path, server_factory=FakeServer)
+    daemon.socket.close()
+    assert not is_server_pool_running(socket_path)
+    daemon = ServerPoolDaemon(socket_path, server_factory=FakeServer)
+    with pytest.raises(RuntimeError):
+        ServerPoolDaemon(socket_path, server_factory=FakeServer)
+    daemon.server_close()
+    assert not os.path.exists(socket_path)
+
+
+def test_server_pool_frees_memory_for_new_servers(daemon):
+    daemon.max_servers = 8
+    for model_path in ("model-a", "model-b", "model-c"):
+        daemon.release(
+            daemon.acquire({"model_path": model_path}, pid=os.getpid())["lease"]
+        )
+
+    # stopping the least recently used idle server releases enough memory
+    def virtual_memory():
+        available = 30 if FakeServer.stopped else 5
+        return mock.Mock(available=available, total=100)
+
+    with mock.patch("psutil.virtual_memory", side_effect=virtual_memory):
+        daemon.acquire({"model_path": "model-d"}, pid=os.getpid())
+    assert FakeServer.stopped == ["model-a"]
+    assert FakeServer.started == ["model-a", "model-b", "model-c", "model-d"]